@@ -11,12 +11,20 @@ import logging
 
 from .config import settings
 from .database import get_supabase
+from .cache import CacheTTL
+from .jwt_verifier import get_jwt_verifier
 
 logger = logging.getLogger(__name__)
 
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
+# Cache de usuários autenticados (sub -> User)
+_usuarios_cache = CacheTTL(settings.auth_user_cache_max_size, settings.auth_user_cache_ttl)
+
+# Campos que, quando alterados, exigem invalidar o usuário em cache
+CAMPOS_USUARIO_CACHE = ('perfil', 'loja_id', 'ativo')
+
 
 class TokenData(BaseModel):
     """Dados extraídos do token JWT"""
@@ -79,27 +87,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str) -> TokenData:
-    """Verifica token do Supabase Auth"""
+async def verify_token(token: str) -> TokenData:
+    """
+    Verifica token do Supabase Auth
+    
+    Valida assinatura, expiração e audience localmente (ver core.jwt_verifier)
+    """
     try:
-        # Usar JWT secret do Supabase (não o customizado)
-        supabase_secret = settings.supabase_anon_key
-        
-        # Decodificar sem verificação primeiro para ver o formato
-        import base64
-        import json
-        
-        # Dividir o token em partes
-        parts = token.split('.')
-        if len(parts) != 3:
-            raise JWTError("Token malformado")
-        
-        # Decodificar payload sem verificação
-        payload_encoded = parts[1]
-        # Adicionar padding se necessário
-        payload_encoded += '=' * (4 - len(payload_encoded) % 4)
-        payload_bytes = base64.urlsafe_b64decode(payload_encoded)
-        payload = json.loads(payload_bytes)
+        payload = await get_jwt_verifier().verificar(token)
         
         user_id: str = payload.get("sub")
         if user_id is None:
@@ -109,20 +104,11 @@ def verify_token(token: str) -> TokenData:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Verificar se token não expirou
-        exp = payload.get("exp")
-        if exp and datetime.now(timezone.utc).timestamp() > exp:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token expirado",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
         return TokenData(
             sub=user_id,
             email=payload.get("email"),
             role=payload.get("role"),
-            exp=exp
+            exp=payload.get("exp")
         )
     
     except JWTError as e:
@@ -162,14 +148,30 @@ async def get_current_user(
         )
     
     token = credentials.credentials
-    token_data = verify_token(token)
+    token_data = await verify_token(token)
+    
+    user = _usuarios_cache.obter(token_data.sub)
+    if user is None:
+        user = await _buscar_usuario(token_data.sub)
+        _usuarios_cache.definir(token_data.sub, user, token_data.exp)
+    
+    if not user.ativo:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuário inativo"
+        )
     
-    # Busca dados do usuário na tabela usuarios
+    # Cópia para que handlers não alterem o objeto em cache
+    return user.model_copy(deep=True)
+
+
+async def _buscar_usuario(user_id: str) -> User:
+    """Busca dados do usuário na tabela usuarios"""
     supabase = get_supabase()
     
     try:
         # Usar supabase admin para acessar a tabela sem RLS
-        result = supabase.admin.table('usuarios').select('*').eq('user_id', token_data.sub).execute()
+        result = await supabase.admin_database.table('usuarios').select('*').eq('user_id', user_id).execute()
         
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -181,8 +183,8 @@ async def get_current_user(
         # Pegar o primeiro resultado
         user_data = result.data[0]
         
-        user = User(
-            id=token_data.sub,
+        return User(
+            id=user_id,
             email=user_data.get('email', ''),
             perfil=user_data.get('perfil', 'USUARIO'),
             loja_id=user_data.get('loja_id'),  # Incluir loja_id real
@@ -191,15 +193,9 @@ async def get_current_user(
             ativo=user_data.get('ativo', True),
             metadata={}
         )
-        
-        if not user.ativo:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Usuário inativo"
-            )
-        
-        return user
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao buscar dados do usuário: {str(e)}")
         raise HTTPException(
@@ -208,6 +204,36 @@ async def get_current_user(
         )
 
 
+def invalidar_usuario_cache(user_id: Optional[str] = None, email: Optional[str] = None) -> int:
+    """
+    Remove usuários do cache de autenticação
+    
+    Deve ser chamado quando perfil, loja_id ou ativo de um usuário mudam.
+    Sem argumentos, limpa o cache inteiro.
+    
+    Returns:
+        Quantidade de entradas removidas
+    """
+    if user_id is None and email is None:
+        removidos = len(_usuarios_cache)
+        _usuarios_cache.limpar()
+        return removidos
+    
+    email_normalizado = email.strip().lower() if email else None
+    removidos = _usuarios_cache.invalidar_onde(
+        lambda user: user.id == user_id
+        or (email_normalizado is not None and (user.email or '').lower() == email_normalizado)
+    )
+    if removidos:
+        logger.info(f"Cache de usuários invalidado: {removidos} entrada(s)")
+    return removidos
+
+
+def estatisticas_usuario_cache() -> Dict[str, Any]:
+    """Contadores de hit/miss do cache de usuários autenticados"""
+    return _usuarios_cache.estatisticas()
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -276,11 +302,11 @@ class AuthService:
                 )
             
             # Busca dados completos do usuário diretamente (sem usar get_current_user para evitar loop)
-            token_data = verify_token(response.session.access_token)
+            token_data = await verify_token(response.session.access_token)
             supabase = get_supabase()
             
             # Buscar usuário na tabela
-            result = supabase.admin.table('usuarios').select('*').eq('user_id', token_data.sub).execute()
+            result = await supabase.admin_database.table('usuarios').select('*').eq('user_id', token_data.sub).execute()
             
             if not result.data or len(result.data) == 0:
                 raise HTTPException(
@@ -333,11 +359,11 @@ class AuthService:
                 )
             
             # Busca dados atualizados do usuário diretamente (sem usar get_current_user para evitar loop)
-            token_data = verify_token(response.session.access_token)
+            token_data = await verify_token(response.session.access_token)
             supabase = get_supabase()
             
             # Buscar usuário na tabela
-            result = supabase.admin.table('usuarios').select('*').eq('user_id', token_data.sub).execute()
+            result = await supabase.admin_database.table('usuarios').select('*').eq('user_id', token_data.sub).execute()
             
             if not result.data or len(result.data) == 0:
                 raise HTTPException(
@@ -0,0 +1,106 @@
+"""
+Cache em memória com TTL e limite de tamanho (LRU)
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import threading
+import time
+
+
+class CacheTTL:
+    """
+    Cache LRU com expiração por entrada
+
+    Cada entrada expira em `ttl` segundos ou no instante informado em
+    `expira_em` (epoch), o que vier primeiro. Ao atingir `max_itens`,
+    a entrada menos usada recentemente é descartada.
+
+    Uso:
+    ```python
+    cache = CacheTTL(max_itens=500, ttl=60)
+    cache.definir('chave', valor)
+    valor = cache.obter('chave')  # None se ausente ou expirado
+    ```
+    """
+
+    def __init__(self, max_itens: int, ttl: float):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor em cache ou None (contabiliza hit/miss)"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+
+            expira, valor = item
+            if time.monotonic() >= expira:
+                del self._itens[chave]
+                self.misses += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any, expira_em: Optional[float] = None) -> None:
+        """
+        Armazena um valor
+
+        Args:
+            chave: Chave da entrada
+            valor: Valor a armazenar
+            expira_em: Expiração absoluta (epoch, ex: `exp` do JWT), limitada pelo TTL
+        """
+        validade = self.ttl
+        if expira_em is not None:
+            validade = min(validade, expira_em - time.time())
+        if validade <= 0:
+            return
+
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + validade, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave: Hashable) -> bool:
+        """Remove uma entrada. Retorna True se ela existia"""
+        with self._lock:
+            return self._itens.pop(chave, None) is not None
+
+    def invalidar_onde(self, predicado: Callable[[Any], bool]) -> int:
+        """Remove as entradas cujo valor satisfaz o predicado. Retorna quantas"""
+        with self._lock:
+            chaves = [chave for chave, (_, valor) in self._itens.items() if predicado(valor)]
+            for chave in chaves:
+                del self._itens[chave]
+            return len(chaves)
+
+    def limpar(self) -> None:
+        """Remove todas as entradas e zera os contadores"""
+        with self._lock:
+            self._itens.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "tamanho": len(self._itens),
+                "max_itens": self.max_itens
+            }
+
+    def __len__(self) -> int:
+        return len(self._itens)
@@ -16,12 +16,81 @@ class Settings(BaseSettings):
     supabase_anon_key: str
     supabase_service_key: str
     
+    # ===== POOL HTTP (PostgREST) =====
+    db_pool_max_connections: int = 100
+    db_pool_max_keepalive: int = 20
+    db_pool_keepalive_expiry: float = 30.0
+    db_timeout: float = 10.0
+    db_connect_timeout: float = 5.0
+    
+    # ===== CACHE DE CLIENTES RLS =====
+    rls_client_cache_max_size: int = 500
+    rls_client_cache_ttl: int = 3600
+    
+    # ===== CACHE DE USUÁRIOS AUTENTICADOS =====
+    auth_user_cache_max_size: int = 1000
+    auth_user_cache_ttl: int = 60
+    
+    # ===== CACHE DE NOMES DE LOJAS =====
+    lojas_nome_cache_max_size: int = 1000
+    lojas_nome_cache_ttl: int = 300
+    
+    # ===== CACHE DE FUNCIONÁRIOS POR SETOR (0 desativa) =====
+    setor_contagem_cache_max_size: int = 500
+    setor_contagem_cache_ttl: int = 60
+    
+    # ===== AUTOCOMPLETE DE CLIENTES (índice por loja; 0 desativa) =====
+    clientes_autocomplete_max_lojas: int = 100
+    clientes_autocomplete_ttl: int = 600
+    
+    # ===== CATÁLOGO DE STATUS DE ORÇAMENTO (0 recarrega a cada consulta) =====
+    status_catalogo_ttl: int = 300
+    
+    # ===== CACHE DA EXTRAÇÃO DE XML (por xml_hash; 0 desativa a memória) =====
+    xml_cache_max_itens: int = 200
+    xml_cache_ttl: int = 86400
+    # Também grava em temp_path/xml_cache (compartilhado entre workers)
+    xml_cache_disco: bool = False
+    
+    # ===== JOBS EM SEGUNDO PLANO (fila em processo) =====
+    jobs_concorrencia: int = 2
+    jobs_fila_max: int = 100
+    # Segundos que um job finalizado continua consultável
+    jobs_ttl: int = 3600
+    # Intervalo de checagem do SSE de status
+    jobs_sse_intervalo: float = 0.5
+    
+    # ===== EVENTOS DE DOMÍNIO (barramento em processo + outbox) =====
+    # Segundos que o despachante espera juntando eventos num lote
+    eventos_janela: float = 0.05
+    eventos_lote_max: int = 200
+    # Tentativas por evento antes de marcar erro no outbox
+    eventos_tentativas: int = 5
+    eventos_fila_max: int = 10000
+    # Grava os eventos em c_eventos_outbox (false: só em memória)
+    eventos_outbox: bool = True
+    # Pendentes do outbox com mais que isso são reenviados (varredura no mesmo intervalo)
+    eventos_recuperar_apos: float = 60
+    
+    # ===== NUMERAÇÃO DE ORÇAMENTOS =====
+    # Números reservados por ida ao banco (>1 pula números não usados em restarts)
+    orcamento_numero_bloco: int = 1
+    
     # ===== JWT =====
     jwt_secret_key: str
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 60
     jwt_refresh_token_expire_days: int = 7
     
+    # ===== VERIFICAÇÃO JWT (Supabase Auth) =====
+    # JWT secret do projeto (não é o JWT_SECRET_KEY); obrigatório com HS256 habilitado
+    supabase_jwt_secret: Optional[str] = None
+    # Aceita tokens HS256; false se o projeto só assina com chaves assimétricas (JWKS)
+    supabase_jwt_hs256: bool = True
+    supabase_jwt_audience: str = "authenticated"
+    jwks_cache_ttl: int = 3600
+    token_claims_cache_max_size: int = 5000
+    
     # ===== APLICAÇÃO =====
     environment: str = "development"
     api_version: str = "v1"
@@ -34,9 +103,23 @@ class Settings(BaseSettings):
     
     # ===== LIMITES =====
     max_file_size_mb: int = 10
+    # Upload de XML lido em partes deste tamanho (bytes)
+    xml_upload_chunk_size: int = 64 * 1024
+    # Extração de XML em pool de processos (0 = thread no próprio processo)
+    xml_extracao_workers: int = 2
+    xml_extracao_timeout: float = 60.0
+    # Importação extrai só caixa, painéis e valor total; as demais seções saem
+    # do índice compacto do XML na primeira leitura dos materiais
+    xml_secoes_sob_demanda: bool = False
+    # Ambientes com seções pendentes extraídos por leitura (os demais ficam para as próximas)
+    xml_secoes_max_por_requisicao: int = 10
+    # Importação em lote: XMLs por requisição (somando os de arquivos .zip)
+    xml_lote_max_arquivos: int = 30
     allowed_file_extensions: str = ".xml"
     max_items_per_page: int = 100
     default_items_per_page: int = 20
+    # Contagem do total nas listagens: exact | planned | estimated | none
+    default_count_mode: str = "exact"
     
     # ===== PATHS =====
     upload_path: str = "uploads"
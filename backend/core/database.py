@@ -2,13 +2,104 @@
 Conexão com Supabase e configuração do cliente
 """
 from supabase import create_client, Client
-from typing import Optional, Dict, Any
+from supabase.lib.client_options import ClientOptions
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from typing import Optional, Dict, Any, List, Literal, Tuple, Union
+from datetime import datetime
+from uuid import UUID
+import base64
+import json
 import logging
+import httpx
 from functools import lru_cache
+from jose import jwt
 from .config import settings
+from .cache import CacheTTL
+from .exceptions import ValidationException
 
 logger = logging.getLogger(__name__)
 
+# Modos de contagem do total nas listagens (`none` não calcula o total)
+CountMode = Literal['exact', 'planned', 'estimated', 'none']
+COUNT_MODES = ('exact', 'planned', 'estimated', 'none')
+
+
+def _criar_transporte() -> httpx.AsyncHTTPTransport:
+    """Cria o pool de conexões keep-alive compartilhado pelos clientes PostgREST"""
+    return httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.db_pool_max_connections,
+            max_keepalive_connections=settings.db_pool_max_keepalive,
+            keepalive_expiry=settings.db_pool_keepalive_expiry
+        )
+    )
+
+
+def _criar_timeout() -> httpx.Timeout:
+    """Timeouts padrão das chamadas ao PostgREST"""
+    return httpx.Timeout(settings.db_timeout, connect=settings.db_connect_timeout)
+
+
+def _expiracao_token(access_token: str) -> Optional[float]:
+    """Lê o `exp` do JWT (sem validar assinatura) para expirar entradas de cache"""
+    try:
+        exp = jwt.get_unverified_claims(access_token).get("exp")
+        return float(exp) if exp is not None else None
+    except Exception:
+        return None
+
+
+class AsyncDatabase(AsyncPostgrestClient):
+    """
+    Cliente PostgREST assíncrono sobre o pool HTTP compartilhado
+    
+    Expõe a mesma API de queries do cliente Supabase (table, select, eq, ...),
+    mas `execute()` é awaitable e não bloqueia o event loop:
+    
+    ```python
+    result = await db.table('c_clientes').select('*').eq('id', cliente_id).execute()
+    ```
+    """
+    
+    def __init__(
+        self,
+        transport: httpx.AsyncHTTPTransport,
+        api_key: str,
+        access_token: Optional[str] = None
+    ):
+        self._transport = transport
+        super().__init__(
+            f"{settings.supabase_url}/rest/v1",
+            headers={
+                **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                "apiKey": api_key,
+                "Authorization": f"Bearer {access_token or api_key}"
+            },
+            timeout=_criar_timeout()
+        )
+    
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, httpx.Timeout]
+    ) -> httpx.AsyncClient:
+        """Sessão própria (headers) sobre o transporte compartilhado (conexões)"""
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=self._transport
+        )
+    
+    async def aclose(self) -> None:
+        """
+        Não fecha o transporte: ele pertence ao SupabaseClient e é
+        compartilhado com os demais clientes
+        """
+        return None
+
 
 class SupabaseClient:
     """Gerenciador de conexão com Supabase"""
@@ -16,6 +107,11 @@ class SupabaseClient:
     def __init__(self):
         self._client: Optional[Client] = None
         self._admin_client: Optional[Client] = None
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._database: Optional[AsyncDatabase] = None
+        self._admin_database: Optional[AsyncDatabase] = None
+        self._rls_databases = CacheTTL(settings.rls_client_cache_max_size, settings.rls_client_cache_ttl)
+        self._rls_clients = CacheTTL(settings.rls_client_cache_max_size, settings.rls_client_cache_ttl)
     
     @property
     def client(self) -> Client:
@@ -39,19 +135,78 @@ class SupabaseClient:
             logger.info("Cliente Supabase Admin inicializado (service key)")
         return self._admin_client
     
+    @property
+    def transport(self) -> httpx.AsyncHTTPTransport:
+        """Pool de conexões HTTP compartilhado pelos clientes assíncronos"""
+        if not self._transport:
+            self._transport = _criar_transporte()
+            logger.info(
+                f"Pool HTTP PostgREST inicializado "
+                f"(max_connections={settings.db_pool_max_connections}, "
+                f"max_keepalive={settings.db_pool_max_keepalive})"
+            )
+        return self._transport
+    
+    @property
+    def database(self) -> AsyncDatabase:
+        """Cliente PostgREST assíncrono com chave anônima"""
+        if not self._database:
+            self._database = AsyncDatabase(self.transport, settings.supabase_anon_key)
+        return self._database
+    
+    @property
+    def admin_database(self) -> AsyncDatabase:
+        """Cliente PostgREST assíncrono com service key (bypassa RLS)"""
+        if not self._admin_database:
+            self._admin_database = AsyncDatabase(self.transport, settings.supabase_service_key)
+        return self._admin_database
+    
+    async def aclose(self) -> None:
+        """Fecha o pool de conexões (shutdown da aplicação)"""
+        if self._transport:
+            await self._transport.aclose()
+        self._transport = None
+        self._database = None
+        self._admin_database = None
+        self._rls_databases.limpar()
+    
+    def get_database_with_auth(self, access_token: str) -> AsyncDatabase:
+        """
+        Retorna cliente assíncrono com o token do usuário (RLS)
+        
+        Os clientes ficam em cache por token até o `exp` do JWT e usam
+        o mesmo pool de conexões dos demais clientes.
+        """
+        database = self._rls_databases.obter(access_token)
+        if database is None:
+            database = AsyncDatabase(self.transport, settings.supabase_anon_key, access_token)
+            self._rls_databases.definir(access_token, database, _expiracao_token(access_token))
+        return database
+    
     def get_client_with_auth(self, access_token: str) -> Client:
         """
         Retorna cliente com token de autenticação específico
         Usado para operações com RLS (Row Level Security)
+        
+        Os clientes ficam em cache por token até o `exp` do JWT.
         """
-        client = create_client(
-            settings.supabase_url,
-            settings.supabase_anon_key
-        )
-        # Define o token na sessão do cliente
-        client.postgrest.auth(access_token)
+        client = self._rls_clients.obter(access_token)
+        if client is None:
+            client = create_client(
+                settings.supabase_url,
+                settings.supabase_anon_key,
+                options=ClientOptions(auto_refresh_token=False, persist_session=False)
+            )
+            # Define o token na sessão do cliente
+            client.postgrest.auth(access_token)
+            self._rls_clients.definir(access_token, client, _expiracao_token(access_token))
         return client
     
+    def invalidar_token(self, access_token: str) -> None:
+        """Remove os clientes em cache de um token (ex: logout)"""
+        self._rls_databases.invalidar(access_token)
+        self._rls_clients.invalidar(access_token)
+    
     async def health_check(self) -> Dict[str, Any]:
         """Verifica se a conexão com Supabase está funcionando"""
         try:
@@ -85,32 +240,32 @@ def get_supabase() -> SupabaseClient:
     return _supabase
 
 
-def get_database() -> Client:
+def get_database() -> AsyncDatabase:
     """
-    Dependency para FastAPI - retorna cliente Supabase padrão
+    Dependency para FastAPI - retorna cliente PostgREST assíncrono padrão
     
     Uso:
     ```python
     @router.get("/")
-    async def list_items(db: Client = Depends(get_database)):
-        result = db.table('items').select('*').execute()
+    async def list_items(db: AsyncDatabase = Depends(get_database)):
+        result = await db.table('items').select('*').execute()
         return result.data
     ```
     """
-    return _supabase.client
+    return _supabase.database
 
 
-def get_admin_database() -> Client:
+def get_admin_database() -> AsyncDatabase:
     """
-    Dependency para FastAPI - retorna cliente admin
+    Dependency para FastAPI - retorna cliente assíncrono admin
     Use apenas para operações administrativas que bypassam RLS
     """
-    return _supabase.admin
+    return _supabase.admin_database
 
 
-async def get_database_with_rls(token: str) -> Client:
+async def get_database_with_rls(token: str) -> AsyncDatabase:
     """
-    Retorna cliente com RLS baseado no token do usuário
+    Retorna cliente assíncrono com RLS baseado no token do usuário
     
     Uso:
     ```python
@@ -118,7 +273,7 @@ async def get_database_with_rls(token: str) -> Client:
     # Queries agora respeitam RLS do usuário
     ```
     """
-    return _supabase.get_client_with_auth(token)
+    return _supabase.get_database_with_auth(token)
 
 
 # Funções auxiliares para queries comuns
@@ -134,6 +289,105 @@ class DatabaseUtils:
         offset = (page - 1) * limit
         return query.limit(limit).offset(offset)
     
+    @staticmethod
+    def unir_ordenacao(query):
+        """
+        Junta chamadas encadeadas de `.order()` em um único parâmetro `order`
+
+        O postgrest-py 0.15 repete o parâmetro a cada `.order()` e o PostgREST
+        considera só um deles; versões mais novas já juntam (nada a fazer).
+        """
+        colunas = query.params.get_list('order')
+        if len(colunas) > 1:
+            query.params = query.params.remove('order').add('order', ','.join(colunas))
+        return query
+    
+    @staticmethod
+    def apply_cursor_pagination(query, cursor: Optional[str], page: int = 1, limit: int = None):
+        """
+        Paginação ordenada por (created_at, id), mais recentes primeiro
+        
+        Com `cursor` usa keyset (custo constante em qualquer profundidade);
+        sem cursor usa page/limit. Busca `limit + 1` linhas para saber se há
+        próxima página: use `split_page` no resultado.
+        """
+        if limit is None:
+            limit = settings.default_items_per_page
+        
+        query = DatabaseUtils.unir_ordenacao(
+            query.order('created_at', desc=True).order('id', desc=True)
+        )
+        
+        if cursor:
+            created_at, item_id = DatabaseUtils.decode_cursor(cursor)
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt.{item_id})'
+            )
+            return query.limit(limit + 1)
+        
+        offset = (page - 1) * limit
+        return query.limit(limit + 1).offset(offset)
+    
+    @staticmethod
+    def count_method(count: Optional[str] = None, cursor: Optional[str] = None) -> Optional[str]:
+        """
+        Método de contagem para passar no `select` da própria página
+        
+        O PostgREST devolve o total no Content-Range da mesma resposta, sem
+        uma segunda query de contagem:
+        - exact: COUNT(*) exato (varre as linhas filtradas)
+        - planned: estimativa do planner do Postgres (sem varredura)
+        - estimated: exato até o `db-max-rows`, estimado acima disso
+        - none: sem contagem (total e pages = None)
+        
+        Com `cursor` a contagem é omitida: o filtro de keyset só enxerga as
+        linhas seguintes e o total já veio na primeira página.
+        """
+        if count is None:
+            count = settings.default_count_mode
+        
+        if count not in COUNT_MODES:
+            raise ValidationException(f"Modo de contagem inválido: {count}")
+        
+        if cursor or count == 'none':
+            return None
+        return count
+    
+    @staticmethod
+    def count_pages(total: Optional[int], limit: int) -> Optional[int]:
+        """Número de páginas para o total (None quando não houve contagem)"""
+        if total is None or limit <= 0:
+            return None
+        return (total + limit - 1) // limit
+    
+    @staticmethod
+    def split_page(rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Separa a página das `limit + 1` linhas buscadas e gera o `next_cursor`"""
+        if len(rows) <= limit:
+            return rows, None
+        
+        rows = rows[:limit]
+        return rows, DatabaseUtils.encode_cursor(rows[-1])
+    
+    @staticmethod
+    def encode_cursor(item: Dict[str, Any]) -> str:
+        """Cursor opaco com (created_at, id) do último item da página"""
+        raw = json.dumps([item['created_at'], str(item['id'])]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str]:
+        """Decodifica e valida um cursor gerado por `encode_cursor`"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            created_at, item_id = json.loads(raw)
+            # Valida os formatos antes de interpolar no filtro PostgREST
+            datetime.fromisoformat(created_at)
+            return created_at, str(UUID(item_id))
+        except Exception:
+            raise ValidationException("Cursor de paginação inválido")
+    
     @staticmethod
     def apply_ordering(query, order_by: str, order_desc: bool = False):
         """Aplica ordenação a uma query"""
@@ -7,7 +7,7 @@ from pydantic import BaseModel
 
 from .config import settings
 from .auth import User, get_current_user
-from .database import get_database_with_rls, DatabaseUtils
+from .database import get_database_with_rls, DatabaseUtils, CountMode
 
 
 class PaginationParams(BaseModel):
@@ -19,6 +19,14 @@ class PaginationParams(BaseModel):
         le=settings.max_items_per_page,
         description="Itens por página"
     )
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor opaco (next_cursor da página anterior) para paginação por keyset"
+    )
+    count: Optional[CountMode] = Query(
+        None,
+        description="Contagem do total: exact, planned, estimated ou none (padrão: settings.default_count_mode)"
+    )
     
     @property
     def offset(self) -> int:
@@ -54,7 +62,7 @@ async def get_db_with_user_context(
     @router.get("/")
     async def list_items(db = Depends(get_db_with_user_context)):
         # Queries automaticamente filtradas pela loja do usuário
-        result = db.table('items').select('*').execute()
+        result = await db.table('items').select('*').execute()
         return result.data
     ```
     """
@@ -66,10 +74,22 @@ async def get_db_with_user_context(
 
 def get_pagination(
     page: int = Query(1, ge=1),
-    limit: int = Query(settings.default_items_per_page, ge=1, le=settings.max_items_per_page)
+    limit: int = Query(settings.default_items_per_page, ge=1, le=settings.max_items_per_page),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior (keyset)"),
+    count: Optional[CountMode] = Query(None, description="Contagem do total: exact, planned, estimated ou none")
 ) -> PaginationParams:
-    """Dependency para paginação"""
-    return PaginationParams(page=page, limit=limit)
+    """
+    Dependency para paginação
+    
+    Sem `cursor` pagina por page/limit. Com `cursor` (o `next_cursor`
+    devolvido na resposta anterior) pagina por keyset em (created_at, id),
+    com latência constante em qualquer profundidade.
+    
+    `count` escolhe como o total é calculado (no mesmo request da página):
+    `planned`/`estimated` evitam o COUNT(*) exato em tabelas grandes e
+    `none` dispensa o total. Páginas com cursor não recalculam o total.
+    """
+    return PaginationParams(page=page, limit=limit, cursor=cursor, count=count)
 
 
 def get_ordering(
@@ -106,7 +126,10 @@ class QueryBuilder:
         .add_filter('loja_id', user.loja_id)
         .build()
     
-    result = query.execute()
+    result = await query.execute()
+    
+    # Com pagination.cursor a query traz limit + 1 linhas:
+    items, next_cursor = DatabaseUtils.split_page(result.data, pagination.limit)
     ```
     """
     
@@ -160,6 +183,14 @@ class QueryBuilder:
             if search_conditions:
                 query = query.or_(','.join(search_conditions))
         
+        # Paginação por cursor: ordem fixa (created_at, id) e limit + 1 linhas
+        if self.pagination and self.pagination.cursor:
+            return DatabaseUtils.apply_cursor_pagination(
+                query,
+                self.pagination.cursor,
+                limit=self.pagination.limit
+            )
+        
         # Aplica ordenação
         if self.ordering:
             query = DatabaseUtils.apply_ordering(
@@ -198,19 +229,27 @@ class ErrorResponse(BaseModel):
 class PaginatedResponse(BaseModel):
     """Resposta paginada padrão"""
     items: list
-    total: int
+    total: Optional[int]  # None com count=none ou em páginas com cursor
     page: int
     limit: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
     
     @classmethod
-    def create(cls, items: list, total: int, pagination: PaginationParams):
+    def create(
+        cls,
+        items: list,
+        total: Optional[int],
+        pagination: PaginationParams,
+        next_cursor: Optional[str] = None
+    ):
         """Cria resposta paginada"""
-        pages = (total + pagination.limit - 1) // pagination.limit
+        pages = DatabaseUtils.count_pages(total, pagination.limit)
         return cls(
             items=items,
             total=total,
             page=pagination.page,
             limit=pagination.limit,
-            pages=pages
+            pages=pages,
+            next_cursor=next_cursor
         )
\ No newline at end of file
@@ -0,0 +1,473 @@
+"""
+Barramento de eventos de domínio (fila em processo + outbox)
+
+Efeitos colaterais que não precisam acontecer dentro da requisição (ex: o
+status do cliente mudar quando um orçamento é criado) viram eventos: quem
+publica só espera o evento ser gravado; um despachante agrupa os eventos em
+lotes e entrega cada lote ao handler do tipo.
+
+- Lotes: o despachante espera `settings.eventos_janela` segundos (ou
+  `settings.eventos_lote_max` eventos) depois do primeiro evento
+- Coalescência: num lote, eventos do mesmo tipo com a mesma `chave`
+  (ex: cliente_id) chegam ao handler uma vez só - o mais recente
+  (`criado_em`)
+- Pelo menos uma vez: lote com erro volta para a fila com espera
+  crescente, até `settings.eventos_tentativas`. Eventos que, enquanto
+  isso, foram superados por um mais recente da mesma chave não voltam.
+  Ainda assim um evento pode chegar depois de um mais novo (ex: pendente
+  recuperado de outro processo): handlers devem ser idempotentes e usar
+  `criado_em` para não desfazer um evento mais novo
+- Outbox: `publicar` grava o evento em c_eventos_outbox
+  (sql/criar_tabela_eventos_outbox.sql) antes de retornar; o despachante
+  só entrega e marca como processado. Eventos pendentes de um processo que
+  caiu são reenviados pela varredura do outbox, que cada despachante faz ao
+  subir e a cada `settings.eventos_recuperar_apos` segundos (só os
+  pendentes com mais que esse tempo). Sem a tabela (ou se
+  a gravação falhar), o evento fica só na memória (perdido num restart).
+
+Uso:
+```python
+barramento_eventos.assinar('cliente.transicao_status', aplicar_transicoes)
+await barramento_eventos.publicar('cliente.transicao_status', {'ordem': 3}, chave=cliente_id)
+```
+"""
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from pydantic import BaseModel, Field
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Evento(BaseModel):
+    """Evento de domínio (linha de c_eventos_outbox)"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tipo: str
+    chave: Optional[str] = None
+    dados: Dict[str, Any] = Field(default_factory=dict)
+    tentativas: int = 0
+    criado_em: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+# Handler: recebe o lote de eventos (já coalescido) de um tipo
+HandlerEventos = Callable[[List[Evento]], Awaitable[None]]
+
+
+# ============================================================================
+# OUTBOX
+# ============================================================================
+
+class BackendOutbox(ABC):
+    """Armazenamento durável dos eventos"""
+
+    @abstractmethod
+    async def gravar(self, eventos: List[Evento]) -> None:
+        """Grava os eventos como pendentes"""
+
+    @abstractmethod
+    async def concluir(self, evento_ids: List[str]) -> None:
+        """Marca os eventos como processados"""
+
+    @abstractmethod
+    async def registrar_falha(self, eventos: List[Evento], erro: str, definitiva: bool) -> None:
+        """Guarda tentativas e erro; `definitiva` tira os eventos da fila de pendentes"""
+
+    @abstractmethod
+    async def pendentes(self, anteriores_a: datetime, limite: int) -> List[Evento]:
+        """Eventos pendentes criados antes de `anteriores_a` (recuperação)"""
+
+
+class OutboxMemoria(BackendOutbox):
+    """Sem durabilidade: os eventos existem só na fila do processo"""
+
+    async def gravar(self, eventos: List[Evento]) -> None:
+        return None
+
+    async def concluir(self, evento_ids: List[str]) -> None:
+        return None
+
+    async def registrar_falha(self, eventos: List[Evento], erro: str, definitiva: bool) -> None:
+        return None
+
+    async def pendentes(self, anteriores_a: datetime, limite: int) -> List[Evento]:
+        return []
+
+
+class OutboxBanco(BackendOutbox):
+    """
+    Eventos em c_eventos_outbox
+
+    Enquanto a tabela não existir no banco, vira OutboxMemoria (avisa uma vez).
+    """
+
+    TABELA = 'c_eventos_outbox'
+
+    def __init__(self, obter_db: Callable[[], Any]):
+        self._obter_db = obter_db
+        self._tabela_disponivel = True
+
+    def _sem_tabela(self, erro: APIError) -> bool:
+        # PGRST205 (PostgREST 12+) / 42P01: tabela não existe
+        if erro.code not in ('PGRST205', '42P01'):
+            return False
+        self._tabela_disponivel = False
+        logger.warning(
+            f"Tabela {self.TABELA} não encontrada - eventos só em memória. "
+            f"Execute sql/criar_tabela_eventos_outbox.sql"
+        )
+        return True
+
+    async def _executar(self, montar: Callable[[Any], Any]) -> Optional[Any]:
+        if not self._tabela_disponivel:
+            return None
+        try:
+            return await montar(self._obter_db().table(self.TABELA)).execute()
+        except APIError as e:
+            if not self._sem_tabela(e):
+                raise
+            return None
+
+    async def gravar(self, eventos: List[Evento]) -> None:
+        linhas = [evento.model_dump(mode='json') for evento in eventos]
+        await self._executar(lambda tabela: tabela.insert(linhas, returning=ReturnMethod.minimal))
+
+    async def concluir(self, evento_ids: List[str]) -> None:
+        await self._executar(lambda tabela: tabela.update({
+            'status': 'processado',
+            'processado_em': datetime.now(timezone.utc).isoformat()
+        }, returning=ReturnMethod.minimal).in_('id', evento_ids))
+
+    async def registrar_falha(self, eventos: List[Evento], erro: str, definitiva: bool) -> None:
+        # As tentativas são iguais no lote inteiro (o lote falha junto)
+        await self._executar(lambda tabela: tabela.update({
+            'status': 'erro' if definitiva else 'pendente',
+            'tentativas': max(evento.tentativas for evento in eventos),
+            'erro': erro[:1000]
+        }, returning=ReturnMethod.minimal).in_('id', [evento.id for evento in eventos]))
+
+    async def pendentes(self, anteriores_a: datetime, limite: int) -> List[Evento]:
+        result = await self._executar(
+            lambda tabela: tabela.select('id, tipo, chave, dados, tentativas, criado_em')
+            .eq('status', 'pendente')
+            .lt('criado_em', anteriores_a.isoformat())
+            .order('criado_em')
+            .limit(limite)
+        )
+        return [Evento(**linha) for linha in (result.data if result else None) or []]
+
+
+# ============================================================================
+# BARRAMENTO
+# ============================================================================
+
+class BarramentoEventos:
+    """Fila de eventos em processo com um despachante em lotes"""
+
+    def __init__(
+        self,
+        outbox: BackendOutbox,
+        janela: float,
+        lote_max: int,
+        tentativas: int,
+        fila_max: int,
+        recuperar_apos: float = 60
+    ):
+        self.outbox = outbox
+        self.janela = janela
+        self.lote_max = max(1, lote_max)
+        self.tentativas = max(1, tentativas)
+        self.fila_max = fila_max
+        self.recuperar_apos = recuperar_apos
+        self._handlers: Dict[str, HandlerEventos] = {}
+        self._fila: Optional[asyncio.Queue] = None
+        self._despachante: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reenvios: set = set()
+        # loop.time() da próxima varredura do outbox (0: ao subir)
+        self._proxima_varredura = 0.0
+        # Eventos deste processo ainda não entregues: a varredura não os repete
+        self._ids_em_andamento: set = set()
+        # Por (tipo, chave) ainda não entregue: criado_em do evento mais recente
+        # e quantos eventos da chave estão na fila, no lote ou esperando reenvio
+        self._mais_recente: Dict[Tuple[str, str], datetime] = {}
+        self._em_andamento: Dict[Tuple[str, str], int] = {}
+        self.publicados = 0
+        self.processados = 0
+        self.coalescidos = 0
+        self.falhas = 0
+
+    def assinar(self, tipo: str, handler: HandlerEventos) -> None:
+        self._handlers[tipo] = handler
+
+    async def publicar(self, tipo: str, dados: Dict[str, Any], chave: Optional[str] = None) -> Optional[Evento]:
+        """
+        Grava o evento no outbox e coloca na fila (não espera a entrega)
+
+        Returns:
+            O evento, ou None se a fila está cheia (fica pendente no outbox)
+        """
+        if tipo not in self._handlers:
+            raise ValueError(f"Tipo de evento sem handler: {tipo}")
+
+        evento = Evento(tipo=tipo, chave=chave, dados=dados)
+        try:
+            await self.outbox.gravar([evento])
+        except Exception as e:
+            # Entrega assim mesmo: a transação de quem publicou já aconteceu
+            logger.error(f"Erro ao gravar evento {tipo} ({chave}) no outbox - só em memória: {e}")
+
+        self.iniciar()
+        try:
+            self._fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            logger.error(f"Fila de eventos cheia - evento {tipo} ({chave}) fica pendente no outbox")
+            return None
+        self._registrar([evento])
+        self.publicados += 1
+        return evento
+
+    def iniciar(self) -> None:
+        """Sobe o despachante no event loop atual (idempotente)"""
+        loop = asyncio.get_running_loop()
+        if self._despachante is not None and not self._despachante.done() and self._loop is loop:
+            return
+        pendentes = [] if self._fila is None else self._retirar_todos()
+        # Fila nova a cada despachante: asyncio.Queue fica presa ao loop em que foi usada
+        self._fila = asyncio.Queue(maxsize=self.fila_max)
+        for evento in pendentes:
+            self._fila.put_nowait(evento)
+        if self._loop is not loop:
+            self._reenvios = set()
+        self._loop = loop
+        self._despachante = loop.create_task(self._despachar())
+
+    async def encerrar(self, tempo_limite: float = 5) -> None:
+        """Entrega o que está na fila (até `tempo_limite`) e para o despachante"""
+        if self._despachante is None:
+            return
+        try:
+            await asyncio.wait_for(self.drenar(), tempo_limite)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"{self._fila.qsize()} eventos não entregues no encerramento "
+                f"(os já gravados no outbox são reenviados na próxima subida)"
+            )
+        for tarefa in [self._despachante, *self._reenvios]:
+            tarefa.cancel()
+        await asyncio.gather(self._despachante, *self._reenvios, return_exceptions=True)
+        self._despachante = None
+        self._reenvios.clear()
+
+    async def drenar(self) -> None:
+        """Espera a fila esvaziar e os reenvios agendados terminarem"""
+        while self._fila is not None:
+            await self._fila.join()
+            if not self._reenvios:
+                return
+            await asyncio.gather(*list(self._reenvios), return_exceptions=True)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores do barramento (exposto no /health)"""
+        return {
+            'na_fila': self._fila.qsize() if self._fila is not None else 0,
+            'publicados': self.publicados,
+            'processados': self.processados,
+            'coalescidos': self.coalescidos,
+            'falhas': self.falhas
+        }
+
+    def _retirar_todos(self) -> List[Evento]:
+        eventos = []
+        while not self._fila.empty():
+            eventos.append(self._fila.get_nowait())
+        return eventos
+
+    async def _despachar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() >= self._proxima_varredura:
+                await self._recuperar()
+                self._proxima_varredura = loop.time() + self.recuperar_apos
+            try:
+                primeiro = await asyncio.wait_for(self._fila.get(), self._proxima_varredura - loop.time())
+            except asyncio.TimeoutError:
+                continue
+
+            lote = [primeiro]
+            prazo = loop.time() + self.janela
+            while len(lote) < self.lote_max:
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._processar(lote)
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
+
+    async def _recuperar(self) -> None:
+        """
+        Entrega os pendentes antigos do outbox (processo que caiu, falha ao concluir)
+
+        Com vários workers, mais de um pode pegar o mesmo pendente: a entrega
+        é pelo menos uma vez e os handlers já toleram repetição.
+        """
+        try:
+            anteriores_a = datetime.now(timezone.utc) - timedelta(seconds=self.recuperar_apos)
+            eventos = await self.outbox.pendentes(anteriores_a, self.fila_max)
+        except Exception as e:
+            logger.error(f"Erro ao recuperar eventos pendentes do outbox: {e}")
+            return
+        eventos = [
+            evento for evento in eventos
+            if evento.tipo in self._handlers and evento.id not in self._ids_em_andamento
+        ]
+        self._registrar(eventos)
+        # Um evento publicado depois da subida já pode ter superado o pendente
+        eventos = await self._descartar_superados(eventos)
+        # Entregues antes dos que já estão na fila: são mais antigos
+        for inicio in range(0, len(eventos), self.lote_max):
+            await self._processar(eventos[inicio:inicio + self.lote_max])
+        if eventos:
+            logger.info(f"{len(eventos)} eventos pendentes recuperados do outbox")
+
+    async def _processar(self, lote: List[Evento]) -> None:
+        por_tipo: Dict[str, List[Evento]] = {}
+        for evento in lote:
+            por_tipo.setdefault(evento.tipo, []).append(evento)
+
+        for tipo, eventos in por_tipo.items():
+            entregues = self._coalescer(eventos)
+            self.coalescidos += len(eventos) - len(entregues)
+            try:
+                await self._handlers[tipo](entregues)
+            except Exception as e:
+                await self._falhou(eventos, f"{type(e).__name__}: {e}")
+                continue
+            self._liberar(eventos)
+            self.processados += len(eventos)
+            try:
+                await self.outbox.concluir([evento.id for evento in eventos])
+            except Exception as e:
+                logger.error(f"Erro ao concluir eventos {tipo} no outbox: {e}")
+
+    @staticmethod
+    def _coalescer(eventos: List[Evento]) -> List[Evento]:
+        """Evento mais recente de cada chave, na ordem em que as chaves apareceram por último"""
+        ultimos: Dict[Any, Evento] = {}
+        for indice, evento in enumerate(eventos):
+            chave = evento.chave if evento.chave is not None else ('sem-chave', indice)
+            anterior = ultimos.pop(chave, None)
+            # Reenvio que chegou atrás de um evento mais novo da mesma chave
+            if anterior is not None and anterior.criado_em > evento.criado_em:
+                evento = anterior
+            ultimos[chave] = evento
+        return list(ultimos.values())
+
+    def _registrar(self, eventos: List[Evento]) -> None:
+        """Eventos que entraram no barramento (publicados ou recuperados)"""
+        for evento in eventos:
+            self._ids_em_andamento.add(evento.id)
+            if evento.chave is None:
+                continue
+            chave = (evento.tipo, evento.chave)
+            if chave not in self._mais_recente or evento.criado_em > self._mais_recente[chave]:
+                self._mais_recente[chave] = evento.criado_em
+            self._em_andamento[chave] = self._em_andamento.get(chave, 0) + 1
+
+    def _liberar(self, eventos: List[Evento]) -> None:
+        """Eventos que saíram do barramento (entregues, descartados ou superados)"""
+        for evento in eventos:
+            self._ids_em_andamento.discard(evento.id)
+            if evento.chave is None:
+                continue
+            chave = (evento.tipo, evento.chave)
+            restantes = self._em_andamento.get(chave, 0) - 1
+            if restantes > 0:
+                self._em_andamento[chave] = restantes
+            else:
+                self._em_andamento.pop(chave, None)
+                self._mais_recente.pop(chave, None)
+
+    async def _descartar_superados(self, eventos: List[Evento]) -> List[Evento]:
+        """
+        Tira os eventos que têm um mais recente da mesma chave no barramento
+
+        Entregar o antigo depois do novo desfaria o novo (ex: o cliente
+        voltaria ao status anterior). Os superados são concluídos no outbox.
+        """
+        superados = [
+            evento for evento in eventos
+            if evento.chave is not None
+            and evento.criado_em < self._mais_recente.get((evento.tipo, evento.chave), evento.criado_em)
+        ]
+        if not superados:
+            return eventos
+
+        self._liberar(superados)
+        self.coalescidos += len(superados)
+        self.processados += len(superados)
+        logger.info(f"{len(superados)} eventos {superados[0].tipo} superados por eventos mais recentes")
+        try:
+            await self.outbox.concluir([evento.id for evento in superados])
+        except Exception as e:
+            logger.error(f"Erro ao concluir eventos superados no outbox: {e}")
+        ids = {evento.id for evento in superados}
+        return [evento for evento in eventos if evento.id not in ids]
+
+    async def _falhou(self, eventos: List[Evento], erro: str) -> None:
+        self.falhas += 1
+        for evento in eventos:
+            evento.tentativas += 1
+        definitiva = eventos[0].tentativas >= self.tentativas
+        logger.warning(
+            f"Handler de {eventos[0].tipo} falhou (tentativa {eventos[0].tentativas}/{self.tentativas}, "
+            f"{len(eventos)} eventos): {erro}"
+        )
+        try:
+            await self.outbox.registrar_falha(eventos, erro, definitiva)
+        except Exception as e:
+            logger.error(f"Erro ao registrar falha no outbox: {e}")
+        if definitiva:
+            self._liberar(eventos)
+            logger.error(f"{len(eventos)} eventos {eventos[0].tipo} descartados após {self.tentativas} tentativas")
+            return
+
+        # Espera crescente: janela * 2^tentativas, no máximo 60s
+        espera = min(60.0, max(self.janela, 0.01) * 2 ** eventos[0].tentativas)
+        reenvio = asyncio.create_task(self._reenfileirar(eventos, espera))
+        self._reenvios.add(reenvio)
+        reenvio.add_done_callback(self._reenvios.discard)
+
+    async def _reenfileirar(self, eventos: List[Evento], espera: float) -> None:
+        await asyncio.sleep(espera)
+        for evento in await self._descartar_superados(eventos):
+            await self._fila.put(evento)
+
+
+def _admin_database():
+    # c_eventos_outbox tem RLS sem políticas: só a service key grava e lê
+    from .database import get_admin_database
+    return get_admin_database()
+
+
+barramento_eventos = BarramentoEventos(
+    OutboxBanco(_admin_database) if settings.eventos_outbox else OutboxMemoria(),
+    janela=settings.eventos_janela,
+    lote_max=settings.eventos_lote_max,
+    tentativas=settings.eventos_tentativas,
+    fila_max=settings.eventos_fila_max,
+    recuperar_apos=settings.eventos_recuperar_apos
+)
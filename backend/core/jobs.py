@@ -0,0 +1,265 @@
+"""
+Jobs em segundo plano com fila em processo
+
+Operações longas (ex: importação de XML grande) não precisam segurar a
+conexão HTTP: o endpoint submete um job e devolve o ID na hora; N
+trabalhadores (`settings.jobs_concorrencia`) consomem a fila e o cliente
+acompanha status e progresso por polling ou SSE.
+
+O armazenamento fica atrás de `BackendJobs`. O padrão, `BackendJobsMemoria`,
+roda sem serviços externos (fila e jobs no próprio processo: cada worker do
+uvicorn tem a sua). Um backend compartilhado (ex: Redis) só precisa
+implementar os mesmos quatro métodos - por isso `parametros` e `resultado`
+devem ser serializáveis em JSON.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+
+from .config import settings
+from .exceptions import LimitExceededException, ValidationException
+
+logger = logging.getLogger(__name__)
+
+
+class StatusJob(str, Enum):
+    PENDENTE = 'pendente'
+    PROCESSANDO = 'processando'
+    CONCLUIDO = 'concluido'
+    ERRO = 'erro'
+
+
+class Job(BaseModel):
+    """Estado de um job (resposta dos endpoints de status)"""
+    id: str
+    tipo: str
+    status: StatusJob = StatusJob.PENDENTE
+    progresso: int = 0  # 0-100
+    etapa: Optional[str] = None
+    resultado: Optional[Any] = None
+    erro: Optional[str] = None
+    usuario_id: Optional[str] = None
+    criado_em: datetime
+    atualizado_em: datetime
+    # Entrada do handler: não sai nas respostas
+    parametros: Dict[str, Any] = Field(default_factory=dict, exclude=True)
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in (StatusJob.CONCLUIDO, StatusJob.ERRO)
+
+
+# Handler: recebe o job e uma função para reportar (progresso, etapa)
+Reportar = Callable[[int, str], Awaitable[None]]
+Handler = Callable[[Job, Reportar], Awaitable[Any]]
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class BackendJobs(ABC):
+    """Armazenamento dos jobs e da fila"""
+
+    @abstractmethod
+    async def salvar(self, job: Job) -> None:
+        """Cria ou atualiza o estado do job"""
+
+    @abstractmethod
+    async def obter(self, job_id: str) -> Optional[Job]:
+        """Estado atual do job ou None"""
+
+    @abstractmethod
+    async def enfileirar(self, job_id: str) -> None:
+        """
+        Coloca o job na fila
+
+        Raises:
+            LimitExceededException: fila cheia
+        """
+
+    @abstractmethod
+    async def proximo(self) -> str:
+        """Aguarda e retira o próximo job da fila"""
+
+
+class BackendJobsMemoria(BackendJobs):
+    """
+    Jobs em dicionário e fila asyncio no próprio processo
+
+    Jobs finalizados são descartados `ttl` segundos depois da última
+    atualização; a fila aceita no máximo `max_fila` jobs pendentes.
+    """
+
+    def __init__(self, max_fila: int, ttl: float):
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._finalizados_em: Dict[str, float] = {}
+        self._fila: asyncio.Queue = asyncio.Queue(maxsize=max_fila)
+
+    async def salvar(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        if job.finalizado:
+            self._finalizados_em[job.id] = time.monotonic()
+        self._remover_expirados()
+
+    async def obter(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        # Cópia: quem consulta não altera o estado guardado
+        return job.model_copy() if job is not None else None
+
+    async def enfileirar(self, job_id: str) -> None:
+        try:
+            self._fila.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise LimitExceededException("Fila de processamento cheia, tente novamente em instantes")
+
+    async def proximo(self) -> str:
+        return await self._fila.get()
+
+    def _remover_expirados(self) -> None:
+        limite = time.monotonic() - self.ttl
+        for job_id in [j for j, finalizado in self._finalizados_em.items() if finalizado < limite]:
+            del self._finalizados_em[job_id]
+            self._jobs.pop(job_id, None)
+
+
+# ============================================================================
+# GERENCIADOR
+# ============================================================================
+
+class GerenciadorJobs:
+    """
+    Fila de jobs com concorrência limitada
+
+    Uso:
+    ```python
+    gerenciador_jobs.registrar('importar_xml', processar_importacao)
+    job = await gerenciador_jobs.submeter('importar_xml', {'caminho': ...}, usuario_id=user.id)
+    job = await gerenciador_jobs.obter(job.id)
+    ```
+    """
+
+    def __init__(self, backend: BackendJobs, concorrencia: int):
+        self.backend = backend
+        self.concorrencia = max(1, concorrencia)
+        self._handlers: Dict[str, Handler] = {}
+        self._trabalhadores: List[asyncio.Task] = []
+        self._em_andamento = 0
+
+    def registrar(self, tipo: str, handler: Handler) -> None:
+        self._handlers[tipo] = handler
+
+    async def submeter(self, tipo: str, parametros: Dict[str, Any], usuario_id: Optional[str] = None) -> Job:
+        """Cria o job e coloca na fila (não espera o processamento)"""
+        if tipo not in self._handlers:
+            raise ValidationException(f"Tipo de job desconhecido: {tipo}")
+
+        self.iniciar()
+        agora = datetime.now()
+        job = Job(
+            id=str(uuid.uuid4()),
+            tipo=tipo,
+            usuario_id=usuario_id,
+            parametros=parametros,
+            criado_em=agora,
+            atualizado_em=agora
+        )
+        await self.backend.salvar(job)
+        await self.backend.enfileirar(job.id)
+        return job
+
+    async def obter(self, job_id: str) -> Optional[Job]:
+        return await self.backend.obter(job_id)
+
+    async def acompanhar(self, job_id: str, intervalo: Optional[float] = None) -> AsyncIterator[Job]:
+        """Estado do job a cada mudança, até finalizar (funciona com qualquer backend)"""
+        intervalo = intervalo or settings.jobs_sse_intervalo
+        ultima = None
+        while True:
+            job = await self.backend.obter(job_id)
+            if job is None:
+                return
+            if job.atualizado_em != ultima:
+                ultima = job.atualizado_em
+                yield job
+            if job.finalizado:
+                return
+            await asyncio.sleep(intervalo)
+
+    def iniciar(self) -> None:
+        """Sobe os trabalhadores no event loop atual (idempotente)"""
+        self._trabalhadores = [t for t in self._trabalhadores if not t.done()]
+        for _ in range(self.concorrencia - len(self._trabalhadores)):
+            self._trabalhadores.append(asyncio.create_task(self._trabalhar()))
+
+    async def encerrar(self) -> None:
+        """Cancela os trabalhadores (jobs em andamento terminam como cancelados)"""
+        for trabalhador in self._trabalhadores:
+            trabalhador.cancel()
+        await asyncio.gather(*self._trabalhadores, return_exceptions=True)
+        self._trabalhadores = []
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Estado da fila (exposto no /health)"""
+        return {
+            'trabalhadores': len([t for t in self._trabalhadores if not t.done()]),
+            'em_andamento': self._em_andamento
+        }
+
+    async def _trabalhar(self) -> None:
+        while True:
+            job_id = await self.backend.proximo()
+            job = await self.backend.obter(job_id)
+            if job is None:
+                continue
+
+            self._em_andamento += 1
+            try:
+                await self._executar(job)
+            finally:
+                self._em_andamento -= 1
+
+    async def _executar(self, job: Job) -> None:
+        async def reportar(progresso: int, etapa: str) -> None:
+            job.progresso = max(0, min(100, progresso))
+            job.etapa = etapa
+            job.atualizado_em = datetime.now()
+            await self.backend.salvar(job)
+
+        job.status = StatusJob.PROCESSANDO
+        await reportar(job.progresso, 'processando')
+
+        try:
+            job.resultado = await self._handlers[job.tipo](job, reportar)
+            job.status = StatusJob.CONCLUIDO
+            job.progresso = 100
+            job.etapa = 'concluido'
+        except asyncio.CancelledError:
+            job.status = StatusJob.ERRO
+            job.erro = "Processamento cancelado (servidor reiniciado)"
+            raise
+        except HTTPException as e:
+            job.status = StatusJob.ERRO
+            job.erro = e.detail
+        except Exception as e:
+            logger.error(f"Erro no job {job.tipo} {job.id}: {type(e).__name__}: {str(e)}")
+            job.status = StatusJob.ERRO
+            job.erro = f"Erro interno: {str(e)}"
+        finally:
+            job.atualizado_em = datetime.now()
+            await self.backend.salvar(job)
+
+
+gerenciador_jobs = GerenciadorJobs(
+    BackendJobsMemoria(settings.jobs_fila_max, ttl=settings.jobs_ttl),
+    concorrencia=settings.jobs_concorrencia
+)
@@ -0,0 +1,178 @@
+"""
+Verificação local de tokens JWT do Supabase Auth
+
+Valida assinatura, `exp` e `aud` sem ida à rede por requisição:
+- Tokens HS256 usam o JWT secret do projeto
+- Tokens assinados com chave assimétrica (RS256/ES256) usam o JWKS do
+  Supabase Auth, baixado uma vez e atualizado quando aparece um `kid` novo
+  (rotação de chaves) ou quando o cache expira. O download é assíncrono,
+  pelo pool HTTP compartilhado, e requisições simultâneas esperam o mesmo
+  download (não bloqueia o event loop)
+
+As claims decodificadas ficam em cache por token até o `exp`.
+"""
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import time
+
+import httpx
+from jose import JWTError, jwt
+
+from .cache import CacheTTL
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+ALGORITMOS_HMAC = ("HS256",)
+ALGORITMOS_JWKS = ("RS256", "ES256")
+
+# Intervalo mínimo entre downloads do JWKS disparados por `kid` desconhecido
+INTERVALO_MINIMO_JWKS = 60
+
+# Limite superior do cache de claims (cada entrada expira antes, no `exp`)
+TTL_MAXIMO_CLAIMS = 3600
+
+
+class JWTVerifier:
+    """
+    Verificador de JWT com cache de chaves e de claims
+
+    Uso:
+    ```python
+    claims = await get_jwt_verifier().verificar(token)  # JWTError se inválido
+    ```
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str],
+        jwks_url: Optional[str],
+        audience: Optional[str],
+        jwks_ttl: int = 3600,
+        max_claims: int = 5000,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.jwks_ttl = jwks_ttl
+        self._claims = CacheTTL(max_claims, ttl=TTL_MAXIMO_CLAIMS)
+        self._chaves: Dict[str, Dict[str, Any]] = {}
+        self._jwks_baixado_em: Optional[float] = None
+        # None: usa o pool HTTP do SupabaseClient
+        self._transport = transport
+        self._lock = asyncio.Lock()
+
+    async def verificar(self, token: str) -> Dict[str, Any]:
+        """
+        Valida o token e retorna suas claims
+
+        Raises:
+            JWTError: Assinatura inválida, token expirado, audience incorreta
+                ou algoritmo não suportado
+        """
+        claims = self._claims.obter(token)
+        if claims is not None:
+            return claims
+
+        header = jwt.get_unverified_header(token)
+        algoritmo = header.get("alg")
+
+        if algoritmo in ALGORITMOS_HMAC:
+            if not self.secret:
+                raise JWTError("JWT secret não configurado")
+            chave = self.secret
+        elif algoritmo in ALGORITMOS_JWKS:
+            chave = await self._chave_jwks(header.get("kid"))
+        else:
+            raise JWTError(f"Algoritmo não suportado: {algoritmo}")
+
+        claims = jwt.decode(
+            token,
+            chave,
+            algorithms=[algoritmo],
+            audience=self.audience,
+            options={"verify_aud": bool(self.audience)}
+        )
+
+        self._claims.definir(token, claims, claims.get("exp"))
+        return claims
+
+    def _precisa_baixar(self, kid: Optional[str]) -> bool:
+        if self._jwks_baixado_em is None:
+            return True
+        idade = time.monotonic() - self._jwks_baixado_em
+        return idade > self.jwks_ttl or (kid not in self._chaves and idade > INTERVALO_MINIMO_JWKS)
+
+    async def _chave_jwks(self, kid: Optional[str]) -> Dict[str, Any]:
+        """Retorna a chave pública do JWKS para o `kid`, baixando se necessário"""
+        if self._precisa_baixar(kid):
+            async with self._lock:
+                # Quem esperou o lock encontra o JWKS já baixado por outra requisição
+                if self._precisa_baixar(kid):
+                    await self._baixar_jwks()
+
+        chave = self._chaves.get(kid)
+
+        if chave is None:
+            raise JWTError(f"Chave de assinatura desconhecida: {kid}")
+        return chave
+
+    async def _baixar_jwks(self) -> None:
+        if not self.jwks_url:
+            raise JWTError("JWKS não configurado")
+
+        transport = self._transport
+        if transport is None:
+            from .database import get_supabase
+            transport = get_supabase().transport
+
+        # Sem aclose(): fecharia o pool compartilhado (como AsyncDatabase.create_session)
+        cliente = httpx.AsyncClient(transport=transport, timeout=settings.db_timeout)
+        response = await cliente.get(self.jwks_url, headers={"apikey": settings.supabase_anon_key})
+        response.raise_for_status()
+
+        self._chaves = {chave.get("kid"): chave for chave in response.json().get("keys", [])}
+        self._jwks_baixado_em = time.monotonic()
+        logger.info(f"JWKS atualizado: {len(self._chaves)} chave(s)")
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores do cache de claims"""
+        return self._claims.estatisticas()
+
+
+_verifier: Optional[JWTVerifier] = None
+
+
+def get_jwt_verifier() -> JWTVerifier:
+    """Retorna o verificador configurado a partir das settings"""
+    global _verifier
+    if _verifier is None:
+        _verifier = JWTVerifier(
+            # Sem HS256 habilitado, tokens HS256 são recusados ("JWT secret não configurado")
+            secret=settings.supabase_jwt_secret if settings.supabase_jwt_hs256 else None,
+            jwks_url=f"{settings.supabase_url}/auth/v1/.well-known/jwks.json",
+            audience=settings.supabase_jwt_audience,
+            jwks_ttl=settings.jwks_cache_ttl,
+            max_claims=settings.token_claims_cache_max_size
+        )
+    return _verifier
+
+
+def validar_configuracao_jwt() -> None:
+    """
+    Confere na inicialização se a verificação HS256 tem o secret do projeto
+
+    O JWT_SECRET_KEY da aplicação não serve: os tokens do Supabase Auth são
+    assinados com o JWT secret do projeto (Settings > API no painel).
+
+    Raises:
+        RuntimeError: HS256 habilitado (SUPABASE_JWT_HS256) sem SUPABASE_JWT_SECRET
+    """
+    if settings.supabase_jwt_hs256 and not settings.supabase_jwt_secret:
+        raise RuntimeError(
+            "SUPABASE_JWT_SECRET não configurado: defina o JWT secret do projeto Supabase "
+            "ou desligue a verificação HS256 com SUPABASE_JWT_HS256=false "
+            "(projetos que só usam chaves assimétricas)"
+        )
@@ -0,0 +1,67 @@
+"""
+Cache compartilhado de nomes de lojas
+
+Listagens que exibem o nome da loja (comissões, config_loja, equipe) resolvem
+os nomes de uma página inteira com um único `in_()` em c_lojas, em vez de uma
+query por linha. Nomes já conhecidos não voltam ao banco até o TTL expirar
+ou a loja ser renomeada (`invalidar_nome_loja`).
+"""
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from .cache import CacheTTL
+from .config import settings
+from .database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+_nomes_lojas = CacheTTL(
+    settings.lojas_nome_cache_max_size,
+    ttl=settings.lojas_nome_cache_ttl
+)
+
+
+async def buscar_nomes_lojas(db: AsyncDatabase, loja_ids: Iterable[Any]) -> Dict[str, str]:
+    """
+    Retorna {loja_id: nome} para os IDs informados
+
+    No máximo uma query por chamada, independente da quantidade de IDs.
+    Lojas inexistentes ficam fora do dicionário.
+
+    Uso:
+    ```python
+    nomes = await buscar_nomes_lojas(db, (item['loja_id'] for item in rows))
+    item['loja_nome'] = nomes.get(str(item['loja_id']))
+    ```
+    """
+    nomes: Dict[str, str] = {}
+    faltantes = []
+
+    for loja_id in {str(loja_id) for loja_id in loja_ids if loja_id}:
+        nome = _nomes_lojas.obter(loja_id)
+        if nome is None:
+            faltantes.append(loja_id)
+        else:
+            nomes[loja_id] = nome
+
+    if faltantes:
+        result = await db.table('c_lojas').select('id, nome').in_('id', faltantes).execute()
+        for loja in result.data or []:
+            loja_id = str(loja['id'])
+            nomes[loja_id] = loja['nome']
+            _nomes_lojas.definir(loja_id, loja['nome'])
+
+    return nomes
+
+
+def invalidar_nome_loja(loja_id: Optional[str] = None) -> None:
+    """Remove o nome de uma loja do cache (sem argumento, limpa tudo)"""
+    if loja_id is None:
+        _nomes_lojas.limpar()
+    else:
+        _nomes_lojas.invalidar(str(loja_id))
+
+
+def estatisticas_nomes_lojas() -> Dict[str, Any]:
+    """Contadores do cache de nomes de lojas (exposto no /health)"""
+    return _nomes_lojas.estatisticas()
@@ -0,0 +1,139 @@
+"""
+Valores monetários em centavos (int): conversão e formatação
+
+Ponto único para textos monetários BR e US ("R$ 1.234,56", "1,234.56",
+"USD 1234.5"), números e Decimal. Os cálculos (somas, descontos,
+comissões) são feitos em centavos inteiros, sem acumular erro de float.
+
+- `para_centavos` / `para_centavos_lote`: um passe por texto, sem cadeias
+  de replace; textos repetidos (ex: a mesma coluna em várias linhas) são
+  convertidos uma vez (cache)
+- `percentual_centavos`: percentual arredondado meio-para-cima
+- `formatar_centavos` / `formatar_brl`: "R$ 1.234,56", com cache
+
+Regra dos separadores: o último '.' ou ',' é o decimal; os demais são de
+milhar. Um separador que aparece mais de uma vez é sempre de milhar
+("1.234.567" = 1234567,00). Moeda e letras antes ou depois do número são
+ignoradas ("100,00 R$", "1234 BRL") e notação científica é aceita ("1e3").
+"""
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional
+
+_CENTAVOS = Decimal('0.01')
+_DIGITOS = frozenset('0123456789')
+_SEPARADORES = frozenset('.,')
+# Expoente logo após o número; no máximo 2 dígitos (valores monetários plausíveis)
+_EXPOENTE = re.compile(r'[eE]([+-]?[0-9]{1,2})(?![0-9])')
+
+
+@lru_cache(maxsize=4096)
+def _centavos_texto(texto: str) -> Optional[int]:
+    """Centavos de um texto monetário (None se não tem dígitos ou é ambíguo)"""
+    negativo = False
+    digitos: List[str] = []
+    # Posição (em `digitos`) e caractere de cada separador, na ordem
+    separadores: List[tuple] = []
+    expoente = 0
+    # Já passou do número (moeda/letras depois dele): dígitos a seguir são ambíguos
+    terminou = False
+
+    posicao = 0
+    while posicao < len(texto):
+        caractere = texto[posicao]
+        if caractere in _DIGITOS or caractere in _SEPARADORES:
+            if terminou:
+                # Letras no meio do número ("12 abc 34")
+                return None
+            if caractere in _DIGITOS:
+                digitos.append(caractere)
+            else:
+                separadores.append((len(digitos), caractere))
+        elif caractere == '-' and not digitos:
+            negativo = True
+        elif caractere.isdigit():
+            # Dígitos não ASCII
+            return None
+        elif digitos and not terminou and not caractere.isspace():
+            # Notação científica ("1e3", "1,5E-2") como no float() dos conversores antigos
+            notacao = _EXPOENTE.match(texto, posicao)
+            if notacao and texto[posicao - 1] not in ' \t':
+                expoente = int(notacao.group(1))
+                posicao = notacao.end()
+            terminou = True
+            continue
+        # Moeda e letras antes ou depois do número ("R$", "BRL", "€") são ignoradas
+        posicao += 1
+
+    if not digitos:
+        return None
+
+    casas = 0
+    if separadores:
+        indice, ultimo = separadores[-1]
+        if sum(1 for _, separador in separadores if separador == ultimo) == 1:
+            casas = len(digitos) - indice
+    casas -= expoente
+
+    inteiro = int(''.join(digitos))
+    if casas <= 2:
+        centavos = inteiro * 10 ** (2 - casas)
+    else:
+        # Mais de 2 casas decimais: arredonda meio-para-cima
+        divisor = 10 ** (casas - 2)
+        centavos = (inteiro + divisor // 2) // divisor
+    return -centavos if negativo else centavos
+
+
+def para_centavos(valor: Any) -> Optional[int]:
+    """
+    Centavos de um texto monetário, número ou Decimal
+
+    Returns:
+        None para vazio, None ou texto sem número
+    """
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor * 100
+    if isinstance(valor, float):
+        valor = Decimal(repr(valor))
+    if isinstance(valor, Decimal):
+        if not valor.is_finite():
+            return None
+        return int(valor.quantize(_CENTAVOS, rounding=ROUND_HALF_UP) * 100)
+    return _centavos_texto(str(valor).strip())
+
+
+def para_centavos_lote(valores: Iterable[Any]) -> List[Optional[int]]:
+    """`para_centavos` de uma coluna inteira (textos repetidos convertidos uma vez)"""
+    return [para_centavos(valor) for valor in valores]
+
+
+def percentual_centavos(centavos: int, percentual: Any) -> int:
+    """`percentual`% de `centavos`, arredondado meio-para-cima"""
+    valor = Decimal(centavos) * Decimal(str(percentual)) / 100
+    return int(valor.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def centavos_para_decimal(centavos: int) -> Decimal:
+    return Decimal(centavos).scaleb(-2)
+
+
+def centavos_para_float(centavos: int) -> float:
+    return centavos / 100
+
+
+@lru_cache(maxsize=4096)
+def formatar_centavos(centavos: int) -> str:
+    """Centavos como moeda BR: "R$ 1.234,56" """
+    inteiro, resto = divmod(abs(centavos), 100)
+    milhares = f"{inteiro:,}".replace(',', '.')
+    sinal = '-' if centavos < 0 else ''
+    return f"R$ {sinal}{milhares},{resto:02d}"
+
+
+def formatar_brl(valor: Any) -> str:
+    """Número, Decimal ou texto monetário como moeda BR ("R$ 0,00" se inválido)"""
+    return formatar_centavos(para_centavos(valor) or 0)
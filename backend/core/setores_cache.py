@@ -0,0 +1,112 @@
+"""
+Contagem de funcionários por setor (agrupada e com cache)
+
+Conta os funcionários ativos de todos os setores de uma página com uma
+única chamada à RPC `contar_funcionarios_por_setor`
+(sql/criar_rpc_contar_funcionarios_por_setor.sql). Enquanto a RPC não
+estiver criada no banco, faz um `count=exact` por setor, em paralelo
+(buscar as linhas e contar em memória seria truncado pelo max-rows do
+PostgREST).
+
+As contagens ficam em cache por setor e são invalidadas por
+EquipeRepository sempre que um funcionário entra, sai ou muda de setor
+(`invalidar_contagem_setores`). TTL 0 desativa o cache.
+"""
+from typing import Any, Dict, Iterable
+import asyncio
+import logging
+
+from postgrest.exceptions import APIError
+
+from .cache import CacheTTL
+from .config import settings
+from .database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+RPC_CONTAGEM = 'contar_funcionarios_por_setor'
+
+_funcionarios_por_setor = CacheTTL(
+    settings.setor_contagem_cache_max_size,
+    ttl=settings.setor_contagem_cache_ttl
+)
+
+# Vira False após o banco responder que a RPC não existe (PGRST202)
+_rpc_disponivel = True
+
+
+async def contar_funcionarios_por_setor(db: AsyncDatabase, setor_ids: Iterable[Any]) -> Dict[str, int]:
+    """
+    Retorna {setor_id: total de funcionários ativos} para os IDs informados
+
+    Uma query por chamada com a RPC, independente da quantidade de setores.
+    Setores sem funcionários retornam 0.
+    """
+    contagens: Dict[str, int] = {}
+    faltantes = []
+
+    for setor_id in {str(setor_id) for setor_id in setor_ids if setor_id}:
+        total = _funcionarios_por_setor.obter(setor_id)
+        if total is None:
+            faltantes.append(setor_id)
+        else:
+            contagens[setor_id] = total
+
+    if faltantes:
+        encontrados = await _contar_no_banco(db, faltantes)
+        for setor_id in faltantes:
+            total = encontrados.get(setor_id, 0)
+            contagens[setor_id] = total
+            _funcionarios_por_setor.definir(setor_id, total)
+
+    return contagens
+
+
+async def _contar_no_banco(db: AsyncDatabase, setor_ids: list) -> Dict[str, int]:
+    """Contagem agrupada via RPC, com fallback para uma contagem por setor"""
+    global _rpc_disponivel
+
+    if _rpc_disponivel:
+        try:
+            result = await db.rpc(RPC_CONTAGEM, {'setor_ids': setor_ids}).execute()
+            return {str(linha['setor_id']): linha['total_funcionarios'] for linha in result.data or []}
+        except APIError as e:
+            if e.code != 'PGRST202':
+                raise
+            _rpc_disponivel = False
+            logger.warning(
+                f"RPC {RPC_CONTAGEM} não encontrada - contando via select. "
+                f"Execute sql/criar_rpc_contar_funcionarios_por_setor.sql"
+            )
+
+    totais = await asyncio.gather(*(_contar_setor(db, setor_id) for setor_id in setor_ids))
+    return dict(zip(setor_ids, totais))
+
+
+async def _contar_setor(db: AsyncDatabase, setor_id: str) -> int:
+    result = await (
+        db.table('cad_equipe')
+        .select('id', count='exact')
+        .eq('setor_id', setor_id)
+        .eq('ativo', True)
+        .limit(1)
+        .execute()
+    )
+    return result.count or 0
+
+
+def invalidar_contagem_setores(*setor_ids: Any) -> None:
+    """Descarta a contagem dos setores informados (IDs vazios são ignorados)"""
+    for setor_id in setor_ids:
+        if setor_id:
+            _funcionarios_por_setor.invalidar(str(setor_id))
+
+
+def limpar_contagem_setores() -> None:
+    """Descarta todas as contagens em cache"""
+    _funcionarios_por_setor.limpar()
+
+
+def estatisticas_contagem_setores() -> Dict[str, Any]:
+    """Contadores do cache de contagem por setor (exposto no /health)"""
+    return _funcionarios_por_setor.estatisticas()
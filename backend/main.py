@@ -18,8 +18,18 @@ from slowapi.errors import RateLimitExceeded
 from core.rate_limiter import limiter
 
 from core.config import settings
+from core.auth import estatisticas_usuario_cache
+from core.lojas_cache import estatisticas_nomes_lojas
+from core.setores_cache import estatisticas_contagem_setores
 from core.database import get_supabase
+from core.jwt_verifier import validar_configuracao_jwt
 from core.exceptions import FlytException
+from core.jobs import gerenciador_jobs
+from core.eventos import barramento_eventos
+from modules.ambientes.xml_cache import cache_materiais_xml
+from modules.ambientes.xml_executor import executor_extracao_xml
+from modules.clientes.autocomplete import autocomplete_clientes
+from modules.status_orcamento.catalogo import catalogo_status
 
 # Configuração de logging
 logging.basicConfig(
@@ -33,6 +43,8 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Gerencia o ciclo de vida da aplicação"""
     # Startup
+    # Sem o JWT secret do projeto todo token HS256 seria recusado: falha já aqui
+    validar_configuracao_jwt()
     logger.info(f"Starting Fluyt API - Environment: {settings.environment}")
     logger.info(f"Supabase URL: {settings.supabase_url}")
     
@@ -43,10 +55,21 @@ async def lifespan(app: FastAPI):
     else:
         logger.error(f"Database connection failed: {health.get('error')}")
     
+    # Workers da extração de XML sobem aquecidos antes da primeira importação
+    executor_extracao_xml.iniciar()
+    # Trabalhadores da fila de jobs em segundo plano
+    gerenciador_jobs.iniciar()
+    # Despachante dos eventos de domínio (reenvia pendentes do outbox)
+    barramento_eventos.iniciar()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Fluyt API")
+    await gerenciador_jobs.encerrar()
+    await barramento_eventos.encerrar()
+    executor_extracao_xml.encerrar()
+    await get_supabase().aclose()
 
 
 # Criação da aplicação
@@ -195,6 +218,17 @@ async def health_check() -> Dict[str, Any]:
         "timestamp": time.time(),
         "environment": settings.environment,
         "database": db_health["database"],
+        "cache": {
+            "usuarios": estatisticas_usuario_cache(),
+            "nomes_lojas": estatisticas_nomes_lojas(),
+            "funcionarios_por_setor": estatisticas_contagem_setores(),
+            "materiais_xml": cache_materiais_xml.estatisticas(),
+            "autocomplete_clientes": autocomplete_clientes.estatisticas(),
+            "status_orcamento": catalogo_status.estatisticas()
+        },
+        "extracao_xml": executor_extracao_xml.estatisticas(),
+        "jobs": gerenciador_jobs.estatisticas(),
+        "eventos": barramento_eventos.estatisticas(),
         "version": "1.0.0"
     }
 
@@ -4,22 +4,27 @@ Define todas as rotas HTTP e suas validações
 """
 import logging
 import os
-import xml.etree.ElementTree as ET
 from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from core.auth import get_current_user
-from core.database import get_database
+from core.config import settings
+from core.database import get_database, CountMode
 from core.exceptions import NotFoundException, ValidationException, DatabaseException
 from core.error_handler import handle_exceptions
+from core.jobs import Job, gerenciador_jobs
 
 from .service import AmbienteService
+from .xml_executor import XMLInvalidoError
+from .xml_jobs import TIPO_IMPORTAR_XML
+from .xml_upload import receber_lote_xml, receber_xml_upload, remover_temporario, salvar_xml_upload
 from .schemas import (
     AmbienteCreate, AmbienteUpdate, AmbienteResponse, 
     AmbienteFiltros, AmbienteListResponse,
-    AmbienteMaterialCreate, AmbienteMaterialResponse
+    AmbienteMaterialCreate, AmbienteMaterialResponse,
+    ImportacaoLoteResponse, ItemImportacaoLote
 )
 
 logger = logging.getLogger(__name__)
@@ -51,9 +56,17 @@ async def listar_ambientes(
     # Incluir materiais
     incluir_materiais: bool = Query(False, description="Incluir dados de materiais na resposta"),
     
+    # Projeção
+    campos: Optional[str] = Query(
+        None,
+        description="Campos de cada item, separados por vírgula (ex: id,nome,cliente_nome,resumo)"
+    ),
+    
     # Paginação
     page: int = Query(1, ge=1, description="Número da página"),
     per_page: int = Query(20, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior (keyset)"),
+    count: Optional[CountMode] = Query(None, description="Contagem do total: exact, planned, estimated ou none"),
     
     # Ordenação
     order_by: str = Query("created_at", description="Campo para ordenação"),
@@ -73,6 +86,11 @@ async def listar_ambientes(
     - valor_min/valor_max: Faixa de valores de venda
     - data_inicio/data_fim: Período de importação
     
+    **Projeção (campos):** os itens trazem só os campos pedidos, entre
+    id, nome, cliente_id, cliente_nome, valor_venda, data_importacao,
+    hora_importacao, origem, created_at, updated_at, materiais e resumo
+    (linha, cor_caixa, cor_porta e valor_total, sem o materiais_json)
+    
     **Retorna:** Lista paginada com dados do cliente via JOIN
     """
     logger.info(f"Listando ambientes - Usuário: {current_user.id}")
@@ -97,13 +115,19 @@ async def listar_ambientes(
         'per_page': per_page,
         'order_by': order_by,
         'order_direction': order_direction,
-        'incluir_materiais': incluir_materiais  # Adicionar parâmetro
+        'incluir_materiais': incluir_materiais,  # Adicionar parâmetro
+        'cursor': cursor,
+        'count': count,
+        'campos': list(dict.fromkeys(c.strip() for c in campos.split(',') if c.strip())) if campos is not None else None
     }
     
     # Busca no service
     resultado = await service.listar_ambientes(filtros, **paginacao)
     
     logger.info(f"Ambientes listados com sucesso - Total: {resultado.total}")
+    if campos is not None:
+        # Sem o response_model: os campos não pedidos ficam fora do JSON
+        return JSONResponse(content=resultado.model_dump(mode='json', exclude_unset=True))
     return resultado
 
 
@@ -262,25 +286,10 @@ async def obter_materiais_ambiente(
     return materiais
 
 
-@router.post("/importar-xml")
-@handle_exceptions
-async def importar_xml(
-    cliente_id: str = Query(..., description="UUID do cliente"),
-    arquivo: UploadFile = File(..., description="Arquivo XML do Promob"),
-    current_user = Depends(get_current_user),
-    service: AmbienteService = Depends(get_ambiente_service)
-):
+def _validar_upload_xml(arquivo: UploadFile) -> None:
     """
-    Importa ambiente a partir de arquivo XML do Promob
-    
-    **Parâmetros:**
-    - cliente_id: UUID do cliente para associar o ambiente
-    - arquivo: Arquivo XML (multipart/form-data)
-    
-    **Retorna:** Dados do ambiente criado
+    Validações de segurança do upload de XML (antes de ler o conteúdo)
     """
-    # Validações de segurança aprimoradas
-    
     # 1. Validar nome do arquivo - previne path traversal
     filename_clean = os.path.basename(arquivo.filename)
     if not filename_clean or filename_clean != arquivo.filename:
@@ -308,64 +317,187 @@ async def importar_xml(
             detail=f"Tipo de arquivo inválido: {arquivo.content_type}"
         )
     
-    # 4. Validar tamanho (máximo 10MB)
-    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-    if arquivo.size and arquivo.size > MAX_FILE_SIZE:
+    # 4. Validar tamanho declarado (máximo 10MB) antes de ler
+    if arquivo.size and arquivo.size > settings.max_file_size_bytes:
         raise HTTPException(
             status_code=400,
-            detail="Arquivo muito grande (máximo 10MB)"
+            detail=f"Arquivo muito grande (máximo {settings.max_file_size_mb}MB)"
         )
+
+
+@router.post("/importar-xml")
+@handle_exceptions
+async def importar_xml(
+    cliente_id: str = Query(..., description="UUID do cliente"),
+    arquivo: UploadFile = File(..., description="Arquivo XML do Promob"),
+    current_user = Depends(get_current_user),
+    service: AmbienteService = Depends(get_ambiente_service)
+):
+    """
+    Importa ambiente a partir de arquivo XML do Promob
     
-    logger.info(f"Importando XML '{arquivo.filename}' - Cliente: {cliente_id} - Usuário: {current_user.id}")
-    
-    # Ler conteúdo do arquivo
-    conteudo_xml = await arquivo.read()
-    
-    # 5. Validar que não está vazio
-    if not conteudo_xml:
-        raise HTTPException(
-            status_code=400,
-            detail="Arquivo XML está vazio"
-        )
+    **Parâmetros:**
+    - cliente_id: UUID do cliente para associar o ambiente
+    - arquivo: Arquivo XML (multipart/form-data)
     
-    # 6. Decodificar e validar estrutura básica do XML
-    try:
-        conteudo_str = conteudo_xml.decode('utf-8')
-    except UnicodeDecodeError:
-        try:
-            # Tentar latin-1 como fallback
-            conteudo_str = conteudo_xml.decode('latin-1')
-        except:
-            raise HTTPException(
-                status_code=400,
-                detail="Erro ao decodificar arquivo - encoding inválido"
-            )
+    **Retorna:** Dados do ambiente criado
+    """
+    _validar_upload_xml(arquivo)
     
-    # 7. Validar estrutura XML básica
-    try:
-        # Parse básico para verificar se é XML válido
-        root = ET.fromstring(conteudo_str)
-    except ET.ParseError as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Arquivo XML inválido: {str(e)}"
-        )
+    logger.info(f"Importando XML '{arquivo.filename}' - Cliente: {cliente_id} - Usuário: {current_user.id}")
     
     # Chamar o service para processar o XML
     try:
-        ambiente_criado = await service.importar_xml_ambiente(
-            cliente_id=cliente_id,
-            conteudo_xml=conteudo_str,
-            nome_arquivo=arquivo.filename
-        )
+        # 5-7. Ler em partes (limite de tamanho e hash); parse e extração no pool de processos
+        async with receber_xml_upload(arquivo) as xml_recebido:
+            ambiente_criado = await service.importar_xml_ambiente(
+                cliente_id=cliente_id,
+                conteudo_xml=xml_recebido.caminho,
+                nome_arquivo=arquivo.filename,
+                xml_hash=xml_recebido.xml_hash
+            )
         
         logger.info(f"Ambiente {ambiente_criado.id} criado via XML com sucesso")
         
         return ambiente_criado
+    except XMLInvalidoError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Arquivo XML inválido: {str(e)}"
+        )
     except ValidationException as e:
         logger.error(f"Erro de validação ao importar XML: {str(e)}")
         raise
     except Exception as e:
         logger.error(f"Erro inesperado ao importar XML: {type(e).__name__}: {str(e)}")
         raise
+
+
+@router.post("/importar-xml/lote", response_model=ImportacaoLoteResponse)
+@handle_exceptions
+async def importar_xml_lote(
+    cliente_id: str = Query(..., description="UUID do cliente"),
+    arquivos: List[UploadFile] = File(..., description="Arquivos XML do Promob e/ou .zip com XMLs"),
+    current_user = Depends(get_current_user),
+    service: AmbienteService = Depends(get_ambiente_service)
+):
+    """
+    Importa vários ambientes de uma vez (projeto completo: cozinha, quartos, banheiros)
+    
+    **Parâmetros:**
+    - cliente_id: UUID do cliente para associar os ambientes
+    - arquivos: Arquivos .xml e/ou .zip com XMLs (multipart/form-data)
+    
+    **Retorna:** Resultado por arquivo (ambiente criado ou erro), na ordem do envio
+    """
+    logger.info(f"Importando lote de {len(arquivos)} arquivo(s) - Cliente: {cliente_id} - Usuário: {current_user.id}")
+    
+    # Arquivos recusados na leitura (nome, extensão, tamanho) viram falhas no resultado
+    async with receber_lote_xml(arquivos) as lote:
+        resultado = await service.importar_xml_lote(
+            cliente_id=cliente_id,
+            arquivos=[
+                (item.nome, item.recebido.caminho, item.recebido.xml_hash)
+                for item in lote if item.recebido
+            ]
+        )
+    
+    # Mescla as falhas de leitura com o resultado da importação, na ordem do lote
+    importados = iter(resultado.itens)
+    itens = [
+        next(importados) if item.recebido else ItemImportacaoLote(arquivo=item.nome, sucesso=False, erro=item.erro)
+        for item in lote
+    ]
+    
+    return ImportacaoLoteResponse(
+        total=len(itens),
+        importados=resultado.importados,
+        falhas=len(itens) - resultado.importados,
+        itens=itens
+    )
  
+
+
+@router.post("/importar-xml/jobs", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+@handle_exceptions
+async def importar_xml_job(
+    cliente_id: str = Query(..., description="UUID do cliente"),
+    arquivo: UploadFile = File(..., description="Arquivo XML do Promob"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Importa ambiente a partir de XML do Promob em segundo plano
+    
+    Responde assim que o arquivo é recebido, sem esperar o processamento.
+    Acompanhe por GET /ambientes/importar-xml/jobs/{job_id} (polling) ou
+    GET /ambientes/importar-xml/jobs/{job_id}/eventos (SSE).
+    
+    **Retorna:** Job com status `pendente`; ao concluir, `resultado` traz o ambiente criado
+    """
+    _validar_upload_xml(arquivo)
+    
+    xml_recebido = await salvar_xml_upload(arquivo)
+    try:
+        job = await gerenciador_jobs.submeter(
+            TIPO_IMPORTAR_XML,
+            {
+                'cliente_id': cliente_id,
+                'caminho': str(xml_recebido.caminho),
+                'nome_arquivo': arquivo.filename,
+                'xml_hash': xml_recebido.xml_hash
+            },
+            usuario_id=current_user.id
+        )
+    except Exception:
+        # Job não entrou na fila: ninguém mais vai remover o arquivo
+        remover_temporario(xml_recebido.caminho)
+        raise
+    
+    logger.info(f"Job {job.id} de importação de XML '{arquivo.filename}' - Cliente: {cliente_id} - Usuário: {current_user.id}")
+    
+    return job
+
+
+async def _obter_job_do_usuario(job_id: str, current_user) -> Job:
+    """Job do usuário (administradores veem todos); 404 para os demais"""
+    job = await gerenciador_jobs.obter(job_id)
+    if job is None or (job.usuario_id != current_user.id and not current_user.is_admin):
+        raise NotFoundException(f"Job {job_id} não encontrado")
+    return job
+
+
+@router.get("/importar-xml/jobs/{job_id}", response_model=Job)
+@handle_exceptions
+async def status_importacao_xml(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """
+    Status, progresso e resultado de uma importação em segundo plano
+    """
+    return await _obter_job_do_usuario(job_id, current_user)
+
+
+@router.get("/importar-xml/jobs/{job_id}/eventos")
+@handle_exceptions
+async def eventos_importacao_xml(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """
+    Acompanha a importação por Server-Sent Events
+    
+    Envia um evento `job` com o estado a cada mudança; a conexão é
+    encerrada quando o job finaliza (`concluido` ou `erro`).
+    """
+    await _obter_job_do_usuario(job_id, current_user)
+    
+    async def eventos():
+        async for job in gerenciador_jobs.acompanhar(job_id):
+            yield f"event: job\ndata: {job.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,273 @@
+"""
+Índice do XML do Promob montado em uma única passada pela árvore
+
+O extrator fazia uma consulta XPath ancorada em `//` (varredura completa da
+árvore) por campo e por coleção. O índice percorre a árvore uma vez e
+responde as mesmas perguntas por dicionário, com a mesma semântica das
+consultas que substitui:
+
+- valores(colecao, campo):
+  //MODELCATEGORYINFORMATION[@DESCRIPTION=colecao]//MODELINFORMATION[@DESCRIPTION=campo]
+  /MODELTYPEINFORMATIONS/MODELTYPEINFORMATION/@DESCRIPTION (sem duplicatas, em ordem)
+- marcas(colecao): //MODELCATEGORYINFORMATION[@DESCRIPTION=colecao]//MARCA/@REFERENCE
+- referencias_descri(colecao, campo):
+  //MODELCATEGORYINFORMATION[@DESCRIPTION=colecao]//MODELINFORMATION[@DESCRIPTION=campo]//DESCRI/@REFERENCE
+- valores_totais(tag): //LISTING/TOTALPRICES/MARGINS/{tag}/@VALUE,
+  //LISTING/AMBIENTS/AMBIENT/TOTALPRICES/MARGINS/{tag}/@VALUE e
+  //TOTALPRICES/MARGINS/{tag}/@VALUE (primeiro valor de cada)
+
+O índice pode ser guardado em forma compacta (`compactar`, dicionário
+serializável em JSON, só com as coleções informadas) e restaurado sem o
+XML (`de_compacto`) para extrair seções depois.
+
+Autor: Ricardo Borges - 2025
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from lxml import etree
+
+COLECAO = 'MODELCATEGORYINFORMATION'
+CAMPO = 'MODELINFORMATION'
+
+# Origens dos totais, na ordem de prioridade do extrator
+ORIGENS_TOTAIS = ('listing', 'ambiente', 'qualquer')
+
+
+class IndicePromob:
+    """
+    Índice por descrição das coleções e campos de um XML do Promob
+
+    Uso:
+    ```python
+    indice = IndicePromob(etree.fromstring(conteudo))
+    indice.valores('Coleção Unique ', '4 - Cor Corpo')  # ['MDF\\Branco', ...]
+    ```
+    """
+
+    def __init__(self, root: Optional[etree._Element]):
+        self.root = root
+
+        # @DESCRIPTION de qualquer elemento (detecção das linhas)
+        self.descricoes: Set[str] = set()
+        # CATEGORY/@DESCRIPTION
+        self.categorias: Set[str] = set()
+        # MODELCATEGORYINFORMATION por descrição, em ordem de documento
+        self.colecoes: Dict[str, List[etree._Element]] = {}
+        # Primeiro AMBIENT abaixo da raiz (equivale a root.find('.//AMBIENT'))
+        self.ambiente: Optional[etree._Element] = None
+
+        self._campos: Dict[Tuple[str, str], Dict[str, None]] = {}
+        self._marcas: Dict[str, List[str]] = {}
+        self._descri: Dict[Tuple[str, str], List[str]] = {}
+        self._totais: Dict[Tuple[str, str], str] = {}
+        # Atributos por coleção do índice restaurado (sem árvore)
+        self._atributos: Optional[Dict[str, List[str]]] = None
+
+        if root is not None:
+            self._indexar()
+
+    # ========================================================================
+    # CONSULTAS
+    # ========================================================================
+
+    def tem_colecao(self, colecao: str) -> bool:
+        return colecao in self.colecoes
+
+    def valores(self, colecao: str, campo: str) -> List[str]:
+        """Valores únicos (em ordem de documento) de um campo dentro da coleção"""
+        return list(self._campos.get((colecao, campo), ()))
+
+    def marcas(self, colecao: str) -> List[str]:
+        """REFERENCE de todas as MARCA dentro da coleção"""
+        return list(self._marcas.get(colecao, ()))
+
+    def referencias_descri(self, colecao: str, campo: str) -> List[str]:
+        """REFERENCE de todos os DESCRI dentro do campo da coleção"""
+        return list(self._descri.get((colecao, campo), ()))
+
+    def valores_totais(self, tag: str) -> List[str]:
+        """Primeiro VALUE de ORDER/BUDGET em cada origem, por prioridade"""
+        return [
+            self._totais[(tag, origem)]
+            for origem in ORIGENS_TOTAIS
+            if (tag, origem) in self._totais
+        ]
+
+    def atributos(self, colecao: str) -> Iterator[str]:
+        """Valores de todos os atributos da coleção e de seus descendentes"""
+        if self._atributos is not None:
+            yield from self._atributos.get(colecao, ())
+            return
+        for elemento_colecao in self.colecoes.get(colecao, ()):
+            for elemento in elemento_colecao.iter(etree.Element):
+                yield from elemento.attrib.values()
+
+    # ========================================================================
+    # FORMA COMPACTA
+    # ========================================================================
+
+    def compactar(
+        self,
+        colecoes: Iterable[str],
+        descricoes: Iterable[str] = (),
+        atributos: Iterable[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        Índice das coleções informadas em um dicionário serializável em JSON
+
+        Args:
+            colecoes: Coleções que o índice restaurado precisa responder
+            descricoes: @DESCRIPTION cuja presença no XML deve ser preservada
+            atributos: Coleções cujos valores de atributos são guardados
+                (sem repetição: `atributos` só é usado para buscar padrões)
+
+        O AMBIENT não é guardado.
+        """
+        colecoes = [colecao for colecao in dict.fromkeys(colecoes) if colecao in self.colecoes]
+        return {
+            'descricoes': [descricao for descricao in dict.fromkeys(descricoes) if descricao in self.descricoes],
+            'categorias': sorted(self.categorias),
+            'colecoes': colecoes,
+            'campos': [
+                [colecao, campo, list(valores)]
+                for (colecao, campo), valores in self._campos.items() if colecao in colecoes
+            ],
+            'marcas': {colecao: self._marcas[colecao] for colecao in colecoes if colecao in self._marcas},
+            'descri': [
+                [colecao, campo, referencias]
+                for (colecao, campo), referencias in self._descri.items() if colecao in colecoes
+            ],
+            'totais': [[tag, origem, valor] for (tag, origem), valor in self._totais.items()],
+            'atributos': {
+                colecao: list(dict.fromkeys(self.atributos(colecao)))
+                for colecao in dict.fromkeys(atributos) if colecao in colecoes
+            },
+        }
+
+    @classmethod
+    def de_compacto(cls, dados: Dict[str, Any]) -> 'IndicePromob':
+        """Índice restaurado de `compactar`, sem a árvore do XML"""
+        indice = cls(None)
+        indice.descricoes = set(dados['descricoes'])
+        indice.categorias = set(dados['categorias'])
+        indice.colecoes = {colecao: [] for colecao in dados['colecoes']}
+        indice._campos = {
+            (colecao, campo): dict.fromkeys(valores) for colecao, campo, valores in dados['campos']
+        }
+        indice._marcas = {colecao: list(marcas) for colecao, marcas in dados['marcas'].items()}
+        indice._descri = {(colecao, campo): list(referencias) for colecao, campo, referencias in dados['descri']}
+        indice._totais = {(tag, origem): valor for tag, origem, valor in dados['totais']}
+        indice._atributos = {colecao: list(valores) for colecao, valores in dados['atributos'].items()}
+        return indice
+
+    # ========================================================================
+    # CONSTRUÇÃO
+    # ========================================================================
+
+    def _indexar(self) -> None:
+        """Percorre a árvore uma única vez, em ordem de documento"""
+        root = self.root
+        campo_atual = None
+        colecoes_campo: Tuple[str, ...] = ()
+
+        for elemento in root.iter(etree.Element):
+            tag = elemento.tag
+            descricao = elemento.get('DESCRIPTION')
+            if descricao is not None:
+                self.descricoes.add(descricao)
+
+            if tag == 'MODELTYPEINFORMATION':
+                if descricao is None:
+                    continue
+                pai = elemento.getparent()
+                if pai is None or pai.tag != 'MODELTYPEINFORMATIONS':
+                    continue
+                campo = pai.getparent()
+                if campo is None or campo.tag != CAMPO or campo.get('DESCRIPTION') is None:
+                    continue
+
+                # Itens do mesmo campo são vizinhos: coleções calculadas uma vez por campo
+                if campo is not campo_atual:
+                    campo_atual = campo
+                    colecoes_campo = _descricoes_acima(campo, COLECAO)
+
+                descricao_campo = campo.get('DESCRIPTION')
+                for colecao in colecoes_campo:
+                    self._campos.setdefault((colecao, descricao_campo), {})[descricao] = None
+
+            elif tag == COLECAO:
+                if descricao is not None:
+                    self.colecoes.setdefault(descricao, []).append(elemento)
+
+            elif tag == 'CATEGORY':
+                if descricao is not None:
+                    self.categorias.add(descricao)
+
+            elif tag == 'MARCA':
+                referencia = elemento.get('REFERENCE')
+                if referencia is not None:
+                    for colecao in _descricoes_acima(elemento, COLECAO):
+                        self._marcas.setdefault(colecao, []).append(referencia)
+
+            elif tag == 'DESCRI':
+                referencia = elemento.get('REFERENCE')
+                if referencia is not None:
+                    self._indexar_descri(elemento, referencia)
+
+            elif tag == 'AMBIENT':
+                if self.ambiente is None and elemento is not root:
+                    self.ambiente = elemento
+
+            elif tag in ('ORDER', 'BUDGET'):
+                valor = elemento.get('VALUE')
+                if valor is not None:
+                    self._indexar_total(elemento, tag, valor)
+
+    def _indexar_descri(self, elemento: etree._Element, referencia: str) -> None:
+        pares = {}
+        for campo in elemento.iterancestors(CAMPO):
+            descricao_campo = campo.get('DESCRIPTION')
+            if descricao_campo is None:
+                continue
+            for colecao in _descricoes_acima(campo, COLECAO):
+                pares[(colecao, descricao_campo)] = None
+
+        for par in pares:
+            self._descri.setdefault(par, []).append(referencia)
+
+    def _indexar_total(self, elemento: etree._Element, tag: str, valor: str) -> None:
+        margens = elemento.getparent()
+        if margens is None or margens.tag != 'MARGINS':
+            return
+        totais = margens.getparent()
+        if totais is None or totais.tag != 'TOTALPRICES':
+            return
+
+        self._totais.setdefault((tag, 'qualquer'), valor)
+
+        dono = totais.getparent()
+        if dono is None:
+            return
+        if dono.tag == 'LISTING':
+            self._totais.setdefault((tag, 'listing'), valor)
+        elif dono.tag == 'AMBIENT' and _caminho(dono, 'AMBIENTS', 'LISTING'):
+            self._totais.setdefault((tag, 'ambiente'), valor)
+
+
+def _descricoes_acima(elemento: etree._Element, tag: str) -> Tuple[str, ...]:
+    """Descrições distintas dos ancestrais com a tag informada"""
+    descricoes = {}
+    for ancestral in elemento.iterancestors(tag):
+        descricao = ancestral.get('DESCRIPTION')
+        if descricao is not None:
+            descricoes[descricao] = None
+    return tuple(descricoes)
+
+
+def _caminho(elemento: etree._Element, *tags: str) -> bool:
+    """True se os ancestrais imediatos do elemento têm as tags informadas"""
+    for tag in tags:
+        elemento = elemento.getparent()
+        if elemento is None or elemento.tag != tag:
+            return False
+    return True
@@ -5,7 +5,7 @@ CORREÇÃO CRÍTICA: Extrai APENAS dados da linha detectada, sem misturar
 Autor: Ricardo Borges - 2025
 """
 
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Union
 from lxml import etree
 import re
 import logging
@@ -24,11 +24,9 @@ try:
         MetadataModel,
         LinhaEnum
     )
+    from modules.ambientes.extrator_xml.app.extractors.indice_promob import IndicePromob
     from modules.ambientes.extrator_xml.app.utils import (
         detectar_linha,
-        detectar_linhas_disponiveis,
-        extrair_multiplos_valores,
-        extrair_multiplos_valores_se_existe,
         processar_material_cor,
         formatar_valor_monetario,
         validar_espessura,
@@ -37,8 +35,8 @@ try:
     from modules.ambientes.extrator_xml.app.utils.helpers import (
         extrair_espessura_vidro,
         mapear_tipo_corredica,
-        detectar_espessura_brilhart,
-        extrair_espessura_paineis_sublime
+        escolher_espessura_brilhart,
+        filtrar_espessuras
     )
 except ImportError:
     # Imports relativos quando chamado internamente
@@ -54,11 +52,9 @@ except ImportError:
         MetadataModel,
         LinhaEnum
     )
+    from .indice_promob import IndicePromob
     from ..utils import (
         detectar_linha,
-        detectar_linhas_disponiveis,
-        extrair_multiplos_valores,
-        extrair_multiplos_valores_se_existe,
         processar_material_cor,
         formatar_valor_monetario,
         validar_espessura,
@@ -67,41 +63,68 @@ except ImportError:
     from ..utils.helpers import (
         extrair_espessura_vidro,
         mapear_tipo_corredica,
-        detectar_espessura_brilhart,
-        extrair_espessura_paineis_sublime
+        escolher_espessura_brilhart,
+        filtrar_espessuras
     )
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+# Coleções (MODELCATEGORYINFORMATION) consultadas pelas seções
+COLECOES_EXTRAIDAS = ("Coleção Unique ", "Coleção Sublime", "Portábille", "Brilhart Color")
+
 
 class XMLExtractor:
     """
     Extrator principal para arquivos XML do Promob
     
     CORREÇÃO CRÍTICA: Extrai APENAS dados da linha principal detectada
+    
+    O XML é parseado uma vez e percorrido uma vez (IndicePromob); todas as
+    seções são respondidas pelo índice, sem novas consultas XPath.
     """
     
     def __init__(self):
         """Inicializa o extrator"""
         self.tree = None
+        self.indice = None
         self.xml_content = None
         self.linhas_detectadas = None
         self.sections_extracted = []
         self.warnings = []
     
-    def extract(self, xml_content: str, sections: Optional[List[str]] = None) -> ExtractionResult:
+    def extract(
+        self,
+        xml_content: Union[str, bytes, etree._Element, IndicePromob],
+        sections: Optional[List[str]] = None
+    ) -> ExtractionResult:
         """
         Extrai dados do XML - REFATORADO para múltiplas linhas
         
         CORREÇÃO: Extrai dados de TODAS as linhas disponíveis
+        
+        Aceita o XML como string, como bytes (sem decodificar o upload), já
+        parseado com lxml (sem parsear de novo) ou um IndicePromob restaurado
+        da forma compacta (seções extraídas depois da importação, sem o XML).
         """
         try:
             self.xml_content = xml_content
-            self.tree = etree.fromstring(xml_content.encode('utf-8'))
+            if isinstance(xml_content, IndicePromob):
+                self.tree = xml_content.root
+            elif isinstance(xml_content, etree._Element):
+                self.tree = xml_content
+            elif isinstance(xml_content, str):
+                self.tree = etree.fromstring(xml_content.encode('utf-8'))
+            else:
+                self.tree = etree.fromstring(xml_content)
+            
+            if isinstance(xml_content, IndicePromob):
+                self.indice = xml_content
+            else:
+                self.indice = IndicePromob(self.tree)
             
             # NOVO: Detectar TODAS as linhas disponíveis
-            self.linhas_detectadas = detectar_linhas_disponiveis(xml_content)
+            self.linhas_detectadas = self._detectar_linhas()
             self.sections_extracted = []
             self.warnings = []
             
@@ -184,19 +207,44 @@ class XMLExtractor:
                 error=f"Erro ao processar XML: {str(e)}"
             )
     
-    def _get_colecao_xpath(self, linha: str) -> str:
+    def indice_compacto(self) -> Optional[Dict[str, Any]]:
+        """
+        Índice da última extração na forma compacta, com o necessário para
+        extrair as demais seções depois (`extract(IndicePromob.de_compacto(...))`)
+        """
+        if self.indice is None:
+            return None
+        return self.indice.compactar(
+            COLECOES_EXTRAIDAS,
+            descricoes=COLECOES_EXTRAIDAS,
+            atributos=("Brilhart Color",)
+        )
+
+    def _get_colecao(self, linha: str) -> Optional[str]:
         """
-        Retorna o XPath correto para a coleção
+        Retorna a descrição da coleção (MODELCATEGORYINFORMATION) da linha
         
         CORREÇÃO CRÍTICA: Sublime NÃO tem espaço no final!
         """
         if linha == "Unique":
-            return "//MODELCATEGORYINFORMATION[@DESCRIPTION='Coleção Unique ']"
+            return "Coleção Unique "
         elif linha == "Sublime":
-            return "//MODELCATEGORYINFORMATION[@DESCRIPTION='Coleção Sublime']"
+            return "Coleção Sublime"
         else:
             return None
     
+    def _detectar_linhas(self) -> List[str]:
+        """
+        Detecta quais linhas (Unique/Sublime) estão disponíveis no XML
+        
+        Mesma regra de detectar_linhas_disponiveis: a linha existe se algum
+        elemento tem DESCRIPTION igual ao nome da coleção.
+        """
+        return [
+            linha for linha in ("Unique", "Sublime")
+            if self._get_colecao(linha) in self.indice.descricoes
+        ]
+    
     def _extrair_nome_ambiente(self) -> Optional[str]:
         """
         Extrai o nome do ambiente do XML
@@ -205,7 +253,7 @@ class XMLExtractor:
         Remove prefixo "Projeto - " se existir
         """
         try:
-            ambient = self.tree.find('.//AMBIENT')
+            ambient = self.indice.ambiente
             if ambient is not None:
                 nome = ambient.get('DESCRIPTION', '').strip()
                 if nome:
@@ -234,14 +282,14 @@ class XMLExtractor:
             for linha in self.linhas_detectadas:
                 if linha == "Unique":
                     # Verificar categoria "Corpo" para Unique
-                    categoria_xpath = "//CATEGORY[@DESCRIPTION='Corpo']"
+                    categoria = "Corpo"
                 elif linha == "Sublime":
                     # Verificar categoria "Corpo Sublime" para Sublime
-                    categoria_xpath = "//CATEGORY[@DESCRIPTION='Corpo Sublime']"
+                    categoria = "Corpo Sublime"
                 else:
                     continue
                 
-                if self.tree.xpath(categoria_xpath):
+                if categoria in self.indice.categorias:
                     tem_categoria_corpo = True
                     break
             
@@ -254,8 +302,8 @@ class XMLExtractor:
             
             # Extrair dados de cada linha disponível
             for linha in self.linhas_detectadas:
-                colecao_xpath = self._get_colecao_xpath(linha)
-                if not colecao_xpath:
+                colecao = self._get_colecao(linha)
+                if not colecao:
                     continue
                 
                 logger.debug(f"Extraindo caixa para linha: {linha}")
@@ -269,26 +317,17 @@ class XMLExtractor:
                 # Extrair campos específicos por linha
                 if linha == "Unique":
                     # Unique tem campos de espessura
-                    espessuras = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "1 - Espessura Caixa"
-                    )
-                    espessuras_prat = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "1.1 - Espessura Prateleiras"
-                    )
+                    espessuras = self.indice.valores(colecao, "1 - Espessura Caixa")
+                    espessuras_prat = self.indice.valores(colecao, "1.1 - Espessura Prateleiras")
                     # Material + Cor
-                    materiais_cores = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "4 - Cor Corpo"
-                    )
+                    materiais_cores = self.indice.valores(colecao, "4 - Cor Corpo")
                     
                 elif linha == "Sublime":
                     # Sublime tem espessura padrão de 15mm APENAS se tem categoria corpo
-                    categoria_sublime = self.tree.xpath("//CATEGORY[@DESCRIPTION='Corpo Sublime']")
-                    if categoria_sublime:
+                    if "Corpo Sublime" in self.indice.categorias:
                         espessuras = ["15mm"]
                     # Apenas tem "Cor Corpo" (sem número)
-                    materiais_cores = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "Cor Corpo"
-                    )
+                    materiais_cores = self.indice.valores(colecao, "Cor Corpo")
                 
                 # Processar separação material\cor
                 if materiais_cores:
@@ -353,8 +392,8 @@ class XMLExtractor:
             
             # Extrair dados de cada linha disponível
             for linha in self.linhas_detectadas:
-                colecao_xpath = self._get_colecao_xpath(linha)
-                if not colecao_xpath:
+                colecao = self._get_colecao(linha)
+                if not colecao:
                     continue
                 
                 logger.debug(f"Extraindo painéis para linha: {linha}")
@@ -366,21 +405,15 @@ class XMLExtractor:
                 # Buscar campos específicos por linha
                 if linha == "Unique":
                     # Coleção Unique: "7 - Painéis"
-                    materiais_cores = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "7 - Painéis"
-                    )
-                    esp = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "2 - Espessura Painéis"
-                    )
+                    materiais_cores = self.indice.valores(colecao, "7 - Painéis")
+                    esp = self.indice.valores(colecao, "2 - Espessura Painéis")
                     espessuras.extend(esp)
                     
                 elif linha == "Sublime":
                     # Coleção Sublime: "Painéis" (nome diferente)
-                    materiais_cores = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "Painéis"
-                    )
+                    materiais_cores = self.indice.valores(colecao, "Painéis")
                     # CORREÇÃO: Extrair espessura via DESCRI REFERENCE
-                    esp = extrair_espessura_paineis_sublime(self.tree, colecao_xpath)
+                    esp = filtrar_espessuras(self.indice.referencias_descri(colecao, "Painéis"))
                     espessuras.extend(esp)
                 
                 # Processar materiais e cores
@@ -439,8 +472,8 @@ class XMLExtractor:
             
             # Extrair dados de cada linha disponível
             for linha in self.linhas_detectadas:
-                colecao_xpath = self._get_colecao_xpath(linha)
-                if not colecao_xpath:
+                colecao = self._get_colecao(linha)
+                if not colecao:
                     continue
                 
                 logger.debug(f"Extraindo portas e ferragens para linha: {linha}")
@@ -458,39 +491,25 @@ class XMLExtractor:
                 # Extrair campos específicos por linha
                 if linha == "Unique":
                     # Coleção Unique
-                    espessuras = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "3 - Espessura Frontal"
-                    )
-                    modelos = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "4.1 - Modelo Frontal"
-                    )
-                    cores_frontais = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "5 - Cor Frontal"
-                    )
-                    puxadores = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "5 - Puxadores"
-                    )
+                    espessuras = self.indice.valores(colecao, "3 - Espessura Frontal")
+                    modelos = self.indice.valores(colecao, "4.1 - Modelo Frontal")
+                    cores_frontais = self.indice.valores(colecao, "5 - Cor Frontal")
+                    puxadores = self.indice.valores(colecao, "5 - Puxadores")
                     
                     # Ferragens
-                    dobradicas = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "7 - Dobradiça"
-                    )
-                    tipos_dobradicas = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "7.2.1 - Tipo Dobradiça"
-                    )
+                    dobradicas = self.indice.valores(colecao, "7 - Dobradiça")
+                    tipos_dobradicas = self.indice.valores(colecao, "7.2.1 - Tipo Dobradiça")
                     
                     # NOVO: Corrediças - Extração completa 7.1 + 7.1.1 + 7.2
                     # 7.1 - Corrediça (MARCA)
-                    marca_corredica_71 = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "7.1 - Corrediça"
-                    )
+                    marca_corredica_71 = self.indice.valores(colecao, "7.1 - Corrediça")
                     
                     # FALLBACK: Se não encontrar 7.1, usar REFERENCES
                     marca_corredica = []
                     if marca_corredica_71:
                         marca_corredica = marca_corredica_71
                     else:
-                        referencias_marca = self.tree.xpath(f"{colecao_xpath}//MARCA/@REFERENCE")
+                        referencias_marca = self.indice.marcas(colecao)
                         for ref in referencias_marca:
                             if ref and ref.strip() != "." and ref.strip():
                                 # Remover ponto inicial se existir
@@ -498,37 +517,31 @@ class XMLExtractor:
                                 if marca_limpa:
                                     marca_corredica.append(marca_limpa.strip())
                     
-                    modelo_corredica = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "7.1.1 - Gaveta"
-                    )
-                    tipo_corredica = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "7.2 - Tipo Corrediça"
-                    )
+                    modelo_corredica = self.indice.valores(colecao, "7.1.1 - Gaveta")
+                    tipo_corredica = self.indice.valores(colecao, "7.2 - Tipo Corrediça")
                     
                 elif linha == "Sublime":
                     # Coleção Sublime (nomenclatura diferente)
-                    modelos = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "Modelo Frontal"  # Nome diferente
+                    modelos = self.indice.valores(
+                        colecao, "Modelo Frontal"  # Nome diferente
                     )
-                    cores_frontais = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "Cor Frontal"  # Nome diferente
+                    cores_frontais = self.indice.valores(
+                        colecao, "Cor Frontal"  # Nome diferente
                     )
                     
                     # Ferragens
-                    dobradicas = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "Tipo Dobradiças"  # Nome diferente
+                    dobradicas = self.indice.valores(
+                        colecao, "Tipo Dobradiças"  # Nome diferente
                     )
                     
                     # NOVO: Corrediças Sublime
-                    tipo_corredica_sublime = extrair_multiplos_valores_se_existe(
-                        self.tree, colecao_xpath, "Tipo Corrediças"  # Nome diferente do Unique
+                    tipo_corredica_sublime = self.indice.valores(
+                        colecao, "Tipo Corrediças"  # Nome diferente do Unique
                     )
                     
                     # FALLBACK: Puxadores podem estar em Unique para Sublime
-                    unique_xpath = "//MODELCATEGORYINFORMATION[@DESCRIPTION='Coleção Unique ']"
-                    puxadores_unique = extrair_multiplos_valores_se_existe(
-                        self.tree, unique_xpath, "5 - Puxadores"
-                    )
+                    unique = "Coleção Unique "
+                    puxadores_unique = self.indice.valores(unique, "5 - Puxadores")
                     if puxadores_unique:
                         puxadores = puxadores_unique
                 
@@ -723,30 +736,18 @@ class XMLExtractor:
         """
         try:
             # Verificar se seção Portábille existe
-            portabille_xpath = "//MODELCATEGORYINFORMATION[@DESCRIPTION='Portábille']"
+            portabille = "Portábille"
             
-            if not self.tree.xpath(portabille_xpath):
+            if not self.indice.tem_colecao(portabille):
                 return None  # Não existe Porta Perfil neste XML
             
             # Extrair campos individuais
-            perfis = extrair_multiplos_valores_se_existe(
-                self.tree, portabille_xpath, "Perfil"
-            )
-            acab_perfis = extrair_multiplos_valores_se_existe(
-                self.tree, portabille_xpath, "Acab Perfis"
-            )
-            acab_vidros = extrair_multiplos_valores_se_existe(
-                self.tree, portabille_xpath, "Acab Vidros"
-            )
-            paineis = extrair_multiplos_valores_se_existe(
-                self.tree, portabille_xpath, "Painéis"
-            )
-            puxadores = extrair_multiplos_valores_se_existe(
-                self.tree, portabille_xpath, "Puxadores"
-            )
-            dobradicas = extrair_multiplos_valores_se_existe(
-                self.tree, portabille_xpath, "Dobradiças"
-            )
+            perfis = self.indice.valores(portabille, "Perfil")
+            acab_perfis = self.indice.valores(portabille, "Acab Perfis")
+            acab_vidros = self.indice.valores(portabille, "Acab Vidros")
+            paineis = self.indice.valores(portabille, "Painéis")
+            puxadores = self.indice.valores(portabille, "Puxadores")
+            dobradicas = self.indice.valores(portabille, "Dobradiças")
             
             # Processar Perfil (combinar perfil + acabamento)
             perfil_final = []
@@ -808,21 +809,17 @@ class XMLExtractor:
         """
         try:
             # Verificar se seção Brilhart Color existe
-            brilhart_xpath = "//MODELCATEGORYINFORMATION[@DESCRIPTION='Brilhart Color']"
+            brilhart = "Brilhart Color"
             
-            if not self.tree.xpath(brilhart_xpath):
+            if not self.indice.tem_colecao(brilhart):
                 return None  # Não existe Brilhart Color neste XML
             
             # Extrair campos
-            acab_porta = extrair_multiplos_valores_se_existe(
-                self.tree, brilhart_xpath, "Acab Porta"
-            )
-            acab_perfil = extrair_multiplos_valores_se_existe(
-                self.tree, brilhart_xpath, "Acab Perfil"
-            )
+            acab_porta = self.indice.valores(brilhart, "Acab Porta")
+            acab_perfil = self.indice.valores(brilhart, "Acab Perfil")
             
             # Detectar espessura automaticamente
-            espessura = detectar_espessura_brilhart(self.tree)
+            espessura = escolher_espessura_brilhart(self.indice.atributos(brilhart))
             
             # Processar Cor (Acab Porta separado por >)
             cores = []
@@ -876,38 +873,24 @@ class XMLExtractor:
         """
         try:
             # 1. CUSTO DE FÁBRICA (ORDER VALUE)
+            # Por prioridade: LISTING/TOTALPRICES, LISTING/AMBIENTS/AMBIENT/TOTALPRICES
+            # e qualquer TOTALPRICES (primeiro valor de cada)
             custo_fabrica_valor = None
-            xpaths_order = [
-                "//LISTING/TOTALPRICES/MARGINS/ORDER/@VALUE",
-                "//LISTING/AMBIENTS/AMBIENT/TOTALPRICES/MARGINS/ORDER/@VALUE",
-                "//TOTALPRICES/MARGINS/ORDER/@VALUE"
-            ]
-            
-            for xpath in xpaths_order:
-                elementos = self.tree.xpath(xpath)
-                if elementos:
-                    try:
-                        custo_fabrica_valor = float(elementos[0])
-                        break
-                    except ValueError:
-                        continue
+            for valor in self.indice.valores_totais('ORDER'):
+                try:
+                    custo_fabrica_valor = float(valor)
+                    break
+                except ValueError:
+                    continue
             
             # 2. VALOR DE VENDA (BUDGET VALUE)  
             valor_venda_valor = None
-            xpaths_budget = [
-                "//LISTING/TOTALPRICES/MARGINS/BUDGET/@VALUE",
-                "//LISTING/AMBIENTS/AMBIENT/TOTALPRICES/MARGINS/BUDGET/@VALUE", 
-                "//TOTALPRICES/MARGINS/BUDGET/@VALUE"
-            ]
-            
-            for xpath in xpaths_budget:
-                elementos = self.tree.xpath(xpath)
-                if elementos:
-                    try:
-                        valor_venda_valor = float(elementos[0])
-                        break
-                    except ValueError:
-                        continue
+            for valor in self.indice.valores_totais('BUDGET'):
+                try:
+                    valor_venda_valor = float(valor)
+                    break
+                except ValueError:
+                    continue
             
             # Verificar se encontrou pelo menos um valor
             if not (custo_fabrica_valor or valor_venda_valor):
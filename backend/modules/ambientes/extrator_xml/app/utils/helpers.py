@@ -4,10 +4,23 @@ Funções auxiliares para extração XML
 Autor: Ricardo Borges - 2025
 """
 
-from typing import List, Optional, Tuple, Set
+from typing import Iterable, List, Optional, Tuple, Set
 from lxml import etree
 import re
-import locale
+
+from core.monetario import formatar_brl
+
+from .xpaths import (
+    ATRIBUTOS_COLECAO,
+    ITENS_FAMILIA,
+    REFERENCIAS_DESCRI,
+    SUFIXO_DESCRI,
+    SUFIXO_VALORES,
+    TEM_COLECAO,
+    VALORES_CAMPO,
+    colecao_da_base,
+    consulta_secao,
+)
 
 
 def detectar_linha(xml_content: str) -> Optional[str]:
@@ -27,14 +40,14 @@ def detectar_linha(xml_content: str) -> Optional[str]:
         tree = etree.fromstring(xml_content.encode('utf-8'))
         
         # Contar itens por família
-        unique_count = len(tree.xpath('//ITEM[@FAMILY="Coleção Unique "]'))
-        sublime_count = len(tree.xpath('//ITEM[@FAMILY="Coleção Sublime"]'))
+        unique_count = int(ITENS_FAMILIA(tree, familia="Coleção Unique "))
+        sublime_count = int(ITENS_FAMILIA(tree, familia="Coleção Sublime"))
         
         # Se não encontrou nenhum item, usar detecção por MODELCATEGORYINFORMATION
         if unique_count == 0 and sublime_count == 0:
             # Fallback: verificar pela existência das coleções
-            has_unique = bool(tree.xpath('//MODELCATEGORYINFORMATION[@DESCRIPTION="Coleção Unique "]'))
-            has_sublime = bool(tree.xpath('//MODELCATEGORYINFORMATION[@DESCRIPTION="Coleção Sublime"]'))
+            has_unique = TEM_COLECAO(tree, colecao="Coleção Unique ")
+            has_sublime = TEM_COLECAO(tree, colecao="Coleção Sublime")
             
             if has_unique and not has_sublime:
                 return "Unique"
@@ -102,9 +115,8 @@ def extrair_multiplos_valores(tree: etree._Element, base_xpath: str, campo_descr
     Returns:
         Lista de valores únicos encontrados
     """
-    xpath = f"{base_xpath}//MODELINFORMATION[@DESCRIPTION='{campo_descricao}']/MODELTYPEINFORMATIONS/MODELTYPEINFORMATION/@DESCRIPTION"
     try:
-        elementos = tree.xpath(xpath)
+        elementos = _consultar_secao(tree, base_xpath, VALORES_CAMPO, SUFIXO_VALORES, campo=campo_descricao)
         # Remove duplicatas mantendo ordem
         valores_unicos = []
         vistos = set()
@@ -117,6 +129,19 @@ def extrair_multiplos_valores(tree: etree._Element, base_xpath: str, campo_descr
         return []
 
 
+def _consultar_secao(tree: etree._Element, base_xpath: str, registrada: etree.XPath, sufixo: str, **variaveis) -> list:
+    """
+    Executa a consulta da seção com as variáveis XPath
+    
+    Bases no padrão de coleção usam a consulta já compilada do registro
+    (utils/xpaths.py); outras bases são compiladas uma vez e reaproveitadas.
+    """
+    colecao = colecao_da_base(base_xpath)
+    if colecao is not None:
+        return registrada(tree, colecao=colecao, **variaveis)
+    return consulta_secao(base_xpath, sufixo)(tree, **variaveis)
+
+
 def extrair_multiplos_valores_se_existe(tree: etree._Element, base_xpath: str, campo_descricao: str) -> List[str]:
     """
     Extrai múltiplos valores APENAS se o campo existir no XML
@@ -176,18 +201,8 @@ def formatar_valor_monetario(valor: float) -> str:
     Returns:
         String formatada como "R$ 1.234,56"
     """
-    try:
-        # Tenta usar locale brasileiro
-        locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-    except:
-        # Fallback se locale não disponível
-        pass
-    
-    # Formata manualmente se locale não disponível
-    valor_str = f"{valor:,.2f}"
-    # Substitui separadores para padrão brasileiro
-    valor_str = valor_str.replace(',', 'X').replace('.', ',').replace('X', '.')
-    return f"R$ {valor_str}"
+    # Em centavos, com cache (core.monetario); sem trocar o locale do processo
+    return formatar_brl(valor)
 
 
 def validar_espessura(espessura: str) -> bool:
@@ -261,24 +276,33 @@ def detectar_espessura_brilhart(tree: etree._Element) -> Optional[str]:
         Espessura detectada ou None se não encontrada
     """
     # Buscar por padrões de espessura nos IDs ou descrições
-    brilhart_xpath = "//MODELCATEGORYINFORMATION[@DESCRIPTION='Brilhart Color']"
-    
     try:
-        elementos = tree.xpath(f"{brilhart_xpath}//@*")
-        espessuras_encontradas = []
-        
-        for attr in elementos:
-            matches = re.findall(r'(\d+mm)', str(attr))
-            espessuras_encontradas.extend(matches)
-        
-        # Filtrar espessuras válidas
-        espessuras_validas = ["15mm", "18mm", "20mm", "25mm"]
-        for esp in set(espessuras_encontradas):
-            if esp in espessuras_validas:
-                return esp
-                
+        return escolher_espessura_brilhart(ATRIBUTOS_COLECAO(tree, colecao='Brilhart Color'))
     except Exception:
-        pass
+        return None
+
+
+def escolher_espessura_brilhart(atributos: Iterable[str]) -> Optional[str]:
+    """
+    Escolhe a espessura do Brilhart Color entre os valores de atributos da seção
+    
+    Args:
+        atributos: Valores de todos os atributos da seção Brilhart Color
+        
+    Returns:
+        Espessura detectada ou None se não encontrada
+    """
+    espessuras_encontradas = []
+    
+    for attr in atributos:
+        matches = re.findall(r'(\d+mm)', str(attr))
+        espessuras_encontradas.extend(matches)
+    
+    # Filtrar espessuras válidas
+    espessuras_validas = ["15mm", "18mm", "20mm", "25mm"]
+    for esp in set(espessuras_encontradas):
+        if esp in espessuras_validas:
+            return esp
     
     return None  # Retornar None se não encontrar, não inventar valor
 
@@ -296,17 +320,29 @@ def extrair_espessura_paineis_sublime(tree: etree._Element, colecao_xpath: str)
     """
     try:
         # Buscar referências DESCRI dentro da coleção de painéis Sublime
-        xpath_descri = f"{colecao_xpath}//MODELINFORMATION[@DESCRIPTION='Painéis']//DESCRI/@REFERENCE"
-        elementos = tree.xpath(xpath_descri)
-        
-        espessuras = []
-        for elem in elementos:
-            # Verificar se é uma espessura válida (formato: "15mm", "18mm", etc.)
-            if re.match(r'^\d+mm$', elem):
-                if elem not in espessuras:
-                    espessuras.append(elem)
-        
-        return espessuras
+        return filtrar_espessuras(
+            _consultar_secao(tree, colecao_xpath, REFERENCIAS_DESCRI, SUFIXO_DESCRI, campo='Painéis')
+        )
         
     except Exception:
-        return [] 
\ No newline at end of file
+        return []
+
+
+def filtrar_espessuras(referencias: Iterable[str]) -> List[str]:
+    """
+    Filtra as referências que são espessuras (ex: "15mm"), sem duplicatas
+    
+    Args:
+        referencias: Valores de DESCRI/@REFERENCE
+        
+    Returns:
+        Lista com espessuras encontradas (ex: ["15mm"])
+    """
+    espessuras = []
+    for elem in referencias:
+        # Verificar se é uma espessura válida (formato: "15mm", "18mm", etc.)
+        if re.match(r'^\d+mm$', elem):
+            if elem not in espessuras:
+                espessuras.append(elem)
+    
+    return espessuras 
\ No newline at end of file
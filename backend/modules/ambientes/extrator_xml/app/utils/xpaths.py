@@ -0,0 +1,72 @@
+"""
+Consultas XPath do extrator, compiladas uma vez na importação do módulo
+
+As partes que mudam entre chamadas (coleção, campo, família) entram como
+variáveis XPath ($colecao, $campo, $familia) em vez de formatação de
+string: nenhuma expressão é montada ou compilada por chamada e descrições
+com aspas (ex: "Porta 1/2'") não quebram a consulta.
+
+Uso:
+```python
+VALORES_CAMPO(tree, colecao='Coleção Unique ', campo='4 - Cor Corpo')
+```
+
+Autor: Ricardo Borges - 2025
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+from lxml import etree
+
+_COLECAO = "//MODELCATEGORYINFORMATION[@DESCRIPTION=$colecao]"
+
+# Caminhos relativos à seção (MODELCATEGORYINFORMATION ou outra base)
+SUFIXO_VALORES = "//MODELINFORMATION[@DESCRIPTION=$campo]/MODELTYPEINFORMATIONS/MODELTYPEINFORMATION/@DESCRIPTION"
+SUFIXO_DESCRI = "//MODELINFORMATION[@DESCRIPTION=$campo]//DESCRI/@REFERENCE"
+
+# ============================================================================
+# REGISTRO
+# ============================================================================
+
+# Quantidade de ITEM de uma família (detecção da linha principal)
+ITENS_FAMILIA = etree.XPath("count(//ITEM[@FAMILY=$familia])")
+
+# A coleção existe no XML
+TEM_COLECAO = etree.XPath(f"boolean({_COLECAO})")
+
+# MODELTYPEINFORMATION/@DESCRIPTION de um campo da coleção
+VALORES_CAMPO = etree.XPath(_COLECAO + SUFIXO_VALORES)
+
+# DESCRI/@REFERENCE de um campo da coleção (espessuras Sublime)
+REFERENCIAS_DESCRI = etree.XPath(_COLECAO + SUFIXO_DESCRI)
+
+# Valores de todos os atributos da coleção (espessura Brilhart Color)
+ATRIBUTOS_COLECAO = etree.XPath(f"{_COLECAO}//@*")
+
+# ============================================================================
+# BASES INFORMADAS COMO XPATH
+# ============================================================================
+
+_BASE_COLECAO = re.compile(r"^//MODELCATEGORYINFORMATION\[@DESCRIPTION='([^']*)'\]$")
+
+
+def colecao_da_base(base_xpath: str) -> Optional[str]:
+    """
+    Nome da coleção quando `base_xpath` é a seção padrão
+    //MODELCATEGORYINFORMATION[@DESCRIPTION='...'] (None para outras bases)
+    """
+    encontrado = _BASE_COLECAO.match(base_xpath)
+    return encontrado.group(1) if encontrado else None
+
+
+@lru_cache(maxsize=64)
+def consulta_secao(base_xpath: str, sufixo: str) -> etree.XPath:
+    """
+    `base_xpath` + `sufixo` compilado na primeira chamada e reaproveitado
+
+    Para bases fora do padrão de coleção; o campo continua como variável
+    ($campo), então o cache cresce com as bases, não com os campos.
+    """
+    return etree.XPath(base_xpath + sufixo)
@@ -6,18 +6,43 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from supabase import Client
-from core.exceptions import NotFoundException, DatabaseException, ConflictException
+from postgrest.exceptions import APIError
+
+from core.database import AsyncDatabase, DatabaseUtils
+from core.exceptions import NotFoundException, DatabaseException, ConflictException, ValidationException
 
 logger = logging.getLogger(__name__)
 
+# Colunas de c_ambientes que a listagem pode projetar (?campos=)
+CAMPOS_AMBIENTE = (
+    'id', 'nome', 'cliente_id', 'valor_venda', 'data_importacao', 'hora_importacao',
+    'origem', 'created_at', 'updated_at'
+)
+
+# Campos aceitos na projeção: colunas, nome do cliente (JOIN), materiais_json e resumo
+CAMPOS_PROJECAO = CAMPOS_AMBIENTE + ('cliente_nome', 'materiais', 'resumo')
+
+# Resumo dos materiais: colunas geradas (sql/criar_resumo_materiais_ambiente.sql)
+# ou, enquanto elas não existem no banco, os mesmos caminhos do materiais_json
+RESUMO_COLUNAS = (
+    "linha:resumo_linha, cor_caixa:resumo_cor_caixa, "
+    "cor_porta:resumo_cor_porta, valor_total:resumo_valor_total"
+)
+RESUMO_JSON = (
+    "linha:materiais_json->>linha_detectada, cor_caixa:materiais_json->caixa->>cor, "
+    "cor_porta:materiais_json->portas->>cor, valor_total:materiais_json->valor_total->>valor_venda"
+)
+
+# Vira False após o banco responder que as colunas de resumo não existem (42703)
+_colunas_resumo_disponiveis = True
+
 
 class AmbienteRepository:
     """
     Classe responsável por acessar as tabelas de ambientes no Supabase
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
@@ -101,6 +126,9 @@ class AmbienteRepository:
         per_page: int = 20,
         limit: int = None,
         include_materiais: bool = False,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None,
+        campos: Optional[List[str]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -112,6 +140,10 @@ class AmbienteRepository:
             per_page: Itens por página
             limit: Alias para per_page (compatibilidade)
             include_materiais: Se deve incluir materiais na resposta
+            cursor: next_cursor da página anterior (paginação por keyset)
+            count: Modo de contagem do total (exact, planned, estimated, none)
+            campos: Projeção (CAMPOS_AMBIENTE, cliente_nome, materiais, resumo);
+                cada item traz só os campos pedidos
             
         Returns:
             Dicionário com items e informações de paginação
@@ -139,31 +171,21 @@ class AmbienteRepository:
             if include_materiais:
                 select_fields = f"{base_fields}, cliente:c_clientes!cliente_id(nome), materiais:c_ambientes_material!ambiente_id(materiais_json)"
             
-            # Query principal com filtros aplicados
-            query = self.db.table(self.table_ambientes).select(select_fields)
-            query = self._aplicar_filtros(query, filtros)
-            
-            # Query de contagem com mesmos filtros
-            count_query = self.db.table(self.table_ambientes).select('id', count='exact')
-            count_query = self._aplicar_filtros(count_query, filtros)
-            
-            # Executa contagem
-            count_result = count_query.execute()
-            total = count_result.count or 0
-            
-            # Ordenação (mais recentes primeiro)
-            query = query.order('created_at', desc=True)
+            if campos is not None:
+                return await self._listar_projecao(campos, filtros, page, per_page, cursor, count)
             
-            # Aplica paginação
-            offset = (page - 1) * per_page
-            query = query.limit(per_page).offset(offset)
+            # Query principal com filtros aplicados
+            # (o total vem no mesmo request, sem query de contagem separada)
+            query = self._consulta_pagina(select_fields, filtros, page, per_page, cursor, count)
             
             # Executa a query
-            result = query.execute()
+            result = await query.execute()
+            total = result.count
+            rows, next_cursor = DatabaseUtils.split_page(result.data, per_page)
             
             # Processa os dados retornados
             items = []
-            for item in result.data:
+            for item in rows:
                 # Extrai nome do cliente
                 if item.get('cliente'):
                     item['cliente_nome'] = item['cliente'].get('nome')
@@ -193,13 +215,104 @@ class AmbienteRepository:
                 'total': total,
                 'page': page,
                 'limit': per_page,
-                'pages': (total + per_page - 1) // per_page
+                'pages': DatabaseUtils.count_pages(total, per_page),
+                'next_cursor': next_cursor
             }
         
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar ambientes: {str(e)}")
             raise DatabaseException(f"Erro ao listar ambientes: {str(e)}")
     
+    def _consulta_pagina(self, select_fields: str, filtros, page: int, per_page: int, cursor, count):
+        """Select paginado da listagem, com filtros e contagem na mesma requisição"""
+        query = self.db.table(self.table_ambientes).select(
+            select_fields,
+            count=DatabaseUtils.count_method(count, cursor)
+        )
+        query = self._aplicar_filtros(query, filtros)
+        
+        # Ordenação (mais recentes primeiro) e paginação
+        return DatabaseUtils.apply_cursor_pagination(query, cursor, page, per_page)
+    
+    async def _listar_projecao(
+        self,
+        campos: List[str],
+        filtros: Optional[Dict[str, Any]],
+        page: int,
+        per_page: int,
+        cursor: Optional[str],
+        count: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Listagem só com os campos pedidos
+        
+        `resumo` vem das colunas geradas de c_ambientes_material em vez do
+        materiais_json inteiro. id e created_at são sempre buscados (cursor);
+        o id sempre volta nos itens.
+        """
+        global _colunas_resumo_disponiveis
+        
+        try:
+            result = await self._consulta_pagina(
+                self._campos_projecao(campos, _colunas_resumo_disponiveis),
+                filtros, page, per_page, cursor, count
+            ).execute()
+        except APIError as e:
+            if e.code != '42703' or 'resumo' not in campos or not _colunas_resumo_disponiveis:
+                raise
+            _colunas_resumo_disponiveis = False
+            logger.warning(
+                "Colunas de resumo de c_ambientes_material não encontradas - lendo do materiais_json. "
+                "Execute sql/criar_resumo_materiais_ambiente.sql"
+            )
+            result = await self._consulta_pagina(
+                self._campos_projecao(campos, False),
+                filtros, page, per_page, cursor, count
+            ).execute()
+        
+        rows, next_cursor = DatabaseUtils.split_page(result.data, per_page)
+        
+        items = []
+        for row in rows:
+            cliente = row.pop('cliente', None) or {}
+            if 'cliente_nome' in campos:
+                row['cliente_nome'] = cliente.get('nome')
+            for relacao in ('materiais', 'resumo'):
+                if relacao in row:
+                    # Relação 1:1 vem como objeto (ou lista, conforme o schema cache)
+                    dados = row[relacao]
+                    if isinstance(dados, list):
+                        dados = dados[0] if dados else None
+                    row[relacao] = dados.get('materiais_json') if relacao == 'materiais' and dados else dados
+            if 'valor_venda' in row and row['valor_venda'] is not None:
+                row['valor_venda'] = float(row['valor_venda'])
+            items.append({campo: row.get(campo) for campo in ('id', *campos)})
+        
+        return {
+            'items': items,
+            'total': result.count,
+            'page': page,
+            'limit': per_page,
+            'pages': DatabaseUtils.count_pages(result.count, per_page),
+            'next_cursor': next_cursor
+        }
+    
+    def _campos_projecao(self, campos: List[str], colunas_resumo: bool = True) -> str:
+        # id e created_at entram sempre: são o cursor da próxima página
+        selecionados = ['id', 'created_at'] + [
+            campo for campo in campos if campo in CAMPOS_AMBIENTE and campo not in ('id', 'created_at')
+        ]
+        if 'cliente_nome' in campos:
+            selecionados.append('cliente:c_clientes!cliente_id(nome)')
+        if 'materiais' in campos:
+            selecionados.append('materiais:c_ambientes_material!ambiente_id(materiais_json)')
+        if 'resumo' in campos:
+            resumo = RESUMO_COLUNAS if colunas_resumo else RESUMO_JSON
+            selecionados.append(f'resumo:c_ambientes_material!ambiente_id({resumo})')
+        return ', '.join(selecionados)
+    
     async def buscar_por_id(self, ambiente_id: str, include_materiais: bool = False) -> Dict[str, Any]:
         """
         Busca um ambiente específico pelo ID
@@ -215,41 +328,15 @@ class AmbienteRepository:
             NotFoundException: Se o ambiente não for encontrado
         """
         try:
-            # Query base com campos explícitos + JOIN para cliente
-            base_fields = "id, nome, cliente_id, valor_venda, data_importacao, hora_importacao, origem, created_at, updated_at"
-            select_fields = f"{base_fields}, cliente:c_clientes!cliente_id(nome)"
-            
-            # Se incluir materiais, adiciona LEFT JOIN
-            if include_materiais:
-                select_fields = f"{base_fields}, cliente:c_clientes!cliente_id(nome), materiais:c_ambientes_material!ambiente_id(materiais_json)"
-            
-            query = self.db.table(self.table_ambientes).select(select_fields).eq('id', ambiente_id)
-            result = query.execute()
+            query = self.db.table(self.table_ambientes).select(
+                self._campos_busca(include_materiais)
+            ).eq('id', ambiente_id)
+            result = await query.execute()
             
             if not result.data:
                 raise NotFoundException(f"Ambiente não encontrado: {ambiente_id}")
             
-            ambiente = result.data[0]
-            
-            # Processa dados relacionados
-            if ambiente.get('cliente'):
-                ambiente['cliente_nome'] = ambiente['cliente'].get('nome')
-                del ambiente['cliente']
-            
-            # Processa materiais se incluídos
-            if include_materiais and ambiente.get('materiais'):
-                materiais_data = ambiente['materiais']
-                if materiais_data and isinstance(materiais_data, dict):
-                    ambiente['materiais'] = materiais_data.get('materiais_json')
-                else:
-                    ambiente['materiais'] = None
-            elif not include_materiais:
-                ambiente.pop('materiais', None)
-            
-            # Converte valores monetários Decimal para float
-            ambiente = self._converter_decimal_para_float(ambiente)
-            
-            return ambiente
+            return self._processar_ambiente(result.data[0], include_materiais)
         
         except NotFoundException:
             raise
@@ -257,6 +344,65 @@ class AmbienteRepository:
             logger.error(f"Erro ao buscar ambiente {ambiente_id}: {str(e)}")
             raise DatabaseException(f"Erro ao buscar ambiente: {str(e)}")
     
+    async def buscar_por_ids(self, ambiente_ids: List[str], include_materiais: bool = False) -> List[Dict[str, Any]]:
+        """
+        Busca vários ambientes em uma única query
+        
+        Args:
+            ambiente_ids: IDs dos ambientes
+            include_materiais: Se deve incluir materiais na resposta
+            
+        Returns:
+            Ambientes encontrados, na ordem dos IDs informados
+        """
+        if not ambiente_ids:
+            return []
+        
+        try:
+            result = await self.db.table(self.table_ambientes).select(
+                self._campos_busca(include_materiais)
+            ).in_('id', ambiente_ids).execute()
+            
+            por_id = {
+                str(ambiente['id']): self._processar_ambiente(ambiente, include_materiais)
+                for ambiente in result.data or []
+            }
+            return [por_id[ambiente_id] for ambiente_id in ambiente_ids if ambiente_id in por_id]
+        
+        except Exception as e:
+            logger.error(f"Erro ao buscar ambientes: {str(e)}")
+            raise DatabaseException(f"Erro ao buscar ambientes: {str(e)}")
+    
+    def _campos_busca(self, include_materiais: bool) -> str:
+        # Query base com campos explícitos + JOIN para cliente
+        base_fields = "id, nome, cliente_id, valor_venda, data_importacao, hora_importacao, origem, created_at, updated_at"
+        select_fields = f"{base_fields}, cliente:c_clientes!cliente_id(nome)"
+        
+        # Se incluir materiais, adiciona LEFT JOIN
+        if include_materiais:
+            select_fields = f"{select_fields}, materiais:c_ambientes_material!ambiente_id(materiais_json)"
+        
+        return select_fields
+    
+    def _processar_ambiente(self, ambiente: Dict[str, Any], include_materiais: bool) -> Dict[str, Any]:
+        # Processa dados relacionados
+        if ambiente.get('cliente'):
+            ambiente['cliente_nome'] = ambiente['cliente'].get('nome')
+            del ambiente['cliente']
+        
+        # Processa materiais se incluídos
+        if include_materiais and ambiente.get('materiais'):
+            materiais_data = ambiente['materiais']
+            if materiais_data and isinstance(materiais_data, dict):
+                ambiente['materiais'] = materiais_data.get('materiais_json')
+            else:
+                ambiente['materiais'] = None
+        elif not include_materiais:
+            ambiente.pop('materiais', None)
+        
+        # Converte valores monetários Decimal para float
+        return self._converter_decimal_para_float(ambiente)
+    
     async def criar_ambiente(self, dados: Dict[str, Any]) -> Dict[str, Any]:
         """
         Cria um novo ambiente
@@ -272,7 +418,7 @@ class AmbienteRepository:
             dados_limpos = self._converter_decimal_para_float(dados)
             
             # Cria o ambiente
-            result = self.db.table(self.table_ambientes).insert(dados_limpos).execute()
+            result = await self.db.table(self.table_ambientes).insert(dados_limpos).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar ambiente")
@@ -283,6 +429,46 @@ class AmbienteRepository:
             logger.error(f"Erro ao criar ambiente: {str(e)}")
             raise DatabaseException(f"Erro ao criar ambiente: {str(e)}")
     
+    async def criar_ambientes_com_materiais(
+        self,
+        ambientes: List[Dict[str, Any]],
+        materiais: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Cria vários ambientes e seus materiais com dois inserts em lote
+        
+        Args:
+            ambientes: Dados dos ambientes
+            materiais: Dados dos materiais, na mesma ordem (sem ambiente_id)
+            
+        Returns:
+            IDs dos ambientes criados, na ordem informada
+        """
+        try:
+            result = await self.db.table(self.table_ambientes).insert(
+                [self._converter_decimal_para_float(dados) for dados in ambientes]
+            ).execute()
+            
+            ambiente_ids = [str(ambiente['id']) for ambiente in result.data or []]
+            if len(ambiente_ids) != len(ambientes):
+                raise DatabaseException("Erro ao criar ambientes")
+            
+            try:
+                await self.db.table(self.table_materiais).insert([
+                    {**dados, 'ambiente_id': ambiente_id}
+                    for ambiente_id, dados in zip(ambiente_ids, materiais)
+                ]).execute()
+            except Exception:
+                # Sem transação no PostgREST: desfaz os ambientes criados sem materiais
+                await self.db.table(self.table_ambientes).delete().in_('id', ambiente_ids).execute()
+                raise
+            
+            return ambiente_ids
+        
+        except Exception as e:
+            logger.error(f"Erro ao criar ambientes em lote: {str(e)}")
+            raise DatabaseException(f"Erro ao criar ambientes: {str(e)}")
+    
     async def atualizar_ambiente(
         self,
         ambiente_id: str,
@@ -310,7 +496,7 @@ class AmbienteRepository:
             
             # Atualiza o ambiente
             query = self.db.table(self.table_ambientes).update(dados_limpos).eq('id', ambiente_id)
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar ambiente")
@@ -341,11 +527,11 @@ class AmbienteRepository:
             await self.buscar_por_id(ambiente_id)
             
             # Exclui materiais relacionados primeiro (CASCADE)
-            self.db.table(self.table_materiais).delete().eq('ambiente_id', ambiente_id).execute()
+            await self.db.table(self.table_materiais).delete().eq('ambiente_id', ambiente_id).execute()
             
             # Exclui o ambiente (DELETE real)
             query = self.db.table(self.table_ambientes).delete().eq('id', ambiente_id)
-            result = query.execute()
+            result = await query.execute()
             
             return bool(result.data)
         
@@ -367,17 +553,17 @@ class AmbienteRepository:
         """
         try:
             # Verifica se já existe material para este ambiente
-            existing = self.db.table(self.table_materiais).select('*').eq('ambiente_id', dados['ambiente_id']).execute()
+            existing = await self.db.table(self.table_materiais).select('*').eq('ambiente_id', dados['ambiente_id']).execute()
             
             if existing.data:
                 # Atualiza material existente
-                result = self.db.table(self.table_materiais).update({
+                result = await self.db.table(self.table_materiais).update({
                     'materiais_json': dados['materiais_json'],
                     'xml_hash': dados.get('xml_hash')
                 }).eq('ambiente_id', dados['ambiente_id']).execute()
             else:
                 # Cria novo material
-                result = self.db.table(self.table_materiais).insert(dados).execute()
+                result = await self.db.table(self.table_materiais).insert(dados).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao salvar materiais do ambiente")
@@ -388,14 +574,58 @@ class AmbienteRepository:
             logger.error(f"Erro ao criar material ambiente: {str(e)}")
             raise DatabaseException(f"Erro ao salvar materiais: {str(e)}")
     
+    async def buscar_materiais_por_hashes(self, xml_hashes: List[str]) -> List[Dict[str, Any]]:
+        """
+        Materiais já importados de XMLs com o mesmo conteúdo
+        
+        Args:
+            xml_hashes: SHA-256 dos XMLs
+            
+        Returns:
+            Linhas com ambiente_id, materiais_json, xml_hash e o cliente_id do ambiente
+        """
+        if not xml_hashes:
+            return []
+        
+        try:
+            result = await self.db.table(self.table_materiais).select(
+                'ambiente_id, materiais_json, xml_hash, ambiente:c_ambientes!ambiente_id(cliente_id)'
+            ).in_('xml_hash', xml_hashes).execute()
+            
+            materiais = []
+            for item in result.data or []:
+                ambiente = item.pop('ambiente', None) or {}
+                item['cliente_id'] = ambiente.get('cliente_id')
+                materiais.append(item)
+            return materiais
+        
+        except Exception as e:
+            logger.error(f"Erro ao buscar materiais por hash: {str(e)}")
+            raise DatabaseException(f"Erro ao buscar materiais por hash: {str(e)}")
+    
+    async def atualizar_materiais_json(self, ambiente_id: str, materiais_json: Dict[str, Any]) -> None:
+        """
+        Regrava o materiais_json de um ambiente (seções extraídas sob demanda)
+        
+        Args:
+            ambiente_id: ID do ambiente
+            materiais_json: Materiais completos
+        """
+        try:
+            await self.db.table(self.table_materiais).update({
+                'materiais_json': materiais_json
+            }).eq('ambiente_id', ambiente_id).execute()
+        except Exception as e:
+            logger.error(f"Erro ao atualizar materiais do ambiente {ambiente_id}: {str(e)}")
+            raise DatabaseException(f"Erro ao atualizar materiais: {str(e)}")
+    
     async def obter_materiais_ambiente(self, ambiente_id: str):
         """Busca todos os materiais associados a um ambiente"""
-        query = "SELECT * FROM c_ambientes_material WHERE ambiente_id = :ambiente_id"
-        return await self.db.fetch_all(query, {"ambiente_id": ambiente_id})
+        result = await self.db.table(self.table_materiais).select('*').eq('ambiente_id', ambiente_id).execute()
+        return result.data or []
 
     async def excluir_materiais_por_ambiente_id(self, ambiente_id: str):
         """Exclui todos os materiais de um ambiente"""
-        query = "DELETE FROM c_ambientes_material WHERE ambiente_id = :ambiente_id"
-        await self.db.execute(query, {"ambiente_id": ambiente_id})
+        await self.db.table(self.table_materiais).delete().eq('ambiente_id', ambiente_id).execute()
     
  
\ No newline at end of file
@@ -81,6 +81,9 @@ class AmbienteResponse(AmbienteBase):
     # Materiais opcionais (apenas se solicitado com ?include=materiais)
     materiais: Optional[Dict[str, Any]] = None
     
+    # Importação XML: ambiente do mesmo cliente já importado com o mesmo arquivo
+    xml_duplicado_de: Optional[str] = None
+    
     # Controle do sistema
     created_at: datetime
     updated_at: datetime
@@ -93,6 +96,35 @@ class AmbienteResponse(AmbienteBase):
         }
 
 
+class ResumoMateriais(BaseModel):
+    """
+    Atributos dos materiais exibidos nas listagens
+    (colunas resumo_* de c_ambientes_material)
+    """
+    linha: Optional[str] = None
+    cor_caixa: Optional[str] = None
+    cor_porta: Optional[str] = None
+    valor_total: Optional[str] = None
+
+
+class AmbienteProjecao(BaseModel):
+    """
+    Ambiente na listagem com ?campos=: só os campos pedidos vão na resposta
+    """
+    id: Optional[str] = None
+    nome: Optional[str] = None
+    cliente_id: Optional[str] = None
+    cliente_nome: Optional[str] = None
+    valor_venda: Optional[float] = None
+    data_importacao: Optional[str] = None
+    hora_importacao: Optional[str] = None
+    origem: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    materiais: Optional[Dict[str, Any]] = None
+    resumo: Optional[ResumoMateriais] = None
+
+
 class AmbienteMaterialCreate(BaseModel):
     """
     Dados para criar/atualizar materiais de um ambiente
@@ -121,15 +153,48 @@ class AmbienteMaterialResponse(BaseModel):
         }
 
 
+class ItemImportacaoLote(BaseModel):
+    """
+    Resultado de um arquivo da importação de XML em lote
+    """
+    arquivo: str
+    sucesso: bool
+    ambiente: Optional[AmbienteResponse] = None
+    erro: Optional[str] = None
+
+
+class ImportacaoLoteResponse(BaseModel):
+    """
+    Resposta da importação de XML em lote (um item por arquivo, na ordem do envio)
+    """
+    total: int
+    importados: int
+    falhas: int
+    itens: list[ItemImportacaoLote]
+
+
 class AmbienteListResponse(BaseModel):
     """
     Resposta quando listamos vários ambientes
     """
     items: list[AmbienteResponse]
-    total: int
+    total: Optional[int]  # None com count=none ou em páginas com cursor
+    page: int
+    limit: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None  # Cursor para a próxima página (keyset)
+
+
+class AmbienteProjecaoListResponse(BaseModel):
+    """
+    Listagem com ?campos=: mesma paginação, itens só com os campos pedidos
+    """
+    items: list[AmbienteProjecao]
+    total: Optional[int]
     page: int
     limit: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class AmbienteFiltros(BaseModel):
@@ -1,18 +1,25 @@
 """Service de ambientes - lógica de negócios e validações"""
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Tuple, Union
 from datetime import datetime, date, time
 from decimal import Decimal
-from supabase import Client
+from pathlib import Path
+from core.config import settings
+from core.database import AsyncDatabase
 from core.exceptions import NotFoundException, ValidationException, DatabaseException
-from .repository import AmbienteRepository
+from .repository import CAMPOS_PROJECAO, AmbienteRepository
 from .schemas import (
     AmbienteCreate, AmbienteUpdate, AmbienteResponse, 
     AmbienteFiltros, AmbienteListResponse,
-    AmbienteMaterialCreate, AmbienteMaterialResponse
+    AmbienteProjecao, AmbienteProjecaoListResponse,
+    AmbienteMaterialCreate, AmbienteMaterialResponse,
+    ImportacaoLoteResponse
 )
 from .xml_importer import XMLImporter
-from ..clientes.services import ClienteService
+from .xml_executor import executor_extracao_xml
+from .xml_secoes import sem_indice, tem_secoes_pendentes
+from ..clientes.status_eventos import publicar_transicao_status
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +33,7 @@ class AmbienteService:
     - Conversão de tipos de dados
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o service com a conexão do banco.
         
@@ -36,8 +43,17 @@ class AmbienteService:
         self.repository = AmbienteRepository(db)
         self.xml_importer = XMLImporter(self)
     
-    async def listar_ambientes(self, filtros: Optional[AmbienteFiltros] = None, **paginacao) -> AmbienteListResponse:
-        """Lista ambientes com filtros e paginação"""
+    async def listar_ambientes(
+        self,
+        filtros: Optional[AmbienteFiltros] = None,
+        **paginacao
+    ) -> Union[AmbienteListResponse, AmbienteProjecaoListResponse]:
+        """
+        Lista ambientes com filtros e paginação
+        
+        Com `campos` (ver CAMPOS_PROJECAO), os itens trazem só os campos
+        pedidos; `resumo` traz linha, cores e valor total sem o materiais_json.
+        """
         try:
             if not filtros:
                 filtros = AmbienteFiltros()
@@ -48,6 +64,17 @@ class AmbienteService:
             order_by = paginacao.get('order_by', 'created_at')
             order_direction = paginacao.get('order_direction', 'desc')
             incluir_materiais = paginacao.get('incluir_materiais', False)
+            cursor = paginacao.get('cursor')
+            count = paginacao.get('count')
+            campos = paginacao.get('campos')
+            
+            if campos is not None:
+                invalidos = [campo for campo in campos if campo not in CAMPOS_PROJECAO]
+                if invalidos or not campos:
+                    raise ValidationException(
+                        f"Campos inválidos: {', '.join(invalidos) or '(vazio)'}. "
+                        f"Disponíveis: {', '.join(CAMPOS_PROJECAO)}"
+                    )
             
             if page < 1:
                 raise ValidationException("Página deve ser maior que 0")
@@ -64,17 +91,34 @@ class AmbienteService:
                 'per_page': per_page,
                 'order_by': order_by,
                 'order_direction': order_direction,
-                'include_materiais': incluir_materiais
+                'include_materiais': incluir_materiais,
+                'cursor': cursor,
+                'count': count,
+                'campos': campos
             })
             
             resultado = await self.repository.listar(**filtros_dict)
+            if campos is not None:
+                if 'materiais' in campos:
+                    await self._resolver_materiais(resultado['items'])
+                return AmbienteProjecaoListResponse(
+                    items=[AmbienteProjecao(**{campo: item[campo] for campo in campos}) for item in resultado['items']],
+                    total=resultado['total'],
+                    page=resultado['page'],
+                    limit=resultado['limit'],
+                    pages=resultado['pages'],
+                    next_cursor=resultado['next_cursor']
+                )
+            if incluir_materiais:
+                await self._resolver_materiais(resultado['items'])
             items = [AmbienteResponse(**item) for item in resultado['items']]
             return AmbienteListResponse(
                 items=items,
                 total=resultado['total'],
                 page=resultado['page'],
                 limit=resultado['limit'],
-                pages=resultado['pages']
+                pages=resultado['pages'],
+                next_cursor=resultado['next_cursor']
             )
         except ValidationException:
             raise
@@ -82,8 +126,18 @@ class AmbienteService:
             logger.error(f"Erro ao listar ambientes: {str(e)}")
             raise DatabaseException(f"Erro interno ao listar ambientes: {str(e)}")
     
-    async def buscar_ambiente_por_id(self, ambiente_id: str, incluir_materiais: bool = False) -> AmbienteResponse:
-        """Busca um ambiente específico por ID"""
+    async def buscar_ambiente_por_id(
+        self,
+        ambiente_id: str,
+        incluir_materiais: bool = False,
+        completar_materiais: bool = True
+    ) -> AmbienteResponse:
+        """
+        Busca um ambiente específico por ID
+        
+        Com `completar_materiais=False`, seções de materiais sob demanda
+        (xml_secoes) continuam pendentes.
+        """
         try:
             self._validar_id(ambiente_id)
             ambiente_dict = await self.repository.buscar_por_id(
@@ -92,6 +146,8 @@ class AmbienteService:
             )
             if not ambiente_dict:
                 raise NotFoundException(f"Ambiente com ID {ambiente_id} não encontrado")
+            if incluir_materiais:
+                await self._resolver_materiais([ambiente_dict], completar=completar_materiais)
             return AmbienteResponse(**ambiente_dict)
         except (NotFoundException, ValidationException):
             raise
@@ -157,13 +213,118 @@ class AmbienteService:
         """Obtém materiais de um ambiente"""
         try:
             await self.buscar_ambiente_por_id(ambiente_id)
-            return await self.repository.obter_materiais_ambiente(ambiente_id)
+            materiais = await self.repository.obter_materiais_ambiente(ambiente_id)
+            completos = await self._completar_secoes_pendentes(
+                [(item['ambiente_id'], item.get('materiais_json')) for item in materiais]
+            )
+            for item, materiais_json in zip(materiais, completos):
+                item['materiais_json'] = materiais_json
+            return materiais
         except (NotFoundException, ValidationException):
             raise
         except Exception as e:
             logger.error(f"Erro ao obter materiais ambiente {ambiente_id}: {str(e)}")
             raise DatabaseException(f"Erro interno ao obter materiais: {str(e)}")
     
+    async def buscar_materiais_por_hashes(self, xml_hashes: List[str]) -> List[Dict[str, Any]]:
+        """Materiais já importados de XMLs com o mesmo conteúdo (ver XMLImporter)"""
+        return await self.repository.buscar_materiais_por_hashes(xml_hashes)
+    
+    async def criar_ambientes_com_materiais(
+        self,
+        itens: List[Tuple[AmbienteCreate, Dict[str, Any], Optional[str]]]
+    ) -> List[AmbienteResponse]:
+        """
+        Cria vários ambientes com materiais (importação em lote)
+        
+        Dois inserts em lote e uma busca, em vez de criar_ambiente +
+        criar_material_ambiente + buscar_ambiente_por_id por ambiente.
+        
+        Args:
+            itens: (dados do ambiente, materiais_json, xml_hash)
+        """
+        if not itens:
+            return []
+        try:
+            for dados, materiais_json, _ in itens:
+                await self._validar_dados_ambiente(dados)
+                if not materiais_json:
+                    raise ValidationException("Dados de materiais são obrigatórios")
+            
+            ambiente_ids = await self.repository.criar_ambientes_com_materiais(
+                [dados.model_dump() for dados, _, _ in itens],
+                [{'materiais_json': materiais_json, 'xml_hash': xml_hash} for _, materiais_json, xml_hash in itens]
+            )
+            ambientes = await self.repository.buscar_por_ids(ambiente_ids, include_materiais=True)
+            await self._resolver_materiais(ambientes, completar=False)
+            return [AmbienteResponse(**ambiente) for ambiente in ambientes]
+        except ValidationException:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao criar ambientes em lote: {str(e)}")
+            raise DatabaseException(f"Erro interno ao criar ambientes: {str(e)}")
+    
+    async def _resolver_materiais(self, ambientes: List[Dict[str, Any]], completar: bool = True) -> None:
+        """'materiais' dos ambientes com as seções sob demanda resolvidas"""
+        completos = await self._completar_secoes_pendentes(
+            [(ambiente['id'], ambiente.get('materiais')) for ambiente in ambientes],
+            completar
+        )
+        for ambiente, materiais_json in zip(ambientes, completos):
+            ambiente['materiais'] = materiais_json
+    
+    async def _completar_secoes_pendentes(
+        self,
+        materiais: List[Tuple[str, Optional[Dict[str, Any]]]],
+        completar: bool = True
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Extrai as seções pendentes (xml_secoes) e grava o materiais_json completo
+        
+        Na primeira leitura as seções saem do índice compacto e são gravadas
+        de volta; nas seguintes já estão no materiais_json. O índice nunca
+        vai para a resposta.
+        
+        A extração roda no pool de processos (xml_executor), no máximo
+        `settings.xml_secoes_max_por_requisicao` ambientes por chamada; os
+        demais saem com `secoes_pendentes` e são completados nas próximas leituras.
+        
+        Args:
+            materiais: (ambiente_id, materiais_json)
+            completar: False só remove o índice
+        """
+        resolvidos = [materiais_json for _, materiais_json in materiais]
+        pendentes = [
+            indice for indice, (_, materiais_json) in enumerate(materiais)
+            if completar and tem_secoes_pendentes(materiais_json)
+        ][:max(0, settings.xml_secoes_max_por_requisicao)]
+        
+        extraidos = await asyncio.gather(
+            *(executor_extracao_xml.completar_secoes(materiais[indice][1]) for indice in pendentes),
+            return_exceptions=True
+        )
+        gravar = []
+        for indice, extraido in zip(pendentes, extraidos):
+            ambiente_id = materiais[indice][0]
+            if isinstance(extraido, Exception):
+                logger.warning(f"Seções pendentes do ambiente {ambiente_id} não extraídas: {str(extraido)}")
+                continue
+            resolvidos[indice] = extraido
+            gravar.append((ambiente_id, extraido))
+        resolvidos = [sem_indice(materiais_json) for materiais_json in resolvidos]
+        
+        # Falha ao gravar não impede a resposta: as seções são extraídas de novo na próxima leitura
+        gravados = await asyncio.gather(
+            *(self.repository.atualizar_materiais_json(ambiente_id, materiais_json)
+              for ambiente_id, materiais_json in gravar),
+            return_exceptions=True
+        )
+        for (ambiente_id, _), gravado in zip(gravar, gravados):
+            if isinstance(gravado, Exception):
+                logger.warning(f"Seções do ambiente {ambiente_id} não gravadas: {str(gravado)}")
+        
+        return resolvidos
+    
     def _validar_id(self, ambiente_id: str) -> None:
         if not ambiente_id or not ambiente_id.strip():
             raise ValidationException("ID do ambiente é obrigatório")
@@ -201,18 +362,49 @@ class AmbienteService:
         self._validar_nome(dados.nome, obrigatorio=False)
         self._validar_valores_monetarios(dados.valor_custo_fabrica, dados.valor_venda)
         self._validar_origem(dados.origem, obrigatorio=False)
-    async def importar_xml_ambiente(self, cliente_id: str, conteudo_xml: str, nome_arquivo: str, user=None) -> AmbienteResponse:
-        """Importa ambiente a partir de XML do Promob"""
-        resultado = await self.xml_importer.importar_xml(cliente_id, conteudo_xml, nome_arquivo)
+    async def importar_xml_ambiente(
+        self,
+        cliente_id: str,
+        conteudo_xml: Union[str, Path],
+        nome_arquivo: str,
+        user=None,
+        xml_hash: Optional[str] = None,
+        reportar: Optional[Callable[[int, str], Awaitable[None]]] = None
+    ) -> AmbienteResponse:
+        """
+        Importa ambiente a partir de XML do Promob
+        
+        `conteudo_xml` pode ser o arquivo temporário do upload (ver
+        xml_upload.receber_xml_upload), com o `xml_hash` calculado na leitura.
+        `reportar(progresso, etapa)` recebe o andamento (jobs em segundo plano).
+        """
+        resultado = await self.xml_importer.importar_xml(
+            cliente_id, conteudo_xml, nome_arquivo, xml_hash, reportar=reportar
+        )
         
         # TRIGGER AUTOMÁTICO: XML importado → Ordem 2 (Projeto Importado)
+        # (aplicado em segundo plano pelo barramento de eventos)
         if user:
-            try:
-                cliente_service = ClienteService()
-                await cliente_service.atualizar_status_cliente(cliente_id, 2, user)
-                logger.info(f"Status atualizado para ordem 2 - cliente {cliente_id}")
-            except Exception as status_error:
-                logger.warning(f"Erro ao atualizar status após import XML: {status_error}")
-                # Não falha a importação por erro de status
+            await publicar_transicao_status(cliente_id, 2, user)
+        
+        return resultado
+    
+    async def importar_xml_lote(
+        self,
+        cliente_id: str,
+        arquivos: List[Tuple[str, Union[str, Path], Optional[str]]],
+        user=None
+    ) -> ImportacaoLoteResponse:
+        """
+        Importa vários XMLs do Promob para o mesmo cliente
+        
+        Args:
+            arquivos: (nome do arquivo, conteúdo ou arquivo temporário, xml_hash)
+        """
+        resultado = await self.xml_importer.importar_lote(cliente_id, arquivos)
+        
+        # TRIGGER AUTOMÁTICO: XML importado → Ordem 2 (Projeto Importado)
+        if user and resultado.importados:
+            await publicar_transicao_status(cliente_id, 2, user)
         
         return resultado
\ No newline at end of file
@@ -2,10 +2,15 @@
 Funções utilitárias para o módulo de ambientes
 """
 import logging
-from typing import Optional
+from typing import Iterable, List, Optional
+
+from core.monetario import centavos_para_float, para_centavos
 
 logger = logging.getLogger(__name__)
 
+# Valores acima de R$ 10 milhões são tratados como erro de leitura
+LIMITE_CENTAVOS = 10_000_000 * 100
+
 
 def converter_valor_monetario(valor_str: Optional[str]) -> float:
     """Converte string de valor monetário para float de forma segura"""
@@ -18,31 +23,20 @@ def converter_valor_monetario(valor_str: Optional[str]) -> float:
     if valor_limpo in ['N/A', 'NA', '-', 'NULL', 'NONE', '']:
         return 0.0
     
-    try:
-        # Remover símbolos de moeda
-        for moeda in ['R$', 'RS', 'BRL', 'USD', '$', '€', '£', '¥']:
-            valor_limpo = valor_limpo.replace(moeda, '')
-        
-        valor_limpo = valor_limpo.strip()
-        
-        # Detectar formato BR vs US
-        if ',' in valor_limpo and '.' in valor_limpo:
-            if valor_limpo.rindex(',') > valor_limpo.rindex('.'):
-                valor_limpo = valor_limpo.replace('.', '').replace(',', '.')
-            else:
-                valor_limpo = valor_limpo.replace(',', '')
-        elif ',' in valor_limpo:
-            valor_limpo = valor_limpo.replace(',', '.')
-        
-        valor_final = float(valor_limpo)
-        
-        # Validações
-        if valor_final < 0 or valor_final > 10_000_000:
-            logger.warning(f"Valor monetário inválido: {valor_str}")
-            return 0.0
-        
-        return round(valor_final, 2)
-        
-    except (ValueError, AttributeError) as e:
-        logger.warning(f"Erro ao converter valor monetário '{valor_str}': {e}")
-        return 0.0
\ No newline at end of file
+    # Conversão em um passe (core.monetario), com cache por texto
+    centavos = para_centavos(valor_limpo)
+    if centavos is None:
+        logger.warning(f"Erro ao converter valor monetário '{valor_str}'")
+        return 0.0
+    
+    # Validações
+    if centavos < 0 or centavos > LIMITE_CENTAVOS:
+        logger.warning(f"Valor monetário inválido: {valor_str}")
+        return 0.0
+    
+    return centavos_para_float(centavos)
+
+
+def converter_valores_monetarios(valores: Iterable[Optional[str]]) -> List[float]:
+    """`converter_valor_monetario` de vários valores (textos repetidos convertidos uma vez)"""
+    return [converter_valor_monetario(valor) for valor in valores]
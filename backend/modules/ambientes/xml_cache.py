@@ -0,0 +1,120 @@
+"""
+Cache da extração de XML por hash do conteúdo
+
+O mesmo arquivo do Promob costuma ser importado mais de uma vez (reenvio,
+outro cliente, ambiente excluído e importado de novo). O `materiais_json`
+depende só do conteúdo do XML, então fica guardado pelo `xml_hash`:
+
+1. memória (LRU, `settings.xml_cache_max_itens`)
+2. disco opcional em `settings.temp_path`/xml_cache (`settings.xml_cache_disco`),
+   sobrevive a restarts e é compartilhado entre os workers do uvicorn
+3. banco: `c_ambientes_material.xml_hash` (consultado pelo XMLImporter)
+
+Só resultados completos (linha Unique/Sublime detectada) entram no cache: a
+importação básica usa o nome do arquivo, que muda entre uploads.
+"""
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.cache import CacheTTL
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUBDIRETORIO = 'xml_cache'
+
+
+class CacheMateriaisXML:
+    """
+    materiais_json por xml_hash, em memória e (opcionalmente) em disco
+
+    Uso:
+    ```python
+    materiais = cache_materiais_xml.obter(xml_hash)
+    if materiais is None:
+        ...  # extrai o XML
+        cache_materiais_xml.definir(xml_hash, materiais)
+    ```
+    """
+
+    def __init__(self, max_itens: int, ttl: float, diretorio: Optional[str] = None):
+        self._memoria = CacheTTL(max_itens, ttl=ttl)
+        self.diretorio = Path(diretorio) if diretorio else None
+        if self.diretorio is not None:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+
+    def obter(self, xml_hash: str) -> Optional[Dict[str, Any]]:
+        """materiais_json do XML ou None (memória, depois disco)"""
+        if not self._memoria.max_itens and self.diretorio is None:
+            return None
+
+        materiais = self._memoria.obter(xml_hash)
+        if materiais is not None:
+            return materiais
+
+        materiais = self._ler_disco(xml_hash)
+        if materiais is not None:
+            self._memoria.definir(xml_hash, materiais)
+        return materiais
+
+    def definir(self, xml_hash: str, materiais: Dict[str, Any]) -> None:
+        if self._memoria.max_itens:
+            self._memoria.definir(xml_hash, materiais)
+        self._gravar_disco(xml_hash, materiais)
+
+    def limpar(self) -> None:
+        """Limpa a memória (o disco é descartável: basta apagar o diretório)"""
+        self._memoria.limpar()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {**self._memoria.estatisticas(), 'disco': self.diretorio is not None}
+
+    # ========================================================================
+    # DISCO
+    # ========================================================================
+
+    def _arquivo(self, xml_hash: str) -> Optional[Path]:
+        # O hash é hexadecimal; qualquer outra coisa não vira nome de arquivo
+        if self.diretorio is None or not xml_hash.isalnum():
+            return None
+        return self.diretorio / f"{xml_hash}.json"
+
+    def _ler_disco(self, xml_hash: str) -> Optional[Dict[str, Any]]:
+        arquivo = self._arquivo(xml_hash)
+        if arquivo is None:
+            return None
+        try:
+            with open(arquivo, encoding='utf-8') as entrada:
+                return json.load(entrada)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache de XML em disco ilegível ({arquivo.name}): {e}")
+            return None
+
+    def _gravar_disco(self, xml_hash: str, materiais: Dict[str, Any]) -> None:
+        arquivo = self._arquivo(xml_hash)
+        if arquivo is None:
+            return
+        temporario = None
+        try:
+            # Grava em arquivo temporário e renomeia: leitores nunca veem JSON pela metade
+            descritor, temporario = tempfile.mkstemp(suffix='.tmp', dir=self.diretorio)
+            with os.fdopen(descritor, 'w', encoding='utf-8') as saida:
+                json.dump(materiais, saida, ensure_ascii=False, default=str)
+            os.replace(temporario, arquivo)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Não foi possível gravar o cache de XML em disco: {e}")
+            if temporario is not None and os.path.exists(temporario):
+                os.unlink(temporario)
+
+
+cache_materiais_xml = CacheMateriaisXML(
+    settings.xml_cache_max_itens,
+    ttl=settings.xml_cache_ttl,
+    diretorio=os.path.join(settings.temp_path, SUBDIRETORIO) if settings.xml_cache_disco else None
+)
@@ -0,0 +1,237 @@
+"""
+Executor da extração de XML do Promob (pool de processos)
+
+Parse e extração são CPU puro: rodando no handler async, um XML grande
+congelava todas as outras requisições do worker do uvicorn. Aqui a extração
+vai para um pool de `settings.xml_extracao_workers` processos, aquecidos na
+subida da API (lxml e extrator já importados), com tempo limite por
+importação (`settings.xml_extracao_timeout`).
+
+Cancelamento: se a requisição for cancelada ou o tempo esgotar, a extração
+que ainda está na fila é descartada; uma que já está rodando termina no
+worker e o resultado é ignorado.
+
+Com `XML_EXTRACAO_WORKERS=0` a extração roda em uma thread do próprio
+processo (desenvolvimento e testes).
+"""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from lxml import etree
+
+from core.config import settings
+from core.exceptions import ValidationException
+from .extrator_xml.app.extractors import XMLExtractor
+from .extrator_xml.app.models import ExtractionResult
+from .xml_secoes import completar_secoes
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_PARTE = 64 * 1024
+
+
+class XMLInvalidoError(ValueError):
+    """O arquivo não é um XML bem formado"""
+
+
+@dataclass
+class ExtracaoXML:
+    """Resultado da extração devolvido pelo worker"""
+    resultado: ExtractionResult
+    # AMBIENT/@DESCRIPTION sem o prefixo "Projeto - ", para a importação
+    # básica de XMLs sem linha Unique/Sublime
+    nome_ambiente: Optional[str] = None
+    # Preenchido quando o arquivo foi lido como latin-1 (hash do conteúdo em UTF-8)
+    xml_hash: Optional[str] = None
+    # Índice compacto (IndicePromob.compactar) quando só parte das seções foi extraída
+    indice: Optional[Dict[str, Any]] = None
+
+
+# ============================================================================
+# EXECUTADO NO WORKER
+# ============================================================================
+
+def extrair_xml(origem: Union[str, Path], secoes: Optional[List[str]] = None) -> ExtracaoXML:
+    """
+    Parseia e extrai um XML do Promob (string ou arquivo do upload)
+
+    Com `secoes`, extrai só as seções informadas e devolve também o índice
+    compacto, para as demais serem extraídas depois sem o XML.
+
+    Raises:
+        XMLInvalidoError: arquivo do upload que não é XML bem formado
+    """
+    extrator = XMLExtractor()
+    xml_hash = None
+    if isinstance(origem, Path):
+        root, xml_hash = _parsear_arquivo(origem)
+        resultado = extrator.extract(root, secoes)
+    else:
+        resultado = extrator.extract(origem, secoes)
+
+    nome_ambiente = None
+    if not resultado.success and extrator.tree is not None:
+        nome_ambiente = _nome_ambiente_basico(extrator.tree)
+
+    indice = extrator.indice_compacto() if secoes and resultado.success else None
+
+    return ExtracaoXML(resultado=resultado, nome_ambiente=nome_ambiente, xml_hash=xml_hash, indice=indice)
+
+
+def _parsear_arquivo(caminho: Path):
+    """Árvore do arquivo; XMLs recusados como UTF-8 são lidos como latin-1"""
+    try:
+        return _parsear_em_partes(caminho), None
+    except etree.XMLSyntaxError as erro:
+        erro_original = erro
+
+    sha256 = hashlib.sha256()
+    try:
+        root = _parsear_em_partes(caminho, 'iso-8859-1', sha256)
+    except etree.XMLSyntaxError:
+        raise XMLInvalidoError(str(erro_original))
+    return root, sha256.hexdigest()
+
+
+def _parsear_em_partes(caminho: Path, encoding: Optional[str] = None, sha256=None) -> etree._Element:
+    # Parser alimentado em partes: com etree.parse(arquivo) erros de encoding
+    # viram OSError do libxml2 em vez de XMLSyntaxError
+    parser = etree.XMLParser(encoding=encoding)
+    with open(caminho, 'rb') as arquivo:
+        for parte in iter(lambda: arquivo.read(TAMANHO_PARTE), b''):
+            if sha256 is not None:
+                # latin-1 decodifica byte a byte: a conversão por parte é exata
+                sha256.update(parte.decode('latin-1').encode('utf-8'))
+            parser.feed(parte)
+    return parser.close()
+
+
+def _nome_ambiente_basico(root: etree._Element) -> Optional[str]:
+    ambiente = root.find('.//AMBIENT')
+    if ambiente is None:
+        return None
+
+    nome = ambiente.get('DESCRIPTION', '').strip()
+    if nome.startswith('Projeto - '):
+        nome = nome[10:].strip()
+    return nome or None
+
+
+def _aquecer_worker() -> None:
+    """Initializer do pool: imports pesados feitos na subida do processo"""
+    import lxml.etree  # noqa: F401
+    from .extrator_xml.app.extractors import indice_promob, xml_extractor  # noqa: F401
+    from . import xml_secoes  # noqa: F401
+
+
+def _pronto() -> bool:
+    return True
+
+
+# ============================================================================
+# EXECUTOR
+# ============================================================================
+
+class ExecutorExtracaoXML:
+    """
+    Pool de processos para a extração de XML
+
+    Uso:
+    ```python
+    extracao = await executor_extracao_xml.extrair(caminho_do_upload)
+    ```
+    """
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = max(0, workers)
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._em_andamento = 0
+
+    def iniciar(self) -> None:
+        """Cria o pool e sobe todos os workers já aquecidos (não bloqueia)"""
+        if self.workers == 0 or self._pool is not None:
+            return
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn: não herda threads/conexões abertas do processo da API
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_aquecer_worker
+        )
+        for _ in range(self.workers):
+            self._pool.submit(_pronto)
+        logger.info(f"Pool de extração XML iniciado com {self.workers} workers")
+
+    def encerrar(self) -> None:
+        """Descarta a fila e encerra os workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def extrair(self, origem: Union[str, Path], secoes: Optional[List[str]] = None) -> ExtracaoXML:
+        """
+        Executa `extrair_xml` fora do event loop, com tempo limite
+
+        Raises:
+            XMLInvalidoError: arquivo que não é XML bem formado
+            ValidationException: extração excedeu o tempo limite
+        """
+        return await self._executar(extrair_xml, origem, secoes)
+
+    async def completar_secoes(self, materiais_json: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Executa `xml_secoes.completar_secoes` fora do event loop, com tempo limite
+
+        Raises:
+            ValueError: índice ausente ou extração sem sucesso
+            ValidationException: extração excedeu o tempo limite
+        """
+        return await self._executar(completar_secoes, materiais_json)
+
+    async def _executar(self, funcao, *args):
+        if self.workers and self._pool is None:
+            self.iniciar()
+
+        if self._pool is not None:
+            execucao = asyncio.wrap_future(self._pool.submit(funcao, *args))
+        else:
+            execucao = asyncio.get_running_loop().run_in_executor(None, funcao, *args)
+
+        self._em_andamento += 1
+        try:
+            # wait_for cancela a execução ao esgotar o tempo ou se a requisição for cancelada
+            return await asyncio.wait_for(execucao, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Extração de XML excedeu {self.timeout}s")
+            raise ValidationException(
+                f"Processamento do XML excedeu o tempo limite de {self.timeout:g}s"
+            )
+        except BrokenProcessPool:
+            # Worker morreu (ex: falta de memória): recria o pool na próxima importação
+            logger.error("Pool de extração XML quebrado - recriando")
+            self.encerrar()
+            raise
+        finally:
+            self._em_andamento -= 1
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Estado do pool (exposto no /health)"""
+        return {
+            'workers': self.workers or 'thread',
+            'ativo': self._pool is not None or self.workers == 0,
+            'em_andamento': self._em_andamento
+        }
+
+
+executor_extracao_xml = ExecutorExtracaoXML(
+    settings.xml_extracao_workers,
+    settings.xml_extracao_timeout
+)
@@ -1,17 +1,25 @@
 """
 Importador de XML para ambientes
 """
+import asyncio
 import logging
 import hashlib
 from datetime import datetime
-from typing import Dict, Any
+from pathlib import Path
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple, Union
 
+from core.config import settings
 from core.exceptions import ValidationException, DatabaseException
-from .schemas import AmbienteCreate, AmbienteMaterialCreate
-from .utils import converter_valor_monetario
+from .schemas import AmbienteCreate, AmbienteMaterialCreate, ImportacaoLoteResponse, ItemImportacaoLote
+from .utils import converter_valores_monetarios
+from .xml_cache import cache_materiais_xml
+from .xml_executor import XMLInvalidoError, executor_extracao_xml
+from .xml_secoes import CHAVE_INDICE, CHAVE_PENDENTES, SECOES_IMPORTACAO, SECOES_SOB_DEMANDA
 
 logger = logging.getLogger(__name__)
 
+BASICA = "Importação Básica"
+
 
 class XMLImporter:
     """Classe responsável pela importação de ambientes via XML"""
@@ -27,100 +35,247 @@ class XMLImporter:
         """Gera hash SHA256 do conteúdo XML"""
         return hashlib.sha256(conteudo_xml.encode('utf-8')).hexdigest()
     
-    async def importar_xml(self, cliente_id: str, conteudo_xml: str, nome_arquivo: str):
+    async def importar_xml(
+        self,
+        cliente_id: str,
+        conteudo_xml: Union[str, Path],
+        nome_arquivo: str,
+        xml_hash: Optional[str] = None,
+        reportar: Optional[Callable[[int, str], Awaitable[None]]] = None
+    ):
         """
         Importa ambiente a partir de XML do Promob
         Integra com o extrator XML e salva no banco
+        
+        Aceita a string do XML ou o arquivo temporário do upload; neste caso
+        o `xml_hash` vem calculado da leitura em partes. A extração roda no
+        pool de processos (xml_executor), fora do event loop.
+        
+        XMLs já importados (mesmo xml_hash) não são extraídos de novo: os
+        materiais vêm do cache (xml_cache) ou de c_ambientes_material, e o
+        ambiente retornado traz `xml_duplicado_de` quando o mesmo cliente já
+        tem um ambiente importado desse arquivo.
+        
+        `reportar(progresso, etapa)`, se informado, recebe o andamento.
         """
+        reportar = reportar or _sem_progresso
         try:
-            # Importação relativa correta sem modificar sys.path
-            from .extrator_xml.app.extractors.xml_extractor import XMLExtractor
-            
-            # Criar instância do extrator
-            extrator = XMLExtractor()
-            
-            # Processar XML
-            logger.info(f"Processando XML '{nome_arquivo}' com extrator")
-            resultado = extrator.extract(conteudo_xml)
-            
-            if not resultado.success:
-                # Se falhou por não detectar linhas específicas, tentar extração básica
-                if "linha (Unique/Sublime)" in resultado.error:
-                    logger.warning(f"XML sem linhas Unique/Sublime detectadas, fazendo importação básica")
-                    resultado = self._extrair_dados_basicos_xml(conteudo_xml, nome_arquivo)
-                else:
-                    raise ValidationException(f"Erro ao processar XML: {resultado.error}")
+            if xml_hash is None and isinstance(conteudo_xml, str):
+                xml_hash = self._gerar_hash_xml(conteudo_xml)
             
-            # Extrair valores monetários com validação robusta
-            valor_custo = converter_valor_monetario(
-                resultado.valor_total.custo_fabrica if resultado.valor_total else None
-            )
-            valor_venda = converter_valor_monetario(
-                resultado.valor_total.valor_venda if resultado.valor_total else None
-            )
+            materiais, importados = await self._buscar_materiais_importados([xml_hash] if xml_hash else [])
             
-            # Criar dados do ambiente
-            dados_ambiente = AmbienteCreate(
-                cliente_id=cliente_id,
-                nome=resultado.nome_ambiente or nome_arquivo.replace('.xml', ''),
-                valor_custo_fabrica=valor_custo,
-                valor_venda=valor_venda,
-                origem='xml',
-                data_importacao=datetime.now().date().isoformat(),
-                hora_importacao=datetime.now().time().isoformat()
-            )
+            if xml_hash in materiais:
+                logger.info(f"XML '{nome_arquivo}' já importado - reaproveitando materiais")
+                materiais_json, xml_hash_gravado = materiais[xml_hash], xml_hash
+            else:
+                await reportar(10, 'extraindo')
+                materiais_json, xml_hash_gravado = await self._extrair_materiais(conteudo_xml, nome_arquivo, xml_hash)
             
-            # Gerar hash do XML ANTES de criar o ambiente
-            xml_hash = self._gerar_hash_xml(conteudo_xml)
+            await reportar(70, 'salvando')
             
             # Criar ambiente
-            ambiente = await self.service.criar_ambiente(dados_ambiente)
-            
-            # Preparar dados para material
-            materiais_json = self._preparar_materiais_json(resultado)
+            ambiente = await self.service.criar_ambiente(
+                self._dados_ambiente(cliente_id, materiais_json, nome_arquivo)
+            )
             
             # Criar registro de material
             material_data = AmbienteMaterialCreate(
                 ambiente_id=ambiente.id,
                 materiais_json=materiais_json,
-                xml_hash=xml_hash
+                xml_hash=xml_hash_gravado
             )
             
             await self.service.criar_material_ambiente(ambiente.id, material_data)
             
             logger.info(f"Ambiente {ambiente.id} importado do XML com sucesso")
             
-            # Retornar ambiente com materiais
-            return await self.service.buscar_ambiente_por_id(ambiente.id, incluir_materiais=True)
+            # Retornar ambiente com materiais (seções sob demanda continuam pendentes)
+            ambiente_importado = await self.service.buscar_ambiente_por_id(
+                ambiente.id, incluir_materiais=True, completar_materiais=False
+            )
+            ambiente_importado.xml_duplicado_de = _duplicado_de(importados.get(xml_hash), cliente_id)
+            return ambiente_importado
             
-        except ValidationException:
+        except (ValidationException, XMLInvalidoError):
             raise
         except Exception as e:
             logger.error(f"Erro ao importar XML: {e}")
             raise DatabaseException(f"Erro ao processar XML: {str(e)}")
     
-    def _extrair_dados_basicos_xml(self, conteudo_xml: str, nome_arquivo: str):
+    async def importar_lote(
+        self,
+        cliente_id: str,
+        arquivos: List[Tuple[str, Union[str, Path], Optional[str]]]
+    ) -> ImportacaoLoteResponse:
+        """
+        Importa vários XMLs para o mesmo cliente
+        
+        Os XMLs são extraídos em paralelo no pool de processos (um por
+        conteúdo distinto; repetidos e já importados não são extraídos) e
+        gravados com inserts em lote: o número de idas ao banco não depende
+        da quantidade de arquivos. Falhas de um arquivo não impedem os demais.
+        
+        Args:
+            arquivos: (nome do arquivo, string do XML ou arquivo temporário, xml_hash)
+        """
+        itens = [ItemImportacaoLote(arquivo=nome, sucesso=False) for nome, _, _ in arquivos]
+        hashes = [
+            xml_hash or (self._gerar_hash_xml(conteudo) if isinstance(conteudo, str) else None)
+            for _, conteudo, xml_hash in arquivos
+        ]
+        
+        materiais, importados = await self._buscar_materiais_importados([h for h in hashes if h])
+        
+        # Uma extração por conteúdo distinto, no máximo uma por worker de cada vez
+        # (o tempo limite de cada extração conta a partir do envio ao pool)
+        pendentes: Dict[Any, int] = {}
+        for indice, xml_hash in enumerate(hashes):
+            if xml_hash not in materiais:
+                pendentes.setdefault(xml_hash or indice, indice)
+        
+        semaforo = asyncio.Semaphore(max(1, executor_extracao_xml.workers))
+        
+        async def extrair(indice: int):
+            nome, conteudo, _ = arquivos[indice]
+            async with semaforo:
+                return await self._extrair_materiais(conteudo, nome, hashes[indice])
+        
+        extraidos = dict(zip(
+            pendentes,
+            await asyncio.gather(*(extrair(indice) for indice in pendentes.values()), return_exceptions=True)
+        ))
+        
+        criar = []
+        for indice, (nome, _, _) in enumerate(arquivos):
+            xml_hash = hashes[indice]
+            try:
+                if xml_hash in materiais:
+                    materiais_json, xml_hash_gravado = materiais[xml_hash], xml_hash
+                else:
+                    extraido = extraidos[xml_hash or indice]
+                    if isinstance(extraido, BaseException):
+                        raise extraido
+                    materiais_json, xml_hash_gravado = extraido
+                
+                dados = self._dados_ambiente(cliente_id, materiais_json, nome)
+                criar.append((indice, dados, materiais_json, xml_hash_gravado))
+            except Exception as e:
+                itens[indice].erro = _mensagem_erro(e)
+                logger.warning(f"XML '{nome}' do lote não importado: {itens[indice].erro}")
+        
+        try:
+            ambientes = await self.service.criar_ambientes_com_materiais(
+                [(dados, materiais_json, xml_hash) for _, dados, materiais_json, xml_hash in criar]
+            )
+            for (indice, _, _, _), ambiente in zip(criar, ambientes):
+                ambiente.xml_duplicado_de = _duplicado_de(importados.get(hashes[indice]), cliente_id)
+                itens[indice].sucesso = True
+                itens[indice].ambiente = ambiente
+        except (ValidationException, DatabaseException) as e:
+            for indice, _, _, _ in criar:
+                itens[indice].erro = _mensagem_erro(e)
+        
+        importados_ok = sum(1 for item in itens if item.sucesso)
+        logger.info(f"Lote de XML do cliente {cliente_id}: {importados_ok}/{len(itens)} importados")
+        
+        return ImportacaoLoteResponse(
+            total=len(itens),
+            importados=importados_ok,
+            falhas=len(itens) - importados_ok,
+            itens=itens
+        )
+    
+    def _dados_ambiente(self, cliente_id: str, materiais_json: Dict[str, Any], nome_arquivo: str) -> AmbienteCreate:
+        """Dados do ambiente a partir dos materiais extraídos"""
+        # Extrair valores monetários com validação robusta
+        valor_total = materiais_json.get('valor_total') or {}
+        valor_custo, valor_venda = converter_valores_monetarios(
+            [valor_total.get('custo_fabrica'), valor_total.get('valor_venda')]
+        )
+        
+        return AmbienteCreate(
+            cliente_id=cliente_id,
+            nome=materiais_json.get('nome_ambiente') or nome_arquivo.replace('.xml', ''),
+            valor_custo_fabrica=valor_custo,
+            valor_venda=valor_venda,
+            origem='xml',
+            data_importacao=datetime.now().date().isoformat(),
+            hora_importacao=datetime.now().time().isoformat()
+        )
+    
+    async def _buscar_materiais_importados(self, xml_hashes: List[str]):
+        """
+        Materiais de XMLs já importados e as importações existentes no banco
+        
+        Returns:
+            ({xml_hash: materiais_json}, {xml_hash: linhas de c_ambientes_material})
+        """
+        if not xml_hashes:
+            return {}, {}
+        
+        # Uma consulta indexada: também informa se o cliente já importou cada XML
+        importados: Dict[str, List[Dict[str, Any]]] = {}
+        for item in await self.service.buscar_materiais_por_hashes(sorted(set(xml_hashes))):
+            importados.setdefault(item['xml_hash'], []).append(item)
+        
+        materiais = {}
+        for xml_hash in set(xml_hashes):
+            materiais_json = cache_materiais_xml.obter(xml_hash)
+            if materiais_json is None:
+                materiais_json = next(
+                    (item['materiais_json'] for item in importados.get(xml_hash, ())
+                     if _materiais_completos(item.get('materiais_json'))),
+                    None
+                )
+                if materiais_json is not None:
+                    cache_materiais_xml.definir(xml_hash, materiais_json)
+            if materiais_json is not None:
+                materiais[xml_hash] = materiais_json
+        
+        return materiais, importados
+    
+    async def _extrair_materiais(self, conteudo_xml: Union[str, Path], nome_arquivo: str, xml_hash: Optional[str]):
+        """
+        Extrai o XML no pool de processos
+        
+        Com `settings.xml_secoes_sob_demanda`, só as SECOES_IMPORTACAO; o
+        materiais_json leva o índice compacto para as demais (xml_secoes).
+        
+        Returns:
+            (materiais_json, xml_hash a gravar)
+        """
+        logger.info(f"Processando XML '{nome_arquivo}' com extrator")
+        secoes = SECOES_IMPORTACAO if settings.xml_secoes_sob_demanda else None
+        extracao = await executor_extracao_xml.extrair(conteudo_xml, secoes=secoes)
+        resultado = extracao.resultado
+        
+        if not resultado.success:
+            # Se falhou por não detectar linhas específicas, tentar extração básica
+            if "linha (Unique/Sublime)" in resultado.error:
+                logger.warning(f"XML sem linhas Unique/Sublime detectadas, fazendo importação básica")
+                resultado = self._extrair_dados_basicos_xml(extracao.nome_ambiente, nome_arquivo)
+            else:
+                raise ValidationException(f"Erro ao processar XML: {resultado.error}")
+        
+        materiais_json = self._preparar_materiais_json(resultado, extracao.indice)
+        
+        # Arquivos lidos como latin-1 têm o hash recalculado pelo worker sobre o conteúdo
+        # em UTF-8 (o gravado no banco; xml_upload.HashXML já chega com ele); o cache
+        # fica sob os dois
+        hashes = {xml_hash, extracao.xml_hash} - {None}
+        if _materiais_completos(materiais_json):
+            for chave in hashes:
+                cache_materiais_xml.definir(chave, materiais_json)
+        
+        return materiais_json, extracao.xml_hash or xml_hash
+    
+    def _extrair_dados_basicos_xml(self, nome_ambiente: Optional[str], nome_arquivo: str):
         """
         Extração básica para XMLs que não têm estrutura Unique/Sublime
-        Extrai apenas nome do ambiente e tenta encontrar valores básicos
+        Usa apenas o nome do ambiente (lido do AMBIENT pelo worker)
         """
         try:
-            from xml.etree import ElementTree as ET
-            from .schemas import AmbienteCreate
-            
-            # Parse básico do XML
-            root = ET.fromstring(conteudo_xml)
-            
-            # Tentar extrair nome do ambiente
-            nome_ambiente = None
-            
-            # Tentativas de encontrar nome do ambiente
-            ambiente_element = root.find('.//AMBIENT')
-            if ambiente_element is not None:
-                nome_ambiente = ambiente_element.get('DESCRIPTION', '').strip()
-                if nome_ambiente and nome_ambiente.startswith('Projeto - '):
-                    nome_ambiente = nome_ambiente[10:].strip()
-            
             # Se não encontrou, usar nome do arquivo
             if not nome_ambiente:
                 nome_ambiente = nome_arquivo.replace('.xml', '').replace('_', ' ')
@@ -129,7 +284,7 @@ class XMLImporter:
             class ResultadoBasico:
                 def __init__(self):
                     self.success = True
-                    self.linha_detectada = "Importação Básica"
+                    self.linha_detectada = BASICA
                     self.nome_ambiente = nome_ambiente
                     self.valor_total = None
                     self.caixa = None
@@ -147,9 +302,13 @@ class XMLImporter:
             logger.error(f"Erro na extração básica: {str(e)}")
             raise ValidationException(f"Não foi possível processar este arquivo XML: {str(e)}")
     
-    def _preparar_materiais_json(self, resultado) -> Dict[str, Any]:
-        """Prepara dados de materiais do resultado do extrator XML"""
-        return {
+    def _preparar_materiais_json(self, resultado, indice: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Prepara dados de materiais do resultado do extrator XML
+        
+        Com o índice compacto, as seções sob demanda ficam pendentes
+        """
+        materiais_json = {
             'linha_detectada': resultado.linha_detectada,
             'nome_ambiente': resultado.nome_ambiente,
             'caixa': resultado.caixa.model_dump() if resultado.caixa else None,
@@ -160,4 +319,31 @@ class XMLImporter:
             'brilhart_color': resultado.brilhart_color.model_dump() if resultado.brilhart_color else None,
             'valor_total': resultado.valor_total.model_dump() if resultado.valor_total else None,
             'metadata': resultado.metadata.model_dump() if resultado.metadata else None
-        }
\ No newline at end of file
+        }
+        if indice is not None:
+            materiais_json[CHAVE_PENDENTES] = list(SECOES_SOB_DEMANDA)
+            materiais_json[CHAVE_INDICE] = indice
+        return materiais_json
+
+
+def _materiais_completos(materiais_json: Optional[Dict[str, Any]]) -> bool:
+    """Resultado reaproveitável: a importação básica depende do nome do arquivo"""
+    return bool(materiais_json) and materiais_json.get('linha_detectada') not in (None, BASICA)
+
+
+async def _sem_progresso(progresso: int, etapa: str) -> None:
+    pass
+
+
+def _duplicado_de(importados: Optional[List[Dict[str, Any]]], cliente_id: str) -> Optional[str]:
+    """Ambiente do mesmo cliente já importado do mesmo XML"""
+    return next((item['ambiente_id'] for item in importados or () if item.get('cliente_id') == cliente_id), None)
+
+
+def _mensagem_erro(erro: Exception) -> str:
+    """Mensagem de falha de um arquivo do lote"""
+    if isinstance(erro, XMLInvalidoError):
+        return f"Arquivo XML inválido: {str(erro)}"
+    if isinstance(erro, (ValidationException, DatabaseException)):
+        return erro.detail
+    return f"Erro ao processar XML: {str(erro)}"
@@ -0,0 +1,51 @@
+"""
+Importação de XML em segundo plano (core.jobs)
+
+O upload é gravado em um arquivo temporário na requisição
+(`xml_upload.salvar_xml_upload`) e o job recebe apenas o caminho; o
+arquivo é removido ao final do processamento, com sucesso ou erro.
+"""
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+from core.database import get_database
+from core.exceptions import ValidationException
+from core.jobs import Job, Reportar, gerenciador_jobs
+
+from .service import AmbienteService
+from .xml_executor import XMLInvalidoError
+from .xml_upload import remover_temporario
+
+logger = logging.getLogger(__name__)
+
+TIPO_IMPORTAR_XML = 'importar_xml'
+
+
+async def processar_importacao_xml(job: Job, reportar: Reportar) -> Dict[str, Any]:
+    """
+    Handler do job `importar_xml`
+
+    Parâmetros do job: cliente_id, caminho, nome_arquivo, xml_hash.
+    Resultado: o ambiente criado (mesmo formato de POST /ambientes/importar-xml).
+    """
+    parametros = job.parametros
+    caminho = Path(parametros['caminho'])
+    try:
+        service = AmbienteService(get_database())
+        ambiente = await service.importar_xml_ambiente(
+            cliente_id=parametros['cliente_id'],
+            conteudo_xml=caminho,
+            nome_arquivo=parametros['nome_arquivo'],
+            xml_hash=parametros.get('xml_hash'),
+            reportar=reportar
+        )
+        logger.info(f"Ambiente {ambiente.id} criado via XML (job {job.id})")
+        return ambiente.model_dump(mode='json')
+    except XMLInvalidoError as e:
+        raise ValidationException(f"Arquivo XML inválido: {str(e)}")
+    finally:
+        remover_temporario(caminho)
+
+
+gerenciador_jobs.registrar(TIPO_IMPORTAR_XML, processar_importacao_xml)
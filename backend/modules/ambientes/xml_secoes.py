@@ -0,0 +1,70 @@
+"""
+Seções do XML extraídas sob demanda (`settings.xml_secoes_sob_demanda`)
+
+Na importação só as seções usadas para criar o ambiente (caixa, painéis e
+valor total) são extraídas; o `materiais_json` gravado leva também o índice
+compacto do XML (IndicePromob.compactar) e a lista das seções pendentes.
+Portas/ferragens, porta perfil e Brilhart Color são extraídas do índice na
+primeira leitura dos materiais e gravadas de volta no `materiais_json`; a
+partir daí o índice é descartado.
+
+O índice nunca sai nas respostas da API (`sem_indice`).
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from .extrator_xml.app.extractors import XMLExtractor
+from .extrator_xml.app.extractors.indice_promob import IndicePromob
+
+logger = logging.getLogger(__name__)
+
+# Seções extraídas na importação: as que o ambiente precisa para ser criado
+SECOES_IMPORTACAO = ['caixa', 'paineis', 'valor_total']
+SECOES_SOB_DEMANDA = ['portas', 'ferragens', 'porta_perfil', 'brilhart_color']
+
+CHAVE_INDICE = 'indice_xml'
+CHAVE_PENDENTES = 'secoes_pendentes'
+
+
+def tem_secoes_pendentes(materiais_json: Optional[Dict[str, Any]]) -> bool:
+    return bool(materiais_json) and bool(materiais_json.get(CHAVE_PENDENTES))
+
+
+def completar_secoes(materiais_json: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    materiais_json com as seções pendentes extraídas do índice compacto
+
+    Raises:
+        ValueError: índice ausente ou extração sem sucesso
+    """
+    pendentes: List[str] = materiais_json[CHAVE_PENDENTES]
+    dados_indice = materiais_json.get(CHAVE_INDICE)
+    if not dados_indice:
+        raise ValueError("materiais sem o índice do XML para as seções pendentes")
+
+    resultado = XMLExtractor().extract(IndicePromob.de_compacto(dados_indice), pendentes)
+    if not resultado.success:
+        raise ValueError(resultado.error)
+
+    completo = {
+        chave: valor for chave, valor in materiais_json.items()
+        if chave not in (CHAVE_INDICE, CHAVE_PENDENTES)
+    }
+    for secao in pendentes:
+        modelo = getattr(resultado, secao)
+        completo[secao] = modelo.model_dump() if modelo else None
+
+    metadata = dict(completo.get('metadata') or {})
+    metadata['sections_extracted'] = list(dict.fromkeys(
+        list(metadata.get('sections_extracted') or []) + resultado.metadata.sections_extracted
+    ))
+    metadata['warnings'] = list(metadata.get('warnings') or []) + resultado.metadata.warnings
+    completo['metadata'] = metadata
+    return completo
+
+
+def sem_indice(materiais_json: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """materiais_json para respostas da API: sem o índice compacto"""
+    if not materiais_json or CHAVE_INDICE not in materiais_json:
+        return materiais_json
+    return {chave: valor for chave, valor in materiais_json.items() if chave != CHAVE_INDICE}
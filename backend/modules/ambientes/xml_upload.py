@@ -0,0 +1,290 @@
+"""
+Leitura em partes do upload de XML do Promob
+
+O arquivo é lido em partes de `settings.xml_upload_chunk_size` bytes e cada
+parte vai para o SHA-256 do xml_hash e para um arquivo temporário em
+`settings.temp_path`. O limite de tamanho é verificado durante a leitura e
+nenhuma cópia inteira do arquivo (bytes ou string decodificada) fica na
+memória da API: parse e extração rodam no pool de processos (xml_executor)
+a partir do arquivo temporário.
+
+Importação em lote: vários .xml e/ou .zip com XMLs, gravados em um
+diretório temporário por lote (`receber_lote_xml`).
+"""
+import asyncio
+import codecs
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class XMLRecebido:
+    """Arquivo temporário com o upload e hash do conteúdo"""
+    caminho: Path
+    xml_hash: str
+    tamanho: int
+
+
+class HashXML:
+    """
+    SHA-256 canônico do XML: o dos bytes, ou o do conteúdo convertido para
+    UTF-8 quando o arquivo não é UTF-8 válido (lido como latin-1, como faz
+    o worker em xml_executor). Calculado em partes, junto com a gravação.
+    """
+
+    def __init__(self):
+        self._bytes = hashlib.sha256()
+        self._utf8 = hashlib.sha256()
+        self._decodificador = codecs.getincrementaldecoder('utf-8')()
+        self._utf8_valido = True
+
+    def update(self, parte: bytes) -> None:
+        self._bytes.update(parte)
+        # latin-1 decodifica byte a byte: a conversão por parte é exata
+        self._utf8.update(parte.decode('latin-1').encode('utf-8'))
+        if self._utf8_valido:
+            try:
+                self._decodificador.decode(parte)
+            except UnicodeDecodeError:
+                self._utf8_valido = False
+
+    def hexdigest(self) -> str:
+        if self._utf8_valido:
+            try:
+                self._decodificador.decode(b'', final=True)
+            except UnicodeDecodeError:
+                self._utf8_valido = False
+        return (self._bytes if self._utf8_valido else self._utf8).hexdigest()
+
+
+@dataclass
+class ArquivoLote:
+    """Um XML do lote (upload direto ou item de um .zip) ou o erro ao recebê-lo"""
+    nome: str
+    recebido: Optional[XMLRecebido] = None
+    erro: Optional[str] = None
+
+
+@asynccontextmanager
+async def receber_xml_upload(
+    arquivo: UploadFile,
+    tamanho_maximo: Optional[int] = None
+) -> AsyncIterator[XMLRecebido]:
+    """
+    Grava o upload em um arquivo temporário, removido ao sair do bloco
+
+    O hash é o SHA-256 do conteúdo em UTF-8 (`HashXML`): igual ao que o
+    worker (xml_executor) grava para arquivos latin-1, então reenviar o
+    mesmo arquivo encontra a importação anterior.
+
+    Uso:
+    ```python
+    async with receber_xml_upload(arquivo) as recebido:
+        await service.importar_xml_ambiente(..., conteudo_xml=recebido.caminho)
+    ```
+
+    Raises:
+        HTTPException 400: arquivo vazio ou maior que o limite
+    """
+    recebido = await salvar_xml_upload(arquivo, tamanho_maximo)
+    try:
+        yield recebido
+    finally:
+        remover_temporario(recebido.caminho)
+
+
+async def salvar_xml_upload(
+    arquivo: UploadFile,
+    tamanho_maximo: Optional[int] = None
+) -> XMLRecebido:
+    """
+    Grava o upload em um arquivo temporário que continua em disco
+
+    Para processamento fora da requisição (jobs): quem recebe o arquivo é
+    responsável por removê-lo (`remover_temporario`). Em caso de erro na
+    leitura o arquivo já é removido aqui.
+
+    Raises:
+        HTTPException 400: arquivo vazio ou maior que o limite
+    """
+    tamanho_maximo = tamanho_maximo or settings.max_file_size_bytes
+    descritor, nome = tempfile.mkstemp(suffix='.xml', dir=settings.temp_path)
+    os.close(descritor)
+    caminho = Path(nome)
+
+    try:
+        xml_hash, tamanho = await _gravar_upload(arquivo, caminho, tamanho_maximo)
+    except BaseException:
+        remover_temporario(caminho)
+        raise
+    return XMLRecebido(caminho=caminho, xml_hash=xml_hash, tamanho=tamanho)
+
+
+def remover_temporario(caminho: Path) -> None:
+    try:
+        caminho.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Não foi possível remover o XML temporário {caminho}: {e}")
+
+
+@asynccontextmanager
+async def receber_lote_xml(
+    arquivos: List[UploadFile],
+    max_arquivos: Optional[int] = None,
+    tamanho_maximo: Optional[int] = None
+) -> AsyncIterator[List[ArquivoLote]]:
+    """
+    Grava os XMLs de um lote (arquivos .xml e/ou .zip) em um diretório temporário
+
+    Arquivos recusados (nome, extensão, tamanho, ZIP inválido) entram no lote
+    com `erro` preenchido em vez de interromper os demais. Itens de .zip que
+    não são .xml (pastas, __MACOSX) são ignorados. O diretório é removido ao
+    sair do bloco.
+
+    Raises:
+        HTTPException 400: lote com mais de `max_arquivos` XMLs
+    """
+    max_arquivos = max_arquivos or settings.xml_lote_max_arquivos
+    tamanho_maximo = tamanho_maximo or settings.max_file_size_bytes
+    diretorio = Path(tempfile.mkdtemp(prefix='lote_', dir=settings.temp_path))
+
+    try:
+        lote: List[ArquivoLote] = []
+        for arquivo in arquivos:
+            nome = os.path.basename(arquivo.filename or '')
+            try:
+                # Previne path traversal (mesma regra do upload individual)
+                if not nome or nome != arquivo.filename:
+                    raise HTTPException(status_code=400, detail="Nome de arquivo inválido")
+
+                if nome.lower().endswith('.zip'):
+                    caminho_zip = diretorio / f"{len(lote)}.zip"
+                    await _gravar_upload(arquivo, caminho_zip, tamanho_maximo * max_arquivos)
+                    # Descompactar é CPU/disco: fora do event loop
+                    lote.extend(await asyncio.to_thread(
+                        _extrair_zip, caminho_zip, nome, tamanho_maximo, max_arquivos - len(lote) + 1
+                    ))
+                    caminho_zip.unlink()
+                elif nome.lower().endswith('.xml'):
+                    caminho = diretorio / f"{len(lote)}.xml"
+                    xml_hash, tamanho = await _gravar_upload(arquivo, caminho, tamanho_maximo)
+                    lote.append(ArquivoLote(nome, XMLRecebido(caminho, xml_hash, tamanho)))
+                else:
+                    raise HTTPException(status_code=400, detail="Apenas arquivos .xml ou .zip são permitidos")
+            except HTTPException as e:
+                lote.append(ArquivoLote(nome or (arquivo.filename or ''), erro=e.detail))
+
+            if len(lote) > max_arquivos:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Lote com mais de {max_arquivos} arquivos XML"
+                )
+
+        yield lote
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+async def _gravar_upload(arquivo: UploadFile, destino: Path, tamanho_maximo: int) -> Tuple[str, int]:
+    """Copia o upload em partes para `destino`. Retorna (xml_hash, tamanho)"""
+    hash_xml = HashXML()
+    tamanho = 0
+
+    with open(destino, 'wb') as saida:
+        while True:
+            parte = await arquivo.read(settings.xml_upload_chunk_size)
+            if not parte:
+                break
+
+            tamanho += len(parte)
+            if tamanho > tamanho_maximo:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Arquivo muito grande (máximo {tamanho_maximo // (1024 * 1024)}MB)"
+                )
+
+            hash_xml.update(parte)
+            saida.write(parte)
+
+    if not tamanho:
+        raise HTTPException(
+            status_code=400,
+            detail="Arquivo XML está vazio"
+        )
+
+    return hash_xml.hexdigest(), tamanho
+
+
+def _extrair_zip(
+    caminho_zip: Path,
+    nome_zip: str,
+    tamanho_maximo: int,
+    limite: int
+) -> List[ArquivoLote]:
+    """XMLs de um .zip, cada um em um arquivo ao lado do .zip (até `limite`)"""
+    try:
+        compactado = zipfile.ZipFile(caminho_zip)
+    except zipfile.BadZipFile:
+        return [ArquivoLote(nome_zip, erro="Arquivo ZIP inválido")]
+
+    itens: List[ArquivoLote] = []
+    with compactado:
+        for info in compactado.infolist():
+            # Só o nome do item é usado: caminhos dentro do zip nunca viram caminhos em disco
+            nome = os.path.basename(info.filename)
+            if info.is_dir() or '__MACOSX' in info.filename or nome.startswith('._'):
+                continue
+            if not nome.lower().endswith('.xml'):
+                continue
+            if len(itens) >= limite:
+                break
+
+            try:
+                itens.append(ArquivoLote(nome, _copiar_item_zip(
+                    compactado, info, caminho_zip.with_suffix(f".{len(itens)}.xml"), tamanho_maximo
+                )))
+            except ValueError as e:
+                itens.append(ArquivoLote(nome, erro=str(e)))
+            except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+                itens.append(ArquivoLote(nome, erro=f"Item do ZIP ilegível: {e}"))
+
+    if not itens:
+        return [ArquivoLote(nome_zip, erro="Nenhum arquivo .xml no ZIP")]
+    return itens
+
+
+def _copiar_item_zip(compactado: zipfile.ZipFile, info: zipfile.ZipInfo, destino: Path, tamanho_maximo: int) -> XMLRecebido:
+    mensagem_limite = f"Arquivo muito grande (máximo {tamanho_maximo // (1024 * 1024)}MB)"
+    if info.file_size > tamanho_maximo:
+        raise ValueError(mensagem_limite)
+
+    hash_xml = HashXML()
+    tamanho = 0
+    # O tamanho declarado no zip pode mentir (zip bomb): o limite vale também na cópia
+    with compactado.open(info) as entrada, open(destino, 'wb') as saida:
+        for parte in iter(lambda: entrada.read(settings.xml_upload_chunk_size), b''):
+            tamanho += len(parte)
+            if tamanho > tamanho_maximo:
+                raise ValueError(mensagem_limite)
+            hash_xml.update(parte)
+            saida.write(parte)
+
+    if not tamanho:
+        raise ValueError("Arquivo XML está vazio")
+    return XMLRecebido(caminho=destino, xml_hash=hash_xml.hexdigest(), tamanho=tamanho)
@@ -5,12 +5,11 @@ import logging
 from typing import Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPAuthorizationCredentials
-from supabase import Client as Supabase
 
 from core.auth import get_current_user, security, User
 from core.dependencies import SuccessResponse
 from core.exceptions import UnauthorizedException, ValidationException
-from core.database import get_database
+from core.database import get_database, get_supabase, AsyncDatabase
 
 from .schemas import (
     LoginRequest,
@@ -35,7 +34,7 @@ auth_service = AuthService()
 async def login(
     credentials: LoginRequest,
     request: Request,
-    db: Supabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ) -> LoginResponse:
     """
     Autentica um usuário no sistema
@@ -51,7 +50,7 @@ async def login(
         
         # Tentar autenticar com Supabase Auth
         try:
-            auth_response = db.auth.sign_in_with_password({
+            auth_response = get_supabase().client.auth.sign_in_with_password({
                 "email": credentials.email,
                 "password": credentials.password
             })
@@ -86,7 +85,7 @@ async def login(
         
         # Buscar dados do usuário na tabela cad_equipe (Equipe)
         try:
-            equipe_response = db.table("cad_equipe")\
+            equipe_response = await db.table("cad_equipe")\
                 .select("*")\
                 .eq("email", credentials.email)\
                 .eq("ativo", True)\
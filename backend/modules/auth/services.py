@@ -25,7 +25,7 @@ class AuthService:
         # Usar o cliente e admin diretamente
         from core.database import _supabase
         self.supabase = _supabase.client
-        self.supabase_admin = _supabase.admin
+        self.supabase_admin = _supabase.admin_database
     
     async def login(self, email: str, password: str) -> LoginResponse:
         """
@@ -132,9 +132,11 @@ class AuthService:
         """
         try:
             # Cria cliente com token específico
-            client = self.supabase.get_client_with_auth(access_token)
+            supabase = get_supabase()
+            client = supabase.get_client_with_auth(access_token)
             
-            # Faz logout no Supabase
+            # Remove clientes em cache do token e faz logout no Supabase
+            supabase.invalidar_token(access_token)
             client.auth.sign_out()
             
             return True
@@ -188,7 +190,7 @@ class AuthService:
         """
         try:
             # Buscar na tabela usuarios
-            result = self.supabase_admin.table('usuarios').select('*').eq('user_id', user_id).execute()
+            result = await self.supabase_admin.table('usuarios').select('*').eq('user_id', user_id).execute()
             
             if result.data:
                 user_data = result.data[0]
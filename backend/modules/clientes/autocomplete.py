@@ -0,0 +1,265 @@
+"""
+Autocomplete de clientes com índice de prefixos em memória, por loja
+
+O seletor de clientes faz uma busca por tecla; a listagem (/clientes) tem
+JOIN com cad_equipe e c_procedencias e conta o total a cada chamada. Aqui
+cada loja tem um índice só com id, nome, CPF/CNPJ e telefone dos clientes
+ativos, carregado uma vez do banco e consultado por prefixo (bisect numa
+lista ordenada de chaves):
+
+- nome: cada palavra normalizada (busca.normalizar_texto) - "jo si" acha
+  "José da Silva" (todas as palavras do termo são prefixo de alguma palavra)
+- CPF/CNPJ e telefone: só dígitos; telefone também sem o DDD
+
+ClienteRepository.criar/atualizar/excluir atualizam os índices já
+carregados (`registrar`/`remover`). Alterações feitas por outro worker
+aparecem quando o índice expira (`settings.clientes_autocomplete_ttl`).
+TTL 0 desativa os índices: a sugestão vai ao banco (ClienteRepository.buscar).
+"""
+import asyncio
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.cache import CacheTTL
+from core.config import settings
+
+from .busca import normalizar_texto, so_digitos, termos_busca
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_SUGESTAO = ('id', 'nome', 'cpf_cnpj')
+
+# Chave do índice sem filtro de loja (SUPER_ADMIN / ADMIN_MASTER)
+TODAS_AS_LOJAS = '*'
+
+_MAIOR_CARACTERE = chr(0x10FFFF)
+
+
+class IndicePrefixosClientes:
+    """
+    Clientes de uma loja indexados por prefixo de nome, CPF/CNPJ e telefone
+
+    Uso:
+    ```python
+    indice = IndicePrefixosClientes(clientes)
+    indice.sugerir('jose si', limite=10)  # [{'id', 'nome', 'cpf_cnpj'}, ...]
+    ```
+    """
+
+    def __init__(self, clientes: Iterable[Dict[str, Any]] = ()):
+        # cliente_id -> (sugestão, nome normalizado, palavras, números)
+        self._clientes: Dict[str, Tuple[Dict[str, Any], str, Tuple[str, ...], Tuple[str, ...]]] = {}
+        # (chave, cliente_id) em ordem: o prefixo é um intervalo contíguo
+        self._chaves: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+        for cliente in clientes:
+            self._clientes[str(cliente['id'])] = self._entrada(cliente)
+        self._chaves = sorted(
+            (chave, cliente_id)
+            for cliente_id, entrada in self._clientes.items()
+            for chave in self._chaves_entrada(entrada)
+        )
+
+    @staticmethod
+    def _entrada(cliente: Dict[str, Any]):
+        nome = normalizar_texto(cliente.get('nome'))
+        numeros = []
+        cpf_cnpj = so_digitos(cliente.get('cpf_cnpj'))
+        if cpf_cnpj:
+            numeros.append(cpf_cnpj)
+        telefone = so_digitos(cliente.get('telefone'))
+        if telefone:
+            numeros.append(telefone)
+            # Telefone com DDD também acha pelo número sem DDD
+            if len(telefone) >= 10:
+                numeros.append(telefone[2:])
+        sugestao = {campo: cliente.get(campo) for campo in CAMPOS_SUGESTAO}
+        sugestao['id'] = str(sugestao['id'])
+        return sugestao, nome, tuple(dict.fromkeys(nome.split())), tuple(numeros)
+
+    @staticmethod
+    def _chaves_entrada(entrada) -> Iterable[str]:
+        _, _, palavras, numeros = entrada
+        return set(palavras) | set(numeros)
+
+    def definir(self, cliente: Dict[str, Any]) -> None:
+        """Inclui ou atualiza um cliente"""
+        cliente_id = str(cliente['id'])
+        entrada = self._entrada(cliente)
+        with self._lock:
+            self._remover(cliente_id)
+            self._clientes[cliente_id] = entrada
+            for chave in self._chaves_entrada(entrada):
+                insort(self._chaves, (chave, cliente_id))
+
+    def remover(self, cliente_id: Any) -> bool:
+        """Tira um cliente do índice. Retorna True se ele estava indexado"""
+        with self._lock:
+            return self._remover(str(cliente_id))
+
+    def _remover(self, cliente_id: str) -> bool:
+        entrada = self._clientes.pop(cliente_id, None)
+        if entrada is None:
+            return False
+        for chave in self._chaves_entrada(entrada):
+            posicao = bisect_left(self._chaves, (chave, cliente_id))
+            if posicao < len(self._chaves) and self._chaves[posicao] == (chave, cliente_id):
+                del self._chaves[posicao]
+        return True
+
+    def _com_prefixo(self, prefixo: str) -> set:
+        # Chaves com o prefixo ficam entre (prefixo, '') e (prefixo + maior caractere,)
+        inicio = bisect_left(self._chaves, (prefixo, ''))
+        fim = bisect_left(self._chaves, (prefixo + _MAIOR_CARACTERE,), inicio)
+        return {cliente_id for _, cliente_id in self._chaves[inicio:fim]}
+
+    def sugerir(self, termo: str, limite: int = 10) -> List[Dict[str, Any]]:
+        """
+        Até `limite` clientes para o termo, do mais ao menos relevante
+
+        Nome igual > nome começando pelo termo > demais; nos números, quanto
+        mais do número o termo cobre, antes.
+        """
+        texto, digitos = termos_busca(termo)
+        palavras = texto.split()
+        if not palavras and not digitos:
+            return []
+
+        pontuados = []
+        with self._lock:
+            if digitos:
+                for cliente_id in self._com_prefixo(digitos):
+                    sugestao, nome, _, numeros = self._clientes[cliente_id]
+                    cobertura = max(
+                        (len(digitos) / len(numero) for numero in numeros if numero.startswith(digitos)),
+                        default=0.0
+                    )
+                    if cobertura:
+                        pontuados.append((-cobertura, nome, sugestao))
+            else:
+                # A palavra mais longa do termo restringe mais o intervalo
+                maior = max(palavras, key=len)
+                demais = [palavra for palavra in palavras if palavra != maior]
+                for cliente_id in self._com_prefixo(maior):
+                    sugestao, nome, palavras_nome, _ = self._clientes[cliente_id]
+                    if demais and not all(any(p.startswith(palavra) for p in palavras_nome) for palavra in demais):
+                        continue
+                    pontos = 2 if nome == texto else 1 if nome.startswith(texto) else 0
+                    pontuados.append((-pontos, nome, sugestao))
+
+        melhores = heapq.nsmallest(limite, pontuados, key=lambda item: item[:2])
+        return [dict(sugestao) for _, _, sugestao in melhores]
+
+    def __len__(self) -> int:
+        return len(self._clientes)
+
+
+class AutocompleteClientes:
+    """
+    Índices de prefixos por loja (LRU com TTL)
+
+    O primeiro pedido de uma loja carrega os clientes ativos dela do banco;
+    pedidos simultâneos durante a carga esperam a mesma carga. Escritas
+    (`registrar`/`remover`) feitas durante a carga são guardadas e
+    reaplicadas no índice carregado - a leitura pode ter sido anterior a elas.
+    """
+
+    def __init__(self, max_lojas: int, ttl: float):
+        self._indices = CacheTTL(max_lojas, ttl=ttl)
+        self._carregando: Dict[str, asyncio.Future] = {}
+        # chave -> escritas feitas durante a carga: ('definir', cliente) ou ('remover', id)
+        self._escritas_na_carga: Dict[str, List[Tuple[str, Any]]] = {}
+
+    @staticmethod
+    def _chave(loja_id: Optional[str]) -> str:
+        return TODAS_AS_LOJAS if loja_id is None else str(loja_id)
+
+    async def sugerir(
+        self,
+        repository,
+        loja_id: Optional[str],
+        termo: str,
+        limite: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Sugestões {id, nome, cpf_cnpj} para o termo, da loja informada
+
+        Args:
+            repository: ClienteRepository (carrega o índice na primeira vez)
+            loja_id: ID da loja (None = todas)
+            termo: Texto digitado
+            limite: Máximo de sugestões
+        """
+        if self._indices.ttl <= 0:
+            clientes = await repository.buscar(termo, loja_id, limite)
+            return [{campo: cliente.get(campo) for campo in CAMPOS_SUGESTAO} for cliente in clientes]
+
+        chave = self._chave(loja_id)
+        indice = self._indices.obter(chave)
+        if indice is None:
+            carga = self._carregando.get(chave)
+            if carga is None:
+                self._escritas_na_carga[chave] = []
+                carga = asyncio.ensure_future(self._carregar(repository, loja_id, chave))
+                self._carregando[chave] = carga
+                carga.add_done_callback(lambda _: self._carregando.pop(chave, None))
+            indice = await asyncio.shield(carga)
+        return indice.sugerir(termo, limite)
+
+    async def _carregar(self, repository, loja_id: Optional[str], chave: str) -> IndicePrefixosClientes:
+        try:
+            clientes = await repository.listar_para_autocomplete(loja_id)
+            indice = IndicePrefixosClientes(clientes)
+            # Sem await daqui até definir: nenhuma escrita fica entre a reaplicação e o cache
+            for operacao, valor in self._escritas_na_carga.get(chave, ()):
+                if operacao == 'definir':
+                    indice.definir(valor)
+                else:
+                    indice.remover(valor)
+            self._indices.definir(chave, indice)
+        finally:
+            self._escritas_na_carga.pop(chave, None)
+        logger.info(f"Índice de autocomplete carregado: {len(indice)} clientes (loja {chave})")
+        return indice
+
+    def _aplicar(self, loja_id: Optional[str], operacao: str, valor: Any) -> None:
+        """Aplica a escrita nos índices carregados e guarda para as cargas em andamento"""
+        for chave in {TODAS_AS_LOJAS, self._chave(loja_id)}:
+            indice = self._indices.obter(chave)
+            if indice is not None:
+                if operacao == 'definir':
+                    indice.definir(valor)
+                else:
+                    indice.remover(valor)
+            escritas = self._escritas_na_carga.get(chave)
+            if escritas is not None:
+                escritas.append((operacao, valor))
+
+    def registrar(self, cliente: Dict[str, Any]) -> None:
+        """Cliente criado ou alterado (inativo sai dos índices)"""
+        if cliente.get('ativo', True):
+            self._aplicar(cliente.get('loja_id'), 'definir', cliente)
+        else:
+            self._aplicar(cliente.get('loja_id'), 'remover', cliente['id'])
+
+    def remover(self, cliente_id: Any, loja_id: Optional[str] = None) -> None:
+        """Cliente excluído/inativado"""
+        self._aplicar(loja_id, 'remover', cliente_id)
+
+    def limpar(self) -> None:
+        """Descarta todos os índices"""
+        self._indices.limpar()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores dos índices (exposto no /health)"""
+        return self._indices.estatisticas()
+
+
+autocomplete_clientes = AutocompleteClientes(
+    settings.clientes_autocomplete_max_lojas,
+    ttl=settings.clientes_autocomplete_ttl
+)
@@ -0,0 +1,109 @@
+"""
+Busca de clientes por nome, CPF/CNPJ ou telefone
+
+O termo é normalizado da mesma forma que as colunas geradas de c_clientes
+(sql/criar_busca_clientes.sql), que têm índice trigram:
+
+- `busca_texto`: nome sem acentos, minúsculo, só letras/dígitos e espaços
+  ("José D'Ávila" -> "jose d avila")
+- `busca_digitos`: só os dígitos do CPF/CNPJ e do telefone, separados por
+  espaço ("123.456.789-00" e "12345678900" caem no mesmo índice)
+
+Termos com letras procuram só no nome; termos sem letras ("123.456",
+"(11) 9999") procuram também nos dígitos.
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+_NAO_DIGITO = re.compile(r'\D+')
+
+
+def normalizar_texto(valor: Optional[str]) -> str:
+    """Sem acentos, minúsculo, pontuação vira espaço (igual a busca_texto)"""
+    if not valor:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', valor)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', sem_acentos.lower()).strip()
+
+
+def so_digitos(valor: Optional[str]) -> str:
+    """Apenas os dígitos ("(11) 99999-0000" -> "11999990000")"""
+    return _NAO_DIGITO.sub('', valor) if valor else ''
+
+
+def termos_busca(busca: Optional[str]) -> Tuple[str, str]:
+    """
+    (texto, digitos) a procurar para o termo informado
+
+    `digitos` fica vazio quando o termo tem letras: "Maria 2" não deve
+    trazer todo telefone com "2".
+    """
+    texto = normalizar_texto(busca)
+    if any(c.isalpha() for c in texto):
+        return texto, ''
+    return texto, so_digitos(busca)
+
+
+def valor_filtro(valor: str) -> str:
+    """
+    Valor entre aspas para filtros `or`/`and` do PostgREST
+
+    Vírgula, ponto e parênteses fazem parte da sintaxe do filtro ("(11) 9999"
+    quebraria o `or=(...)`); entre aspas duplas valem como texto, com `\\` e
+    `"` escapados.
+    """
+    escapado = valor.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escapado}"'
+
+
+def filtro_busca(busca: Optional[str], normalizada: bool = True) -> Optional[str]:
+    """
+    Filtro `or` do PostgREST para o termo (None se não sobra nada a procurar)
+
+    Com `normalizada`, usa as colunas geradas (ILIKE atendido pelo índice
+    trigram); sem, o ILIKE antigo direto em nome, cpf_cnpj e telefone.
+    """
+    if not normalizada:
+        if not busca or not busca.strip():
+            return None
+        termo = valor_filtro(f"%{busca}%")
+        return f"nome.ilike.{termo},cpf_cnpj.ilike.{termo},telefone.ilike.{termo}"
+
+    texto, digitos = termos_busca(busca)
+    condicoes = []
+    if texto:
+        condicoes.append(f"busca_texto.ilike.%{texto}%")
+    if digitos:
+        condicoes.append(f"busca_digitos.ilike.%{digitos}%")
+    return ','.join(condicoes) or None
+
+
+def relevancia(cliente: Dict[str, Any], texto: str, digitos: str) -> float:
+    """
+    Pontuação do cliente para o termo (mesma ordem da RPC buscar_clientes)
+
+    Nome igual > nome começando pelo termo > palavra começando pelo termo >
+    termo no meio do nome; nos dígitos, quanto mais do número o termo
+    cobre, maior a pontuação.
+    """
+    pontos = 0.0
+    if texto:
+        nome = normalizar_texto(cliente.get('nome'))
+        if nome == texto:
+            pontos = 4.0
+        elif nome.startswith(texto):
+            pontos = 3.0
+        elif f" {texto}" in f" {nome}":
+            pontos = 2.0
+        elif texto in nome:
+            pontos = 1.0
+    if digitos:
+        for campo in ('cpf_cnpj', 'telefone'):
+            numero = so_digitos(cliente.get(campo))
+            if digitos in numero:
+                pontos = max(pontos, 2.0 + len(digitos) / len(numero))
+                break
+    return pontos
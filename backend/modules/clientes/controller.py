@@ -21,6 +21,7 @@ from .schemas import (
     ClienteUpdate,
     ClienteResponse,
     ClienteListResponse,
+    ClienteSugestao,
     FiltrosCliente
 )
 from .services import ClienteService
@@ -63,6 +64,7 @@ async def listar_clientes(
     **Paginação:**
     - `page`: Página atual (padrão: 1)
     - `limit`: Itens por página (padrão: 20, máximo: 100)
+    - `count`: Contagem do total: exact (padrão), planned, estimated ou none
     
     **Response:**
     ```json
@@ -110,6 +112,53 @@ async def listar_clientes(
         raise
 
 
+@router.get("/autocomplete", response_model=List[ClienteSugestao])
+async def autocomplete_clientes(
+    q: str = Query(..., min_length=1, max_length=100, description="Início do nome, CPF/CNPJ ou telefone"),
+    limite: int = Query(10, ge=1, le=50, description="Máximo de sugestões"),
+    current_user: dict = Depends(get_current_user)
+) -> List[ClienteSugestao]:
+    """
+    Sugestões para o seletor de clientes, a cada tecla
+    
+    Retorna só `id`, `nome` e `cpf_cnpj`, de um índice em memória da loja
+    (sem JOINs nem contagem). "jo si" sugere "José da Silva"; "123.4" e
+    "1234" sugerem o mesmo CPF.
+    """
+    try:
+        return await cliente_service.autocomplete_clientes(q, current_user, limite)
+    
+    except Exception as e:
+        logger.error(f"Erro no autocomplete de clientes: {str(e)}")
+        raise
+
+
+@router.get("/buscar", response_model=List[ClienteResponse])
+async def buscar_clientes(
+    q: str = Query(..., min_length=1, max_length=100, description="Nome, CPF/CNPJ ou telefone"),
+    limite: int = Query(20, ge=1, le=100, description="Máximo de clientes retornados"),
+    current_user: dict = Depends(get_current_user)
+) -> List[ClienteResponse]:
+    """
+    Busca rápida de clientes, ordenada por relevância
+    
+    Nome sem diferenciar acentos e maiúsculas ("jose" acha "José");
+    CPF/CNPJ e telefone pelos dígitos ("123.456" e "123456" são iguais).
+    Nome igual vem antes de nome começando pelo termo, que vem antes de
+    nome contendo o termo.
+    """
+    try:
+        clientes = await cliente_service.buscar_clientes(q, current_user, limite)
+        
+        logger.info(f"Busca de clientes: {len(clientes)} resultados para usuário {current_user.id}")
+        
+        return clientes
+    
+    except Exception as e:
+        logger.error(f"Erro ao buscar clientes: {str(e)}")
+        raise
+
+
 @router.get("/{cliente_id}", response_model=ClienteResponse)
 async def buscar_cliente(
     cliente_id: str,
@@ -355,7 +404,7 @@ async def listar_procedencias_publico() -> List[dict]:
         from core.database import get_admin_database
         supabase = get_admin_database()
         
-        result = supabase.table('c_procedencias').select('*').eq('ativo', True).order('nome').execute()
+        result = await supabase.table('c_procedencias').select('*').eq('ativo', True).order('nome').execute()
         
         return result.data
     
@@ -388,7 +437,7 @@ async def listar_procedencias() -> List[dict]:
         from core.database import get_admin_database
         supabase = get_admin_database()
         
-        result = supabase.table('c_procedencias').select('*').eq('ativo', True).order('nome').execute()
+        result = await supabase.table('c_procedencias').select('*').eq('ativo', True).order('nome').execute()
         
         return result.data
     
@@ -4,20 +4,51 @@ Responsável por todas as operações com o Supabase
 """
 import logging
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 
-from supabase import Client
-from core.exceptions import NotFoundException, DatabaseException, ConflictException
+from postgrest.exceptions import APIError
+
+from core.database import AsyncDatabase, DatabaseUtils
+from core.exceptions import NotFoundException, DatabaseException, ConflictException, ValidationException
+
+from .autocomplete import autocomplete_clientes
+from .busca import filtro_busca, relevancia, termos_busca
 
 logger = logging.getLogger(__name__)
 
+RPC_BUSCA = 'buscar_clientes'
+
+# Linhas por requisição ao carregar o índice do autocomplete (max-rows do PostgREST)
+LOTE_AUTOCOMPLETE = 1000
+
+RPC_CRIACAO = 'criar_cliente'
+RPC_ATUALIZACAO = 'atualizar_cliente'
+RPC_TRANSICOES = 'aplicar_transicoes_status'
+
+# Viram False após o banco responder que as colunas de busca (42703) ou a
+# RPC de busca (PGRST202) não existem - ver sql/criar_busca_clientes.sql
+_colunas_busca_disponiveis = True
+_rpc_busca_disponivel = True
+
+# Vira False após o banco responder que as RPCs de escrita não existem
+# (PGRST202) - ver sql/criar_rpc_escrita_clientes.sql
+_rpc_escrita_disponivel = True
+
+# Vira False após o banco responder que a RPC de transições de status não
+# existe (PGRST202) - ver sql/criar_rpc_transicoes_status.sql
+_rpc_transicoes_disponivel = True
+
+# Vira False após o banco responder que c_clientes.status_transicao_em não
+# existe (PGRST204/42703) - ver sql/criar_rpc_transicoes_status.sql
+_coluna_transicao_disponivel = True
+
 
 class ClienteRepository:
     """
     Classe responsável por acessar a tabela de clientes no Supabase
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
@@ -33,75 +64,34 @@ class ClienteRepository:
         filtros: Dict[str, Any] = None,
         page: int = 1,
         limit: int = 20,
-        incluir_inativos: bool = False
+        incluir_inativos: bool = False,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Lista clientes com filtros e paginação, usando JOINs para dados relacionados.
+        Com `cursor` pagina por keyset em (created_at, id).
+        O total vem no mesmo request da página, conforme o modo `count`.
         """
         try:
-            # ✨ FIX: Unificar a query para usar JOINs, garantindo consistência
-            # e incluindo os nomes de vendedor e procedência em uma única chamada.
-            query = self.db.table(self.table).select(
-                """
-                *,
-                vendedor:cad_equipe!vendedor_id(id, nome),
-                procedencia:c_procedencias!procedencia_id(id, nome)
-                """
-            )
-
-            # Filtra por ativos por padrão
-            if not incluir_inativos:
-                query = query.eq('ativo', True)
-            
-            # Aplica filtro de loja apenas se fornecido (RLS)
-            if loja_id is not None:
-                query = query.eq('loja_id', loja_id)
-
-            # Prepara a query de contagem com os mesmos filtros de RLS
-            count_query = self.db.table(self.table).select('id', count='exact')
-            if not incluir_inativos:
-                count_query = count_query.eq('ativo', True)
-            if loja_id is not None:
-                count_query = count_query.eq('loja_id', loja_id)
-            
-            # Aplica filtros opcionais na query principal e na de contagem
-            if filtros:
-                if filtros.get('busca'):
-                    busca = f"%{filtros['busca']}%"
-                    or_filter = f"nome.ilike.{busca},cpf_cnpj.ilike.{busca},telefone.ilike.{busca}"
-                    query = query.or_(or_filter)
-                    count_query = count_query.or_(or_filter)
-                if filtros.get('tipo_venda'):
-                    query = query.eq('tipo_venda', filtros['tipo_venda'])
-                    count_query = count_query.eq('tipo_venda', filtros['tipo_venda'])
-                if filtros.get('vendedor_id'):
-                    query = query.eq('vendedor_id', filtros['vendedor_id'])
-                    count_query = count_query.eq('vendedor_id', filtros['vendedor_id'])
-                if filtros.get('procedencia_id'):
-                    query = query.eq('procedencia_id', filtros['procedencia_id'])
-                    count_query = count_query.eq('procedencia_id', filtros['procedencia_id'])
-                if filtros.get('data_inicio'):
-                    query = query.gte('created_at', filtros['data_inicio'].isoformat())
-                    count_query = count_query.gte('created_at', filtros['data_inicio'].isoformat())
-                if filtros.get('data_fim'):
-                    query = query.lte('created_at', filtros['data_fim'].isoformat())
-                    count_query = count_query.lte('created_at', filtros['data_fim'].isoformat())
-
-            # Executa a query de contagem
-            count_result = count_query.execute()
-            total = count_result.count or 0
-            
-            # Aplica ordenação e paginação na query principal
-            query = query.order('created_at', desc=True)
-            offset = (page - 1) * limit
-            query = query.limit(limit).offset(offset)
-            
-            # Executa a query principal
-            result = query.execute()
+            busca = (filtros or {}).get('busca')
+            try:
+                result = await self._consulta_listagem(
+                    loja_id, filtros, page, limit, incluir_inativos, cursor, count,
+                    _colunas_busca_disponiveis
+                ).execute()
+            except APIError as e:
+                if not self._sem_colunas_busca(e, busca):
+                    raise
+                result = await self._consulta_listagem(
+                    loja_id, filtros, page, limit, incluir_inativos, cursor, count, False
+                ).execute()
+            total = result.count
+            rows, next_cursor = DatabaseUtils.split_page(result.data, limit)
             
             # Processa os dados para extrair os nomes dos campos aninhados
             items = []
-            for item in result.data:
+            for item in rows:
                 # Extrai nome do vendedor do objeto aninhado
                 if item.get('vendedor'):
                     item['vendedor_nome'] = item['vendedor'].get('nome')
@@ -121,13 +111,188 @@ class ClienteRepository:
                 'total': total,
                 'page': page,
                 'limit': limit,
-                'pages': (total + limit - 1) // limit if limit > 0 else 0
+                'pages': DatabaseUtils.count_pages(total, limit),
+                'next_cursor': next_cursor
             }
         
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar clientes: {str(e)}")
             raise DatabaseException(f"Erro ao listar clientes: {str(e)}")
     
+    def _consulta_listagem(
+        self,
+        loja_id: Optional[str],
+        filtros: Optional[Dict[str, Any]],
+        page: int,
+        limit: int,
+        incluir_inativos: bool,
+        cursor: Optional[str],
+        count: Optional[str],
+        busca_normalizada: bool
+    ):
+        """Query da página de clientes (ainda sem execute)"""
+        # ✨ FIX: Unificar a query para usar JOINs, garantindo consistência
+        # e incluindo os nomes de vendedor e procedência em uma única chamada.
+        query = self.db.table(self.table).select(
+            """
+            *,
+            vendedor:cad_equipe!vendedor_id(id, nome),
+            procedencia:c_procedencias!procedencia_id(id, nome)
+            """,
+            count=DatabaseUtils.count_method(count, cursor)
+        )
+
+        # Filtra por ativos por padrão
+        if not incluir_inativos:
+            query = query.eq('ativo', True)
+        
+        # Aplica filtro de loja apenas se fornecido (RLS)
+        if loja_id is not None:
+            query = query.eq('loja_id', loja_id)
+
+        # Aplica filtros opcionais
+        if filtros:
+            or_filter = filtro_busca(filtros.get('busca'), busca_normalizada)
+            if or_filter:
+                query = query.or_(or_filter)
+            if filtros.get('tipo_venda'):
+                query = query.eq('tipo_venda', filtros['tipo_venda'])
+            if filtros.get('vendedor_id'):
+                query = query.eq('vendedor_id', filtros['vendedor_id'])
+            if filtros.get('procedencia_id'):
+                query = query.eq('procedencia_id', filtros['procedencia_id'])
+            if filtros.get('data_inicio'):
+                query = query.gte('created_at', filtros['data_inicio'].isoformat())
+            if filtros.get('data_fim'):
+                query = query.lte('created_at', filtros['data_fim'].isoformat())
+
+        # Aplica ordenação e paginação na query principal
+        return DatabaseUtils.apply_cursor_pagination(query, cursor, page, limit)
+    
+    @staticmethod
+    def _sem_colunas_busca(erro: APIError, busca: Optional[str]) -> bool:
+        """
+        True se o erro é a falta das colunas de busca (42703) - a partir daí
+        a busca volta ao ILIKE direto em nome, cpf_cnpj e telefone
+        
+        Vale para todas as requisições que falharam, inclusive as simultâneas
+        à primeira (só ela registra o aviso).
+        """
+        global _colunas_busca_disponiveis
+        
+        if erro.code != '42703' or not busca:
+            return False
+        if _colunas_busca_disponiveis:
+            _colunas_busca_disponiveis = False
+            logger.warning(
+                "Colunas de busca de c_clientes não encontradas - buscando sem índice. "
+                "Execute sql/criar_busca_clientes.sql"
+            )
+        return True
+    
+    async def buscar(
+        self,
+        termo: str,
+        loja_id: Optional[str],
+        limite: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Clientes ativos que casam com o termo, do mais ao menos relevante
+        
+        Nome sem diferenciar acentos/maiúsculas; CPF/CNPJ e telefone só
+        pelos dígitos ("123.456" = "123456"). Usa a RPC buscar_clientes
+        (índices trigram); sem ela, ordena em memória os resultados do ILIKE.
+        
+        Args:
+            termo: Texto digitado (nome, CPF/CNPJ ou telefone)
+            loja_id: ID da loja (para RLS)
+            limite: Máximo de clientes retornados
+            
+        Returns:
+            Clientes ordenados por relevância ([] se o termo não tem letras nem dígitos)
+        """
+        global _rpc_busca_disponivel
+        
+        texto, digitos = termos_busca(termo)
+        if not texto and not digitos:
+            return []
+        
+        try:
+            if _rpc_busca_disponivel:
+                try:
+                    result = await self.db.rpc(RPC_BUSCA, {
+                        'p_texto': texto,
+                        'p_digitos': digitos,
+                        'p_loja_id': loja_id,
+                        'p_limite': limite
+                    }).execute()
+                    return result.data or []
+                except APIError as e:
+                    if e.code != 'PGRST202':
+                        raise
+                    _rpc_busca_disponivel = False
+                    logger.warning(
+                        f"RPC {RPC_BUSCA} não encontrada - ordenando a busca em memória. "
+                        f"Execute sql/criar_busca_clientes.sql"
+                    )
+            
+            # Sem a RPC: candidatos pelo filtro da listagem, ordenados aqui
+            def consultar_candidatos(normalizada: bool):
+                # Query nova a cada tentativa: o builder acumula os filtros `or`
+                query = self.db.table(self.table).select('*').eq('ativo', True).limit(
+                    max(limite * 10, 200)
+                )
+                if loja_id is not None:
+                    query = query.eq('loja_id', loja_id)
+                return query.or_(filtro_busca(termo, normalizada)).execute()
+            
+            try:
+                result = await consultar_candidatos(_colunas_busca_disponiveis)
+            except APIError as e:
+                if not self._sem_colunas_busca(e, termo):
+                    raise
+                result = await consultar_candidatos(False)
+            
+            candidatos = sorted(
+                result.data or [],
+                key=lambda cliente: (-relevancia(cliente, texto, digitos), cliente.get('nome') or '')
+            )
+            return candidatos[:limite]
+        
+        except Exception as e:
+            logger.error(f"Erro ao buscar clientes por '{termo}': {str(e)}")
+            raise DatabaseException(f"Erro ao buscar clientes: {str(e)}")
+    
+    async def listar_para_autocomplete(self, loja_id: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        id, nome, cpf_cnpj e telefone de todos os clientes ativos da loja
+        
+        Carrega o índice do autocomplete (modules/clientes/autocomplete.py),
+        em lotes de LOTE_AUTOCOMPLETE linhas.
+        
+        Args:
+            loja_id: ID da loja (None = todas)
+        """
+        try:
+            clientes: List[Dict[str, Any]] = []
+            while True:
+                query = self.db.table(self.table).select('id, nome, cpf_cnpj, telefone, loja_id').eq('ativo', True)
+                if loja_id is not None:
+                    query = query.eq('loja_id', loja_id)
+                result = await query.order('id').range(
+                    len(clientes), len(clientes) + LOTE_AUTOCOMPLETE - 1
+                ).execute()
+                lote = result.data or []
+                clientes.extend(lote)
+                if len(lote) < LOTE_AUTOCOMPLETE:
+                    return clientes
+        
+        except Exception as e:
+            logger.error(f"Erro ao carregar clientes para o autocomplete: {str(e)}")
+            raise DatabaseException(f"Erro ao carregar clientes: {str(e)}")
+    
     async def buscar_por_id(self, cliente_id: str, loja_id: Optional[str]) -> Dict[str, Any]:
         """
         Busca um cliente específico pelo ID, apenas se estiver ativo.
@@ -155,22 +320,12 @@ class ClienteRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise NotFoundException(f"Cliente não encontrado ou inativo: {cliente_id}")
             
-            cliente = result.data[0]
-            
-            # Processa dados relacionados
-            if cliente.get('vendedor'):
-                cliente['vendedor_nome'] = cliente['vendedor'].get('nome')
-                del cliente['vendedor']
-            
-            if cliente.get('procedencia'):
-                cliente['procedencia'] = cliente['procedencia'].get('nome')
-            
-            return cliente
+            return self._com_nomes_relacionados(result.data[0])
         
         except NotFoundException:
             raise
@@ -178,6 +333,18 @@ class ClienteRepository:
             logger.error(f"Erro ao buscar cliente {cliente_id}: {str(e)}")
             raise DatabaseException(f"Erro ao buscar cliente: {str(e)}")
     
+    @staticmethod
+    def _com_nomes_relacionados(cliente: Dict[str, Any]) -> Dict[str, Any]:
+        """Troca os objetos do JOIN por vendedor_nome e o nome da procedência"""
+        if cliente.get('vendedor'):
+            cliente['vendedor_nome'] = cliente['vendedor'].get('nome')
+        cliente.pop('vendedor', None)
+        
+        if cliente.get('procedencia'):
+            cliente['procedencia'] = cliente['procedencia'].get('nome')
+        
+        return cliente
+    
     async def buscar_por_cpf_cnpj(self, cpf_cnpj: str, loja_id: Optional[str]) -> Optional[Dict[str, Any]]:
         """
         Busca cliente pelo CPF ou CNPJ, apenas se estiver ativo.
@@ -196,7 +363,7 @@ class ClienteRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -225,7 +392,7 @@ class ClienteRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -269,11 +436,12 @@ class ClienteRepository:
             dados['ativo'] = True
             
             # Cria o cliente
-            result = self.db.table(self.table).insert(dados).execute()
+            result = await self.db.table(self.table).insert(dados).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar cliente")
             
+            autocomplete_clientes.registrar(result.data[0])
             return result.data[0]
         
         except ConflictException:
@@ -324,18 +492,32 @@ class ClienteRepository:
             # Atualiza apenas campos fornecidos
             dados_limpos = {k: v for k, v in dados.items() if v is not None}
             
-            # Atualiza o cliente
-            query = self.db.table(self.table).update(dados_limpos).eq('id', cliente_id)
-            
-            # Aplica filtro de loja apenas se fornecido
-            if loja_id is not None:
-                query = query.eq('loja_id', loja_id)
-                
-            result = query.execute()
+            # Mudança manual de status: transições automáticas mais antigas
+            # (eventos atrasados ou recuperados) não a desfazem
+            if 'status_id' in dados_limpos and str(dados_limpos['status_id']) != str(cliente_atual.get('status_id')):
+                dados_limpos['status_transicao_em'] = datetime.now(timezone.utc).isoformat()
+            
+            def atualizacao(valores: Dict[str, Any]):
+                query = self.db.table(self.table).update(valores).eq('id', cliente_id)
+                # Aplica filtro de loja apenas se fornecido
+                if loja_id is not None:
+                    query = query.eq('loja_id', loja_id)
+                return query.execute()
+            
+            if not _coluna_transicao_disponivel:
+                dados_limpos.pop('status_transicao_em', None)
+            try:
+                result = await atualizacao(dados_limpos)
+            except APIError as e:
+                if 'status_transicao_em' not in dados_limpos or not self._sem_coluna_transicao(e):
+                    raise
+                dados_limpos.pop('status_transicao_em')
+                result = await atualizacao(dados_limpos)
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar cliente")
             
+            autocomplete_clientes.registrar(result.data[0])
             return result.data[0]
         
         except (NotFoundException, ConflictException):
@@ -343,6 +525,197 @@ class ClienteRepository:
         except Exception as e:
             logger.error(f"Erro ao atualizar cliente {cliente_id}: {str(e)}")
             raise DatabaseException(f"Erro ao atualizar cliente: {str(e)}")
+
+    async def atualizar_status_em_lote(
+        self,
+        cliente_ids: List[str],
+        status_id: str,
+        loja_id: Optional[str]
+    ) -> int:
+        """
+        Aplica o mesmo status a vários clientes em um único UPDATE
+
+        Args:
+            cliente_ids: IDs dos clientes
+            status_id: ID do status
+            loja_id: ID da loja (para RLS); None não filtra
+
+        Returns:
+            Quantidade de clientes atualizados (clientes de outra loja ou
+            inexistentes são ignorados)
+        """
+        try:
+            query = self.db.table(self.table).update({'status_id': status_id}).in_('id', cliente_ids)
+
+            if loja_id is not None:
+                query = query.eq('loja_id', loja_id)
+
+            result = await query.execute()
+            return len(result.data or [])
+
+        except Exception as e:
+            logger.error(f"Erro ao atualizar status de {len(cliente_ids)} clientes: {str(e)}")
+            raise DatabaseException(f"Erro ao atualizar status dos clientes: {str(e)}")
+
+    async def aplicar_transicoes_status(self, transicoes: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        Aplica transições de status de vários clientes em uma ida ao banco
+
+        Cada transição só é aplicada se `transicao_em` for mais recente que
+        a última aplicada ao cliente (c_clientes.status_transicao_em): uma
+        transição antiga entregue atrasada não desfaz uma mais nova.
+
+        Args:
+            transicoes: {cliente_id, status_id, loja_id, transicao_em (ISO)}, um por cliente
+
+        Returns:
+            Quantidade de clientes atualizados; None se a RPC ainda não existe
+            no banco (usar `atualizar_status_em_lote`, sem a verificação)
+        """
+        global _rpc_transicoes_disponivel
+
+        if not _rpc_transicoes_disponivel:
+            return None
+
+        try:
+            result = await self.db.rpc(RPC_TRANSICOES, {'p_transicoes': transicoes}).execute()
+        except APIError as e:
+            if e.code == 'PGRST202':
+                _rpc_transicoes_disponivel = False
+                logger.warning(
+                    f"RPC {RPC_TRANSICOES} não encontrada - transições de status sem verificar a ordem. "
+                    f"Execute sql/criar_rpc_transicoes_status.sql"
+                )
+                return None
+            logger.error(f"Erro ao aplicar {len(transicoes)} transições de status: {str(e)}")
+            raise DatabaseException(f"Erro ao aplicar transições de status: {str(e)}")
+
+        return result.data or 0
+
+    @staticmethod
+    def _sem_coluna_transicao(erro: APIError) -> bool:
+        """True se o erro é a falta de c_clientes.status_transicao_em (atualiza sem ela)"""
+        global _coluna_transicao_disponivel
+        
+        if erro.code not in ('PGRST204', '42703') or 'status_transicao_em' not in (erro.message or ''):
+            return False
+        if _coluna_transicao_disponivel:
+            _coluna_transicao_disponivel = False
+            logger.warning(
+                "Coluna status_transicao_em de c_clientes não encontrada - mudanças manuais de status "
+                "podem ser desfeitas por transições atrasadas. Execute sql/criar_rpc_transicoes_status.sql"
+            )
+        return True
+    
+    @staticmethod
+    def _rpc_escrita_ausente(erro: APIError) -> bool:
+        """
+        True se o erro é a falta das RPCs de escrita (PGRST202) - a partir daí
+        criar_completo/atualizar_completo retornam None sem ir ao banco
+        """
+        global _rpc_escrita_disponivel
+        
+        if erro.code != 'PGRST202':
+            return False
+        _rpc_escrita_disponivel = False
+        logger.warning(
+            f"RPCs {RPC_CRIACAO}/{RPC_ATUALIZACAO} não encontradas - gravando clientes em etapas. "
+            f"Execute sql/criar_rpc_escrita_clientes.sql"
+        )
+        return True
+    
+    async def criar_completo(
+        self,
+        dados: Dict[str, Any],
+        loja_id: Optional[str],
+        status_ordem: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cria o cliente já com o status inicial, em uma ida ao banco
+        
+        O nome duplicado é barrado pelo índice único (loja_id, nome) dos
+        ativos, sem busca prévia.
+        
+        Args:
+            dados: Dados do cliente
+            loja_id: ID da loja
+            status_ordem: Ordem do status inicial (ignorada se não existir)
+            
+        Returns:
+            Cliente criado, com vendedor_nome e procedência (como buscar_por_id);
+            None se a RPC ainda não existe no banco (usar `criar`)
+            
+        Raises:
+            ConflictException: Se nome já existe
+        """
+        if not _rpc_escrita_disponivel:
+            return None
+        
+        try:
+            result = await self.db.rpc(RPC_CRIACAO, {
+                'p_dados': dados,
+                'p_loja_id': loja_id,
+                'p_status_ordem': status_ordem
+            }).execute()
+        except APIError as e:
+            if self._rpc_escrita_ausente(e):
+                return None
+            if e.code == '23505':
+                raise ConflictException(f"Cliente com nome '{dados['nome']}' já cadastrado")
+            logger.error(f"Erro ao criar cliente: {str(e)}")
+            raise DatabaseException(f"Erro ao criar cliente: {str(e)}")
+        
+        if not result.data:
+            raise DatabaseException("Erro ao criar cliente")
+        
+        autocomplete_clientes.registrar(result.data)
+        return self._com_nomes_relacionados(result.data)
+    
+    async def atualizar_completo(
+        self,
+        cliente_id: str,
+        dados: Dict[str, Any],
+        loja_id: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atualiza os campos informados (não None) em uma ida ao banco
+        
+        Args:
+            cliente_id: ID do cliente
+            dados: Dados a atualizar
+            loja_id: ID da loja (para RLS)
+            
+        Returns:
+            Cliente atualizado, com vendedor_nome e procedência (como buscar_por_id);
+            None se a RPC ainda não existe no banco (usar `atualizar`)
+            
+        Raises:
+            NotFoundException: Se cliente não encontrado ou inativo
+            ConflictException: Se nome já existe em outro cliente
+        """
+        if not _rpc_escrita_disponivel:
+            return None
+        
+        dados_limpos = {k: v for k, v in dados.items() if v is not None}
+        try:
+            result = await self.db.rpc(RPC_ATUALIZACAO, {
+                'p_cliente_id': cliente_id,
+                'p_dados': dados_limpos,
+                'p_loja_id': loja_id
+            }).execute()
+        except APIError as e:
+            if self._rpc_escrita_ausente(e):
+                return None
+            if e.code == '23505':
+                raise ConflictException(f"Cliente com nome '{dados_limpos.get('nome')}' já cadastrado")
+            logger.error(f"Erro ao atualizar cliente {cliente_id}: {str(e)}")
+            raise DatabaseException(f"Erro ao atualizar cliente: {str(e)}")
+        
+        if not result.data:
+            raise NotFoundException(f"Cliente não encontrado ou inativo: {cliente_id}")
+        
+        autocomplete_clientes.registrar(result.data)
+        return self._com_nomes_relacionados(result.data)
     
     async def excluir(self, cliente_id: str, loja_id: Optional[str]) -> bool:
         """
@@ -369,7 +742,10 @@ class ClienteRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
+            
+            for cliente in result.data or []:
+                autocomplete_clientes.remover(cliente_id, cliente.get('loja_id'))
             
             # A API de update retorna os dados atualizados. Se a lista não estiver vazia, foi sucesso.
             return bool(result.data)
@@ -392,7 +768,7 @@ class ClienteRepository:
             Número total de clientes na tabela
         """
         try:
-            result = self.db.table(self.table).select(
+            result = await self.db.table(self.table).select(
                 'id', count='exact'
             ).execute()
             
@@ -417,7 +793,7 @@ class ClienteRepository:
         Returns:
             Número de clientes que atendem aos critérios
         """
-        try:
+        def consulta(busca_normalizada: bool):
             query = self.db.table(self.table).select('id', count='exact').eq('ativo', True)
             
             # Aplica filtro de loja apenas se fornecido
@@ -427,13 +803,9 @@ class ClienteRepository:
             # Aplica filtros opcionais
             if filtros:
                 # Busca textual
-                if filtros.get('busca'):
-                    busca = f"%{filtros['busca']}%"
-                    query = query.or_(
-                        f"nome.ilike.{busca},"
-                        f"cpf_cnpj.ilike.{busca},"
-                        f"telefone.ilike.{busca}"
-                    )
+                or_filter = filtro_busca(filtros.get('busca'), busca_normalizada)
+                if or_filter:
+                    query = query.or_(or_filter)
                 
                 # Tipo de venda
                 if filtros.get('tipo_venda'):
@@ -446,8 +818,15 @@ class ClienteRepository:
                 # Procedência
                 if filtros.get('procedencia_id'):
                     query = query.eq('procedencia_id', filtros['procedencia_id'])
-            
-            result = query.execute()
+            return query
+        
+        try:
+            try:
+                result = await consulta(_colunas_busca_disponiveis).execute()
+            except APIError as e:
+                if not self._sem_colunas_busca(e, (filtros or {}).get('busca')):
+                    raise
+                result = await consulta(False).execute()
             return result.count or 0
             
         except Exception as e:
@@ -215,10 +215,20 @@ class ClienteListResponse(BaseModel):
     Resposta quando listamos vários clientes
     """
     items: list[ClienteResponse]
-    total: int
+    total: Optional[int]  # None com count=none ou em páginas com cursor
     page: int
     limit: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None  # Cursor para a próxima página (keyset)
+
+
+class ClienteSugestao(BaseModel):
+    """
+    Sugestão do autocomplete de clientes (só o necessário para o seletor)
+    """
+    id: str
+    nome: str
+    cpf_cnpj: Optional[str] = None
 
 
 class FiltrosCliente(BaseModel):
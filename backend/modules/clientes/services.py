@@ -3,19 +3,22 @@ Services - Lógica de negócio para clientes
 Camada intermediária entre os controllers e o repository
 """
 import logging
-from typing import Dict, Any, Optional
+import re
+from typing import Dict, Any, List, Optional
 
 from core.database import get_database
 from core.auth import User
 from core.dependencies import PaginationParams
 from core.exceptions import ValidationException, NotFoundException
 
+from .autocomplete import autocomplete_clientes
 from .repository import ClienteRepository
 from .schemas import (
     ClienteCreate,
     ClienteUpdate,
     ClienteResponse,
     ClienteListResponse,
+    ClienteSugestao,
     FiltrosCliente
 )
 from ..status_orcamento.services import StatusOrcamentoService
@@ -23,6 +26,9 @@ from ..status_orcamento.repository import StatusOrcamentoRepository
 
 logger = logging.getLogger(__name__)
 
+# Status aplicado a todo cliente novo (Ordem 1 - Cliente Cadastrado)
+ORDEM_STATUS_INICIAL = 1
+
 
 class ClienteService:
     """
@@ -85,7 +91,6 @@ class ClienteService:
         
         # Validação de email se fornecido
         if dados.get('email'):
-            import re
             email = dados['email'].strip()
             email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
             if not re.match(email_pattern, email):
@@ -147,7 +152,9 @@ class ClienteService:
                 loja_id=loja_id,
                 filtros=filtros_dict,
                 page=pagination.page,
-                limit=pagination.limit
+                limit=pagination.limit,
+                cursor=pagination.cursor,
+                count=pagination.count
             )
             
             # Converte para response model
@@ -158,13 +165,68 @@ class ClienteService:
                 total=resultado['total'],
                 page=resultado['page'],
                 limit=resultado['limit'],
-                pages=resultado['pages']
+                pages=resultado['pages'],
+                next_cursor=resultado['next_cursor']
             )
         
         except Exception as e:
             logger.error(f"Erro ao listar clientes para usuário {user.id}: {str(e)}")
             raise
     
+    async def buscar_clientes(self, termo: str, user: User, limite: int = 20) -> List[ClienteResponse]:
+        """
+        Busca clientes por nome, CPF/CNPJ ou telefone, do mais ao menos relevante
+        
+        Args:
+            termo: Texto digitado ("jose", "123.456", "(11) 9999")
+            user: Usuário logado
+            limite: Máximo de clientes retornados
+            
+        Returns:
+            Clientes ordenados por relevância
+        """
+        try:
+            self._validar_usuario_loja(user)
+            
+            db = get_database()
+            repository = ClienteRepository(db)
+            
+            clientes = await repository.buscar(termo, self._determinar_loja_id(user), limite)
+            
+            return [ClienteResponse(**cliente) for cliente in clientes]
+        
+        except Exception as e:
+            logger.error(f"Erro ao buscar clientes por '{termo}' para usuário {user.id}: {str(e)}")
+            raise
+    
+    async def autocomplete_clientes(self, termo: str, user: User, limite: int = 10) -> List[ClienteSugestao]:
+        """
+        Sugestões para o seletor de clientes (índice de prefixos em memória)
+        
+        Args:
+            termo: Início do nome, CPF/CNPJ ou telefone
+            user: Usuário logado
+            limite: Máximo de sugestões
+            
+        Returns:
+            Clientes (id, nome, cpf_cnpj) do mais ao menos relevante
+        """
+        try:
+            self._validar_usuario_loja(user)
+            
+            db = get_database()
+            repository = ClienteRepository(db)
+            
+            sugestoes = await autocomplete_clientes.sugerir(
+                repository, self._determinar_loja_id(user), termo, limite
+            )
+            
+            return [ClienteSugestao(**sugestao) for sugestao in sugestoes]
+        
+        except Exception as e:
+            logger.error(f"Erro no autocomplete de clientes para usuário {user.id}: {str(e)}")
+            raise
+    
     async def buscar_cliente(self, cliente_id: str, user: User) -> ClienteResponse:
         """
         Busca um cliente específico
@@ -242,22 +304,26 @@ class ClienteService:
             # Define loja_id baseado no perfil 
             loja_id = None if user.perfil == "SUPER_ADMIN" else user.loja_id
             
-            # Cria o cliente
-            cliente_criado = await repository.criar(dados_cliente, loja_id)
-            
-            # TRIGGER AUTOMÁTICO: Define status inicial (Ordem 1 - Cliente Cadastrado)
-            try:
-                await self.atualizar_status_cliente(cliente_criado['id'], 1, user)
-                logger.info(f"Status inicial aplicado ao cliente {cliente_criado['id']}")
-            except Exception as status_error:
-                logger.warning(f"Erro ao aplicar status inicial: {status_error}")
-                # Não falha a criação do cliente por erro de status
-            
-            # Busca o cliente completo (com dados relacionados)
-            cliente_completo = await repository.buscar_por_id(
-                cliente_criado['id'], 
-                loja_id
-            )
+            # Cria o cliente já com o status inicial, em uma ida ao banco
+            cliente_completo = await repository.criar_completo(dados_cliente, loja_id, ORDEM_STATUS_INICIAL)
+            
+            if cliente_completo is None:
+                # Sem a RPC: o status inicial (catálogo em memória) entra no próprio insert
+                try:
+                    status_inicial = await StatusOrcamentoRepository(db).buscar_por_ordem(ORDEM_STATUS_INICIAL)
+                    if status_inicial:
+                        dados_cliente['status_id'] = str(status_inicial['id'])
+                except Exception as status_error:
+                    logger.warning(f"Erro ao obter status inicial: {status_error}")
+                    # Não falha a criação do cliente por erro de status
+                
+                cliente_criado = await repository.criar(dados_cliente, loja_id)
+                
+                # Busca o cliente completo (com dados relacionados)
+                cliente_completo = await repository.buscar_por_id(
+                    cliente_criado['id'], 
+                    loja_id
+                )
             
             logger.info(f"Cliente criado: {cliente_completo['id']} por usuário {user.id}")
             
@@ -305,11 +371,13 @@ class ClienteService:
             if not dados_atualizacao:
                 raise ValidationException("Nenhum dado fornecido para atualização")
             
-            # Atualiza o cliente
-            await repository.atualizar(cliente_id, dados_atualizacao, loja_id)
+            # Atualiza e devolve o cliente em uma ida ao banco
+            cliente_atualizado = await repository.atualizar_completo(cliente_id, dados_atualizacao, loja_id)
             
-            # Busca o cliente atualizado
-            cliente_atualizado = await repository.buscar_por_id(cliente_id, loja_id)
+            if cliente_atualizado is None:
+                # Sem a RPC: atualiza e busca de novo
+                await repository.atualizar(cliente_id, dados_atualizacao, loja_id)
+                cliente_atualizado = await repository.buscar_por_id(cliente_id, loja_id)
             
             logger.info(f"Cliente atualizado: {cliente_id} por usuário {user.id}")
             
@@ -481,7 +549,7 @@ class ClienteService:
             status = await status_service.buscar_por_ordem(ordem)
             
             # Atualiza o status do cliente
-            dados_atualizacao = {'status_id': status.id}
+            dados_atualizacao = {'status_id': str(status.id)}
             await cliente_repository.atualizar(cliente_id, dados_atualizacao, user.loja_id)
             
             # Busca o cliente atualizado
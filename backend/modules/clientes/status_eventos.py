@@ -0,0 +1,94 @@
+"""
+Transições automáticas de status do cliente (core.eventos)
+
+Importar XML (ordem 2), criar orçamento (ordem 3) e enviar orçamento
+(ordem 4) mudam o status do cliente. Antes isso era feito dentro da
+requisição (busca do status + update + busca do cliente); agora a
+requisição só grava o evento no outbox e o barramento aplica as
+transições em lote, fora do caminho da resposta:
+
+- Transições repetidas do mesmo cliente no lote: vale a mais recente
+- O lote inteiro numa chamada à RPC aplicar_transicoes_status
+  (sql/criar_rpc_transicoes_status.sql)
+
+O barramento entrega pelo menos uma vez e uma transição pode chegar depois
+de uma mais nova (ex: pendente recuperado do outbox). A RPC só aplica a
+transição se o `criado_em` do evento for mais recente que o da última
+aplicada ao cliente. Sem a RPC, volta ao UPDATE por status (um por grupo
+de clientes que vão para o mesmo status na mesma loja), sem essa
+verificação.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.auth import User
+from core.database import get_database
+from core.eventos import Evento, barramento_eventos
+
+from .repository import ClienteRepository
+from ..status_orcamento.repository import StatusOrcamentoRepository
+
+logger = logging.getLogger(__name__)
+
+EVENTO_TRANSICAO_STATUS = 'cliente.transicao_status'
+
+
+async def publicar_transicao_status(cliente_id: str, ordem: int, user: User) -> Optional[Evento]:
+    """
+    Agenda a mudança do cliente para o status de ordem `ordem`
+
+    Espera só a gravação do evento no outbox (um INSERT), não a transição.
+
+    Returns:
+        O evento publicado, ou None se não foi publicado (usuário sem loja ou fila cheia)
+    """
+    if not user.loja_id:
+        logger.warning(f"Transição de status do cliente {cliente_id} ignorada: usuário {user.id} sem loja")
+        return None
+
+    return await barramento_eventos.publicar(
+        EVENTO_TRANSICAO_STATUS,
+        {'cliente_id': str(cliente_id), 'ordem': ordem, 'loja_id': str(user.loja_id), 'usuario_id': user.id},
+        chave=str(cliente_id)
+    )
+
+
+async def aplicar_transicoes_status(eventos: List[Evento]) -> None:
+    """Handler do evento `cliente.transicao_status` (lote já coalescido por cliente)"""
+    db = get_database()
+    status_repository = StatusOrcamentoRepository(db)
+    cliente_repository = ClienteRepository(db)
+
+    transicoes: List[Dict[str, Any]] = []
+    for evento in eventos:
+        ordem = evento.dados['ordem']
+        # Catálogo em memória: sem ida ao banco por evento
+        status = await status_repository.buscar_por_ordem(ordem)
+        if not status:
+            # Não adianta tentar de novo: descarta
+            logger.warning(f"Status de ordem {ordem} não encontrado - cliente {evento.dados['cliente_id']} mantido")
+            continue
+        transicoes.append({
+            'cliente_id': evento.dados['cliente_id'],
+            'status_id': str(status['id']),
+            'loja_id': evento.dados['loja_id'],
+            'transicao_em': evento.criado_em.isoformat()
+        })
+    if not transicoes:
+        return
+
+    atualizados = await cliente_repository.aplicar_transicoes_status(transicoes)
+    if atualizados is not None:
+        logger.info(f"Transições de status aplicadas a {atualizados}/{len(transicoes)} clientes")
+        return
+
+    grupos: Dict[Tuple[str, str], List[str]] = {}
+    for transicao in transicoes:
+        grupos.setdefault((transicao['status_id'], transicao['loja_id']), []).append(transicao['cliente_id'])
+
+    for (status_id, loja_id), cliente_ids in grupos.items():
+        atualizados = await cliente_repository.atualizar_status_em_lote(cliente_ids, status_id, loja_id)
+        logger.info(f"Status {status_id} aplicado a {atualizados}/{len(cliente_ids)} clientes da loja {loja_id}")
+
+
+barramento_eventos.assinar(EVENTO_TRANSICAO_STATUS, aplicar_transicoes_status)
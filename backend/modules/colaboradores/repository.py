@@ -6,7 +6,7 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from supabase import Client
+from core.database import AsyncDatabase
 from core.exceptions import NotFoundException, DatabaseException, ConflictException
 
 logger = logging.getLogger(__name__)
@@ -17,7 +17,7 @@ class TipoColaboradorRepository:
     Classe responsável por acessar a tabela de tipos de colaboradores no Supabase
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
@@ -264,7 +264,7 @@ class ColaboradorRepository:
     Classe responsável por acessar a tabela de colaboradores individuais no Supabase
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
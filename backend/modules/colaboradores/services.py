@@ -6,7 +6,7 @@ import logging
 from typing import Dict, Any, Optional
 
 from core.database import get_database
-from core.auth import User
+from core.auth import User, invalidar_usuario_cache, CAMPOS_USUARIO_CACHE
 from core.dependencies import PaginationParams
 from core.exceptions import ValidationException, NotFoundException
 
@@ -510,6 +510,10 @@ class ColaboradorService:
             # Busca o colaborador atualizado
             colaborador_atualizado = await repository.buscar_por_id(colaborador_id, user.perfil)
             
+            # Permissões do usuário mudaram: descarta o usuário em cache
+            if any(campo in dados_atualizacao for campo in CAMPOS_USUARIO_CACHE):
+                invalidar_usuario_cache(email=colaborador_atualizado.get('email'))
+            
             logger.info(f"Colaborador atualizado: {colaborador_id}")
             
             return ColaboradorResponse(**colaborador_atualizado)
@@ -538,10 +542,13 @@ class ColaboradorService:
             db = get_database()
             repository = ColaboradorRepository(db)
             
+            colaborador = await repository.buscar_por_id(colaborador_id, user.perfil)
+            
             # Desativa o colaborador (soft delete)
             sucesso = await repository.desativar(colaborador_id)
             
             if sucesso:
+                invalidar_usuario_cache(email=colaborador.get('email'))
                 logger.info(f"Colaborador desativado: {colaborador_id}")
             
             return sucesso
@@ -45,7 +45,7 @@ async def listar_regras_comissao(
     if busca:
         filtros['busca'] = busca
     
-    return service.listar_regras(filtros, page, limit)
+    return await service.listar_regras(filtros, page, limit)
 
 
 @router.get("/{regra_id}", response_model=RegraComissaoResponse)
@@ -56,7 +56,7 @@ async def buscar_regra_comissao(
 ):
     """Busca regra de comissão por ID"""
     service = ComissoesService(db)
-    regra = service.buscar_por_id(regra_id)
+    regra = await service.buscar_por_id(regra_id)
     
     if not regra:
         raise HTTPException(status_code=404, detail="Regra não encontrada")
@@ -72,7 +72,7 @@ async def criar_regra_comissao(
 ):
     """Cria nova regra de comissão"""
     service = ComissoesService(db)
-    return service.criar_regra(dados)
+    return await service.criar_regra(dados)
 
 
 @router.put("/{regra_id}", response_model=RegraComissaoResponse)
@@ -84,7 +84,7 @@ async def atualizar_regra_comissao(
 ):
     """Atualiza regra de comissão existente"""
     service = ComissoesService(db)
-    regra = service.atualizar_regra(regra_id, dados)
+    regra = await service.atualizar_regra(regra_id, dados)
     
     if not regra:
         raise HTTPException(status_code=404, detail="Regra não encontrada")
@@ -100,7 +100,7 @@ async def excluir_regra_comissao(
 ):
     """Exclui regra de comissão (soft delete)"""
     service = ComissoesService(db)
-    sucesso = service.excluir_regra(regra_id)
+    sucesso = await service.excluir_regra(regra_id)
     
     if not sucesso:
         raise HTTPException(status_code=404, detail="Regra não encontrada")
@@ -114,7 +114,7 @@ async def calcular_comissao(
 ):
     """Calcula comissão para um valor específico"""
     service = ComissoesService(db)
-    resultado = service.calcular_comissao(dados.valor, dados.tipo_comissao, dados.loja_id)
+    resultado = await service.calcular_comissao(dados.valor, dados.tipo_comissao, dados.loja_id)
     
     if not resultado:
         raise HTTPException(
@@ -133,7 +133,7 @@ async def alternar_status_regra(
 ):
     """Alterna status ativo/inativo da regra"""
     service = ComissoesService(db)
-    regra = service.alternar_status(regra_id)
+    regra = await service.alternar_status(regra_id)
     
     if not regra:
         raise HTTPException(status_code=404, detail="Regra não encontrada")
@@ -149,4 +149,4 @@ async def listar_tipos_por_loja(
 ):
     """Lista tipos de comissão disponíveis para uma loja"""
     service = ComissoesService(db)
-    return service.listar_tipos_por_loja(loja_id)
\ No newline at end of file
+    return await service.listar_tipos_por_loja(loja_id)
\ No newline at end of file
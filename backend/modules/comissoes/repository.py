@@ -3,24 +3,26 @@ Repository para regras de comissão
 Gerencia acesso aos dados na tabela c_config_regras_comissao_faixa
 """
 
-from supabase import Client
+from core.database import AsyncDatabase
 from typing import Optional, Dict, Any, List
 from uuid import UUID
 
 from core.exceptions import DatabaseException, NotFoundException
+from core.lojas_cache import buscar_nomes_lojas
 
 
 class ComissoesRepository:
     """Repository para operações de regras de comissão"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.table = "c_config_regras_comissao_faixa"
     
-    def listar(self, filtros: Dict[str, Any] = None, page: int = 1, limit: int = 20) -> tuple[List[Dict], int]:
+    async def listar(self, filtros: Dict[str, Any] = None, page: int = 1, limit: int = 20) -> tuple[List[Dict], int]:
         """Lista regras de comissão com filtros e paginação"""
         try:
-            query = self.db.table(self.table).select("*")
+            # Total vem no mesmo request da página (Content-Range)
+            query = self.db.table(self.table).select("*", count="exact")
             
             # Aplicar filtros
             if filtros:
@@ -35,65 +37,56 @@ class ComissoesRepository:
                     busca = filtros['busca'].lower()
                     query = query.or_(f"tipo_comissao.ilike.%{busca}%,percentual::text.ilike.%{busca}%")
             
-            # Contar total de registros
-            count_response = query.execute()
-            total = len(count_response.data) if count_response.data else 0
-            
             # Aplicar ordenação e paginação
             offset = (page - 1) * limit
             query = query.order("tipo_comissao,ordem").range(offset, offset + limit - 1)
             
-            response = query.execute()
+            response = await query.execute()
+            total = response.count or 0
             
-            # Enriquecer dados com nome da loja
-            regras = []
-            for regra in response.data:
-                regra_enriquecida = regra.copy()
-                
-                # Buscar nome da loja
-                try:
-                    loja = self.db.table("c_lojas").select("nome").eq("id", regra["loja_id"]).limit(1).execute()
-                    if loja.data and len(loja.data) > 0:
-                        regra_enriquecida["loja_nome"] = loja.data[0]["nome"]
-                    else:
-                        regra_enriquecida["loja_nome"] = "Loja Não Encontrada"
-                except:
-                    regra_enriquecida["loja_nome"] = "Erro ao buscar loja"
-                
-                regras.append(regra_enriquecida)
+            regras = await self._enriquecer_loja_nome(response.data or [])
             
             return regras, total
             
         except Exception as e:
             raise DatabaseException(f"Erro ao listar regras de comissão: {str(e)}")
     
-    def buscar_por_id(self, regra_id: str) -> Optional[Dict[str, Any]]:
+    async def buscar_por_id(self, regra_id: str) -> Optional[Dict[str, Any]]:
         """Busca regra por ID"""
         try:
-            response = self.db.table(self.table).select("*").eq("id", regra_id).limit(1).execute()
+            response = await self.db.table(self.table).select("*").eq("id", regra_id).limit(1).execute()
             
             if response.data and len(response.data) > 0:
-                regra = response.data[0]
-                
-                # Buscar nome da loja
-                try:
-                    loja = self.db.table("c_lojas").select("nome").eq("id", regra["loja_id"]).limit(1).execute()
-                    if loja.data and len(loja.data) > 0:
-                        regra["loja_nome"] = loja.data[0]["nome"]
-                except:
-                    regra["loja_nome"] = "Erro ao buscar loja"
-                
-                return regra
+                regras = await self._enriquecer_loja_nome(response.data[:1])
+                return regras[0]
             
             return None
             
         except Exception as e:
             raise DatabaseException(f"Erro ao buscar regra: {str(e)}")
     
-    def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
+    async def _enriquecer_loja_nome(self, regras: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Adiciona `loja_nome` às regras com uma única busca de lojas (sem N+1)"""
+        try:
+            nomes = await buscar_nomes_lojas(self.db, (regra.get("loja_id") for regra in regras))
+        except Exception:
+            nomes = None
+        
+        enriquecidas = []
+        for regra in regras:
+            regra_enriquecida = regra.copy()
+            if nomes is None:
+                regra_enriquecida["loja_nome"] = "Erro ao buscar loja"
+            else:
+                regra_enriquecida["loja_nome"] = nomes.get(str(regra.get("loja_id")), "Loja Não Encontrada")
+            enriquecidas.append(regra_enriquecida)
+        
+        return enriquecidas
+    
+    async def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Cria nova regra de comissão"""
         try:
-            response = self.db.table(self.table).insert(dados).execute()
+            response = await self.db.table(self.table).insert(dados).execute()
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -103,11 +96,11 @@ class ComissoesRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao criar regra de comissão: {str(e)}")
     
-    def atualizar(self, regra_id: str, dados: Dict[str, Any]) -> Dict[str, Any]:
+    async def atualizar(self, regra_id: str, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza regra existente"""
         try:
             response = (
-                self.db.table(self.table)
+                await self.db.table(self.table)
                 .update(dados)
                 .eq("id", regra_id)
                 .execute()
@@ -123,11 +116,11 @@ class ComissoesRepository:
                 raise NotFoundException(f"Regra com ID {regra_id} não encontrada")
             raise DatabaseException(f"Erro ao atualizar regra: {str(e)}")
     
-    def excluir(self, regra_id: str) -> bool:
+    async def excluir(self, regra_id: str) -> bool:
         """Soft delete - marca regra como inativa"""
         try:
             response = (
-                self.db.table(self.table)
+                await self.db.table(self.table)
                 .update({"ativo": False})
                 .eq("id", regra_id)
                 .execute()
@@ -138,11 +131,11 @@ class ComissoesRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao excluir regra: {str(e)}")
     
-    def buscar_regras_ativas_por_tipo(self, tipo_comissao: str, loja_id: str) -> List[Dict[str, Any]]:
+    async def buscar_regras_ativas_por_tipo(self, tipo_comissao: str, loja_id: str) -> List[Dict[str, Any]]:
         """Busca regras ativas por tipo para cálculo de comissão"""
         try:
             response = (
-                self.db.table(self.table)
+                await self.db.table(self.table)
                 .select("*")
                 .eq("tipo_comissao", tipo_comissao)
                 .eq("loja_id", loja_id)
@@ -156,7 +149,7 @@ class ComissoesRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao buscar regras ativas: {str(e)}")
     
-    def verificar_sobreposicao(self, dados: Dict[str, Any], regra_id: str = None) -> bool:
+    async def verificar_sobreposicao(self, dados: Dict[str, Any], regra_id: str = None) -> bool:
         """Verifica se há sobreposição de faixas de valores"""
         try:
             query = (
@@ -171,7 +164,7 @@ class ComissoesRepository:
             if regra_id:
                 query = query.neq("id", regra_id)
             
-            response = query.execute()
+            response = await query.execute()
             
             if not response.data:
                 return False
@@ -200,11 +193,11 @@ class ComissoesRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao verificar sobreposição: {str(e)}")
     
-    def obter_proxima_ordem(self, tipo_comissao: str, loja_id: str) -> int:
+    async def obter_proxima_ordem(self, tipo_comissao: str, loja_id: str) -> int:
         """Obtém próximo número de ordem para o tipo de comissão"""
         try:
             response = (
-                self.db.table(self.table)
+                await self.db.table(self.table)
                 .select("ordem")
                 .eq("tipo_comissao", tipo_comissao)
                 .eq("loja_id", loja_id)
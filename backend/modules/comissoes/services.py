@@ -3,12 +3,13 @@ Service para Regras de Comissão
 Contém lógica de negócio para gerenciamento de comissões
 """
 
-from supabase import Client
+from core.database import AsyncDatabase
 from typing import Dict, Any, List, Optional
 from uuid import UUID
 from datetime import datetime
 
 from core.exceptions import ValidationException, BusinessRuleException
+from core.monetario import centavos_para_float, para_centavos, percentual_centavos
 from .repository import ComissoesRepository
 from .schemas import (
     RegraComissaoCreate,
@@ -22,12 +23,12 @@ from .schemas import (
 class ComissoesService:
     """Service para gerenciar regras de comissão"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         self.repository = ComissoesRepository(db)
     
-    def listar_regras(self, filtros: Dict[str, Any] = None, page: int = 1, limit: int = 20) -> RegraComissaoListResponse:
+    async def listar_regras(self, filtros: Dict[str, Any] = None, page: int = 1, limit: int = 20) -> RegraComissaoListResponse:
         """Lista regras de comissão com filtros"""
-        regras, total = self.repository.listar(filtros, page, limit)
+        regras, total = await self.repository.listar(filtros, page, limit)
         
         # Converter para response models
         items = [RegraComissaoResponse(**self._converter_para_frontend(regra)) for regra in regras]
@@ -42,26 +43,26 @@ class ComissoesService:
             pages=pages
         )
     
-    def buscar_por_id(self, regra_id: str) -> Optional[RegraComissaoResponse]:
+    async def buscar_por_id(self, regra_id: str) -> Optional[RegraComissaoResponse]:
         """Busca regra por ID"""
-        regra = self.repository.buscar_por_id(regra_id)
+        regra = await self.repository.buscar_por_id(regra_id)
         
         if regra:
             return RegraComissaoResponse(**self._converter_para_frontend(regra))
         
         return None
     
-    def criar_regra(self, dados: RegraComissaoCreate) -> RegraComissaoResponse:
+    async def criar_regra(self, dados: RegraComissaoCreate) -> RegraComissaoResponse:
         """Cria nova regra de comissão"""
         # Validações de negócio
         self._validar_regra_comissao(dados.model_dump())
         
         # Verificar sobreposição
-        if self.repository.verificar_sobreposicao(dados.model_dump()):
+        if await self.repository.verificar_sobreposicao(dados.model_dump()):
             raise ValidationException("Existe sobreposição com outra regra ativa do mesmo tipo")
         
         # Gerar próxima ordem automaticamente
-        ordem = self.repository.obter_proxima_ordem(dados.tipo_comissao, str(dados.loja_id))
+        ordem = await self.repository.obter_proxima_ordem(dados.tipo_comissao, str(dados.loja_id))
         
         # Converter para formato do banco
         dados_banco = self._converter_para_banco(dados.model_dump())
@@ -69,14 +70,14 @@ class ComissoesService:
         dados_banco['created_at'] = datetime.now().isoformat()
         dados_banco['updated_at'] = datetime.now().isoformat()
         
-        regra_criada = self.repository.criar(dados_banco)
+        regra_criada = await self.repository.criar(dados_banco)
         
         return RegraComissaoResponse(**self._converter_para_frontend(regra_criada))
     
-    def atualizar_regra(self, regra_id: str, dados: RegraComissaoUpdate) -> Optional[RegraComissaoResponse]:
+    async def atualizar_regra(self, regra_id: str, dados: RegraComissaoUpdate) -> Optional[RegraComissaoResponse]:
         """Atualiza regra existente"""
         # Buscar regra atual
-        regra_atual = self.repository.buscar_por_id(regra_id)
+        regra_atual = await self.repository.buscar_por_id(regra_id)
         if not regra_atual:
             return None
         
@@ -90,25 +91,25 @@ class ComissoesService:
             self._validar_regra_comissao(dados_completos)
             
             # Verificar sobreposição (excluindo regra atual)
-            if self.repository.verificar_sobreposicao(dados_completos, regra_id):
+            if await self.repository.verificar_sobreposicao(dados_completos, regra_id):
                 raise ValidationException("Existe sobreposição com outra regra ativa do mesmo tipo")
             
             # Converter para formato do banco
             dados_banco = self._converter_para_banco(dados_atualizacao)
             dados_banco['updated_at'] = datetime.now().isoformat()
             
-            regra_atualizada = self.repository.atualizar(regra_id, dados_banco)
+            regra_atualizada = await self.repository.atualizar(regra_id, dados_banco)
             return RegraComissaoResponse(**self._converter_para_frontend(regra_atualizada))
         
         return RegraComissaoResponse(**self._converter_para_frontend(regra_atual))
     
-    def excluir_regra(self, regra_id: str) -> bool:
+    async def excluir_regra(self, regra_id: str) -> bool:
         """Exclui regra (soft delete)"""
-        return self.repository.excluir(regra_id)
+        return await self.repository.excluir(regra_id)
     
-    def alternar_status(self, regra_id: str) -> Optional[RegraComissaoResponse]:
+    async def alternar_status(self, regra_id: str) -> Optional[RegraComissaoResponse]:
         """Alterna status ativo/inativo"""
-        regra = self.repository.buscar_por_id(regra_id)
+        regra = await self.repository.buscar_por_id(regra_id)
         if not regra:
             return None
         
@@ -118,24 +119,24 @@ class ComissoesService:
             'updated_at': datetime.now().isoformat()
         }
         
-        regra_atualizada = self.repository.atualizar(regra_id, dados_atualizacao)
+        regra_atualizada = await self.repository.atualizar(regra_id, dados_atualizacao)
         return RegraComissaoResponse(**self._converter_para_frontend(regra_atualizada))
     
-    def calcular_comissao(self, valor: float, tipo_comissao: str, loja_id: UUID) -> Optional[CalculoComissaoResponse]:
+    async def calcular_comissao(self, valor: float, tipo_comissao: str, loja_id: UUID) -> Optional[CalculoComissaoResponse]:
         """Calcula comissão para um valor específico"""
-        regras = self.repository.buscar_regras_ativas_por_tipo(tipo_comissao, str(loja_id))
+        regras = await self.repository.buscar_regras_ativas_por_tipo(tipo_comissao, str(loja_id))
+        
+        # Faixas e comissão em centavos (sem erro de float nos limites)
+        valor_centavos = para_centavos(valor)
         
         # Encontrar regra aplicável
         for regra in regras:
-            valor_min = regra['valor_minimo']
-            valor_max = regra['valor_maximo']
-            
+            valor_min = para_centavos(regra['valor_minimo']) or 0
             # Se valor_maximo é None, considerar infinito
-            if valor_max is None:
-                valor_max = float('inf')
+            valor_max = para_centavos(regra['valor_maximo'])
             
-            if valor_min <= valor <= valor_max:
-                valor_comissao = (valor * regra['percentual']) / 100
+            if valor_min <= valor_centavos and (valor_max is None or valor_centavos <= valor_max):
+                valor_comissao = centavos_para_float(percentual_centavos(valor_centavos, regra['percentual']))
                 
                 return CalculoComissaoResponse(
                     valor_venda=valor,
@@ -147,9 +148,9 @@ class ComissoesService:
         
         return None
     
-    def listar_tipos_por_loja(self, loja_id: UUID) -> List[str]:
+    async def listar_tipos_por_loja(self, loja_id: UUID) -> List[str]:
         """Lista tipos de comissão únicos para uma loja"""
-        regras, _ = self.repository.listar({'loja_id': loja_id, 'ativo': True})
+        regras, _ = await self.repository.listar({'loja_id': loja_id, 'ativo': True})
         tipos = list(set(regra['tipo_comissao'] for regra in regras))
         return sorted(tipos)
     
@@ -68,7 +68,7 @@ async def verificar_store_configuracao(
     - **store_id**: ID da loja
     - **Retorna**: {existe: bool, config: dados}
     """
-    result = service.verificar_store_configuracao(store_id)
+    result = await service.verificar_store_configuracao(store_id)
     return {
         "success": True,
         "data": result
@@ -90,7 +90,7 @@ async def desativar_configuracao(
     - **config_id**: ID da configuração
     - **Retorna**: 204 No Content em caso de sucesso
     """
-    if not service.desativar_configuracao(config_id, current_user.id, current_user.perfil):
+    if not await service.desativar_configuracao(config_id, current_user.id, current_user.perfil):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Configuração não encontrada"
@@ -111,7 +111,7 @@ async def obter_config_por_id(
     - **config_id**: ID da configuração
     - **Retorna**: Dados completos da configuração
     """
-    result = service.obter_por_id(config_id, current_user.perfil)
+    result = await service.obter_por_id(config_id, current_user.perfil)
     return result
 
 
@@ -140,7 +140,7 @@ async def listar_configuracoes(
             detail="Sem permissão para listar configurações"
         )
     
-    configs, total = service.listar(store_id, limit, page, current_user.perfil)
+    configs, total = await service.listar(store_id, limit, page, current_user.perfil)
     
     return {
         "success": True,
@@ -170,7 +170,7 @@ async def criar_configuracao(
     - **store_id**: ID da loja (deve ser única)
     - **Retorna**: Configuração criada
     """
-    result = service.criar(dados, current_user.id)
+    result = await service.criar(dados, current_user.id)
     return result
 
 
@@ -192,7 +192,7 @@ async def atualizar_configuracao(
     - **Campos**: Todos opcionais, envia apenas o que deseja alterar
     - **Retorna**: Configuração atualizada
     """
-    result = service.atualizar(config_id, dados, current_user.id)
+    result = await service.atualizar(config_id, dados, current_user.id)
     return result
 
 
@@ -210,7 +210,7 @@ async def deletar_configuracao(
     - **config_id**: ID da configuração
     - **Retorna**: 204 No Content em caso de sucesso
     """
-    if not service.deletar(config_id, current_user.id):
+    if not await service.deletar(config_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Configuração não encontrada"
@@ -232,5 +232,5 @@ async def criar_config_padrao(
     - **store_id**: ID da loja
     - **Retorna**: Configuração existente ou nova criada com valores padrão
     """
-    result = service.obter_ou_criar_padrao(store_id, current_user.id)
+    result = await service.obter_ou_criar_padrao(store_id, current_user.id)
     return result
\ No newline at end of file
@@ -3,26 +3,27 @@ Repository para configurações de loja
 Gerencia acesso aos dados de configuração no banco de dados
 """
 
-from supabase import Client
-from typing import Optional, Dict, Any
+from core.database import AsyncDatabase
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 from datetime import datetime
 
 from core.exceptions import DatabaseException, NotFoundException
+from core.lojas_cache import buscar_nomes_lojas
 
 
 class ConfigLojaRepository:
     """Repository para operações de configuração de loja"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.table = "c_config_loja"
     
-    def buscar_por_loja(self, store_id: str) -> Optional[Dict[str, Any]]:
+    async def buscar_por_loja(self, store_id: str) -> Optional[Dict[str, Any]]:
         """Busca configuração por ID da loja"""
         try:
             # Busca configuração simples (sem JOIN para evitar problemas)
-            response = self.db.table(self.table).select("*").eq("loja_id", store_id).limit(1).execute()
+            response = await self.db.table(self.table).select("*").eq("loja_id", store_id).limit(1).execute()
             
             if response.data and len(response.data) > 0:
                 config = response.data[0]
@@ -31,15 +32,8 @@ class ConfigLojaRepository:
                 if "loja_id" in config:
                     config["store_id"] = config["loja_id"]
                 
-                # Buscar nome da loja separadamente
-                try:
-                    loja = self.db.table("c_lojas").select("nome").eq("id", store_id).limit(1).execute()
-                    if loja.data and len(loja.data) > 0:
-                        config["store_name"] = loja.data[0]["nome"]
-                    else:
-                        config["store_name"] = "Loja Não Encontrada"
-                except:
-                    config["store_name"] = "Erro ao buscar loja"
+                # Nome da loja via cache compartilhado
+                await self._preencher_store_name([config])
                 return config
             
             return None
@@ -49,10 +43,10 @@ class ConfigLojaRepository:
                 return None
             raise DatabaseException(f"Erro ao buscar configuração: {str(e)}")
     
-    def buscar_por_id(self, config_id: str, user_perfil: str = "USER") -> Optional[Dict[str, Any]]:
+    async def buscar_por_id(self, config_id: str, user_perfil: str = "USER") -> Optional[Dict[str, Any]]:
         """Busca configuração por ID"""
         try:
-            response = self.db.table(self.table).select("*").eq("id", config_id).limit(1).execute()
+            response = await self.db.table(self.table).select("*").eq("id", config_id).limit(1).execute()
             
             if response.data and len(response.data) > 0:
                 config = response.data[0]
@@ -61,19 +55,8 @@ class ConfigLojaRepository:
                 if "loja_id" in config:
                     config["store_id"] = config["loja_id"]
                 
-                # Buscar nome da loja separadamente
-                try:
-                    loja_id = config.get("loja_id") or config.get("store_id")
-                    if loja_id:
-                        loja = self.db.table("c_lojas").select("nome").eq("id", loja_id).limit(1).execute()
-                        if loja.data and len(loja.data) > 0:
-                            config["store_name"] = loja.data[0]["nome"]
-                        else:
-                            config["store_name"] = "Loja Não Encontrada"
-                    else:
-                        config["store_name"] = "Sem Loja Associada"
-                except:
-                    config["store_name"] = "Erro ao buscar loja"
+                # Nome da loja via cache compartilhado
+                await self._preencher_store_name([config])
                 return config
             
             return None
@@ -83,7 +66,7 @@ class ConfigLojaRepository:
                 return None
             raise DatabaseException(f"Erro ao buscar configuração: {str(e)}")
     
-    def listar(
+    async def listar(
         self, 
         filtros: Optional[Dict[str, Any]] = None,
         page: int = 1,
@@ -115,7 +98,7 @@ class ConfigLojaRepository:
             query = query.order("created_at", desc=True)
             query = query.range(offset, offset + limit - 1)
             
-            response = query.execute()
+            response = await query.execute()
             
             # Mapear dados diretos (colunas já estão em inglês)
             configs = []
@@ -138,16 +121,35 @@ class ConfigLojaRepository:
                 }
                 configs.append(config_mapeado)
             
+            # Nomes das lojas da página inteira em uma única busca
+            await self._preencher_store_name(configs)
+            
             return configs, response.count or 0
             
         except Exception as e:
             raise DatabaseException(f"Erro ao listar configurações: {str(e)}")
     
-    def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
+    async def _preencher_store_name(self, configs: List[Dict[str, Any]]) -> None:
+        """Preenche `store_name` com uma única busca de lojas (sem N+1)"""
+        try:
+            nomes = await buscar_nomes_lojas(self.db, (config.get("store_id") for config in configs))
+        except Exception:
+            for config in configs:
+                config["store_name"] = "Erro ao buscar loja"
+            return
+        
+        for config in configs:
+            store_id = config.get("store_id")
+            if store_id:
+                config["store_name"] = nomes.get(str(store_id), "Loja Não Encontrada")
+            else:
+                config["store_name"] = "Sem Loja Associada"
+    
+    async def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Cria nova configuração de loja"""
         try:
             
-            response = self.db.table(self.table).insert(dados).execute()
+            response = await self.db.table(self.table).insert(dados).execute()
             
             if not response.data:
                 raise DatabaseException("Falha ao criar configuração")
@@ -157,7 +159,7 @@ class ConfigLojaRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao criar configuração: {str(e)}")
     
-    def atualizar(self, config_id: str, dados: Dict[str, Any]) -> Dict[str, Any]:
+    async def atualizar(self, config_id: str, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza configuração existente"""
         try:
             # Remove campos None
@@ -169,7 +171,7 @@ class ConfigLojaRepository:
             # Adiciona timestamp de atualização
             dados_limpos["updated_at"] = datetime.utcnow().isoformat()
             
-            response = self.db.table(self.table).update(dados_limpos).eq(
+            response = await self.db.table(self.table).update(dados_limpos).eq(
                 "id", config_id
             ).execute()
             
@@ -183,10 +185,10 @@ class ConfigLojaRepository:
                 raise
             raise DatabaseException(f"Erro ao atualizar configuração: {str(e)}")
     
-    def deletar(self, config_id: str) -> bool:
+    async def deletar(self, config_id: str) -> bool:
         """Remove configuração (hard delete)"""
         try:
-            response = self.db.table(self.table).delete().eq(
+            response = await self.db.table(self.table).delete().eq(
                 "id", config_id
             ).execute()
             
@@ -195,10 +197,10 @@ class ConfigLojaRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao deletar configuração: {str(e)}")
     
-    def desativar(self, config_id: str) -> bool:
+    async def desativar(self, config_id: str) -> bool:
         """Desativa configuração (soft delete)"""
         try:
-            response = self.db.table(self.table).update({
+            response = await self.db.table(self.table).update({
                 "ativo": False,
                 "updated_at": "now()"
             }).eq("id", config_id).execute()
@@ -208,10 +210,10 @@ class ConfigLojaRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao desativar configuração: {str(e)}")
     
-    def verificar_loja_tem_config(self, store_id: str) -> bool:
+    async def verificar_loja_tem_config(self, store_id: str) -> bool:
         """Verifica se a loja já tem configuração"""
         try:
-            response = self.db.table(self.table).select("id").eq(
+            response = await self.db.table(self.table).select("id").eq(
                 "loja_id", store_id
             ).execute()
             
@@ -220,10 +222,10 @@ class ConfigLojaRepository:
         except Exception as e:
             raise DatabaseException(f"Erro ao verificar configuração: {str(e)}")
     
-    def verificar_store_tem_config(self, store_id: str) -> Dict[str, Any]:
+    async def verificar_store_tem_config(self, store_id: str) -> Dict[str, Any]:
         """Verifica se store já tem configuração e retorna detalhes"""
         try:
-            response = self.db.table(self.table).select(
+            response = await self.db.table(self.table).select(
                 "id, loja_id, created_at"
             ).eq("loja_id", store_id).execute()
             
@@ -14,6 +14,7 @@ from .schemas import (
     ConfigLojaValidation
 )
 from core.exceptions import ValidationException, ConflictException, NotFoundException
+from ..orcamentos.numeracao import numeracao_orcamento
 
 
 class ConfigLojaService:
@@ -24,23 +25,23 @@ class ConfigLojaService:
     
     async def obter_por_loja(self, store_id: UUID) -> Optional[ConfigLojaResponse]:
         """Obtém configuração de uma loja específica"""
-        config = self.repository.buscar_por_loja(str(store_id))
+        config = await self.repository.buscar_por_loja(str(store_id))
         
         if not config:
             return None
         
         return ConfigLojaResponse(**config)
     
-    def obter_por_id(self, config_id: UUID, user_perfil: str = "USER") -> ConfigLojaResponse:
+    async def obter_por_id(self, config_id: UUID, user_perfil: str = "USER") -> ConfigLojaResponse:
         """Obtém configuração por ID"""
-        config = self.repository.buscar_por_id(str(config_id), user_perfil)
+        config = await self.repository.buscar_por_id(str(config_id), user_perfil)
         
         if not config:
             raise NotFoundException("Configuração não encontrada")
         
         return ConfigLojaResponse(**config)
     
-    def listar(
+    async def listar(
         self,
         store_id: Optional[UUID] = None,
         limit: int = 20,
@@ -60,17 +61,17 @@ class ConfigLojaService:
             filtros["store_id"] = str(store_id)
         
         # Buscar dados
-        configs, total = self.repository.listar(filtros, page, limit, user_perfil)
+        configs, total = await self.repository.listar(filtros, page, limit, user_perfil)
         
         # Converter para response
         configs_response = [ConfigLojaResponse(**config) for config in configs]
         
         return configs_response, total
     
-    def criar(self, dados: ConfigLojaCreate, user_id: str) -> ConfigLojaResponse:
+    async def criar(self, dados: ConfigLojaCreate, user_id: str) -> ConfigLojaResponse:
         """Cria nova configuração de loja"""
         # Validar se loja já tem configuração
-        if self.repository.verificar_loja_tem_config(str(dados.store_id)):
+        if await self.repository.verificar_loja_tem_config(str(dados.store_id)):
             raise ConflictException(
                 "Esta loja já possui configuração. Use o endpoint de atualização."
             )
@@ -89,12 +90,12 @@ class ConfigLojaService:
         dados_dict = dados.model_dump(mode='json')
         
         # Criar configuração
-        config_criada = self.repository.criar(dados_dict)
+        config_criada = await self.repository.criar(dados_dict)
         
         # Buscar com JOIN para retornar completo (convertendo UUID para string)
-        return self.obter_por_id(str(config_criada["id"]))
+        return await self.obter_por_id(str(config_criada["id"]))
     
-    def atualizar(
+    async def atualizar(
         self, 
         config_id: UUID, 
         dados: ConfigLojaUpdate,
@@ -102,7 +103,7 @@ class ConfigLojaService:
     ) -> ConfigLojaResponse:
         """Atualiza configuração existente"""
         # Verificar se existe
-        config_atual = self.obter_por_id(config_id)
+        config_atual = await self.obter_por_id(config_id)
         
         # Preparar dados para update
         dados_update = dados.model_dump(mode='json', exclude_unset=True)
@@ -138,23 +139,27 @@ class ConfigLojaService:
                 raise ValidationException("\n".join(erros))
         
         # Atualizar no banco
-        self.repository.atualizar(str(config_id), dados_update)
+        await self.repository.atualizar(str(config_id), dados_update)
+        
+        # Números já reservados em memória usam o formato antigo
+        if any(k in dados_update for k in ["initial_number", "number_format", "number_prefix"]):
+            numeracao_orcamento.descartar_blocos(str(config_atual.store_id))
         
         # Retornar atualizado
-        return self.obter_por_id(config_id)
+        return await self.obter_por_id(config_id)
     
-    def deletar(self, config_id: UUID, user_id: str) -> bool:
+    async def deletar(self, config_id: UUID, user_id: str) -> bool:
         """Remove configuração (apenas SUPER_ADMIN)"""
         # Verificar se existe
-        self.obter_por_id(config_id)
+        await self.obter_por_id(config_id)
         
         # Deletar
-        return self.repository.deletar(str(config_id))
+        return await self.repository.deletar(str(config_id))
     
-    def obter_ou_criar_padrao(self, store_id: UUID, user_id: str) -> ConfigLojaResponse:
+    async def obter_ou_criar_padrao(self, store_id: UUID, user_id: str) -> ConfigLojaResponse:
         """Obtém configuração existente ou cria uma padrão"""
         # Tentar obter existente
-        config = self.obter_por_loja(store_id)
+        config = await self.obter_por_loja(store_id)
         if config:
             return config
         
@@ -173,20 +178,20 @@ class ConfigLojaService:
             number_prefix="ORC"
         )
         
-        return self.criar(config_padrao, user_id)
+        return await self.criar(config_padrao, user_id)
     
-    def desativar_configuracao(self, config_id: UUID, user_id: str, user_perfil: str) -> bool:
+    async def desativar_configuracao(self, config_id: UUID, user_id: str, user_perfil: str) -> bool:
         """Desativa configuração (apenas SUPER_ADMIN)"""
         # Verificar permissão
         if user_perfil != "SUPER_ADMIN":
             raise ValidationException("Apenas SUPER_ADMIN pode desativar configurações")
         
         # Verificar se existe
-        self.obter_por_id(config_id, user_perfil)
+        await self.obter_por_id(config_id, user_perfil)
         
         # Desativar
-        return self.repository.desativar(str(config_id))
+        return await self.repository.desativar(str(config_id))
     
-    def verificar_store_configuracao(self, store_id: UUID) -> Dict[str, Any]:
+    async def verificar_store_configuracao(self, store_id: UUID) -> Dict[str, Any]:
         """Verifica se store já possui configuração"""
-        return self.repository.verificar_store_tem_config(str(store_id))
\ No newline at end of file
+        return await self.repository.verificar_store_tem_config(str(store_id))
\ No newline at end of file
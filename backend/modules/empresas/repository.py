@@ -6,8 +6,8 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from supabase import Client
-from core.exceptions import NotFoundException, DatabaseException, ConflictException
+from core.database import AsyncDatabase, DatabaseUtils
+from core.exceptions import NotFoundException, DatabaseException, ConflictException, ValidationException
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,7 @@ class EmpresaRepository:
     Classe responsável por acessar a tabela de empresas no Supabase
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
@@ -32,7 +32,9 @@ class EmpresaRepository:
         filtros: Dict[str, Any] = None,
         page: int = 1,
         limit: int = 20,
-        user_perfil: str = None
+        user_perfil: str = None,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Lista empresas com filtros e paginação
@@ -43,6 +45,8 @@ class EmpresaRepository:
             page: Página atual
             limit: Itens por página
             user_perfil: Perfil do usuário para controle de hierarquia
+            cursor: next_cursor da página anterior (paginação por keyset)
+            count: Modo de contagem do total (exact, planned, estimated, none)
             
         Returns:
             Dicionário com items e informações de paginação
@@ -50,26 +54,19 @@ class EmpresaRepository:
         try:
             # Nested select para buscar empresas + lojas em UMA query só
             # Isso elimina o problema N+1 (evita fazer query separada para cada empresa)
-            if user_perfil == "SUPER_ADMIN":
-                # SUPER_ADMIN vê empresas ativas E inativas
-                query = self.db.table(self.table).select('''
-                    *,
-                    c_lojas (
-                        id,
-                        ativo
-                    )
-                ''')
-                count_query = self.db.table(self.table).select('id', count='exact')
-            else:
+            # O total vem no mesmo request, sem query de contagem separada
+            query = self.db.table(self.table).select('''
+                *,
+                c_lojas (
+                    id,
+                    ativo
+                )
+            ''', count=DatabaseUtils.count_method(count, cursor))
+            
+            if user_perfil != "SUPER_ADMIN":
                 # Outros perfis veem apenas empresas ativas
-                query = self.db.table(self.table).select('''
-                    *,
-                    c_lojas (
-                        id,
-                        ativo
-                    )
-                ''').eq('ativo', True)
-                count_query = self.db.table(self.table).select('id', count='exact').eq('ativo', True)
+                # (SUPER_ADMIN vê empresas ativas E inativas)
+                query = query.eq('ativo', True)
             
             # Aplica filtros opcionais
             if filtros:
@@ -89,23 +86,17 @@ class EmpresaRepository:
                 if filtros.get('data_fim'):
                     query = query.lte('created_at', filtros['data_fim'].isoformat())
             
-            # Conta total de registros (sem paginação)
-            count_result = count_query.execute()
-            total = count_result.count or 0
-            
-            # Aplica ordenação (mais recentes primeiro)
-            query = query.order('created_at', desc=True)
-            
-            # Aplica paginação
-            offset = (page - 1) * limit
-            query = query.limit(limit).offset(offset)
+            # Aplica ordenação (mais recentes primeiro) e paginação
+            query = DatabaseUtils.apply_cursor_pagination(query, cursor, page, limit)
             
             # Executa a query OTIMIZADA (1 query em vez de N+1)
-            result = query.execute()
+            result = await query.execute()
+            total = result.count
+            rows, next_cursor = DatabaseUtils.split_page(result.data, limit)
             
             # Processa os dados já unidos
             items = []
-            for item in result.data:
+            for item in rows:
                 # Lojas já vêm junto na query (nested select)
                 lojas = item.get('c_lojas', []) or []
                 
@@ -123,9 +114,12 @@ class EmpresaRepository:
                 'total': total,
                 'page': page,
                 'limit': limit,
-                'pages': (total + limit - 1) // limit
+                'pages': DatabaseUtils.count_pages(total, limit),
+                'next_cursor': next_cursor
             }
         
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar empresas: {str(e)}")
             raise DatabaseException(f"Erro ao listar empresas: {str(e)}")
@@ -166,7 +160,7 @@ class EmpresaRepository:
                     )
                 ''').eq('id', empresa_id).eq('ativo', True)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise NotFoundException(f"Empresa não encontrada: {empresa_id}")
@@ -209,7 +203,7 @@ class EmpresaRepository:
             else:
                 query = self.db.table(self.table).select('*').eq('cnpj', cnpj).eq('ativo', True)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -238,7 +232,7 @@ class EmpresaRepository:
             else:
                 query = self.db.table(self.table).select('*').eq('nome', nome).eq('ativo', True)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -292,7 +286,7 @@ class EmpresaRepository:
                 dados_normalizados['cnpj'] = cnpj_normalizado
             
             # Cria a empresa
-            result = self.db.table(self.table).insert(dados_normalizados).execute()
+            result = await self.db.table(self.table).insert(dados_normalizados).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar empresa")
@@ -356,7 +350,7 @@ class EmpresaRepository:
             # Atualiza a empresa
             query = self.db.table(self.table).update(dados_limpos).eq('id', empresa_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar empresa")
@@ -389,7 +383,7 @@ class EmpresaRepository:
             # Marca como inativo em vez de deletar fisicamente
             query = self.db.table(self.table).update({'ativo': False}).eq('id', empresa_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             return bool(result.data)
         
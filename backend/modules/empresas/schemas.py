@@ -171,10 +171,11 @@ class EmpresaListResponse(BaseModel):
     Resposta quando listamos várias empresas
     """
     items: list[EmpresaResponse]
-    total: int
+    total: Optional[int]  # None com count=none ou em páginas com cursor
     page: int
     limit: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None  # Cursor para a próxima página (keyset)
 
 
 class FiltrosEmpresa(BaseModel):
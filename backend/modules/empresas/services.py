@@ -73,7 +73,9 @@ class EmpresaService:
                 filtros=filtros_dict,
                 page=pagination.page,
                 limit=pagination.limit,
-                user_perfil=user.perfil
+                user_perfil=user.perfil,
+                cursor=pagination.cursor,
+                count=pagination.count
             )
             
             # Converte para response model
@@ -84,7 +86,8 @@ class EmpresaService:
                 total=resultado['total'],
                 page=resultado['page'],
                 limit=resultado['limit'],
-                pages=resultado['pages']
+                pages=resultado['pages'],
+                next_cursor=resultado['next_cursor']
             )
         
         except Exception as e:
@@ -64,6 +64,7 @@ async def listar_funcionarios(
     **Paginação:**
     - `page`: Página atual (padrão: 1)
     - `limit`: Itens por página (padrão: 20, máximo: 100)
+    - `count`: Contagem do total: exact (padrão), planned, estimated ou none
     
     **Response:**
     ```json
@@ -107,7 +108,7 @@ async def listar_funcionarios(
             filtros.data_fim = datetime.fromisoformat(data_fim)
         
         # Chama o serviço
-        resultado = funcionario_service.listar_funcionarios(
+        resultado = await funcionario_service.listar_funcionarios(
             user=current_user,
             filtros=filtros,
             pagination=pagination
@@ -173,7 +174,7 @@ async def buscar_funcionario(
     ```
     """
     try:
-        funcionario = funcionario_service.buscar_funcionario(funcionario_id, current_user)
+        funcionario = await funcionario_service.buscar_funcionario(funcionario_id, current_user)
         
         # REMOVIDA DUPLA CONVERSÃO - Conversão agora é feita apenas no frontend service
         # funcionario_convertido = FuncionarioResponse(
@@ -244,7 +245,7 @@ async def criar_funcionario(
         
         dados = FuncionarioCreate(**dados_convertidos)
         
-        funcionario = funcionario_service.criar_funcionario(dados, current_user)
+        funcionario = await funcionario_service.criar_funcionario(dados, current_user)
         
         # REMOVIDA DUPLA CONVERSÃO
         # funcionario_convertido = FuncionarioResponse(
@@ -311,7 +312,7 @@ async def atualizar_funcionario(
         
         dados = FuncionarioUpdate(**dados_convertidos)
         
-        funcionario = funcionario_service.atualizar_funcionario(funcionario_id, dados, current_user)
+        funcionario = await funcionario_service.atualizar_funcionario(funcionario_id, dados, current_user)
         
         # REMOVIDA DUPLA CONVERSÃO
         # funcionario_convertido = FuncionarioResponse(
@@ -356,7 +357,7 @@ async def excluir_funcionario(
     ```
     """
     try:
-        sucesso = funcionario_service.excluir_funcionario(funcionario_id, current_user)
+        sucesso = await funcionario_service.excluir_funcionario(funcionario_id, current_user)
         
         if sucesso:
             logger.info(f"Funcionário excluído (soft delete): {funcionario_id} por usuário {current_user.id}")
@@ -6,8 +6,10 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from supabase import Client
-from core.exceptions import NotFoundException, DatabaseException, ConflictException
+from core.database import AsyncDatabase, DatabaseUtils
+from core.lojas_cache import buscar_nomes_lojas
+from core.setores_cache import invalidar_contagem_setores
+from core.exceptions import NotFoundException, DatabaseException, ConflictException, ValidationException
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +19,7 @@ class FuncionarioRepository:
     Classe responsável por acessar a tabela cad_equipe no Supabase
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
@@ -27,12 +29,13 @@ class FuncionarioRepository:
         self.db = db
         self.table = 'cad_equipe'
     
-    def listar(
+    async def listar(
         self,
         loja_id: Optional[str] = None,
         filtros: Dict[str, Any] = None,
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        count: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Lista funcionários com filtros e paginação
@@ -43,13 +46,18 @@ class FuncionarioRepository:
             filtros: Dicionário com filtros opcionais
             page: Página atual
             limit: Itens por página
+            count: Modo de contagem do total (exact, planned, estimated, none)
             
         Returns:
             Dicionário com items e informações de paginação
         """
         try:
             # Buscar funcionários (sem joins devido a limitação do cliente Python)
-            query = self.db.table(self.table).select('*').eq('ativo', True)
+            # O total vem no mesmo request, sem query de contagem separada
+            query = self.db.table(self.table).select(
+                '*',
+                count=DatabaseUtils.count_method(count)
+            ).eq('ativo', True)
             
             # Aplica filtro de loja se fornecido
             if loja_id is not None:
@@ -78,14 +86,6 @@ class FuncionarioRepository:
                 if filtros.get('data_fim'):
                     query = query.lte('data_admissao', filtros['data_fim'].isoformat())
             
-            # Conta total de registros (sem paginação)
-            count_query = self.db.table(self.table).select('id', count='exact').eq('ativo', True)
-            if loja_id is not None:
-                count_query = count_query.eq('loja_id', loja_id)
-            count_result = count_query.execute()
-            
-            total = count_result.count or 0
-            
             # Aplica ordenação (alfabética por nome)
             query = query.order('nome')
             
@@ -94,7 +94,8 @@ class FuncionarioRepository:
             query = query.limit(limit).offset(offset)
             
             # Executa a query OTIMIZADA
-            result = query.execute()
+            result = await query.execute()
+            total = result.count
             
             # Otimização: Buscar todos os nomes de lojas e setores de uma vez
             
@@ -102,23 +103,20 @@ class FuncionarioRepository:
             loja_ids = list(set(item['loja_id'] for item in result.data if item.get('loja_id')))
             setor_ids = list(set(item['setor_id'] for item in result.data if item.get('setor_id')))
             
-            # Buscar todos os nomes de lojas de uma vez
-            lojas_map = {}
-            if loja_ids:
-                lojas_result = self.db.table('c_lojas').select('id, nome').in_('id', loja_ids).execute()
-                lojas_map = {loja['id']: loja['nome'] for loja in lojas_result.data}
+            # Buscar todos os nomes de lojas de uma vez (cache compartilhado)
+            lojas_map = await buscar_nomes_lojas(self.db, loja_ids)
             
             # Buscar todos os nomes de setores de uma vez
             setores_map = {}
             if setor_ids:
-                setores_result = self.db.table('cad_setores').select('id, nome').in_('id', setor_ids).execute()
+                setores_result = await self.db.table('cad_setores').select('id, nome').in_('id', setor_ids).execute()
                 setores_map = {setor['id']: setor['nome'] for setor in setores_result.data}
             
             # Adicionar nomes aos itens
             items = []
             for item in result.data:
                 # Adiciona nome da loja
-                item['loja_nome'] = lojas_map.get(item['loja_id']) if item.get('loja_id') else None
+                item['loja_nome'] = lojas_map.get(str(item['loja_id'])) if item.get('loja_id') else None
                 
                 # Adiciona nome do setor
                 item['setor_nome'] = setores_map.get(item['setor_id']) if item.get('setor_id') else None
@@ -130,14 +128,16 @@ class FuncionarioRepository:
                 'total': total,
                 'page': page,
                 'limit': limit,
-                'pages': (total + limit - 1) // limit
+                'pages': DatabaseUtils.count_pages(total, limit)
             }
         
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar funcionários: {str(e)}")
             raise DatabaseException(f"Erro ao listar funcionários: {str(e)}")
     
-    def buscar_por_id(self, funcionario_id: str, loja_id: Optional[str] = None) -> Dict[str, Any]:
+    async def buscar_por_id(self, funcionario_id: str, loja_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Busca um funcionário específico pelo ID
         OTIMIZADO: Usa nested select para evitar problema N+1
@@ -160,7 +160,7 @@ class FuncionarioRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise NotFoundException(f"Funcionário não encontrado: {funcionario_id}")
@@ -171,7 +171,7 @@ class FuncionarioRepository:
             # Busca nome da loja se houver loja_id
             if funcionario.get('loja_id'):
                 try:
-                    loja_result = self.db.table('c_lojas').select('nome').eq('id', funcionario['loja_id']).execute()
+                    loja_result = await self.db.table('c_lojas').select('nome').eq('id', funcionario['loja_id']).execute()
                     if loja_result.data:
                         funcionario['loja_nome'] = loja_result.data[0]['nome']
                 except:
@@ -182,7 +182,7 @@ class FuncionarioRepository:
             # Busca nome do setor se houver setor_id
             if funcionario.get('setor_id'):
                 try:
-                    setor_result = self.db.table('cad_setores').select('nome').eq('id', funcionario['setor_id']).execute()
+                    setor_result = await self.db.table('cad_setores').select('nome').eq('id', funcionario['setor_id']).execute()
                     if setor_result.data:
                         funcionario['setor_nome'] = setor_result.data[0]['nome']
                 except:
@@ -198,7 +198,7 @@ class FuncionarioRepository:
             logger.error(f"Erro ao buscar funcionário {funcionario_id}: {str(e)}")
             raise DatabaseException(f"Erro ao buscar funcionário: {str(e)}")
     
-    def buscar_por_nome(self, nome: str, loja_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    async def buscar_por_nome(self, nome: str, loja_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Busca funcionário pelo nome exato
         
@@ -216,7 +216,7 @@ class FuncionarioRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -227,7 +227,7 @@ class FuncionarioRepository:
             logger.error(f"Erro ao buscar por nome: {str(e)}")
             raise DatabaseException(f"Erro ao buscar funcionário: {str(e)}")
     
-    def buscar_por_email(self, email: str, loja_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    async def buscar_por_email(self, email: str, loja_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Busca funcionário pelo email
         
@@ -245,7 +245,7 @@ class FuncionarioRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -256,7 +256,7 @@ class FuncionarioRepository:
             logger.error(f"Erro ao buscar por email: {str(e)}")
             raise DatabaseException(f"Erro ao buscar funcionário: {str(e)}")
     
-    def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
+    async def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
         """
         Cria um novo funcionário
         
@@ -279,7 +279,7 @@ class FuncionarioRepository:
             
             # Verifica se nome já existe (considerando loja se fornecida)
             loja_id = dados.get('loja_id')
-            existe_nome = self.buscar_por_nome(nome_normalizado, loja_id)
+            existe_nome = await self.buscar_por_nome(nome_normalizado, loja_id)
             if existe_nome:
                 logger.warning(f"CONFLICT: Nome '{nome_normalizado}' já existe no funcionário {existe_nome['id']}")
                 raise ConflictException(
@@ -290,7 +290,7 @@ class FuncionarioRepository:
             if dados.get('email'):
                 email_normalizado = dados['email'].strip().lower() if dados['email'] else ''
                 if email_normalizado:
-                    existe_email = self.buscar_por_email(email_normalizado, loja_id)
+                    existe_email = await self.buscar_por_email(email_normalizado, loja_id)
                     if existe_email:
                         logger.info(f"INFO: Email '{email_normalizado}' já existe em outro funcionário - permitido")
             
@@ -314,11 +314,13 @@ class FuncionarioRepository:
                     pass
             
             # Cria o funcionário
-            result = self.db.table(self.table).insert(dados_normalizados).execute()
+            result = await self.db.table(self.table).insert(dados_normalizados).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar funcionário")
             
+            invalidar_contagem_setores(result.data[0].get('setor_id'))
+            
             return result.data[0]
         
         except ConflictException:
@@ -327,7 +329,7 @@ class FuncionarioRepository:
             logger.error(f"Erro ao criar funcionário: {str(e)}")
             raise DatabaseException(f"Erro ao criar funcionário: {str(e)}")
     
-    def atualizar(
+    async def atualizar(
         self,
         funcionario_id: str,
         dados: Dict[str, Any],
@@ -350,7 +352,7 @@ class FuncionarioRepository:
         """
         try:
             # Verifica se funcionário existe
-            funcionario_atual = self.buscar_por_id(funcionario_id, loja_id)
+            funcionario_atual = await self.buscar_por_id(funcionario_id, loja_id)
             logger.info(f"Atualizando funcionário {funcionario_id}: dados={dados}")
             
             # Se está mudando o nome, verifica duplicidade
@@ -358,7 +360,7 @@ class FuncionarioRepository:
                 nome_novo = dados['nome'].strip() if dados['nome'] else ''
                 nome_atual = funcionario_atual['nome'].strip() if funcionario_atual['nome'] else ''
                 if nome_novo and nome_novo != nome_atual:
-                    existe_nome = self.buscar_por_nome(nome_novo, loja_id)
+                    existe_nome = await self.buscar_por_nome(nome_novo, loja_id)
                     if existe_nome:
                         logger.warning(f"CONFLICT: Nome '{nome_novo}' já existe no funcionário {existe_nome['id']}")
                         raise ConflictException(
@@ -370,7 +372,7 @@ class FuncionarioRepository:
                 email_novo = dados['email'].strip().lower() if dados['email'] else None
                 email_atual = funcionario_atual['email'].strip().lower() if funcionario_atual['email'] else None
                 if email_novo and email_novo != email_atual:
-                    existe_email = self.buscar_por_email(email_novo, loja_id)
+                    existe_email = await self.buscar_por_email(email_novo, loja_id)
                     if existe_email:
                         logger.info(f"INFO: Email '{email_novo}' já existe em outro funcionário - permitido na atualização")
             
@@ -397,11 +399,15 @@ class FuncionarioRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar funcionário")
             
+            # Mudança de setor ou de status altera a contagem dos dois setores
+            if 'setor_id' in dados_limpos or 'ativo' in dados_limpos:
+                invalidar_contagem_setores(funcionario_atual.get('setor_id'), result.data[0].get('setor_id'))
+            
             return result.data[0]
         
         except (NotFoundException, ConflictException):
@@ -410,7 +416,7 @@ class FuncionarioRepository:
             logger.error(f"Erro ao atualizar funcionário {funcionario_id}: {str(e)}")
             raise DatabaseException(f"Erro ao atualizar funcionário: {str(e)}")
     
-    def excluir(self, funcionario_id: str, loja_id: Optional[str] = None) -> bool:
+    async def excluir(self, funcionario_id: str, loja_id: Optional[str] = None) -> bool:
         """
         Exclui um funcionário (soft delete - marca como inativo)
         
@@ -426,7 +432,7 @@ class FuncionarioRepository:
         """
         try:
             # Verifica se existe
-            self.buscar_por_id(funcionario_id, loja_id)
+            funcionario = await self.buscar_por_id(funcionario_id, loja_id)
             
             # Marca como inativo em vez de deletar fisicamente
             query = self.db.table(self.table).update({'ativo': False}).eq('id', funcionario_id)
@@ -435,7 +441,10 @@ class FuncionarioRepository:
             if loja_id is not None:
                 query = query.eq('loja_id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
+            
+            if result.data:
+                invalidar_contagem_setores(funcionario.get('setor_id'))
             
             return bool(result.data)
         
@@ -194,10 +194,10 @@ class FuncionarioListResponse(BaseModel):
     Resposta quando listamos vários funcionários
     """
     items: list[FuncionarioResponse]
-    total: int
+    total: Optional[int]  # None com count=none ou em páginas com cursor
     page: int
     limit: int
-    pages: int
+    pages: Optional[int]
 
 
 class FiltrosFuncionario(BaseModel):
@@ -6,7 +6,7 @@ import logging
 from typing import Dict, Any, Optional
 
 from core.database import get_database
-from core.auth import User
+from core.auth import User, invalidar_usuario_cache, CAMPOS_USUARIO_CACHE
 from core.dependencies import PaginationParams
 from core.exceptions import ValidationException, NotFoundException
 
@@ -33,7 +33,7 @@ class FuncionarioService:
         """
         pass
     
-    def listar_funcionarios(
+    async def listar_funcionarios(
         self,
         user: User,
         filtros: FiltrosFuncionario,
@@ -78,11 +78,12 @@ class FuncionarioService:
             loja_id = None if user.perfil in ["ADMIN_MASTER", "SUPER_ADMIN"] else user.loja_id
             
             # Busca no repository
-            resultado = repository.listar(
+            resultado = await repository.listar(
                 loja_id=loja_id,
                 filtros=filtros_dict,
                 page=pagination.page,
-                limit=pagination.limit
+                limit=pagination.limit,
+                count=pagination.count
             )
             
             # Converte para response model
@@ -100,7 +101,7 @@ class FuncionarioService:
             logger.error(f"Erro ao listar funcionários para usuário {user.id}: {str(e)}")
             raise
     
-    def buscar_funcionario(self, funcionario_id: str, user: User) -> FuncionarioResponse:
+    async def buscar_funcionario(self, funcionario_id: str, user: User) -> FuncionarioResponse:
         """
         Busca um funcionário específico
         
@@ -124,7 +125,7 @@ class FuncionarioService:
             repository = FuncionarioRepository(db)
             
             # Busca o funcionário
-            funcionario_data = repository.buscar_por_id(funcionario_id, loja_id)
+            funcionario_data = await repository.buscar_por_id(funcionario_id, loja_id)
             
             return FuncionarioResponse(**funcionario_data)
         
@@ -132,7 +133,7 @@ class FuncionarioService:
             logger.error(f"Erro ao buscar funcionário {funcionario_id}: {str(e)}")
             raise
     
-    def validar_relacionamentos(self, loja_id: Optional[str], setor_id: Optional[str]) -> Dict[str, Any]:
+    async def validar_relacionamentos(self, loja_id: Optional[str], setor_id: Optional[str]) -> Dict[str, Any]:
         """
         Valida se loja e setor existem
         
@@ -153,7 +154,7 @@ class FuncionarioService:
             # Valida loja se fornecida
             if loja_id:
                 loja_id_str = str(loja_id) if loja_id else None
-                result = db.table('c_lojas').select('id, nome').eq('id', loja_id_str).eq('ativo', True).execute()
+                result = await db.table('c_lojas').select('id, nome').eq('id', loja_id_str).eq('ativo', True).execute()
                 
                 if not result.data:
                     raise ValidationException(f"Loja não encontrada: {loja_id_str}")
@@ -166,7 +167,7 @@ class FuncionarioService:
                 admin_db = get_admin_database()
                 
                 setor_id_str = str(setor_id) if setor_id else None
-                result = admin_db.table('cad_setores').select('id, nome').eq('id', setor_id_str).execute()
+                result = await admin_db.table('cad_setores').select('id, nome').eq('id', setor_id_str).execute()
                 
                 if not result.data:
                     raise ValidationException(f"Setor não encontrado: {setor_id_str}")
@@ -181,7 +182,7 @@ class FuncionarioService:
             logger.error(f"Erro ao validar relacionamentos: {str(e)}")
             raise
     
-    def criar_funcionario(self, dados: FuncionarioCreate, user: User) -> FuncionarioResponse:
+    async def criar_funcionario(self, dados: FuncionarioCreate, user: User) -> FuncionarioResponse:
         """
         Cria um novo funcionário
         
@@ -214,16 +215,16 @@ class FuncionarioService:
             
             # Valida relacionamentos se fornecidos
             if dados_funcionario.get('loja_id') or dados_funcionario.get('setor_id'):
-                self.validar_relacionamentos(
+                await self.validar_relacionamentos(
                     dados_funcionario.get('loja_id'),
                     dados_funcionario.get('setor_id')
                 )
             
             # Cria o funcionário
-            funcionario_criado = repository.criar(dados_funcionario)
+            funcionario_criado = await repository.criar(dados_funcionario)
             
             # Busca o funcionário completo (com dados relacionados)
-            funcionario_completo = repository.buscar_por_id(
+            funcionario_completo = await repository.buscar_por_id(
                 funcionario_criado['id'], 
                 dados_funcionario.get('loja_id')
             )
@@ -236,7 +237,7 @@ class FuncionarioService:
             logger.error(f"Erro ao criar funcionário: {str(e)}")
             raise
     
-    def atualizar_funcionario(
+    async def atualizar_funcionario(
         self,
         funcionario_id: str,
         dados: FuncionarioUpdate,
@@ -277,16 +278,20 @@ class FuncionarioService:
             
             # Valida relacionamentos se estão sendo alterados
             if dados_atualizacao.get('loja_id') or dados_atualizacao.get('setor_id'):
-                self.validar_relacionamentos(
+                await self.validar_relacionamentos(
                     dados_atualizacao.get('loja_id'),
                     dados_atualizacao.get('setor_id')
                 )
             
             # Atualiza o funcionário
-            repository.atualizar(funcionario_id, dados_atualizacao, loja_id)
+            await repository.atualizar(funcionario_id, dados_atualizacao, loja_id)
             
             # Busca o funcionário atualizado
-            funcionario_atualizado = repository.buscar_por_id(funcionario_id, loja_id)
+            funcionario_atualizado = await repository.buscar_por_id(funcionario_id, loja_id)
+            
+            # Permissões do usuário mudaram: descarta o usuário em cache
+            if any(campo in dados_atualizacao for campo in CAMPOS_USUARIO_CACHE):
+                invalidar_usuario_cache(email=funcionario_atualizado.get('email'))
             
             logger.info(f"Funcionário atualizado: {funcionario_id} por usuário {user.id}")
             
@@ -296,7 +301,7 @@ class FuncionarioService:
             logger.error(f"Erro ao atualizar funcionário {funcionario_id}: {str(e)}")
             raise
     
-    def excluir_funcionario(self, funcionario_id: str, user: User) -> bool:
+    async def excluir_funcionario(self, funcionario_id: str, user: User) -> bool:
         """
         Exclui um funcionário (soft delete)
         
@@ -323,10 +328,13 @@ class FuncionarioService:
             db = get_database()
             repository = FuncionarioRepository(db)
             
+            funcionario = await repository.buscar_por_id(funcionario_id, loja_id)
+            
             # Exclui o funcionário
-            sucesso = repository.excluir(funcionario_id, loja_id)
+            sucesso = await repository.excluir(funcionario_id, loja_id)
             
             if sucesso:
+                invalidar_usuario_cache(email=funcionario.get('email'))
                 logger.info(f"Funcionário excluído: {funcionario_id} por usuário {user.id}")
             
             return sucesso
@@ -335,7 +343,7 @@ class FuncionarioService:
             logger.error(f"Erro ao excluir funcionário {funcionario_id}: {str(e)}")
             raise
     
-    def verificar_nome_disponivel(
+    async def verificar_nome_disponivel(
         self,
         nome: str,
         user: User,
@@ -369,7 +377,7 @@ class FuncionarioService:
             repository = FuncionarioRepository(db)
             
             # Busca funcionário com esse nome
-            funcionario_existente = repository.buscar_por_nome(nome.strip(), loja_id)
+            funcionario_existente = await repository.buscar_por_nome(nome.strip(), loja_id)
             
             # Se não encontrou, está disponível
             if not funcionario_existente:
@@ -59,6 +59,7 @@ async def listar_lojas(
     **Paginação:**
     - `page`: Página atual (padrão: 1)
     - `limit`: Itens por página (padrão: 20, máximo: 100)
+    - `count`: Contagem do total: exact (padrão), planned, estimated ou none
     
     **Response:**
     ```json
@@ -6,8 +6,9 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from supabase import Client
-from core.exceptions import NotFoundException, DatabaseException, ConflictException
+from core.database import AsyncDatabase, DatabaseUtils
+from core.exceptions import NotFoundException, DatabaseException, ConflictException, ValidationException
+from core.lojas_cache import invalidar_nome_loja
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +18,7 @@ class LojaRepository:
     Classe responsável por acessar a tabela de lojas no Supabase
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
@@ -31,7 +32,9 @@ class LojaRepository:
         self,
         filtros: Dict[str, Any] = None,
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Lista lojas com filtros e paginação
@@ -40,18 +43,21 @@ class LojaRepository:
             filtros: Dicionário com filtros opcionais
             page: Página atual
             limit: Itens por página
+            cursor: next_cursor da página anterior (paginação por keyset)
+            count: Modo de contagem do total (exact, planned, estimated, none)
             
         Returns:
             Dicionário com items e informações de paginação
         """
         try:
-            # Inicia a query base com JOINs
+            # Inicia a query base com JOINs (o total vem no mesmo request)
             query = self.db.table(self.table).select(
                 """
                 *,
                 empresa:cad_empresas!empresa_id(id, nome),
                 gerente:cad_equipe!gerente_id(id, nome)
-                """
+                """,
+                count=DatabaseUtils.count_method(count, cursor)
             ).eq('ativo', True)  # Filtrar apenas lojas ativas (soft delete)
             
             # Aplica filtros opcionais
@@ -80,25 +86,17 @@ class LojaRepository:
                 if filtros.get('data_fim'):
                     query = query.lte('created_at', filtros['data_fim'].isoformat())
             
-            # Conta total de registros (sem paginação)
-            count_query = self.db.table(self.table).select('id', count='exact').eq('ativo', True)
-            count_result = count_query.execute()
-            
-            total = count_result.count or 0
-            
-            # Aplica ordenação (mais recentes primeiro)
-            query = query.order('created_at', desc=True)
-            
-            # Aplica paginação
-            offset = (page - 1) * limit
-            query = query.limit(limit).offset(offset)
+            # Aplica ordenação (mais recentes primeiro) e paginação
+            query = DatabaseUtils.apply_cursor_pagination(query, cursor, page, limit)
             
             # Executa a query
-            result = query.execute()
+            result = await query.execute()
+            total = result.count
+            rows, next_cursor = DatabaseUtils.split_page(result.data, limit)
             
             # Processa os dados retornados
             items = []
-            for item in result.data:
+            for item in rows:
                 # Extrai dados da empresa
                 if item.get('empresa'):
                     item['empresa'] = item['empresa'].get('nome')
@@ -114,9 +112,12 @@ class LojaRepository:
                 'total': total,
                 'page': page,
                 'limit': limit,
-                'pages': (total + limit - 1) // limit
+                'pages': DatabaseUtils.count_pages(total, limit),
+                'next_cursor': next_cursor
             }
         
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar lojas: {str(e)}")
             raise DatabaseException(f"Erro ao listar lojas: {str(e)}")
@@ -143,7 +144,7 @@ class LojaRepository:
                 """
             ).eq('id', loja_id).eq('ativo', True)  # Filtrar apenas lojas ativas
                 
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise NotFoundException(f"Loja não encontrada: {loja_id}")
@@ -178,7 +179,7 @@ class LojaRepository:
         try:
             query = self.db.table(self.table).select('*').eq('nome', nome).eq('ativo', True)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -221,7 +222,7 @@ class LojaRepository:
                         dados_limpos[k] = v
                         
             # Cria a loja
-            result = self.db.table(self.table).insert(dados_limpos).execute()
+            result = await self.db.table(self.table).insert(dados_limpos).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar loja")
@@ -279,11 +280,14 @@ class LojaRepository:
             # Atualiza a loja
             query = self.db.table(self.table).update(dados_limpos).eq('id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar loja")
             
+            if 'nome' in dados_limpos:
+                invalidar_nome_loja(loja_id)
+            
             return result.data[0]
         
         except (NotFoundException, ConflictException):
@@ -312,7 +316,7 @@ class LojaRepository:
             # Marca como inativa em vez de deletar fisicamente
             query = self.db.table(self.table).update({'ativo': False}).eq('id', loja_id)
                 
-            result = query.execute()
+            result = await query.execute()
             
             return bool(result.data)
         
@@ -332,7 +336,7 @@ class LojaRepository:
             Número total de lojas na tabela
         """
         try:
-            result = self.db.table(self.table).select(
+            result = await self.db.table(self.table).select(
                 'id', count='exact'
             ).execute()
             
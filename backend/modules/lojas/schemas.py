@@ -88,10 +88,11 @@ class LojaListResponse(BaseModel):
     Resposta quando listamos várias lojas
     """
     items: list[LojaResponse]
-    total: int
+    total: Optional[int]  # None com count=none ou em páginas com cursor
     page: int
     limit: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None  # Cursor para a próxima página (keyset)
 
 
 class FiltrosLoja(BaseModel):
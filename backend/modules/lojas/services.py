@@ -72,7 +72,9 @@ class LojaService:
             resultado = await repository.listar(
                 filtros=filtros_dict,
                 page=pagination.page,
-                limit=pagination.limit
+                limit=pagination.limit,
+                cursor=pagination.cursor,
+                count=pagination.count
             )
             
             # Converte para response model
@@ -83,7 +85,8 @@ class LojaService:
                 total=resultado['total'],
                 page=resultado['page'],
                 limit=resultado['limit'],
-                pages=resultado['pages']
+                pages=resultado['pages'],
+                next_cursor=resultado['next_cursor']
             )
         
         except Exception as e:
@@ -6,11 +6,11 @@ from typing import Optional, Dict, Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from supabase import Client
+from core.database import AsyncDatabase
 
 from core.dependencies import get_db_with_user_context, get_current_user
 from core.database import get_database as get_db
-from core.exceptions import NotFoundException, BusinessRuleException
+from core.exceptions import NotFoundException, BusinessRuleException, ValidationException
 from .repository import OrcamentoRepository, FormaPagamentoRepository
 from .services import OrcamentoService, FormaPagamentoService
 from .schemas import (
@@ -31,10 +31,11 @@ forma_router = APIRouter(prefix="/formas-pagamento", tags=["Formas de Pagamento"
 async def listar_orcamentos(
     page: int = Query(1, ge=1, description="Página"),
     limit: int = Query(20, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior (keyset)"),
     cliente_id: Optional[UUID] = Query(None, description="Filtrar por cliente"),
     status_id: Optional[UUID] = Query(None, description="Filtrar por status"),
     numero: Optional[str] = Query(None, description="Buscar por número"),
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Lista orçamentos com filtros e paginação"""
@@ -54,10 +55,12 @@ async def listar_orcamentos(
         service = OrcamentoService(orcamento_repo, forma_repo)
         
         # Lista orçamentos
-        resultado = await service.listar(filtros, page, limit)
+        resultado = await service.listar(filtros, page, limit, cursor)
         
         return OrcamentoListResponse(**resultado)
         
+    except ValidationException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,7 +71,7 @@ async def listar_orcamentos(
 @router.get("/{orcamento_id}", response_model=OrcamentoResponse)
 async def buscar_orcamento(
     orcamento_id: UUID,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Busca orçamento por ID"""
@@ -94,7 +97,7 @@ async def buscar_orcamento(
 @router.post("/", response_model=OrcamentoResponse)
 async def criar_orcamento(
     dados: OrcamentoCreate,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Cria novo orçamento"""
@@ -121,7 +124,7 @@ async def criar_orcamento(
 async def atualizar_orcamento(
     orcamento_id: UUID,
     dados: OrcamentoUpdate,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Atualiza orçamento existente"""
@@ -152,7 +155,7 @@ async def atualizar_orcamento(
 @router.delete("/{orcamento_id}")
 async def excluir_orcamento(
     orcamento_id: UUID,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Exclui orçamento"""
@@ -193,7 +196,7 @@ async def excluir_orcamento(
 @router.get("/{orcamento_id}/formas-pagamento", response_model=list[FormaPagamentoResponse])
 async def listar_formas_pagamento(
     orcamento_id: UUID,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Lista formas de pagamento de um orçamento"""
@@ -219,7 +222,7 @@ async def listar_formas_pagamento(
 @forma_router.get("/{forma_id}", response_model=FormaPagamentoResponse)
 async def buscar_forma_pagamento(
     forma_id: UUID,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Busca forma de pagamento por ID"""
@@ -245,7 +248,7 @@ async def buscar_forma_pagamento(
 @forma_router.post("/", response_model=FormaPagamentoResponse)
 async def criar_forma_pagamento(
     dados: FormaPagamentoCreate,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Cria nova forma de pagamento"""
@@ -277,7 +280,7 @@ async def criar_forma_pagamento(
 async def atualizar_forma_pagamento(
     forma_id: UUID,
     dados: FormaPagamentoUpdate,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Atualiza forma de pagamento"""
@@ -308,7 +311,7 @@ async def atualizar_forma_pagamento(
 @forma_router.delete("/{forma_id}")
 async def excluir_forma_pagamento(
     forma_id: UUID,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Exclui forma de pagamento"""
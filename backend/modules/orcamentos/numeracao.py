@@ -0,0 +1,152 @@
+"""
+Numeração de orçamentos por loja
+
+Os números vêm do contador atômico da loja no banco (RPC
+`reservar_numeros_orcamento`, sql/criar_rpc_numeracao_orcamento.sql) e são
+formatados com `number_prefix`/`number_format` da configuração da loja.
+
+Cada chamada à RPC reserva um bloco de `settings.orcamento_numero_bloco`
+números: lojas com muitas criações simultâneas consomem o bloco em memória
+sem ir ao banco a cada orçamento. Números de um bloco não usado até o fim
+(ex: restart do servidor) são pulados, nunca repetidos.
+"""
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from postgrest.exceptions import APIError
+
+from core.config import settings
+from core.database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+RPC_NUMERACAO = 'reservar_numeros_orcamento'
+
+# Padrões de c_config_loja (ver ConfigLojaService.obter_ou_criar_padrao)
+FORMATO_PADRAO = 'YYYY-NNNNNN'
+PREFIXO_PADRAO = 'ORC'
+
+_TOKENS_FORMATO = re.compile(r'YYYY|YY|MM|N+')
+
+
+def formatar_numero(
+    numero: int,
+    formato: Optional[str] = None,
+    prefixo: Optional[str] = None,
+    data: Optional[datetime] = None
+) -> str:
+    """
+    Formata o número sequencial conforme a configuração da loja
+
+    Tokens do formato: `YYYY` (ano), `YY` (ano com 2 dígitos), `MM` (mês) e
+    `N...` (número com zeros à esquerda até a quantidade de N).
+
+    Exemplo: formatar_numero(1001, 'YYYY-NNNNNN', 'ORC') -> 'ORC-2025-001001'
+    """
+    formato = formato or FORMATO_PADRAO
+    data = data or datetime.now()
+
+    def substituir(token: re.Match) -> str:
+        valor = token.group(0)
+        if valor == 'YYYY':
+            return f"{data.year:04d}"
+        if valor == 'YY':
+            return f"{data.year % 100:02d}"
+        if valor == 'MM':
+            return f"{data.month:02d}"
+        return str(numero).zfill(len(valor))
+
+    corpo = _TOKENS_FORMATO.sub(substituir, formato)
+    if 'N' not in formato:
+        corpo = f"{corpo}-{numero}"
+
+    return f"{prefixo}-{corpo}" if prefixo else corpo
+
+
+@dataclass
+class _Bloco:
+    """Faixa [proximo, fim) reservada no banco para uma loja"""
+    proximo: int
+    fim: int
+    formato: Optional[str]
+    prefixo: Optional[str]
+
+
+class NumeracaoOrcamento:
+    """
+    Alocador de números de orçamento com pré-reserva em blocos
+
+    Uso:
+    ```python
+    numero = await numeracao_orcamento.proximo_numero(db, loja_id)
+    # None se a RPC ainda não foi criada no banco
+    ```
+    """
+
+    def __init__(self, tamanho_bloco: int = 1):
+        self.tamanho_bloco = max(1, tamanho_bloco)
+        self._blocos: Dict[str, _Bloco] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._rpc_disponivel = True
+
+    async def proximo_numero(self, db: AsyncDatabase, loja_id: str) -> Optional[str]:
+        """Retorna o próximo número formatado da loja"""
+        if not self._rpc_disponivel:
+            return None
+
+        loja_id = str(loja_id)
+        lock = self._locks.setdefault(loja_id, asyncio.Lock())
+
+        async with lock:
+            bloco = self._blocos.get(loja_id)
+            if bloco is None or bloco.proximo >= bloco.fim:
+                bloco = await self._reservar_bloco(db, loja_id)
+                if bloco is None:
+                    return None
+                self._blocos[loja_id] = bloco
+
+            numero = bloco.proximo
+            bloco.proximo += 1
+
+        return formatar_numero(numero, bloco.formato, bloco.prefixo)
+
+    async def _reservar_bloco(self, db: AsyncDatabase, loja_id: str) -> Optional[_Bloco]:
+        try:
+            result = await db.rpc(
+                RPC_NUMERACAO,
+                {'p_loja_id': loja_id, 'p_quantidade': self.tamanho_bloco}
+            ).execute()
+        except APIError as e:
+            if e.code != 'PGRST202':
+                raise
+            self._rpc_disponivel = False
+            logger.warning(
+                f"RPC {RPC_NUMERACAO} não encontrada - usando numeração antiga. "
+                f"Execute sql/criar_rpc_numeracao_orcamento.sql"
+            )
+            return None
+
+        reserva = result.data
+        return _Bloco(
+            proximo=reserva['inicio'],
+            fim=reserva['inicio'] + reserva['quantidade'],
+            formato=reserva.get('number_format') or FORMATO_PADRAO,
+            prefixo=reserva.get('number_prefix') or PREFIXO_PADRAO
+        )
+
+    def descartar_blocos(self, loja_id: Optional[str] = None) -> None:
+        """
+        Descarta os números reservados em memória (ex: após mudar o formato
+        da loja). Os números descartados são pulados.
+        """
+        if loja_id is None:
+            self._blocos.clear()
+        else:
+            self._blocos.pop(str(loja_id), None)
+
+
+numeracao_orcamento = NumeracaoOrcamento(settings.orcamento_numero_bloco)
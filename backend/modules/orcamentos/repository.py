@@ -8,8 +8,9 @@ from datetime import datetime
 from uuid import UUID
 from decimal import Decimal
 
-from supabase import Client
-from core.exceptions import NotFoundException, DatabaseException, ConflictException
+from core.database import AsyncDatabase, DatabaseUtils
+from core.exceptions import NotFoundException, DatabaseException, ConflictException, ValidationException
+from .numeracao import numeracao_orcamento
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +18,7 @@ logger = logging.getLogger(__name__)
 class OrcamentoRepository:
     """Repository para tabela c_orcamentos"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.table = 'c_orcamentos'
     
@@ -25,9 +26,10 @@ class OrcamentoRepository:
         self,
         filtros: Dict[str, Any] = None,
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Lista orçamentos com filtros e paginação"""
+        """Lista orçamentos com filtros e paginação (keyset quando há `cursor`)"""
         try:
             # Query otimizada com nested select
             query = self.db.table(self.table).select('''
@@ -55,19 +57,18 @@ class OrcamentoRepository:
                     query = query.ilike('numero', f"%{filtros['numero']}%")
             
             # Conta total
-            count_result = self.db.table(self.table).select('id', count='exact').execute()
+            count_result = await self.db.table(self.table).select('id', count='exact').execute()
             total = count_result.count or 0
             
             # Ordenação e paginação
-            query = query.order('created_at', desc=True)
-            offset = (page - 1) * limit
-            query = query.limit(limit).offset(offset)
+            query = DatabaseUtils.apply_cursor_pagination(query, cursor, page, limit)
             
-            result = query.execute()
+            result = await query.execute()
+            rows, next_cursor = DatabaseUtils.split_page(result.data, limit)
             
             # Processa dados
             items = []
-            for item in result.data:
+            for item in rows:
                 # Renomeia relacionamentos para formato esperado
                 item['status'] = item.pop('c_status_orcamento', None)
                 item['cliente'] = item.pop('c_clientes', None)
@@ -79,9 +80,12 @@ class OrcamentoRepository:
                 'total': total,
                 'page': page,
                 'limit': limit,
-                'pages': (total + limit - 1) // limit
+                'pages': (total + limit - 1) // limit,
+                'next_cursor': next_cursor
             }
             
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar orçamentos: {str(e)}")
             raise DatabaseException(f"Erro ao listar orçamentos: {str(e)}")
@@ -89,7 +93,7 @@ class OrcamentoRepository:
     async def buscar_por_id(self, orcamento_id: str) -> Dict[str, Any]:
         """Busca orçamento por ID com relacionamentos"""
         try:
-            result = self.db.table(self.table).select('''
+            result = await self.db.table(self.table).select('''
                 *,
                 c_status_orcamento!status_id (
                     id, nome, cor, ordem
@@ -123,14 +127,9 @@ class OrcamentoRepository:
     async def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Cria novo orçamento"""
         try:
-            # Gera número sequencial se não fornecido
+            # Gera número sequencial da loja se não fornecido
             if not dados.get('numero'):
-                ultimo = self.db.table(self.table).select('numero').order('created_at', desc=True).limit(1).execute()
-                if ultimo.data and ultimo.data[0].get('numero'):
-                    ultimo_numero = int(ultimo.data[0]['numero'].split('-')[-1])
-                    dados['numero'] = f"orc-{ultimo_numero + 1:04d}"
-                else:
-                    dados['numero'] = "orc-0001"
+                dados['numero'] = await self._gerar_numero(dados.get('loja_id'))
             
             # Define status padrão se não fornecido - TEMPORARIAMENTE DESABILITADO
             # if not dados.get('status_id'):
@@ -148,7 +147,7 @@ class OrcamentoRepository:
                 else:
                     dados_convertidos[key] = value
             
-            result = self.db.table(self.table).insert(dados_convertidos).execute()
+            result = await self.db.table(self.table).insert(dados_convertidos).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar orçamento")
@@ -159,6 +158,22 @@ class OrcamentoRepository:
             logger.error(f"Erro ao criar orçamento: {str(e)}")
             raise DatabaseException(f"Erro ao criar orçamento: {str(e)}")
     
+    async def _gerar_numero(self, loja_id: Optional[Any]) -> str:
+        """
+        Próximo número do orçamento pelo contador atômico da loja
+        (formato de c_config_loja). Sem a RPC no banco, usa a numeração antiga.
+        """
+        if loja_id:
+            numero = await numeracao_orcamento.proximo_numero(self.db, str(loja_id))
+            if numero:
+                return numero
+        
+        ultimo = await self.db.table(self.table).select('numero').order('created_at', desc=True).limit(1).execute()
+        if ultimo.data and ultimo.data[0].get('numero'):
+            ultimo_numero = int(ultimo.data[0]['numero'].split('-')[-1])
+            return f"orc-{ultimo_numero + 1:04d}"
+        return "orc-0001"
+    
     async def atualizar(self, orcamento_id: str, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza orçamento existente"""
         try:
@@ -176,7 +191,7 @@ class OrcamentoRepository:
                     else:
                         dados_limpos[k] = v
             
-            result = self.db.table(self.table).update(dados_limpos).eq('id', orcamento_id).execute()
+            result = await self.db.table(self.table).update(dados_limpos).eq('id', orcamento_id).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar orçamento")
@@ -195,7 +210,7 @@ class OrcamentoRepository:
             # Verifica se existe
             await self.buscar_por_id(orcamento_id)
             
-            result = self.db.table(self.table).delete().eq('id', orcamento_id).execute()
+            result = await self.db.table(self.table).delete().eq('id', orcamento_id).execute()
             
             return bool(result.data)
             
@@ -209,14 +224,14 @@ class OrcamentoRepository:
 class FormaPagamentoRepository:
     """Repository para tabela c_formas_pagamento"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.table = 'c_formas_pagamento'
     
     async def listar_por_orcamento(self, orcamento_id: str) -> List[Dict[str, Any]]:
         """Lista formas de pagamento de um orçamento"""
         try:
-            result = self.db.table(self.table).select('*').eq('orcamento_id', orcamento_id).execute()
+            result = await self.db.table(self.table).select('*').eq('orcamento_id', orcamento_id).execute()
             return result.data or []
             
         except Exception as e:
@@ -226,7 +241,7 @@ class FormaPagamentoRepository:
     async def buscar_por_id(self, forma_id: str) -> Dict[str, Any]:
         """Busca forma de pagamento por ID"""
         try:
-            result = self.db.table(self.table).select('*').eq('id', forma_id).execute()
+            result = await self.db.table(self.table).select('*').eq('id', forma_id).execute()
             
             if not result.data:
                 raise NotFoundException(f"Forma de pagamento não encontrada: {forma_id}")
@@ -252,7 +267,7 @@ class FormaPagamentoRepository:
                 else:
                     dados_convertidos[key] = value
             
-            result = self.db.table(self.table).insert(dados_convertidos).execute()
+            result = await self.db.table(self.table).insert(dados_convertidos).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar forma de pagamento")
@@ -272,7 +287,7 @@ class FormaPagamentoRepository:
             # Remove campos None
             dados_limpos = {k: v for k, v in dados.items() if v is not None}
             
-            result = self.db.table(self.table).update(dados_limpos).eq('id', forma_id).execute()
+            result = await self.db.table(self.table).update(dados_limpos).eq('id', forma_id).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar forma de pagamento")
@@ -291,7 +306,7 @@ class FormaPagamentoRepository:
             # Verifica se existe
             await self.buscar_por_id(forma_id)
             
-            result = self.db.table(self.table).delete().eq('id', forma_id).execute()
+            result = await self.db.table(self.table).delete().eq('id', forma_id).execute()
             
             return bool(result.data)
             
@@ -304,7 +319,7 @@ class FormaPagamentoRepository:
     async def excluir_por_orcamento(self, orcamento_id: str) -> int:
         """Exclui todas as formas de pagamento de um orçamento"""
         try:
-            result = self.db.table(self.table).delete().eq('orcamento_id', orcamento_id).execute()
+            result = await self.db.table(self.table).delete().eq('orcamento_id', orcamento_id).execute()
             return len(result.data) if result.data else 0
             
         except Exception as e:
@@ -133,4 +133,5 @@ class OrcamentoListResponse(BaseModel):
     total: int
     page: int
     limit: int
-    pages: int
\ No newline at end of file
+    pages: int
+    next_cursor: Optional[str] = None
@@ -7,12 +7,15 @@ from typing import Optional, List, Dict, Any
 from uuid import UUID
 
 from core.exceptions import BusinessRuleException, NotFoundException
+from core.monetario import (
+    centavos_para_decimal, formatar_centavos, para_centavos, para_centavos_lote, percentual_centavos
+)
 from .repository import OrcamentoRepository, FormaPagamentoRepository
 from .schemas import (
     OrcamentoCreate, OrcamentoUpdate, OrcamentoResponse,
     FormaPagamentoCreate, FormaPagamentoUpdate, FormaPagamentoResponse
 )
-from ..clientes.services import ClienteService
+from ..clientes.status_eventos import publicar_transicao_status
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +31,8 @@ class OrcamentoService:
         self,
         filtros: Dict[str, Any] = None,
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """Lista orçamentos com validação de parâmetros"""
         # Valida paginação
@@ -37,7 +41,7 @@ class OrcamentoService:
         if limit < 1 or limit > 100:
             limit = 20
             
-        return await self.orcamento_repo.listar(filtros, page, limit)
+        return await self.orcamento_repo.listar(filtros, page, limit, cursor)
     
     async def buscar_por_id(self, orcamento_id: str) -> OrcamentoResponse:
         """Busca orçamento com validação"""
@@ -52,24 +56,20 @@ class OrcamentoService:
                 dados.necessita_aprovacao = True
                 logger.info(f"Orçamento com desconto {dados.desconto_percentual}% marcado para aprovação")
             
-            # Calcula valor final se não fornecido
+            # Calcula valor final se não fornecido (em centavos, desconto arredondado)
             if dados.valor_ambientes and not dados.valor_final:
-                desconto = dados.valor_ambientes * (dados.desconto_percentual / 100)
-                dados.valor_final = dados.valor_ambientes - desconto
+                valor_ambientes = para_centavos(dados.valor_ambientes)
+                desconto = percentual_centavos(valor_ambientes, dados.desconto_percentual)
+                dados.valor_final = centavos_para_decimal(valor_ambientes - desconto)
             
             # Cria orçamento
             orcamento_dict = dados.model_dump(exclude_unset=True)
             orcamento = await self.orcamento_repo.criar(orcamento_dict)
             
             # TRIGGER AUTOMÁTICO: Orçamento salvo → Ordem 3 (Orçamento Criado)
+            # (aplicado em segundo plano pelo barramento de eventos)
             if user and dados.cliente_id:
-                try:
-                    cliente_service = ClienteService()
-                    await cliente_service.atualizar_status_cliente(str(dados.cliente_id), 3, user)
-                    logger.info(f"Status atualizado para ordem 3 - cliente {dados.cliente_id}")
-                except Exception as status_error:
-                    logger.warning(f"Erro ao atualizar status após criar orçamento: {status_error}")
-                    # Não falha a criação por erro de status
+                await publicar_transicao_status(str(dados.cliente_id), 3, user)
             
             return OrcamentoResponse(**orcamento)
             
@@ -155,7 +155,7 @@ class FormaPagamentoService:
                 orcamento = await self.orcamento_repo.buscar_por_id(str(dados.orcamento_id))
             except Exception:
                 # Se der erro no relacionamento, busca diretamente da tabela
-                result = self.orcamento_repo.db.table('c_orcamentos').select('*').eq('id', str(dados.orcamento_id)).execute()
+                result = await self.orcamento_repo.db.table('c_orcamentos').select('*').eq('id', str(dados.orcamento_id)).execute()
                 if not result.data:
                     raise BusinessRuleException("Orçamento não encontrado")
                 orcamento = result.data[0]
@@ -164,15 +164,18 @@ class FormaPagamentoService:
             # if orcamento.get('status', {}).get('nome') in ['Cancelado', 'Rejeitado']:
             #     raise BusinessRuleException("Não é possível adicionar pagamento em orçamento cancelado/rejeitado")
             
-            # Valida valor total
+            # Valida valor total (em centavos)
             formas_existentes = await self.forma_repo.listar_por_orcamento(str(dados.orcamento_id))
-            total_existente = sum(float(f.get('valor', 0)) for f in formas_existentes)
-            total_novo = total_existente + float(dados.valor)
-            valor_orcamento = float(orcamento.get('valor_final', 0))
+            total_existente = sum(
+                centavos or 0 for centavos in para_centavos_lote(f.get('valor') for f in formas_existentes)
+            )
+            total_novo = total_existente + (para_centavos(dados.valor) or 0)
+            valor_orcamento = para_centavos(orcamento.get('valor_final')) or 0
             
-            if total_novo > valor_orcamento * 1.01:  # Tolerância de 1%
+            if total_novo > valor_orcamento + percentual_centavos(valor_orcamento, 1):  # Tolerância de 1%
                 raise BusinessRuleException(
-                    f"Total de pagamentos (R$ {total_novo:.2f}) excede valor do orçamento (R$ {valor_orcamento:.2f})"
+                    f"Total de pagamentos ({formatar_centavos(total_novo)}) excede valor do orçamento "
+                    f"({formatar_centavos(valor_orcamento)})"
                 )
             
             # Cria forma de pagamento
@@ -240,14 +243,9 @@ class FormaPagamentoService:
             orcamento = await self.orcamento_repo.buscar_por_id(orcamento_id)
             
             # TRIGGER AUTOMÁTICO: Orçamento enviado → Ordem 4 (Em Negociação)
+            # (aplicado em segundo plano pelo barramento de eventos)
             if user and orcamento.get('cliente_id'):
-                try:
-                    cliente_service = ClienteService()
-                    await cliente_service.atualizar_status_cliente(str(orcamento['cliente_id']), 4, user)
-                    logger.info(f"Status atualizado para ordem 4 - cliente {orcamento['cliente_id']}")
-                except Exception as status_error:
-                    logger.warning(f"Erro ao atualizar status após enviar orçamento: {status_error}")
-                    # Não falha o envio por erro de status
+                await publicar_transicao_status(str(orcamento['cliente_id']), 4, user)
             
             # Aqui seria implementada a lógica de envio (email, WhatsApp, etc.)
             logger.info(f"Orçamento {orcamento_id} enviado com sucesso")
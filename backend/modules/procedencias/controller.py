@@ -4,9 +4,8 @@ Controller - Endpoints REST para Procedências
 import logging
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from supabase import Client
 
-from core.database import get_admin_database
+from core.database import AsyncDatabase, get_admin_database
 from core.dependencies import get_current_user
 from core.exceptions import NotFoundException, ConflictException, BusinessRuleException
 from .repository import ProcedenciaRepository
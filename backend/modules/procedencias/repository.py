@@ -3,7 +3,7 @@ Repository para operações de banco de dados - Procedências
 """
 import logging
 from typing import List, Optional, Dict, Any
-from supabase import Client
+from core.database import AsyncDatabase
 from .schemas import ProcedenciaCreate, ProcedenciaUpdate
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 class ProcedenciaRepository:
     """Repository para gerenciar operações de procedências no Supabase"""
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.table_name = "c_procedencias"
     
@@ -27,7 +27,7 @@ class ProcedenciaRepository:
             if apenas_ativas:
                 query = query.eq("ativo", True)
             
-            result = query.order("nome").execute()
+            result = await query.order("nome").execute()
             return result.data or []
         
         except Exception as e:
@@ -37,7 +37,7 @@ class ProcedenciaRepository:
     async def buscar_por_id(self, procedencia_id: str) -> Optional[Dict[str, Any]]:
         """Busca procedência por ID"""
         try:
-            result = self.db.table(self.table_name).select("*").eq("id", procedencia_id).execute()
+            result = await self.db.table(self.table_name).select("*").eq("id", procedencia_id).execute()
             return result.data[0] if result.data else None
         
         except Exception as e:
@@ -47,7 +47,7 @@ class ProcedenciaRepository:
     async def buscar_por_nome(self, nome: str) -> Optional[Dict[str, Any]]:
         """Busca procedência por nome"""
         try:
-            result = self.db.table(self.table_name).select("*").eq("nome", nome).execute()
+            result = await self.db.table(self.table_name).select("*").eq("nome", nome).execute()
             return result.data[0] if result.data else None
         
         except Exception as e:
@@ -58,7 +58,7 @@ class ProcedenciaRepository:
         """Cria nova procedência"""
         try:
             procedencia_data = dados.model_dump()
-            result = self.db.table(self.table_name).insert(procedencia_data).execute()
+            result = await self.db.table(self.table_name).insert(procedencia_data).execute()
             return result.data[0]
         
         except Exception as e:
@@ -74,7 +74,7 @@ class ProcedenciaRepository:
             if not update_data:
                 return await self.buscar_por_id(procedencia_id)
             
-            result = self.db.table(self.table_name).update(update_data).eq("id", procedencia_id).execute()
+            result = await self.db.table(self.table_name).update(update_data).eq("id", procedencia_id).execute()
             return result.data[0] if result.data else None
         
         except Exception as e:
@@ -84,7 +84,7 @@ class ProcedenciaRepository:
     async def deletar(self, procedencia_id: str) -> bool:
         """Soft delete - marca como inativo"""
         try:
-            result = self.db.table(self.table_name).update({"ativo": False}).eq("id", procedencia_id).execute()
+            result = await self.db.table(self.table_name).update({"ativo": False}).eq("id", procedencia_id).execute()
             return len(result.data) > 0
         
         except Exception as e:
@@ -99,7 +99,7 @@ class ProcedenciaRepository:
             if excluir_id:
                 query = query.neq("id", excluir_id)
             
-            result = query.execute()
+            result = await query.execute()
             return len(result.data) == 0
         
         except Exception as e:
@@ -6,8 +6,9 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 
-from supabase import Client
-from core.exceptions import NotFoundException, DatabaseException, ConflictException
+from core.database import AsyncDatabase, DatabaseUtils
+from core.setores_cache import contar_funcionarios_por_setor
+from core.exceptions import NotFoundException, DatabaseException, ConflictException, ValidationException
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,7 @@ class SetorRepository:
     SETORES SÃO GLOBAIS - compartilhados entre todas as lojas
     """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         """
         Inicializa o repository com a conexão do banco
         
@@ -32,7 +33,8 @@ class SetorRepository:
         self,
         filtros: Dict[str, Any] = None,
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        count: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Lista setores com filtros e paginação
@@ -42,14 +44,17 @@ class SetorRepository:
             filtros: Dicionário com filtros opcionais
             page: Página atual
             limit: Itens por página
+            count: Modo de contagem do total (exact, planned, estimated, none)
             
         Returns:
             Dicionário com items e informações de paginação
         """
         try:
-            # Query simplificada - contagem será feita separadamente
-            # devido a limitação do cliente Python do Supabase com subqueries
-            query = self.db.table(self.table).select('*')
+            # O total vem no mesmo request, sem query de contagem separada
+            query = self.db.table(self.table).select(
+                '*',
+                count=DatabaseUtils.count_method(count)
+            )
             
             # Aplica filtros
             if filtros:
@@ -73,39 +78,23 @@ class SetorRepository:
             else:
                 query = query.eq('ativo', True)
             
-            # Conta total (sem paginação)
-            count_query = self.db.table(self.table).select('id', count='exact')
-            if not filtros or filtros.get('ativo') is None:
-                count_query = count_query.eq('ativo', True)
-            
-            # Aplica mesmos filtros na contagem
-            if filtros and filtros.get('busca'):
-                busca = f"%{filtros['busca']}%"
-                count_query = count_query.or_(
-                    f"nome.ilike.{busca},"
-                    f"descricao.ilike.{busca}"
-                )
-            
-            count_result = count_query.execute()
-            total = count_result.count or 0
-            
             # Ordenação e paginação
             query = query.order('nome', desc=False)
             offset = (page - 1) * limit
             query = query.limit(limit).offset(offset)
             
             # Executa query
-            result = query.execute()
+            result = await query.execute()
+            total = result.count
+            
+            # Contagem de funcionários de todos os setores da página em uma query
+            contagens = await contar_funcionarios_por_setor(
+                self.db, (setor['id'] for setor in result.data)
+            )
             
-            # Adiciona contagem de funcionários para cada setor
             items = []
             for setor in result.data:
-                # Conta funcionários ativos deste setor
-                count_result = self.db.table('cad_equipe').select(
-                    'id', count='exact'
-                ).eq('setor_id', setor['id']).eq('ativo', True).execute()
-                
-                setor['total_funcionarios'] = count_result.count or 0
+                setor['total_funcionarios'] = contagens.get(str(setor['id']), 0)
                 items.append(setor)
             
             return {
@@ -113,9 +102,11 @@ class SetorRepository:
                 'total': total,
                 'page': page,
                 'limit': limit,
-                'pages': (total + limit - 1) // limit
+                'pages': DatabaseUtils.count_pages(total, limit)
             }
         
+        except ValidationException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar setores: {str(e)}")
             raise DatabaseException(f"Erro ao listar setores: {str(e)}")
@@ -137,19 +128,16 @@ class SetorRepository:
         try:
             # Query simplificada
             query = self.db.table(self.table).select('*').eq('id', setor_id).eq('ativo', True)
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise NotFoundException(f"Setor não encontrado: {setor_id}")
             
             setor = result.data[0]
             
-            # Adiciona contagem de funcionários
-            count_result = self.db.table('cad_equipe').select(
-                'id', count='exact'
-            ).eq('setor_id', setor_id).eq('ativo', True).execute()
-            
-            setor['total_funcionarios'] = count_result.count or 0
+            # Adiciona contagem de funcionários (cache compartilhado com listar)
+            contagens = await contar_funcionarios_por_setor(self.db, [setor_id])
+            setor['total_funcionarios'] = contagens.get(str(setor_id), 0)
             
             return setor
         
@@ -172,7 +160,7 @@ class SetorRepository:
         """
         try:
             query = self.db.table(self.table).select('*').eq('nome', nome).eq('ativo', True)
-            result = query.execute()
+            result = await query.execute()
             
             if result.data:
                 return result.data[0]
@@ -212,7 +200,7 @@ class SetorRepository:
                 dados['updated_at'] = now
             
             # Cria o setor
-            result = self.db.table(self.table).insert(dados).execute()
+            result = await self.db.table(self.table).insert(dados).execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar setor")
@@ -268,7 +256,7 @@ class SetorRepository:
             
             # Atualiza apenas campos fornecidos
             query = self.db.table(self.table).update(dados).eq('id', setor_id)
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar setor")
@@ -307,7 +295,7 @@ class SetorRepository:
             
             # Marca como inativo em vez de deletar fisicamente
             query = self.db.table(self.table).update({'ativo': False}).eq('id', setor_id)
-            result = query.execute()
+            result = await query.execute()
             
             return bool(result.data)
         
@@ -321,6 +309,7 @@ class SetorRepository:
         """
         Conta quantos funcionários estão vinculados a um setor
         CONTA FUNCIONÁRIOS DE TODAS AS LOJAS
+        Contagem exata direto no banco (sem cache), para validações
         
         Args:
             setor_id: ID do setor
@@ -329,7 +318,7 @@ class SetorRepository:
             Número total de funcionários no setor (todas as lojas)
         """
         try:
-            result = self.db.table('cad_equipe').select(
+            result = await self.db.table('cad_equipe').select(
                 'id', count='exact'
             ).eq('setor_id', setor_id).eq('ativo', True).execute()
             
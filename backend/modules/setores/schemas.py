@@ -81,10 +81,10 @@ class SetorListResponse(BaseModel):
     Resposta quando listamos vários setores
     """
     items: list[SetorResponse]
-    total: int
+    total: Optional[int]  # None com count=none ou em páginas com cursor
     page: int
     limit: int
-    pages: int
+    pages: Optional[int]
 
 
 class FiltrosSetor(BaseModel):
@@ -78,7 +78,8 @@ class SetorService:
             resultado = await repository.listar(
                 filtros=filtros_dict,
                 page=pagination.page,
-                limit=pagination.limit
+                limit=pagination.limit,
+                count=pagination.count
             )
             
             # Converte para response model
@@ -238,13 +239,9 @@ class SetorService:
             # Busca setor atual para verificar se tem funcionários
             setor_atual = await repository.buscar_por_id(setor_id)
             
-            # ✅ CORREÇÃO: Verificar se o campo existe antes de usar
-            total_funcionarios = setor_atual.get('total_funcionarios', 0)
-            
-            # Se não tem o campo, contar manualmente
-            if 'total_funcionarios' not in setor_atual:
-                logger.warning(f"Campo total_funcionarios não encontrado para setor {setor_id}, contando manualmente")
-                total_funcionarios = await repository.contar_funcionarios(setor_id)
+            # Contagem exata no banco: total_funcionarios de buscar_por_id vem do
+            # cache por setor e pode estar defasado em outro worker
+            total_funcionarios = await repository.contar_funcionarios(setor_id)
             
             logger.info(f"Setor {setor_id} tem {total_funcionarios} funcionários vinculados")
             
@@ -0,0 +1,134 @@
+"""
+Catálogo de status de orçamento em memória
+
+c_status_orcamento tem poucas linhas e quase nunca muda, mas é consultada a
+cada gatilho automático de status (cadastro de cliente, criação e envio de
+orçamento) e ao exibir o cliente com status. O catálogo carrega a tabela
+inteira uma vez e responde por id, ordem e nome sem ir ao banco.
+
+StatusOrcamentoRepository.criar/atualizar/excluir invalidam o catálogo.
+Alterações feitas por outro worker aparecem quando ele expira
+(`settings.status_catalogo_ttl`; 0 recarrega a cada consulta).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogoStatus:
+    """
+    Todos os status (ativos e inativos), indexados por id, ordem e nome
+
+    Uso:
+    ```python
+    status = await catalogo_status.por_ordem(carregar, 1)  # None se não existe
+    ```
+    `carregar` é a consulta da tabela inteira (StatusOrcamentoRepository).
+    Os dicts retornados são cópias: podem ser alterados por quem chama.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._status: List[Dict[str, Any]] = []
+        self._por_id: Dict[str, Dict[str, Any]] = {}
+        self._por_ordem: Dict[int, Dict[str, Any]] = {}
+        self._por_nome: Dict[str, Dict[str, Any]] = {}
+        self._expira = 0.0
+        self._versao = 0
+        # Versão dos dados em memória e da carga em andamento
+        self._versao_dados = -1
+        self._versao_carregando = -1
+        self._carregando: Optional[asyncio.Future] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def _garantir(self, carregar: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> None:
+        if time.monotonic() < self._expira:
+            self.hits += 1
+            return
+
+        self.misses += 1
+        # Carga iniciada antes de um invalidar() pode ter lido dados antigos:
+        # quem chega depois da escrita não se junta a ela, começa outra
+        if self._carregando is None or self._versao_carregando != self._versao:
+            self._versao_carregando = self._versao
+            carregando = asyncio.ensure_future(self._carregar(carregar, self._versao))
+            carregando.add_done_callback(self._fim_da_carga)
+            self._carregando = carregando
+        await asyncio.shield(self._carregando)
+
+    def _fim_da_carga(self, carregando: asyncio.Future) -> None:
+        if self._carregando is carregando:
+            self._carregando = None
+
+    async def _carregar(self, carregar, versao: int) -> None:
+        status_list = await carregar()
+        # Uma carga mais nova já terminou: não volta aos dados antigos
+        if versao < self._versao_dados:
+            return
+
+        # Ordem ativa: o primeiro status ativo com aquela ordem (como a consulta antiga)
+        por_ordem: Dict[int, Dict[str, Any]] = {}
+        for status in status_list:
+            if status.get('ativo'):
+                por_ordem.setdefault(status.get('ordem'), status)
+
+        self._status = status_list
+        self._por_id = {str(status['id']): status for status in status_list}
+        self._por_ordem = por_ordem
+        self._por_nome = {}
+        for status in status_list:
+            self._por_nome.setdefault(status.get('nome'), status)
+        self._versao_dados = versao
+        # Invalidado durante a carga: usa o resultado só nesta consulta
+        if versao == self._versao:
+            self._expira = time.monotonic() + self.ttl
+        logger.debug(f"Catálogo de status carregado: {len(status_list)} status")
+
+    async def listar(self, carregar, apenas_ativos: bool = True) -> List[Dict[str, Any]]:
+        """Status ordenados por ordem"""
+        await self._garantir(carregar)
+        return [
+            dict(status)
+            for status in sorted(self._status, key=lambda s: s.get('ordem') or 0)
+            if status.get('ativo') or not apenas_ativos
+        ]
+
+    async def por_id(self, carregar, status_id: Any) -> Optional[Dict[str, Any]]:
+        await self._garantir(carregar)
+        status = self._por_id.get(str(status_id))
+        return dict(status) if status else None
+
+    async def por_ordem(self, carregar, ordem: int) -> Optional[Dict[str, Any]]:
+        """Status ativo com a ordem informada"""
+        await self._garantir(carregar)
+        status = self._por_ordem.get(ordem)
+        return dict(status) if status else None
+
+    async def por_nome(self, carregar, nome: str) -> Optional[Dict[str, Any]]:
+        await self._garantir(carregar)
+        status = self._por_nome.get(nome)
+        return dict(status) if status else None
+
+    def invalidar(self) -> None:
+        """Força a próxima consulta a recarregar do banco"""
+        self._versao += 1
+        self._expira = 0.0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores do catálogo (exposto no /health)"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "tamanho": len(self._status)
+        }
+
+
+catalogo_status = CatalogoStatus(ttl=settings.status_catalogo_ttl)
@@ -5,7 +5,7 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from supabase import Client
+from core.database import AsyncDatabase
 
 from core.dependencies import get_db_with_user_context, get_current_user
 from core.database import get_database as get_db
@@ -25,7 +25,7 @@ router = APIRouter(prefix="/status-orcamento", tags=["Status de Orçamento"])
 @router.get("/", response_model=StatusOrcamentoListResponse)
 async def listar_status(
     apenas_ativos: bool = Query(True, description="Listar apenas status ativos"),
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
     """Lista todos os status de orçamento ordenados"""
@@ -50,7 +50,7 @@ async def listar_status(
 @router.get("/{status_id}", response_model=StatusOrcamentoResponse)
 async def buscar_status(
     status_id: UUID,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
     """Busca status por ID"""
@@ -75,7 +75,7 @@ async def buscar_status(
 @router.post("/", response_model=StatusOrcamentoResponse)
 async def criar_status(
     dados: StatusOrcamentoCreate,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
     """Cria novo status de orçamento"""
@@ -106,7 +106,7 @@ async def criar_status(
 async def atualizar_status(
     status_id: UUID,
     dados: StatusOrcamentoUpdate,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
     """Atualiza status existente"""
@@ -141,7 +141,7 @@ async def atualizar_status(
 @router.delete("/{status_id}")
 async def excluir_status(
     status_id: UUID,
-    db: Client = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: dict = Depends(get_current_user)
 ):
     """Desativa status (soft delete)"""
@@ -4,31 +4,35 @@ Repository - Acesso ao banco para status de orçamento
 import logging
 from typing import List, Dict, Any, Optional
 
-from supabase import Client
+from core.database import AsyncDatabase
 from core.exceptions import NotFoundException, DatabaseException, ConflictException, BusinessRuleException
 
+from .catalogo import catalogo_status
+
 logger = logging.getLogger(__name__)
 
 
 class StatusOrcamentoRepository:
-    """Repository para tabela c_status_orcamento"""
+    """
+    Repository para tabela c_status_orcamento
+    
+    As consultas vêm do catálogo em memória (catalogo.py), carregado com uma
+    query da tabela inteira; criar/atualizar/excluir o invalidam.
+    """
     
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.table = 'c_status_orcamento'
     
+    async def _carregar_todos(self) -> List[Dict[str, Any]]:
+        """Tabela inteira (ativos e inativos), para o catálogo"""
+        result = await self.db.table(self.table).select('*').order('ordem', desc=False).execute()
+        return result.data or []
+    
     async def listar(self, apenas_ativos: bool = True) -> List[Dict[str, Any]]:
         """Lista todos os status ordenados"""
         try:
-            query = self.db.table(self.table).select('*')
-            
-            if apenas_ativos:
-                query = query.eq('ativo', True)
-            
-            query = query.order('ordem', desc=False)
-            result = query.execute()
-            
-            return result.data or []
+            return await catalogo_status.listar(self._carregar_todos, apenas_ativos)
             
         except Exception as e:
             logger.error(f"Erro ao listar status: {str(e)}")
@@ -37,12 +41,12 @@ class StatusOrcamentoRepository:
     async def buscar_por_id(self, status_id: str) -> Dict[str, Any]:
         """Busca status por ID"""
         try:
-            result = self.db.table(self.table).select('*').eq('id', status_id).execute()
+            status = await catalogo_status.por_id(self._carregar_todos, status_id)
             
-            if not result.data:
+            if not status:
                 raise NotFoundException(f"Status não encontrado: {status_id}")
             
-            return result.data[0]
+            return status
             
         except NotFoundException:
             raise
@@ -53,12 +57,7 @@ class StatusOrcamentoRepository:
     async def buscar_por_nome(self, nome: str) -> Optional[Dict[str, Any]]:
         """Busca status por nome"""
         try:
-            result = self.db.table(self.table).select('*').eq('nome', nome).execute()
-            
-            if result.data:
-                return result.data[0]
-            
-            return None
+            return await catalogo_status.por_nome(self._carregar_todos, nome)
             
         except Exception as e:
             logger.error(f"Erro ao buscar por nome: {str(e)}")
@@ -67,12 +66,14 @@ class StatusOrcamentoRepository:
     async def criar(self, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Cria novo status"""
         try:
-            # Verifica se nome já existe
+            # Verifica duplicidade com o catálogo recarregado (outro worker pode ter criado)
+            catalogo_status.invalidar()
             existe = await self.buscar_por_nome(dados['nome'])
             if existe:
                 raise ConflictException(f"Status '{dados['nome']}' já existe")
             
-            result = self.db.table(self.table).insert(dados).execute()
+            result = await self.db.table(self.table).insert(dados).execute()
+            catalogo_status.invalidar()
             
             if not result.data:
                 raise DatabaseException("Erro ao criar status")
@@ -88,7 +89,8 @@ class StatusOrcamentoRepository:
     async def atualizar(self, status_id: str, dados: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza status existente"""
         try:
-            # Verifica se existe
+            # Verifica se existe (catálogo recarregado, como no criar)
+            catalogo_status.invalidar()
             await self.buscar_por_id(status_id)
             
             # Se está mudando nome, verifica duplicidade
@@ -100,7 +102,8 @@ class StatusOrcamentoRepository:
             # Remove campos None
             dados_limpos = {k: v for k, v in dados.items() if v is not None}
             
-            result = self.db.table(self.table).update(dados_limpos).eq('id', status_id).execute()
+            result = await self.db.table(self.table).update(dados_limpos).eq('id', status_id).execute()
+            catalogo_status.invalidar()
             
             if not result.data:
                 raise DatabaseException("Erro ao atualizar status")
@@ -114,14 +117,9 @@ class StatusOrcamentoRepository:
             raise DatabaseException(f"Erro ao atualizar status: {str(e)}")
     
     async def buscar_por_ordem(self, ordem: int) -> Optional[Dict[str, Any]]:
-        """Busca status por ordem"""
+        """Busca status ativo por ordem"""
         try:
-            result = self.db.table(self.table).select('*').eq('ordem', ordem).eq('ativo', True).execute()
-            
-            if result.data:
-                return result.data[0]
-            
-            return None
+            return await catalogo_status.por_ordem(self._carregar_todos, ordem)
             
         except Exception as e:
             logger.error(f"Erro ao buscar status por ordem {ordem}: {str(e)}")
@@ -130,16 +128,18 @@ class StatusOrcamentoRepository:
     async def excluir(self, status_id: str) -> bool:
         """Marca status como inativo (soft delete)"""
         try:
-            # Verifica se existe
+            # Verifica se existe (catálogo recarregado, como no criar)
+            catalogo_status.invalidar()
             await self.buscar_por_id(status_id)
             
             # Verifica se há orçamentos usando este status
-            orcamentos = self.db.table('c_orcamentos').select('id', count='exact').eq('status_id', status_id).execute()
+            orcamentos = await self.db.table('c_orcamentos').select('id', count='exact').eq('status_id', status_id).execute()
             if orcamentos.count > 0:
                 raise BusinessRuleException(f"Existem {orcamentos.count} orçamentos usando este status")
             
             # Marca como inativo
-            result = self.db.table(self.table).update({'ativo': False}).eq('id', status_id).execute()
+            result = await self.db.table(self.table).update({'ativo': False}).eq('id', status_id).execute()
+            catalogo_status.invalidar()
             
             return bool(result.data)
             
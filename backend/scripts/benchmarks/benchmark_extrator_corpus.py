@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmark e regressão do XMLExtractor sobre um corpus de XMLs do Promob
+
+Para cada arquivo do corpus mede, em um processo novo:
+- parse: `etree.parse` do arquivo
+- extração: `XMLExtractor.extract` sobre a árvore, com o tempo por seção
+  (índice, detecção das linhas, caixa, painéis, portas/ferragens, porta
+  perfil, Brilhart Color, valor total)
+- pico de memória: RSS acima do processo já com os imports (Linux)
+
+O corpus padrão é sintético (gerador_xml_promob.py): linhas Unique, Sublime
+e mista em tamanhos configuráveis (100 a 100k itens; ~2,5 KB por item). Os
+resultados vão para um JSON; com `--comparar`, cada métrica é comparada à
+execução anterior e o script termina com código 1 se alguma piorou além da
+tolerância ou se o resultado da extração mudou (linha detectada, seções).
+
+Uso:
+    cd backend
+    python scripts/benchmarks/benchmark_extrator_corpus.py --saida base.json
+    python scripts/benchmarks/benchmark_extrator_corpus.py --comparar base.json
+    python scripts/benchmarks/benchmark_extrator_corpus.py --itens 100 100000 --linhas misto
+    python scripts/benchmarks/benchmark_extrator_corpus.py projeto1.xml projeto2.xml
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Adiciona o diretório backend ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from gerador_xml_promob import LINHAS, gravar_xml_promob  # noqa: E402
+
+VERSAO_FORMATO = 1
+DIRETORIO_RESULTADOS = Path(__file__).parent / "resultados"
+
+# Métodos do XMLExtractor medidos por seção
+SECOES = {
+    "_detectar_linhas": "deteccao_linhas",
+    "_extrair_nome_ambiente": "nome_ambiente",
+    "_extrair_caixa_multiplas_linhas": "caixa",
+    "_extrair_paineis_multiplas_linhas": "paineis",
+    "_extrair_portas_e_ferragens_multiplas_linhas": "portas_ferragens",
+    "_extrair_porta_perfil": "porta_perfil",
+    "_extrair_brilhart_color": "brilhart_color",
+    "_extrair_valor_total": "valor_total",
+}
+
+# Diferenças abaixo destes pisos são ruído, mesmo acima da tolerância
+PISO_MS = 1.0
+PISO_MB = 2.0
+
+
+# ============================================================================
+# MEDIÇÃO (processo novo por arquivo)
+# ============================================================================
+
+def _memoria_kb(campo: str) -> Optional[int]:
+    """VmRSS/VmHWM do processo atual (Linux; None em outros sistemas)"""
+    try:
+        with open("/proc/self/status") as status:
+            for linha in status:
+                if linha.startswith(campo + ":"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _zerar_pico() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def _cronometrar(funcao, nome: str, tempos: Dict[str, float]):
+    @wraps(funcao)
+    def cronometrada(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            tempos[nome] = tempos.get(nome, 0.0) + time.perf_counter() - inicio
+    return cronometrada
+
+
+def _medir_arquivo(caminho: str, repeticoes: int, fila) -> None:
+    """Roda no processo filho: parse + extração `repeticoes` vezes"""
+    import logging
+    from lxml import etree
+    from modules.ambientes.extrator_xml.app.extractors import xml_extractor
+    from modules.ambientes.extrator_xml.app.extractors.xml_extractor import XMLExtractor
+
+    # O extrator registra as linhas detectadas em INFO a cada arquivo
+    logging.disable(logging.INFO)
+
+    tempos: Dict[str, float] = {}
+    # O índice é montado dentro de extract(): mede pelo nome usado no módulo
+    xml_extractor.IndicePromob = _cronometrar(xml_extractor.IndicePromob, "indice", tempos)
+
+    _zerar_pico()
+    base = _memoria_kb("VmRSS")
+
+    amostras = []
+    for _ in range(repeticoes):
+        tempos.clear()
+        inicio = time.perf_counter()
+        tree = etree.parse(caminho).getroot()
+        parse = time.perf_counter() - inicio
+
+        extrator = XMLExtractor()
+        for metodo, nome in SECOES.items():
+            setattr(extrator, metodo, _cronometrar(getattr(extrator, metodo), nome, tempos))
+
+        inicio = time.perf_counter()
+        resultado = extrator.extract(tree)
+        extracao = time.perf_counter() - inicio
+        del tree
+
+        secoes = dict(tempos)
+        secoes["outros"] = max(0.0, extracao - sum(secoes.values()))
+        amostras.append({"parse": parse, "extracao": extracao, "secoes": secoes})
+
+    pico = _memoria_kb("VmHWM")
+    fila.put({
+        "parse_ms": statistics.median(a["parse"] for a in amostras) * 1000,
+        "extracao_ms": statistics.median(a["extracao"] for a in amostras) * 1000,
+        "secoes_ms": {
+            nome: statistics.median(a["secoes"].get(nome, 0.0) for a in amostras) * 1000
+            for nome in amostras[0]["secoes"]
+        },
+        "pico_rss_mb": (pico - base) / 1024 if pico is not None and base is not None else None,
+        "sucesso": resultado.success,
+        "linha_detectada": resultado.linha_detectada,
+        "secoes_extraidas": resultado.metadata.sections_extracted if resultado.metadata else [],
+        "erro": resultado.error,
+    })
+
+
+def medir_arquivo(caminho: Path, repeticoes: int) -> Dict[str, Any]:
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_medir_arquivo, args=(str(caminho), repeticoes, fila))
+    processo.start()
+    medicao = fila.get()
+    processo.join()
+    return {"tamanho_mb": caminho.stat().st_size / 1024 / 1024, **medicao}
+
+
+# ============================================================================
+# CORPUS E RESULTADOS
+# ============================================================================
+
+def gerar_corpus(diretorio: Path, linhas: List[str], itens: List[int]) -> Dict[str, Path]:
+    """XMLs sintéticos por linha e tamanho, chaveados por '<linha>_<itens>'"""
+    corpus = {}
+    for linha in linhas:
+        for quantidade in itens:
+            chave = f"{linha}_{quantidade}"
+            corpus[chave] = gravar_xml_promob(diretorio / f"{chave}.xml", quantidade, linha)
+    return corpus
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ambiente() -> Dict[str, Any]:
+    from lxml import etree
+    return {
+        "python": platform.python_version(),
+        "lxml": ".".join(map(str, etree.LXML_VERSION)),
+        "plataforma": platform.platform(),
+        "nucleos": multiprocessing.cpu_count(),
+        "commit": _commit_atual(),
+    }
+
+
+def executar(corpus: Dict[str, Path], repeticoes: int) -> Dict[str, Any]:
+    resultados = {}
+    print(f"{'arquivo':<18}{'MB':>8}{'parse':>12}{'extração':>12}{'pico RSS':>12}  seções mais lentas")
+    for chave, caminho in corpus.items():
+        medicao = medir_arquivo(caminho, repeticoes)
+        resultados[chave] = medicao
+
+        lentas = sorted(medicao["secoes_ms"].items(), key=lambda secao: -secao[1])[:3]
+        pico = f"{medicao['pico_rss_mb']:9.1f} MB" if medicao["pico_rss_mb"] is not None else f"{'-':>12}"
+        print(
+            f"{chave:<18}{medicao['tamanho_mb']:8.2f}{medicao['parse_ms']:10.1f}ms"
+            f"{medicao['extracao_ms']:10.1f}ms{pico}  "
+            + ", ".join(f"{nome} {ms:.1f}ms" for nome, ms in lentas)
+        )
+        if not medicao["sucesso"]:
+            print(f"{'':18}falha na extração: {medicao['erro']}")
+
+    return {
+        "versao": VERSAO_FORMATO,
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": _ambiente(),
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+def _metricas(medicao: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    metricas = {
+        "parse_ms": medicao["parse_ms"],
+        "extracao_ms": medicao["extracao_ms"],
+        "pico_rss_mb": medicao["pico_rss_mb"],
+    }
+    metricas.update({f"secoes_ms.{nome}": ms for nome, ms in medicao["secoes_ms"].items()})
+    return metricas
+
+
+def comparar(anterior: Dict[str, Any], atual: Dict[str, Any], tolerancia: float) -> List[str]:
+    """Regressões de `atual` em relação a `anterior` (vazio se nenhuma)"""
+    regressoes = []
+    for chave, medicao in atual["resultados"].items():
+        referencia = anterior["resultados"].get(chave)
+        if referencia is None:
+            continue
+
+        for campo in ("sucesso", "linha_detectada", "secoes_extraidas"):
+            if medicao[campo] != referencia[campo]:
+                regressoes.append(f"{chave}: {campo} mudou de {referencia[campo]!r} para {medicao[campo]!r}")
+
+        metricas_anteriores = _metricas(referencia)
+        for metrica, valor in _metricas(medicao).items():
+            base = metricas_anteriores.get(metrica)
+            if valor is None or base is None:
+                continue
+            piso = PISO_MB if metrica.endswith("_mb") else PISO_MS
+            if valor > base * (1 + tolerancia) and valor - base > piso:
+                regressoes.append(f"{chave}: {metrica} {base:.1f} -> {valor:.1f} (+{(valor / base - 1) * 100 if base else float('inf'):.0f}%)")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("arquivos", nargs="*", type=Path, help="XMLs do Promob (padrão: corpus sintético)")
+    parser.add_argument("--linhas", nargs="+", choices=sorted(LINHAS), default=["unique", "sublime", "misto"])
+    parser.add_argument("--itens", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Itens por XML sintético (100k itens: ~250 MB de XML, ~8 GB de RSS)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", type=Path, help="JSON dos resultados (padrão: resultados/extrator_<data>.json)")
+    parser.add_argument("--comparar", type=Path, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora aceita por métrica (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        if args.arquivos:
+            corpus = {arquivo.stem: arquivo for arquivo in args.arquivos}
+        else:
+            corpus = gerar_corpus(Path(diretorio), args.linhas, args.itens)
+        atual = executar(corpus, args.repeticoes)
+
+    saida = args.saida or DIRETORIO_RESULTADOS / f"extrator_{datetime.now():%Y%m%d_%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(atual, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados: {saida}")
+
+    if args.comparar:
+        anterior = json.loads(args.comparar.read_text(encoding="utf-8"))
+        regressoes = comparar(anterior, atual, args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) em relação a {args.comparar}:")
+            for regressao in regressoes:
+                print(f"  {regressao}")
+            sys.exit(1)
+        print(f"\nSem regressões em relação a {args.comparar} (tolerância {args.tolerancia:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga: execute() síncrono vs cliente PostgREST assíncrono com pool
+
+Sobe um servidor HTTP local que imita o PostgREST (latência simulada, resposta
+JSON com Content-Range) e dispara N requisições concorrentes no event loop,
+como o uvicorn faz com requisições simultâneas:
+
+- ANTES: cliente supabase-py síncrono, `query.execute()` dentro de corrotinas
+  (cada chamada bloqueia o event loop durante todo o round trip)
+- DEPOIS: `AsyncDatabase` de core.database, `await query.execute()` sobre o
+  pool keep-alive compartilhado
+
+Uso:
+    cd backend
+    python scripts/benchmarks/benchmark_pool_async.py --requisicoes 200 --latencia 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+# Chave fake no formato JWT (o supabase-py valida o formato)
+CHAVE_FAKE = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.benchmark"
+
+LINHAS = [
+    {"id": f"00000000-0000-0000-0000-{i:012d}", "nome": f"Cliente {i}", "ativo": True}
+    for i in range(20)
+]
+
+
+class PostgrestFake(BaseHTTPRequestHandler):
+    """Stand-in mínimo do PostgREST: responde qualquer GET com uma página de linhas"""
+
+    protocol_version = "HTTP/1.1"
+    latencia = 0.02
+
+    def do_GET(self):
+        # Consome o corpo (se houver) para manter a conexão keep-alive íntegra
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.latencia)
+        corpo = json.dumps(LINHAS).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Range", f"0-{len(LINHAS) - 1}/{len(LINHAS)}")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_servidor(latencia: float) -> ThreadingHTTPServer:
+    PostgrestFake.latencia = latencia
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), PostgrestFake)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+async def medir(nome: str, consulta, requisicoes: int, concorrencia: int) -> float:
+    """Executa `requisicoes` consultas com no máximo `concorrencia` simultâneas"""
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def requisicao():
+        async with semaforo:
+            await consulta()
+
+    # Aquecimento (abre conexões)
+    await asyncio.gather(*(requisicao() for _ in range(min(concorrencia, requisicoes))))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(requisicao() for _ in range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+
+    rps = requisicoes / duracao
+    print(f"{nome:<40} {duracao:8.2f}s  {rps:10.1f} req/s")
+    return rps
+
+
+async def main(args):
+    servidor = iniciar_servidor(args.latencia)
+    url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    # Settings leem o ambiente na importação
+    os.environ.update({
+        "SUPABASE_URL": url,
+        "SUPABASE_ANON_KEY": CHAVE_FAKE,
+        "SUPABASE_SERVICE_KEY": CHAVE_FAKE,
+        "JWT_SECRET_KEY": "benchmark",
+    })
+    from supabase import create_client
+    from core.database import get_supabase
+
+    print(f"📊 {args.requisicoes} requisições, concorrência {args.concorrencia}, "
+          f"latência simulada {args.latencia * 1000:.0f}ms\n")
+
+    cliente_sync = create_client(url, CHAVE_FAKE)
+
+    async def consulta_sync():
+        cliente_sync.table("c_clientes").select("*").eq("ativo", True).limit(20).execute()
+
+    db = get_supabase().database
+
+    async def consulta_async():
+        await db.table("c_clientes").select("*").eq("ativo", True).limit(20).execute()
+
+    antes = await medir("ANTES  (execute() síncrono)", consulta_sync, args.requisicoes, args.concorrencia)
+    depois = await medir("DEPOIS (AsyncDatabase + pool)", consulta_async, args.requisicoes, args.concorrencia)
+
+    print(f"\n🚀 Ganho: {depois / antes:.1f}x")
+
+    await get_supabase().aclose()
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--latencia", type=float, default=0.02, help="Latência simulada por chamada (segundos)")
+    asyncio.run(main(parser.parse_args()))
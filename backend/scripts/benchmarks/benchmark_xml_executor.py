@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga: extração de XML no event loop vs pool de processos
+
+Dispara N importações concorrentes de um XML sintético do Promob enquanto uma
+corrotina "sonda" acorda a cada 10 ms, como as outras requisições do worker
+do uvicorn. Mede o tempo total e o maior atraso da sonda (quanto tempo o
+event loop ficou sem atender ninguém):
+
+- ANTES: `extrair_xml` chamado direto na corrotina (como o XMLImporter fazia)
+- DEPOIS: `ExecutorExtracaoXML.extrair` (modules/ambientes/xml_executor.py)
+  com o pool de processos aquecido
+
+A vazão do pool cresce com o número de núcleos; com 1 núcleo o ganho é só o
+event loop livre.
+
+Uso:
+    cd backend
+    python scripts/benchmarks/benchmark_xml_executor.py --importacoes 8 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from benchmark_xml_extractor import gerar_xml_promob  # noqa: E402
+from modules.ambientes.xml_executor import ExecutorExtracaoXML, extrair_xml  # noqa: E402
+
+INTERVALO_SONDA = 0.01
+
+
+async def medir(nome: str, extrair, arquivo: Path, importacoes: int) -> None:
+    atrasos = []
+    ativo = True
+
+    async def sonda():
+        while ativo:
+            inicio = time.perf_counter()
+            await asyncio.sleep(INTERVALO_SONDA)
+            atrasos.append(time.perf_counter() - inicio - INTERVALO_SONDA)
+
+    tarefa_sonda = asyncio.create_task(sonda())
+    await asyncio.sleep(0)
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(extrair(arquivo) for _ in range(importacoes)))
+    total = time.perf_counter() - inicio
+
+    ativo = False
+    await tarefa_sonda
+
+    assert all(r.resultado.success for r in resultados)
+    print(
+        f"{nome:8}{total * 1000:10.1f}ms{importacoes / total:12.2f}/s"
+        f"{max(atrasos) * 1000:12.1f}ms"
+    )
+
+
+async def principal(args) -> None:
+    async def inline(arquivo):
+        return extrair_xml(arquivo)
+
+    executor = ExecutorExtracaoXML(workers=args.workers, timeout=300)
+    executor.iniciar()
+    # Aguarda os workers subirem (spawn + imports) para medir só a extração
+    await executor.extrair(args.arquivo)
+
+    print(f"\n{args.importacoes} importações de {args.arquivo.stat().st_size / 1024 / 1024:.2f} MB "
+          f"({args.workers} workers, {os.cpu_count()} núcleos)")
+    print(f"{'':8}{'total':>12}{'vazão':>12}{'maior atraso':>14}")
+    await medir("ANTES", inline, args.arquivo, args.importacoes)
+    await medir("DEPOIS", executor.extrair, args.arquivo, args.importacoes)
+
+    executor.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("arquivo", nargs="?", type=Path, help="XML do Promob (padrão: sintético)")
+    parser.add_argument("--itens", type=int, default=1000, help="Itens do XML sintético")
+    parser.add_argument("--importacoes", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.arquivo:
+        asyncio.run(principal(args))
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        args.arquivo = Path(diretorio) / f"sintetico_{args.itens}.xml"
+        args.arquivo.write_bytes(gerar_xml_promob(args.itens))
+        asyncio.run(principal(args))
+
+
+if __name__ == "__main__":
+    main()
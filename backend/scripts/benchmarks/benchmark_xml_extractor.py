@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark do extrator XML do Promob: consultas XPath vs índice de passada única
+
+Mede tempo de parse, tempo de extração e pico de memória (RSS, Linux) por
+arquivo:
+
+- ANTES: o caminho antigo da importação - upload lido inteiro, validação com
+  ElementTree sobre a string decodificada, parse com lxml da string
+  recodificada, detecção das linhas por busca na string e uma consulta
+  XPath `//` por campo/coleção
+- DEPOIS: upload lido em partes para um arquivo temporário, com o hash na
+  mesma passada (modules/ambientes/xml_upload.py), e `extrair_xml` (o que
+  roda no worker do modules/ambientes/xml_executor.py): parse do arquivo e
+  `XMLExtractor.extract` em uma passada (extractors/indice_promob.py)
+
+Sem argumentos, gera XMLs sintéticos no formato do Promob
+(gerador_xml_promob.py) em três tamanhos. Para medir exportações reais,
+passe os arquivos .xml.
+
+Uso:
+    cd backend
+    python scripts/benchmarks/benchmark_xml_extractor.py
+    python scripts/benchmarks/benchmark_xml_extractor.py --itens 2000 --repeticoes 3
+    python scripts/benchmarks/benchmark_xml_extractor.py caminho/projeto.xml
+"""
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from gerador_xml_promob import SUBLIME, UNIQUE, gerar_xml_promob  # noqa: E402
+
+# Campos consultados pelo extrator antigo, uma consulta XPath cada
+CAMPOS_ANTES = [
+    (UNIQUE, "1 - Espessura Caixa"), (UNIQUE, "1.1 - Espessura Prateleiras"),
+    (UNIQUE, "4 - Cor Corpo"), (SUBLIME, "Cor Corpo"),
+    (UNIQUE, "7 - Painéis"), (UNIQUE, "2 - Espessura Painéis"), (SUBLIME, "Painéis"),
+    (UNIQUE, "3 - Espessura Frontal"), (UNIQUE, "4.1 - Modelo Frontal"),
+    (UNIQUE, "5 - Cor Frontal"), (UNIQUE, "5 - Puxadores"), (UNIQUE, "7 - Dobradiça"),
+    (UNIQUE, "7.2.1 - Tipo Dobradiça"), (UNIQUE, "7.1 - Corrediça"),
+    (UNIQUE, "7.1.1 - Gaveta"), (UNIQUE, "7.2 - Tipo Corrediça"),
+    (SUBLIME, "Modelo Frontal"), (SUBLIME, "Cor Frontal"), (SUBLIME, "Tipo Dobradiças"),
+    (SUBLIME, "Tipo Corrediças"), (UNIQUE, "5 - Puxadores"),
+    ("Portábille", "Perfil"), ("Portábille", "Acab Perfis"), ("Portábille", "Acab Vidros"),
+    ("Portábille", "Painéis"), ("Portábille", "Puxadores"), ("Portábille", "Dobradiças"),
+    ("Brilhart Color", "Acab Porta"), ("Brilhart Color", "Acab Perfil"),
+]
+
+
+# ============================================================================
+# CAMINHOS MEDIDOS
+# ============================================================================
+
+def extrair_antes(arquivo: Path) -> dict:
+    """Parses e consultas que a importação fazia antes do índice"""
+    from lxml import etree
+    from modules.ambientes.extrator_xml.app.utils import (
+        detectar_espessura_brilhart,
+        detectar_linhas_disponiveis,
+        extrair_multiplos_valores_se_existe,
+    )
+    from modules.ambientes.extrator_xml.app.utils.helpers import extrair_espessura_paineis_sublime
+
+    tempos = {}
+    inicio = time.perf_counter()
+    conteudo = arquivo.read_bytes()
+    conteudo_str = conteudo.decode("utf-8")
+    ET.fromstring(conteudo_str)
+    tree = etree.fromstring(conteudo_str.encode("utf-8"))
+    hashlib.sha256(conteudo_str.encode("utf-8")).hexdigest()
+    tempos["parse"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    detectar_linhas_disponiveis(conteudo_str)
+    for colecao in (UNIQUE, SUBLIME, "Portábille", "Brilhart Color"):
+        tree.xpath(f"//MODELCATEGORYINFORMATION[@DESCRIPTION='{colecao}']")
+    for categoria in ("Corpo", "Corpo Sublime", "Corpo Sublime"):
+        tree.xpath(f"//CATEGORY[@DESCRIPTION='{categoria}']")
+    for colecao, campo in CAMPOS_ANTES:
+        extrair_multiplos_valores_se_existe(tree, f"//MODELCATEGORYINFORMATION[@DESCRIPTION='{colecao}']", campo)
+    tree.xpath(f"//MODELCATEGORYINFORMATION[@DESCRIPTION='{UNIQUE}']//MARCA/@REFERENCE")
+    extrair_espessura_paineis_sublime(tree, f"//MODELCATEGORYINFORMATION[@DESCRIPTION='{SUBLIME}']")
+    detectar_espessura_brilhart(tree)
+    tree.find(".//AMBIENT")
+    for tag in ("ORDER", "BUDGET"):
+        tree.xpath(f"//LISTING/TOTALPRICES/MARGINS/{tag}/@VALUE")
+    tempos["extracao"] = time.perf_counter() - inicio
+    return tempos
+
+
+def extrair_depois(arquivo: Path) -> dict:
+    """Upload em partes (hash + arquivo temporário) e extração a partir do arquivo"""
+    from starlette.datastructures import UploadFile
+    from modules.ambientes.xml_executor import extrair_xml
+    from modules.ambientes.xml_upload import receber_xml_upload
+
+    async def receber_e_extrair(upload):
+        async with receber_xml_upload(UploadFile(file=upload, filename=arquivo.name)) as recebido:
+            tempos["upload"] = time.perf_counter() - inicio
+            return extrair_xml(recebido.caminho)
+
+    tempos = {}
+    inicio = time.perf_counter()
+    with open(arquivo, "rb") as upload:
+        extracao = asyncio.run(receber_e_extrair(upload))
+    # Parse e extração rodam juntos no worker: "parse" aqui é a leitura do upload
+    tempos["extracao"] = time.perf_counter() - inicio - tempos["upload"]
+    tempos["parse"] = tempos.pop("upload")
+
+    assert extracao.resultado.success, extracao.resultado.error
+    return tempos
+
+
+CAMINHOS = {"ANTES": extrair_antes, "DEPOIS": extrair_depois}
+
+
+def _memoria_kb(campo: str) -> int:
+    """VmRSS/VmHWM do processo atual (Linux)"""
+    with open("/proc/self/status") as status:
+        for linha in status:
+            if linha.startswith(campo + ":"):
+                return int(linha.split()[1])
+    raise RuntimeError(f"{campo} indisponível")
+
+
+def _medir_memoria(nome: str, arquivo: Path, fila) -> None:
+    """Roda em processo novo: pico de RSS acima do processo já com os imports"""
+    import lxml.etree  # noqa: F401
+    import starlette.datastructures  # noqa: F401
+    import modules.ambientes.extrator_xml.app.extractors  # noqa: F401
+    import modules.ambientes.xml_upload  # noqa: F401
+    import modules.ambientes.xml_executor  # noqa: F401
+
+    # Zera o pico (VmHWM) para medir só o processamento
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    base = _memoria_kb("VmRSS")
+
+    CAMINHOS[nome](arquivo)
+    fila.put(_memoria_kb("VmHWM") - base)
+
+
+def pico_memoria_mb(nome: str, arquivo: Path) -> float:
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_medir_memoria, args=(nome, arquivo, fila))
+    processo.start()
+    pico = fila.get()
+    processo.join()
+    return pico / 1024
+
+
+def medir(rotulo: str, arquivo: Path, repeticoes: int) -> None:
+    print(f"\n{rotulo} ({arquivo.stat().st_size / 1024 / 1024:.2f} MB)")
+    print(f"{'':8}{'parse':>12}{'extração':>12}{'total':>12}{'pico RSS':>12}")
+
+    for nome, funcao in CAMINHOS.items():
+        amostras = [funcao(arquivo) for _ in range(repeticoes)]
+        parse = statistics.median(a["parse"] for a in amostras) * 1000
+        extracao = statistics.median(a["extracao"] for a in amostras) * 1000
+        memoria = pico_memoria_mb(nome, arquivo)
+        print(f"{nome:8}{parse:10.1f}ms{extracao:10.1f}ms{parse + extracao:10.1f}ms{memoria:9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("arquivos", nargs="*", type=Path, help="XMLs do Promob (padrão: sintéticos)")
+    parser.add_argument("--itens", type=int, nargs="+", default=[100, 1000, 3500],
+                        help="Itens por XML sintético")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.arquivos:
+        for arquivo in args.arquivos:
+            medir(arquivo.name, arquivo, args.repeticoes)
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for itens in args.itens:
+            arquivo = Path(diretorio) / f"sintetico_{itens}.xml"
+            arquivo.write_bytes(gerar_xml_promob(itens))
+            medir(f"Sintético {itens} itens", arquivo, args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
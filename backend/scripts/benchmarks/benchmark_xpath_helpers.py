@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark das consultas XPath dos helpers do extrator: expressões montadas
+por chamada vs registro compilado (extrator_xml/app/utils/xpaths.py)
+
+Mede o tempo de extração por arquivo com as consultas que os helpers
+respondem (valores por coleção/campo, espessura dos painéis Sublime,
+espessura Brilhart Color e contagem por família):
+
+- ANTES: f-string com coleção e campo e `tree.xpath(...)` a cada chamada
+  (a expressão é compilada de novo toda vez)
+- DEPOIS: helpers de utils/helpers.py com as consultas do registro,
+  compiladas na importação e parametrizadas por variáveis XPath
+
+O parse do XML fica fora da medição. Sem argumentos, usa XMLs sintéticos
+do gerador_xml_promob.py; para exportações reais, passe os .xml.
+
+Uso:
+    cd backend
+    python scripts/benchmarks/benchmark_xpath_helpers.py
+    python scripts/benchmarks/benchmark_xpath_helpers.py --itens 1000 --repeticoes 3
+    python scripts/benchmarks/benchmark_xpath_helpers.py caminho/projeto.xml
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from lxml import etree
+
+# Adiciona o diretório backend ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from benchmark_xml_extractor import CAMPOS_ANTES  # noqa: E402
+from gerador_xml_promob import SUBLIME, UNIQUE, gerar_xml_promob  # noqa: E402
+from modules.ambientes.extrator_xml.app.utils.helpers import (  # noqa: E402
+    detectar_espessura_brilhart,
+    escolher_espessura_brilhart,
+    extrair_espessura_paineis_sublime,
+    extrair_multiplos_valores,
+    filtrar_espessuras,
+)
+from modules.ambientes.extrator_xml.app.utils.xpaths import ITENS_FAMILIA, TEM_COLECAO  # noqa: E402
+
+
+def _base(colecao: str) -> str:
+    return f"//MODELCATEGORYINFORMATION[@DESCRIPTION='{colecao}']"
+
+
+def extrair_antes(tree) -> list:
+    """Consultas como os helpers faziam: expressão montada e compilada por chamada"""
+    resultados = []
+    for colecao, campo in CAMPOS_ANTES:
+        valores = tree.xpath(
+            f"{_base(colecao)}//MODELINFORMATION[@DESCRIPTION='{campo}']"
+            "/MODELTYPEINFORMATIONS/MODELTYPEINFORMATION/@DESCRIPTION"
+        )
+        resultados.append(list(dict.fromkeys(valores)))
+    resultados.append(filtrar_espessuras(tree.xpath(
+        f"{_base(SUBLIME)}//MODELINFORMATION[@DESCRIPTION='Painéis']//DESCRI/@REFERENCE"
+    )))
+    resultados.append(escolher_espessura_brilhart(tree.xpath(f"{_base('Brilhart Color')}//@*")))
+    for colecao in (UNIQUE, SUBLIME):
+        resultados.append(len(tree.xpath(f'//ITEM[@FAMILY="{colecao}"]')))
+        resultados.append(bool(tree.xpath(_base(colecao))))
+    return resultados
+
+
+def extrair_depois(tree) -> list:
+    """Mesmas consultas pelos helpers, com o registro compilado"""
+    resultados = [extrair_multiplos_valores(tree, _base(colecao), campo) for colecao, campo in CAMPOS_ANTES]
+    resultados.append(extrair_espessura_paineis_sublime(tree, _base(SUBLIME)))
+    resultados.append(detectar_espessura_brilhart(tree))
+    for colecao in (UNIQUE, SUBLIME):
+        resultados.append(int(ITENS_FAMILIA(tree, familia=colecao)))
+        resultados.append(TEM_COLECAO(tree, colecao=colecao))
+    return resultados
+
+
+CAMINHOS = {"ANTES": extrair_antes, "DEPOIS": extrair_depois}
+
+
+def medir(rotulo: str, conteudo: bytes, repeticoes: int) -> None:
+    tree = etree.fromstring(conteudo)
+    assert extrair_antes(tree) == extrair_depois(tree), "caminhos com respostas diferentes"
+
+    print(f"\n{rotulo} ({len(conteudo) / 1024:.0f} KB, {len(CAMPOS_ANTES) + 6} consultas por arquivo)")
+    print(f"{'':8}{'por arquivo':>14}{'arquivos/s':>14}")
+    for nome, funcao in CAMINHOS.items():
+        amostras = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao(tree)
+            amostras.append(time.perf_counter() - inicio)
+        mediana = statistics.median(amostras)
+        print(f"{nome:8}{mediana * 1000:12.3f}ms{1 / mediana:14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("arquivos", nargs="*", type=Path, help="XMLs do Promob (padrão: sintéticos)")
+    parser.add_argument("--itens", type=int, nargs="+", default=[1, 10, 100],
+                        help="Itens por XML sintético")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.arquivos:
+        for arquivo in args.arquivos:
+            medir(arquivo.name, arquivo.read_bytes(), args.repeticoes)
+        return
+
+    for itens in args.itens:
+        medir(f"Sintético {itens} itens", gerar_xml_promob(itens), args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Gerador de XMLs sintéticos no formato do Promob para os benchmarks
+
+Estrutura: LISTING > AMBIENTS > AMBIENT > CATEGORIES > CATEGORY > ITEMS >
+ITEM > MODELCATEGORYINFORMATIONS > MODELCATEGORYINFORMATION >
+MODELINFORMATIONS > MODELINFORMATION, com os metadados que o Promob exporta
+por item (preços, medidas, componentes), ~2,5 KB por item.
+
+Linhas:
+- unique: Coleção Unique, Portábille e Brilhart Color
+- sublime: Coleção Sublime, Portábille e Brilhart Color
+- misto: as quatro coleções
+
+O arquivo é escrito em partes (`escrever_xml_promob`), então tamanhos
+grandes (100k itens, ~250 MB) não precisam caber na memória.
+
+Uso:
+    cd backend
+    python scripts/benchmarks/gerador_xml_promob.py saida.xml --itens 10000 --linha sublime
+"""
+import argparse
+import io
+from pathlib import Path
+from typing import Callable, Dict, List, TextIO, Tuple
+from xml.sax.saxutils import quoteattr
+
+UNIQUE = "Coleção Unique "
+SUBLIME = "Coleção Sublime"
+PORTABILLE = "Portábille"
+BRILHART = "Brilhart Color"
+
+CORES = ["MDF\\Branco Supremo", "MDF\\Carvalho Hanover", "BP\\Grafite"]
+
+TOTAIS = "<TOTALPRICES><MARGINS><ORDER VALUE=\"48211.37\" /><BUDGET VALUE=\"96422.74\" /></MARGINS></TOTALPRICES>"
+
+
+def _modelinfo(descricao: str, valores, extra: str = "") -> str:
+    tipos = "".join(
+        f"<MODELTYPEINFORMATION ID=\"{i}\" DESCRIPTION={quoteattr(v)} />" for i, v in enumerate(valores)
+    )
+    return (
+        f"<MODELINFORMATION DESCRIPTION={quoteattr(descricao)}>"
+        f"<MODELTYPEINFORMATIONS>{tipos}</MODELTYPEINFORMATIONS>{extra}</MODELINFORMATION>"
+    )
+
+
+def _item(i: int, categoria: str, colecao: str, campos: str, marca: str = "") -> str:
+    """Item com os metadados que o Promob exporta (preços, medidas, componentes)"""
+    componentes = "".join(
+        f"<ITEM ID=\"{i}.{c}\" DESCRIPTION=\"Componente {c}\" REFERENCE=\"CMP{c:03d}\" "
+        f"WIDTH=\"{300 + c}\" HEIGHT=\"720\" DEPTH=\"550\" QUANTITY=\"1\">"
+        f"<PRICE TABLE=\"{c * 1.5:.2f}\" TOTAL=\"{c * 3.0:.2f}\" UNIT=\"un\" /></ITEM>"
+        for c in range(6)
+    )
+    return (
+        f"<ITEM ID=\"{i}\" DESCRIPTION=\"Módulo {i} {categoria}\" FAMILY={quoteattr(colecao)} "
+        f"REFERENCE=\"MOD{i:05d}\" WIDTH=\"600\" HEIGHT=\"720\" DEPTH=\"550\" QUANTITY=\"1\">"
+        f"<PRICE TABLE=\"{i * 10.5:.2f}\" TOTAL=\"{i * 21.0:.2f}\" UNIT=\"un\" />"
+        f"<MODELCATEGORYINFORMATIONS><MODELCATEGORYINFORMATION DESCRIPTION={quoteattr(colecao)}>"
+        f"<MODELINFORMATIONS>{campos}</MODELINFORMATIONS></MODELCATEGORYINFORMATION>"
+        f"</MODELCATEGORYINFORMATIONS>"
+        f"<REFERENCES>{marca}<FABRICANTE REFERENCE=\"Fluyt\" /></REFERENCES>"
+        f"<ITEMS>{componentes}</ITEMS></ITEM>"
+    )
+
+
+def _item_unique(i: int) -> str:
+    campos = (
+        _modelinfo("1 - Espessura Caixa", ["18mm" if i % 8 else "15mm"])
+        + _modelinfo("1.1 - Espessura Prateleiras", ["18mm"])
+        + _modelinfo("4 - Cor Corpo", [CORES[i % 3]])
+        + _modelinfo("7 - Painéis", [CORES[(i + 1) % 3]])
+        + _modelinfo("2 - Espessura Painéis", ["18mm"])
+        + _modelinfo("3 - Espessura Frontal", ["18mm"])
+        + _modelinfo("4.1 - Modelo Frontal", ["Liso", "Ripado"][: 1 + i % 2])
+        + _modelinfo("5 - Cor Frontal", [CORES[(i + 2) % 3]])
+        + _modelinfo("5 - Puxadores", ["128mm\\Pux. Punata", "Sem puxador\\Sem Puxador"][i % 2:][:1])
+        + _modelinfo("7 - Dobradiça", ["Blum"])
+        + _modelinfo("7.2.1 - Tipo Dobradiça", ["Dobradiça\\Reta c/ amortecedor"])
+        + _modelinfo("7.1.1 - Gaveta", ["c/ corrediça telescópica"])
+        + _modelinfo("7.2 - Tipo Corrediça", ["c/ amortecimento"])
+    )
+    return _item(i, "Corpo", UNIQUE, campos, "<MARCA REFERENCE=\".Blum\" />")
+
+
+def _item_sublime(i: int) -> str:
+    campos = (
+        _modelinfo("Cor Corpo", [CORES[i % 3]])
+        + _modelinfo("Painéis", [CORES[(i + 1) % 3]], "<DESCRI REFERENCE=\"15mm\" /><DESCRI REFERENCE=\"Painel\" />")
+        + _modelinfo("Modelo Frontal", ["Frontal"])
+        + _modelinfo("Cor Frontal", [CORES[(i + 2) % 3]])
+        + _modelinfo("Tipo Dobradiças", ["Reta"])
+        + _modelinfo("Tipo Corrediças", ["Standard s/ amortecimento"])
+    )
+    return _item(i, "Corpo Sublime", SUBLIME, campos)
+
+
+def _item_portabille(i: int) -> str:
+    campos = (
+        _modelinfo("Perfil", ["Slim"])
+        + _modelinfo("Acab Perfis", ["Preto Fosco"])
+        + _modelinfo("Acab Vidros", ["Importados\\Argentato"])
+        + _modelinfo("Painéis", ["Vidro 4mm"])
+        + _modelinfo("Puxadores", ["Cava"])
+        + _modelinfo("Dobradiças", ["Sem Dobradiças", "Dobradiça Portábille"][i % 2:][:1])
+    )
+    return _item(i, "Portas", PORTABILLE, campos)
+
+
+def _item_brilhart(i: int) -> str:
+    campos = (
+        _modelinfo("Acab Porta", ["Fosco (2 Face)>Alba"])
+        + _modelinfo("Acab Perfil", ["Anodizados>Inox Escovado"])
+    )
+    return _item(i, "Portas", BRILHART, campos).replace(
+        "<MODELINFORMATIONS>", "<MODELINFORMATIONS REFERENCE=\"BC18mm\">", 1
+    )
+
+
+# Ciclo de tipos de item por linha: (categoria, gerador do item)
+TiposItem = List[Tuple[str, Callable[[int], str]]]
+
+LINHAS: Dict[str, TiposItem] = {
+    "unique": [("Corpo", _item_unique), ("Portas", _item_portabille), ("Portas", _item_brilhart)],
+    "sublime": [("Corpo Sublime", _item_sublime), ("Portas", _item_portabille), ("Portas", _item_brilhart)],
+    "misto": [
+        ("Corpo", _item_unique), ("Corpo Sublime", _item_sublime),
+        ("Portas", _item_portabille), ("Portas", _item_brilhart),
+    ],
+}
+
+
+def escrever_xml_promob(saida: TextIO, itens: int = 500, linha: str = "misto") -> None:
+    """Escreve o projeto em `saida`, uma CATEGORY por vez, item a item"""
+    tipos = LINHAS[linha]
+    # Só categorias com itens, na ordem do primeiro item de cada
+    categorias = list(dict.fromkeys(tipos[i % len(tipos)][0] for i in range(min(itens, len(tipos)))))
+
+    saida.write(
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+        f"<LISTING VERSION=\"5.0\">{TOTAIS}<AMBIENTS>"
+        f"<AMBIENT ID=\"1\" DESCRIPTION=\"Projeto - Cozinha Integrada\">{TOTAIS}<CATEGORIES>"
+    )
+    for categoria in categorias:
+        saida.write(f"<CATEGORY DESCRIPTION={quoteattr(categoria)}><ITEMS>")
+        for i in range(itens):
+            categoria_item, gerar_item = tipos[i % len(tipos)]
+            if categoria_item == categoria:
+                saida.write(gerar_item(i))
+        saida.write("</ITEMS></CATEGORY>")
+    saida.write("</CATEGORIES></AMBIENT></AMBIENTS></LISTING>")
+
+
+def gerar_xml_promob(itens: int = 500, linha: str = "misto") -> bytes:
+    """Projeto inteiro em memória (para tamanhos pequenos)"""
+    saida = io.StringIO()
+    escrever_xml_promob(saida, itens, linha)
+    return saida.getvalue().encode("utf-8")
+
+
+def gravar_xml_promob(destino: Path, itens: int = 500, linha: str = "misto") -> Path:
+    """Projeto gravado em `destino` sem montar o arquivo inteiro na memória"""
+    with open(destino, "w", encoding="utf-8", buffering=1024 * 1024) as saida:
+        escrever_xml_promob(saida, itens, linha)
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("destino", type=Path)
+    parser.add_argument("--itens", type=int, default=500)
+    parser.add_argument("--linha", choices=sorted(LINHAS), default="misto")
+    args = parser.parse_args()
+
+    gravar_xml_promob(args.destino, args.itens, args.linha)
+    print(f"{args.destino}: {args.destino.stat().st_size / 1024 / 1024:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+-- Busca de clientes por nome, CPF/CNPJ ou telefone com índice trigram
+-- Usada por ClienteRepository.listar/contar (?busca=) e ClienteRepository.buscar
+-- (GET /clientes/buscar, resultados ordenados por relevância)
+--
+-- O ILIKE '%termo%' direto em nome/cpf_cnpj/telefone não usa índice e
+-- diferencia "José" de "Jose" e "123.456" de "123456". As colunas geradas
+-- abaixo guardam a forma normalizada (mesmas regras de
+-- modules/clientes/busca.py) e os índices GIN trigram atendem o ILIKE com
+-- curinga dos dois lados.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA extensions;
+
+-- unaccent() não é IMMUTABLE (depende do dicionário padrão); com o
+-- dicionário explícito pode ser usada em coluna gerada e índice
+CREATE OR REPLACE FUNCTION f_unaccent(TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+STRICT
+AS $$
+    SELECT extensions.unaccent('extensions.unaccent', $1);
+$$;
+
+-- busca_texto: nome sem acentos, minúsculo, pontuação vira espaço
+-- busca_digitos: dígitos do CPF/CNPJ e do telefone, separados por espaço
+--                (o termo não casa atravessando os dois números)
+ALTER TABLE c_clientes
+    ADD COLUMN IF NOT EXISTS busca_texto TEXT
+        GENERATED ALWAYS AS (
+            trim(regexp_replace(lower(f_unaccent(coalesce(nome, ''))), '[^a-z0-9]+', ' ', 'g'))
+        ) STORED,
+    ADD COLUMN IF NOT EXISTS busca_digitos TEXT
+        GENERATED ALWAYS AS (
+            regexp_replace(coalesce(cpf_cnpj, ''), '\D', '', 'g')
+            || ' ' ||
+            regexp_replace(coalesce(telefone, ''), '\D', '', 'g')
+        ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_c_clientes_busca_texto_trgm
+    ON c_clientes USING gin (busca_texto extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_c_clientes_busca_digitos_trgm
+    ON c_clientes USING gin (busca_digitos extensions.gin_trgm_ops);
+
+COMMENT ON COLUMN c_clientes.busca_texto IS
+'Nome normalizado para busca (sem acentos, minúsculo), gerada';
+COMMENT ON COLUMN c_clientes.busca_digitos IS
+'Dígitos do CPF/CNPJ e do telefone para busca, gerada';
+
+-- Busca ordenada por relevância
+-- p_texto e p_digitos já chegam normalizados (modules/clientes/busca.py:
+-- termos_busca). Pontuação igual a busca.relevancia: nome igual (4) >
+-- começa pelo termo (3) > palavra começa pelo termo (2) > contém (1) >
+-- nome parecido (word_similarity, tolera erro de digitação); nos dígitos,
+-- 2 + fração do número coberta pelo termo.
+CREATE OR REPLACE FUNCTION buscar_clientes(
+    p_texto TEXT,
+    p_digitos TEXT,
+    p_loja_id UUID DEFAULT NULL,
+    p_limite INTEGER DEFAULT 20
+)
+RETURNS SETOF c_clientes
+LANGUAGE sql
+STABLE
+SET search_path = public, extensions
+AS $$
+    SELECT c.*
+    FROM c_clientes c
+    WHERE c.ativo = true
+      AND (p_loja_id IS NULL OR c.loja_id = p_loja_id)
+      AND (
+          (p_texto <> '' AND (c.busca_texto LIKE '%' || p_texto || '%' OR p_texto <% c.busca_texto))
+          OR (p_digitos <> '' AND c.busca_digitos LIKE '%' || p_digitos || '%')
+      )
+    ORDER BY
+        GREATEST(
+            CASE
+                WHEN p_texto = '' THEN 0
+                WHEN c.busca_texto = p_texto THEN 4
+                WHEN c.busca_texto LIKE p_texto || '%' THEN 3
+                WHEN ' ' || c.busca_texto LIKE '% ' || p_texto || '%' THEN 2
+                WHEN c.busca_texto LIKE '%' || p_texto || '%' THEN 1
+                ELSE word_similarity(p_texto, c.busca_texto)
+            END,
+            CASE
+                WHEN p_digitos = '' THEN 0
+                WHEN regexp_replace(coalesce(c.cpf_cnpj, ''), '\D', '', 'g') LIKE '%' || p_digitos || '%'
+                    THEN 2 + length(p_digitos)::real / length(regexp_replace(c.cpf_cnpj, '\D', '', 'g'))
+                WHEN regexp_replace(coalesce(c.telefone, ''), '\D', '', 'g') LIKE '%' || p_digitos || '%'
+                    THEN 2 + length(p_digitos)::real / length(regexp_replace(c.telefone, '\D', '', 'g'))
+                ELSE 0
+            END
+        ) DESC,
+        c.nome
+    LIMIT p_limite;
+$$;
+
+-- SECURITY INVOKER (padrão): o RLS de c_clientes continua valendo
+GRANT EXECUTE ON FUNCTION buscar_clientes TO authenticated;
+
+COMMENT ON FUNCTION buscar_clientes IS
+'Clientes ativos por nome, CPF/CNPJ ou telefone, ordenados por relevância (índices trigram)';
+
+-- Recarregar o schema do PostgREST para expor as colunas e a função
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,34 @@
+-- Colunas de resumo dos materiais em c_ambientes_material
+-- Usadas pela listagem de ambientes com ?campos=...,resumo: a página traz só
+-- linha, cor da caixa, cor da porta e valor total, sem o materiais_json inteiro
+-- (o blob fica no TOAST e não é lido para montar a listagem)
+--
+-- Colunas geradas: o Postgres recalcula a cada INSERT/UPDATE do
+-- materiais_json, inclusive quando seções sob demanda são gravadas depois
+-- (modules/ambientes/xml_secoes.py)
+
+ALTER TABLE c_ambientes_material
+    ADD COLUMN IF NOT EXISTS resumo_linha TEXT
+        GENERATED ALWAYS AS (materiais_json ->> 'linha_detectada') STORED,
+    ADD COLUMN IF NOT EXISTS resumo_cor_caixa TEXT
+        GENERATED ALWAYS AS (materiais_json -> 'caixa' ->> 'cor') STORED,
+    ADD COLUMN IF NOT EXISTS resumo_cor_porta TEXT
+        GENERATED ALWAYS AS (materiais_json -> 'portas' ->> 'cor') STORED,
+    ADD COLUMN IF NOT EXISTS resumo_valor_total TEXT
+        GENERATED ALWAYS AS (materiais_json -> 'valor_total' ->> 'valor_venda') STORED;
+
+-- Filtro/agrupamento por linha nas listagens
+CREATE INDEX IF NOT EXISTS idx_c_ambientes_material_resumo_linha
+    ON c_ambientes_material (resumo_linha);
+
+COMMENT ON COLUMN c_ambientes_material.resumo_linha IS
+'Linha detectada no XML (materiais_json.linha_detectada), gerada';
+COMMENT ON COLUMN c_ambientes_material.resumo_cor_caixa IS
+'Cor da caixa (materiais_json.caixa.cor), gerada';
+COMMENT ON COLUMN c_ambientes_material.resumo_cor_porta IS
+'Cor das portas (materiais_json.portas.cor), gerada';
+COMMENT ON COLUMN c_ambientes_material.resumo_valor_total IS
+'Valor de venda do XML (materiais_json.valor_total.valor_venda), gerada';
+
+-- Recarregar o schema do PostgREST para expor as novas colunas
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,36 @@
+-- Função RPC para contar funcionários ativos de vários setores de uma vez
+-- SETORES SÃO GLOBAIS - conta funcionários de todas as lojas
+-- Usada por SetorRepository.listar/buscar_por_id: uma query por página,
+-- em vez de um COUNT por setor (N+1)
+
+CREATE OR REPLACE FUNCTION contar_funcionarios_por_setor(
+    setor_ids UUID[]
+)
+RETURNS TABLE (
+    setor_id UUID,
+    total_funcionarios INTEGER
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    SELECT
+        e.setor_id,
+        COUNT(*)::int AS total_funcionarios
+    FROM cad_equipe e
+    WHERE e.ativo = true
+      AND e.setor_id = ANY(setor_ids)
+    GROUP BY e.setor_id;
+$$;
+
+-- Índice para o agrupamento (ignora funcionários inativos)
+CREATE INDEX IF NOT EXISTS idx_cad_equipe_setor_ativo
+    ON cad_equipe (setor_id)
+    WHERE ativo = true;
+
+-- Conceder permissão para usuários autenticados
+GRANT EXECUTE ON FUNCTION contar_funcionarios_por_setor TO authenticated;
+
+-- Comentário da função
+COMMENT ON FUNCTION contar_funcionarios_por_setor IS
+'Conta funcionários ativos por setor para uma lista de setores, evitando N+1 queries';
@@ -0,0 +1,147 @@
+-- Criação e atualização de clientes em uma única chamada
+-- Usadas por ClienteRepository.criar_completo/atualizar_completo
+--
+-- Antes, cadastrar um cliente fazia ~7 idas ao banco em sequência: busca
+-- por nome (duplicado), busca por CPF/CNPJ, insert, busca do status
+-- inicial, update do status, busca por id (duas vezes). Aqui o nome
+-- duplicado é barrado pelo índice único, o status inicial entra no próprio
+-- insert e a função devolve o cliente já com vendedor e procedência.
+
+-- Nome único entre os clientes ativos da loja (mesma regra de
+-- ClienteRepository.buscar_por_nome). Se a criação falhar por duplicados já
+-- existentes, liste-os com:
+--   SELECT loja_id, nome, count(*) FROM c_clientes
+--   WHERE ativo = true GROUP BY loja_id, nome HAVING count(*) > 1;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_c_clientes_loja_nome_ativo
+    ON c_clientes (loja_id, nome)
+    WHERE ativo = true;
+
+-- Instante da última mudança de status (também criada por
+-- sql/criar_rpc_transicoes_status.sql): mudança manual pelo
+-- atualizar_cliente também conta, para que uma transição automática mais
+-- antiga entregue depois não a desfaça
+ALTER TABLE c_clientes ADD COLUMN IF NOT EXISTS status_transicao_em TIMESTAMPTZ;
+
+-- Cliente com {id, nome} do vendedor e da procedência (mesmo formato do
+-- select com JOIN da listagem)
+CREATE OR REPLACE FUNCTION cliente_com_relacionados(p_cliente_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT to_jsonb(c)
+        || jsonb_build_object(
+            'vendedor', (
+                SELECT jsonb_build_object('id', e.id, 'nome', e.nome)
+                FROM cad_equipe e WHERE e.id = c.vendedor_id
+            ),
+            'procedencia', (
+                SELECT jsonb_build_object('id', p.id, 'nome', p.nome)
+                FROM c_procedencias p WHERE p.id = c.procedencia_id
+            )
+        )
+    FROM c_clientes c
+    WHERE c.id = p_cliente_id;
+$$;
+
+-- Cria o cliente ativo na loja, com o status de ordem `p_status_ordem`
+-- (sem status se a ordem não existir). Nome duplicado: erro 23505.
+CREATE OR REPLACE FUNCTION criar_cliente(
+    p_dados JSONB,
+    p_loja_id UUID,
+    p_status_ordem INTEGER DEFAULT 1
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_cliente_id UUID;
+BEGIN
+    INSERT INTO c_clientes (
+        nome, cpf_cnpj, rg_ie, email, telefone, tipo_venda,
+        logradouro, numero, complemento, bairro, cidade, uf, cep,
+        procedencia_id, vendedor_id, observacoes,
+        status_id, loja_id, ativo
+    )
+    SELECT
+        r.nome, r.cpf_cnpj, r.rg_ie, r.email, r.telefone, COALESCE(r.tipo_venda, 'NORMAL'),
+        r.logradouro, r.numero, r.complemento, r.bairro, r.cidade, r.uf, r.cep,
+        r.procedencia_id, r.vendedor_id, r.observacoes,
+        COALESCE(
+            (SELECT s.id FROM c_status_orcamento s
+             WHERE s.ordem = p_status_ordem AND s.ativo = true LIMIT 1),
+            r.status_id
+        ),
+        p_loja_id,
+        true
+    FROM jsonb_populate_record(NULL::c_clientes, p_dados) r
+    RETURNING id INTO v_cliente_id;
+
+    RETURN cliente_com_relacionados(v_cliente_id);
+END;
+$$;
+
+-- Atualiza só as chaves presentes em `p_dados` de um cliente ativo.
+-- Retorna NULL se o cliente não existe/está inativo/é de outra loja.
+-- Nome duplicado: erro 23505. loja_id nunca é alterado.
+CREATE OR REPLACE FUNCTION atualizar_cliente(
+    p_cliente_id UUID,
+    p_dados JSONB,
+    p_loja_id UUID DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_cliente_id UUID;
+BEGIN
+    UPDATE c_clientes c SET
+        nome           = CASE WHEN p_dados ? 'nome' THEN r.nome ELSE c.nome END,
+        cpf_cnpj       = CASE WHEN p_dados ? 'cpf_cnpj' THEN r.cpf_cnpj ELSE c.cpf_cnpj END,
+        rg_ie          = CASE WHEN p_dados ? 'rg_ie' THEN r.rg_ie ELSE c.rg_ie END,
+        email          = CASE WHEN p_dados ? 'email' THEN r.email ELSE c.email END,
+        telefone       = CASE WHEN p_dados ? 'telefone' THEN r.telefone ELSE c.telefone END,
+        tipo_venda     = CASE WHEN p_dados ? 'tipo_venda' THEN r.tipo_venda ELSE c.tipo_venda END,
+        ativo          = CASE WHEN p_dados ? 'ativo' THEN r.ativo ELSE c.ativo END,
+        logradouro     = CASE WHEN p_dados ? 'logradouro' THEN r.logradouro ELSE c.logradouro END,
+        numero         = CASE WHEN p_dados ? 'numero' THEN r.numero ELSE c.numero END,
+        complemento    = CASE WHEN p_dados ? 'complemento' THEN r.complemento ELSE c.complemento END,
+        bairro         = CASE WHEN p_dados ? 'bairro' THEN r.bairro ELSE c.bairro END,
+        cidade         = CASE WHEN p_dados ? 'cidade' THEN r.cidade ELSE c.cidade END,
+        uf             = CASE WHEN p_dados ? 'uf' THEN r.uf ELSE c.uf END,
+        cep            = CASE WHEN p_dados ? 'cep' THEN r.cep ELSE c.cep END,
+        procedencia_id = CASE WHEN p_dados ? 'procedencia_id' THEN r.procedencia_id ELSE c.procedencia_id END,
+        vendedor_id    = CASE WHEN p_dados ? 'vendedor_id' THEN r.vendedor_id ELSE c.vendedor_id END,
+        status_id      = CASE WHEN p_dados ? 'status_id' THEN r.status_id ELSE c.status_id END,
+        status_transicao_em = CASE
+            WHEN p_dados ? 'status_id' AND r.status_id IS DISTINCT FROM c.status_id THEN NOW()
+            ELSE c.status_transicao_em
+        END,
+        observacoes    = CASE WHEN p_dados ? 'observacoes' THEN r.observacoes ELSE c.observacoes END,
+        updated_at     = NOW()
+    FROM jsonb_populate_record(NULL::c_clientes, p_dados) r
+    WHERE c.id = p_cliente_id
+      AND c.ativo = true
+      AND (p_loja_id IS NULL OR c.loja_id = p_loja_id)
+    RETURNING c.id INTO v_cliente_id;
+
+    IF v_cliente_id IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    RETURN cliente_com_relacionados(v_cliente_id);
+END;
+$$;
+
+-- SECURITY INVOKER (padrão): o RLS de c_clientes continua valendo
+GRANT EXECUTE ON FUNCTION cliente_com_relacionados TO authenticated;
+GRANT EXECUTE ON FUNCTION criar_cliente TO authenticated;
+GRANT EXECUTE ON FUNCTION atualizar_cliente TO authenticated;
+
+COMMENT ON FUNCTION criar_cliente IS
+'Cria cliente com status inicial e retorna o registro com vendedor e procedência (1 ida ao banco)';
+COMMENT ON FUNCTION atualizar_cliente IS
+'Atualiza as chaves informadas do cliente e retorna o registro com vendedor e procedência';
+
+-- Recarregar o schema do PostgREST para expor as funções
+NOTIFY pgrst, 'reload schema';
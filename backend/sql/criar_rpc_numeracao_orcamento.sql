@@ -0,0 +1,66 @@
+-- Numeração sequencial de orçamentos por loja
+-- Substitui a leitura do último orçamento criado (que disputava o mesmo
+-- número em criações simultâneas) por um contador atômico por loja.
+-- O backend reserva blocos de números (settings.orcamento_numero_bloco)
+-- e formata cada número com number_prefix/number_format da c_config_loja.
+
+CREATE TABLE IF NOT EXISTS c_orcamento_numeracao (
+    loja_id UUID PRIMARY KEY REFERENCES c_lojas(id) ON DELETE CASCADE,
+    proximo_numero BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE c_orcamento_numeracao ENABLE ROW LEVEL SECURITY;
+
+-- Reserva `p_quantidade` números consecutivos para a loja e retorna o
+-- primeiro, junto com o formato configurado. O UPSERT trava apenas a linha
+-- da loja: lojas diferentes nunca disputam o mesmo contador.
+CREATE OR REPLACE FUNCTION reservar_numeros_orcamento(
+    p_loja_id UUID,
+    p_quantidade INTEGER DEFAULT 1
+)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_inicial BIGINT;
+    v_formato TEXT;
+    v_prefixo TEXT;
+    v_inicio BIGINT;
+BEGIN
+    IF p_quantidade IS NULL OR p_quantidade < 1 THEN
+        RAISE EXCEPTION 'Quantidade de números deve ser maior que 0';
+    END IF;
+
+    SELECT initial_number, number_format, number_prefix
+    INTO v_inicial, v_formato, v_prefixo
+    FROM c_config_loja
+    WHERE loja_id = p_loja_id
+    LIMIT 1;
+
+    v_inicial := COALESCE(v_inicial, 1);
+
+    -- initial_number maior que o contador (configuração alterada) passa a valer
+    INSERT INTO c_orcamento_numeracao (loja_id, proximo_numero)
+    VALUES (p_loja_id, v_inicial + p_quantidade)
+    ON CONFLICT (loja_id) DO UPDATE
+        SET proximo_numero = GREATEST(c_orcamento_numeracao.proximo_numero, v_inicial) + p_quantidade,
+            updated_at = NOW()
+    RETURNING proximo_numero - p_quantidade INTO v_inicio;
+
+    RETURN json_build_object(
+        'inicio', v_inicio,
+        'quantidade', p_quantidade,
+        'number_format', v_formato,
+        'number_prefix', v_prefixo
+    );
+END;
+$$;
+
+-- Conceder permissão para usuários autenticados
+GRANT EXECUTE ON FUNCTION reservar_numeros_orcamento TO authenticated;
+
+-- Comentário da função
+COMMENT ON FUNCTION reservar_numeros_orcamento IS
+'Reserva um bloco de números de orçamento por loja de forma atômica (sem corrida entre criações simultâneas)';
@@ -0,0 +1,45 @@
+-- Transições automáticas de status do cliente em uma única chamada
+-- Usada por ClienteRepository.aplicar_transicoes_status (handler do evento
+-- cliente.transicao_status, modules/clientes/status_eventos.py)
+--
+-- O barramento de eventos entrega pelo menos uma vez e pode entregar um
+-- evento antigo depois de um mais novo (reenvio, pendente recuperado do
+-- outbox por outro processo). Cada cliente guarda o instante do evento que
+-- definiu o status atual; uma transição só é aplicada se for mais recente.
+-- Mudanças manuais de status (ClienteRepository.atualizar e a RPC
+-- atualizar_cliente de sql/criar_rpc_escrita_clientes.sql - execute-o de
+-- novo se já tinha executado) também gravam o instante da mudança.
+
+ALTER TABLE c_clientes ADD COLUMN IF NOT EXISTS status_transicao_em TIMESTAMPTZ;
+
+COMMENT ON COLUMN c_clientes.status_transicao_em IS
+'Instante da mudança que definiu o status_id atual (criado_em do evento ou mudança manual)';
+
+-- `p_transicoes`: [{cliente_id, status_id, loja_id, transicao_em}, ...]
+-- (um item por cliente). Retorna quantos clientes mudaram de status.
+CREATE OR REPLACE FUNCTION aplicar_transicoes_status(p_transicoes JSONB)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH atualizados AS (
+        UPDATE c_clientes c SET
+            status_id = t.status_id,
+            status_transicao_em = t.transicao_em
+        FROM jsonb_to_recordset(p_transicoes)
+            AS t(cliente_id UUID, status_id UUID, loja_id UUID, transicao_em TIMESTAMPTZ)
+        WHERE c.id = t.cliente_id
+          AND c.loja_id = t.loja_id
+          AND (c.status_transicao_em IS NULL OR c.status_transicao_em < t.transicao_em)
+        RETURNING c.id
+    )
+    SELECT count(*)::INTEGER FROM atualizados;
+$$;
+
+-- SECURITY INVOKER (padrão): o RLS de c_clientes continua valendo
+GRANT EXECUTE ON FUNCTION aplicar_transicoes_status TO authenticated;
+
+COMMENT ON FUNCTION aplicar_transicoes_status IS
+'Aplica transições de status em lote, ignorando as mais antigas que a última aplicada ao cliente';
+
+-- Recarregar o schema do PostgREST para expor a função
+NOTIFY pgrst, 'reload schema';
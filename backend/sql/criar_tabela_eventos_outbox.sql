@@ -0,0 +1,37 @@
+-- Outbox dos eventos de domínio (core/eventos.py)
+--
+-- BarramentoEventos.publicar grava cada evento aqui antes de retornar; o
+-- despachante entrega e marca como processado depois. Eventos que ficaram 'pendente' (processo caiu
+-- antes de terminar) são reenviados quando o próximo processo sobe.
+-- Eventos que esgotaram as tentativas ficam com status 'erro' e a mensagem
+-- do último erro.
+CREATE TABLE IF NOT EXISTS c_eventos_outbox (
+    id UUID PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    chave TEXT,
+    dados JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status TEXT NOT NULL DEFAULT 'pendente'
+        CHECK (status IN ('pendente', 'processado', 'erro')),
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    erro TEXT,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    processado_em TIMESTAMPTZ
+);
+
+-- Recuperação na subida: só os pendentes, do mais antigo para o mais novo
+CREATE INDEX IF NOT EXISTS idx_c_eventos_outbox_pendentes
+    ON c_eventos_outbox (criado_em)
+    WHERE status = 'pendente';
+
+-- Acesso só pela service key do backend
+ALTER TABLE c_eventos_outbox ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE c_eventos_outbox IS
+'Eventos de domínio publicados pelo backend (entrega pelo menos uma vez)';
+
+-- Limpeza periódica sugerida (eventos processados não são mais lidos):
+--   DELETE FROM c_eventos_outbox
+--   WHERE status = 'processado' AND processado_em < NOW() - INTERVAL '7 days';
+
+-- Recarregar o schema do PostgREST para expor a tabela
+NOTIFY pgrst, 'reload schema';
@@ -27,6 +27,12 @@ JWT_SECRET_KEY=fluyt-super-secret-key-development-2025
 JWT_ALGORITHM=HS256
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES=60
 
+# ===== SUPABASE AUTH (verificação dos tokens) =====
+# JWT secret do projeto (painel do Supabase > Settings > API), não o JWT_SECRET_KEY
+# Obrigatório enquanto SUPABASE_JWT_HS256=true: sem ele o backend não sobe
+SUPABASE_JWT_SECRET=
+SUPABASE_JWT_HS256=true
+
 # ===== APPLICATION SETTINGS =====
 ENVIRONMENT=development
 API_VERSION=v1
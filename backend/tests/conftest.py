@@ -0,0 +1,103 @@
+"""
+Banco em memória compartilhado pelos testes
+
+`PostgRESTFake` é um transporte HTTP que imita o PostgREST: cada teste
+herda dele e implementa `responder` para as tabelas/RPCs que usa. As
+requisições ficam registradas em `chamadas`.
+
+Uso:
+```python
+from conftest import PostgRESTFake
+
+class BancoClientes(PostgRESTFake):
+    def responder(self, request, requisicao):
+        return self.resposta([{'id': 'c1'}])
+
+fake = BancoClientes()
+repo = ClienteRepository(fake.banco())
+assert fake.rotas() == [('GET', 'c_clientes')]
+```
+"""
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+import pytest
+
+from core.database import AsyncDatabase
+
+
+class Requisicao(NamedTuple):
+    """Requisição recebida pelo PostgRESTFake"""
+    metodo: str
+    # Tabela ou rpc/<função>
+    caminho: str
+    # Query string já decodificada (filtros, select, order...)
+    params: Dict[str, str]
+    # JSON do corpo (None sem corpo)
+    corpo: Any
+
+
+class PostgRESTFake:
+    """Base dos bancos em memória: registra as requisições e delega a `responder`"""
+
+    def __init__(self):
+        self.chamadas: List[Requisicao] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        requisicao = Requisicao(
+            request.method,
+            request.url.path.split('/rest/v1/', 1)[-1],
+            dict(request.url.params),
+            json.loads(request.content) if request.content else None
+        )
+        self.chamadas.append(requisicao)
+        return self.responder(request, requisicao)
+
+    def responder(self, request: httpx.Request, requisicao: Requisicao) -> httpx.Response:
+        raise NotImplementedError
+
+    def banco(self) -> AsyncDatabase:
+        """Cliente do banco que fala com este fake (sem rede)"""
+        return AsyncDatabase(httpx.MockTransport(self), 'a.b.c')
+
+    def de(self, caminho: str, metodo: Optional[str] = None) -> List[Requisicao]:
+        """Requisições feitas a uma tabela/RPC (opcionalmente só de um método)"""
+        return [c for c in self.chamadas if c.caminho == caminho and metodo in (None, c.metodo)]
+
+    def caminhos(self) -> List[str]:
+        """Tabela/RPC de cada requisição, na ordem"""
+        return [c.caminho for c in self.chamadas]
+
+    def rotas(self) -> List[Tuple[str, str]]:
+        """(método, caminho) de cada requisição, na ordem"""
+        return [(c.metodo, c.caminho) for c in self.chamadas]
+
+    @staticmethod
+    def resposta(dados: List[Any], status: int = 200, total: Optional[int] = None) -> httpx.Response:
+        """Linhas com o content-range que o PostgREST devolve (`total` para count=exact)"""
+        return httpx.Response(
+            status,
+            content=json.dumps(dados),
+            headers={'content-range': f"0-{len(dados) - 1}/{len(dados) if total is None else total}"}
+        )
+
+    @staticmethod
+    def erro(status: int, codigo: str, mensagem: str) -> httpx.Response:
+        """Erro no formato do PostgREST (vira APIError com `code`)"""
+        return httpx.Response(status, json={'code': codigo, 'message': mensagem})
+
+
+@pytest.fixture
+def usar_banco(monkeypatch):
+    """
+    Faz `get_database()` dos módulos informados devolver o banco do fake
+
+    `usar_banco(fake, services)` -> o fake (para conferir as chamadas)
+    """
+    def usar(fake: PostgRESTFake, *modulos):
+        db = fake.banco()
+        for modulo in modulos:
+            monkeypatch.setattr(modulo, 'get_database', lambda: db)
+        return fake
+    return usar
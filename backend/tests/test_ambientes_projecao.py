@@ -0,0 +1,121 @@
+"""
+Testes da listagem de ambientes com projeção (?campos=)
+
+O banco é um transporte HTTP em memória que imita o PostgREST e guarda o
+`select` de cada requisição: com `resumo`, o materiais_json não é pedido.
+"""
+from urllib.parse import unquote
+
+import pytest
+
+from conftest import PostgRESTFake
+from core.exceptions import ValidationException
+from modules.ambientes import repository
+from modules.ambientes.service import AmbienteService
+
+MATERIAIS = {
+    'linha_detectada': 'Unique',
+    'caixa': {'cor': 'Branco Supremo', 'espessura': '18mm'},
+    'portas': {'cor': 'Carvalho Hanover'},
+    'valor_total': {'valor_venda': 'R$ 96.422,74'},
+    'paineis': {'cor': 'Grafite', 'material': 'MDF' * 200},
+}
+
+AMBIENTE = {
+    'id': '00000000-0000-4000-8000-00000000000a',
+    'nome': 'Cozinha',
+    'cliente_id': '00000000-0000-4000-8000-000000000001',
+    'valor_venda': 96422.74,
+    'data_importacao': '2025-07-01',
+    'hora_importacao': '10:00:00',
+    'origem': 'xml',
+    'created_at': '2025-07-01T10:00:00',
+    'updated_at': '2025-07-01T10:00:00',
+}
+
+
+class BancoAmbientes(PostgRESTFake):
+    """c_ambientes com o JOIN de c_ambientes_material, respondendo ao select pedido"""
+
+    def __init__(self, colunas_resumo=True):
+        super().__init__()
+        self.colunas_resumo = colunas_resumo
+
+    @property
+    def selects(self):
+        return [unquote(c.params['select']) for c in self.chamadas]
+
+    def responder(self, request, requisicao):
+        if 'resumo_linha' in unquote(requisicao.params['select']) and not self.colunas_resumo:
+            return self.erro(400, '42703', 'column c_ambientes_material_1.resumo_linha does not exist')
+
+        linha = dict(AMBIENTE)
+        linha['cliente'] = {'nome': 'Maria'}
+        linha['materiais'] = {'materiais_json': MATERIAIS}
+        linha['resumo'] = {
+            'linha': MATERIAIS['linha_detectada'],
+            'cor_caixa': MATERIAIS['caixa']['cor'],
+            'cor_porta': MATERIAIS['portas']['cor'],
+            'valor_total': MATERIAIS['valor_total']['valor_venda'],
+        }
+        return self.resposta([linha])
+
+
+@pytest.fixture(autouse=True)
+def colunas_resumo(monkeypatch):
+    monkeypatch.setattr(repository, '_colunas_resumo_disponiveis', True)
+
+
+def servico(fake):
+    return AmbienteService(fake.banco())
+
+
+@pytest.mark.asyncio
+async def test_resumo_sem_materiais_json():
+    fake = BancoAmbientes()
+
+    resultado = await servico(fake).listar_ambientes(campos=['nome', 'cliente_nome', 'resumo'])
+
+    assert 'materiais_json' not in fake.selects[0]
+    assert 'resumo_cor_porta' in fake.selects[0]
+    assert resultado.model_dump(mode='json', exclude_unset=True)['items'] == [{
+        'nome': 'Cozinha',
+        'cliente_nome': 'Maria',
+        'resumo': {
+            'linha': 'Unique', 'cor_caixa': 'Branco Supremo',
+            'cor_porta': 'Carvalho Hanover', 'valor_total': 'R$ 96.422,74'
+        },
+    }]
+
+
+@pytest.mark.asyncio
+async def test_projecao_menor_que_materiais_completos():
+    service = servico(BancoAmbientes())
+
+    completa = await service.listar_ambientes(incluir_materiais=True)
+    projetada = await service.listar_ambientes(campos=['id', 'nome', 'resumo'])
+
+    assert len(projetada.model_dump_json(exclude_unset=True)) * 4 < len(completa.model_dump_json())
+
+
+@pytest.mark.asyncio
+async def test_sem_colunas_de_resumo_le_do_materiais_json():
+    fake = BancoAmbientes(colunas_resumo=False)
+    service = servico(fake)
+
+    primeira = await service.listar_ambientes(campos=['resumo'])
+    segunda = await service.listar_ambientes(campos=['resumo'])
+
+    assert primeira.items[0].resumo.cor_caixa == 'Branco Supremo'
+    assert segunda.items[0].resumo.linha == 'Unique'
+    # Depois do 42703 a listagem não tenta mais as colunas geradas
+    assert ['resumo_linha' in select for select in fake.selects] == [True, False, False]
+    assert 'materiais_json->caixa->>cor' in fake.selects[-1]
+
+
+@pytest.mark.asyncio
+async def test_campo_desconhecido():
+    with pytest.raises(ValidationException) as erro:
+        await servico(BancoAmbientes()).listar_ambientes(campos=['nome', 'senha'])
+
+    assert 'senha' in erro.value.detail
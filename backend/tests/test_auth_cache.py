@@ -0,0 +1,81 @@
+"""
+Testes do cache de usuários autenticados (core.auth.get_current_user)
+"""
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from core import jwt_verifier
+from core.config import settings
+from core.auth import (
+    User,
+    get_current_user,
+    invalidar_usuario_cache,
+    estatisticas_usuario_cache
+)
+
+
+@pytest.fixture
+def usuario():
+    return User(
+        id="user-123",
+        email="vendedor@fluyt.com",
+        perfil="VENDEDOR",
+        loja_id="loja-123",
+        nome="Vendedor Teste",
+        ativo=True
+    )
+
+
+@pytest.fixture
+def credenciais(monkeypatch):
+    # Token como o do Supabase Auth, assinado com o JWT secret do projeto
+    monkeypatch.setattr(settings, "supabase_jwt_secret", "segredo-do-projeto")
+    monkeypatch.setattr(jwt_verifier, "_verifier", None)
+    token = jwt.encode(
+        {"sub": "user-123", "email": "vendedor@fluyt.com", "aud": "authenticated", "exp": int(time.time()) + 3600},
+        "segredo-do-projeto"
+    )
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    invalidar_usuario_cache()
+    yield
+    invalidar_usuario_cache()
+
+
+@pytest.mark.asyncio
+async def test_segunda_requisicao_nao_consulta_banco(usuario, credenciais):
+    with patch("core.auth._buscar_usuario", new=AsyncMock(return_value=usuario)) as buscar:
+        primeiro = await get_current_user(credenciais)
+        segundo = await get_current_user(credenciais)
+
+    assert buscar.await_count == 1
+    assert primeiro == segundo == usuario
+    assert estatisticas_usuario_cache()["hits"] == 1
+    assert estatisticas_usuario_cache()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidacao_por_email_forca_nova_consulta(usuario, credenciais):
+    with patch("core.auth._buscar_usuario", new=AsyncMock(return_value=usuario)) as buscar:
+        await get_current_user(credenciais)
+        assert invalidar_usuario_cache(email="VENDEDOR@fluyt.com") == 1
+        await get_current_user(credenciais)
+
+    assert buscar.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_usuario_em_cache_nao_e_alterado_pelo_handler(usuario, credenciais):
+    with patch("core.auth._buscar_usuario", new=AsyncMock(return_value=usuario)):
+        user = await get_current_user(credenciais)
+        user.perfil = "SUPER_ADMIN"
+        user = await get_current_user(credenciais)
+
+    assert user.perfil == "VENDEDOR"
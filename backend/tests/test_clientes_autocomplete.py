@@ -0,0 +1,133 @@
+"""
+Testes do autocomplete de clientes (índice de prefixos por loja)
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from core.database import AsyncDatabase
+from modules.clientes import repository
+from modules.clientes.autocomplete import AutocompleteClientes, IndicePrefixosClientes, autocomplete_clientes
+from modules.clientes.repository import ClienteRepository
+
+LOJA = 'loja-1'
+
+CLIENTES = [
+    {'id': 'c1', 'nome': 'Maria José da Silva', 'cpf_cnpj': '123.456.789-00', 'telefone': '(11) 98888-7777', 'loja_id': LOJA},
+    {'id': 'c2', 'nome': 'José', 'cpf_cnpj': '98765432100', 'telefone': None, 'loja_id': LOJA},
+    {'id': 'c3', 'nome': 'Josefina Silveira', 'cpf_cnpj': None, 'telefone': '1133334444', 'loja_id': LOJA},
+    {'id': 'c4', 'nome': 'Ana Paula', 'cpf_cnpj': '12345000011', 'telefone': None, 'loja_id': LOJA},
+]
+
+
+def ids(sugestoes):
+    return [sugestao['id'] for sugestao in sugestoes]
+
+
+def test_prefixos_de_nome_e_numeros():
+    indice = IndicePrefixosClientes(CLIENTES)
+
+    assert ids(indice.sugerir('jos')) == ['c2', 'c3', 'c1']
+    assert ids(indice.sugerir('jo si')) == ['c3', 'c1']
+    assert ids(indice.sugerir('123.4')) == ids(indice.sugerir('1234')) == ['c4', 'c1']
+    # Telefone com ou sem DDD
+    assert ids(indice.sugerir('3333-4')) == ids(indice.sugerir('(11) 3333')) == ['c3']
+    assert indice.sugerir('jose', limite=1) == [{'id': 'c2', 'nome': 'José', 'cpf_cnpj': '98765432100'}]
+    assert indice.sugerir('--') == [] and indice.sugerir('xyz') == []
+
+
+def test_atualizacao_incremental():
+    indice = IndicePrefixosClientes(CLIENTES)
+
+    indice.definir({**CLIENTES[1], 'nome': 'Josué Prado'})
+    indice.definir({'id': 'c5', 'nome': 'Joana', 'cpf_cnpj': None, 'telefone': None})
+    assert indice.remover('c3') and not indice.remover('c3')
+
+    assert ids(indice.sugerir('jos')) == ['c2', 'c1']
+    assert ids(indice.sugerir('pra')) == ['c2']
+    assert ids(indice.sugerir('jo')) == ['c5', 'c2', 'c1']
+    assert len(indice) == 4
+
+
+class RepositorioFake:
+    def __init__(self):
+        self.cargas = 0
+
+    async def listar_para_autocomplete(self, loja_id):
+        self.cargas += 1
+        await asyncio.sleep(0.01)
+        return [cliente for cliente in CLIENTES if loja_id in (None, cliente['loja_id'])]
+
+
+@pytest.mark.asyncio
+async def test_uma_carga_por_loja():
+    autocomplete = AutocompleteClientes(max_lojas=10, ttl=60)
+    repo = RepositorioFake()
+
+    resultados = await asyncio.gather(*(autocomplete.sugerir(repo, LOJA, termo) for termo in ('jo', 'an', '123')))
+    await autocomplete.sugerir(repo, LOJA, 'maria')
+    assert repo.cargas == 1
+    assert [ids(r) for r in resultados] == [['c2', 'c3', 'c1'], ['c4'], ['c4', 'c1']]
+
+    # Escritas atualizam os índices já carregados (o da loja e o geral)
+    await autocomplete.sugerir(repo, None, 'jo')
+    autocomplete.registrar({'id': 'c6', 'nome': 'Joaquim', 'loja_id': LOJA})
+    autocomplete.remover('c2', LOJA)
+    assert repo.cargas == 2
+    for loja_id in (LOJA, None):
+        assert ids(await autocomplete.sugerir(repo, loja_id, 'jo')) == ['c6', 'c3', 'c1']
+    autocomplete.registrar({'id': 'c6', 'nome': 'Joaquim', 'loja_id': LOJA, 'ativo': False})
+    assert 'c6' not in ids(await autocomplete.sugerir(repo, LOJA, 'jo'))
+
+
+
+@pytest.mark.asyncio
+async def test_escrita_durante_a_carga_nao_se_perde():
+    autocomplete = AutocompleteClientes(max_lojas=10, ttl=60)
+    repo = RepositorioFake()
+
+    # A leitura do banco não vê as escritas feitas enquanto a carga está em andamento
+    carga = asyncio.ensure_future(autocomplete.sugerir(repo, LOJA, 'jo'))
+    await asyncio.sleep(0)
+    autocomplete.registrar({'id': 'c6', 'nome': 'Joaquim', 'loja_id': LOJA})
+    autocomplete.remover('c2', LOJA)
+
+    assert ids(await carga) == ['c6', 'c3', 'c1']
+    assert ids(await autocomplete.sugerir(repo, LOJA, 'jo')) == ['c6', 'c3', 'c1']
+    assert repo.cargas == 1
+
+
+class PostgRESTFake:
+    """c_clientes em lotes (offset/limit) e insert"""
+
+    def __init__(self):
+        self.lotes = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == 'POST':
+            cliente = {**json.loads(request.content), 'id': 'novo'}
+            return httpx.Response(201, content=json.dumps([cliente]))
+        if request.url.params.get('nome'):
+            # Verificação de nome duplicado no criar
+            return httpx.Response(200, content='[]', headers={'content-range': '*/0'})
+
+        inicio, limite = int(request.url.params['offset']), int(request.url.params['limit'])
+        self.lotes.append((inicio, limite))
+        dados = CLIENTES[inicio:inicio + limite]
+        return httpx.Response(200, content=json.dumps(dados), headers={'content-range': f"{inicio}-{inicio + len(dados) - 1}/*"})
+
+
+@pytest.mark.asyncio
+async def test_repositorio_carrega_em_lotes_e_registra_o_criado(monkeypatch):
+    monkeypatch.setattr(repository, 'LOTE_AUTOCOMPLETE', 3)
+    monkeypatch.setattr(autocomplete_clientes, '_indices', AutocompleteClientes(10, ttl=60)._indices)
+    fake = PostgRESTFake()
+    repo = ClienteRepository(AsyncDatabase(httpx.MockTransport(fake), 'a.b.c'))
+
+    assert ids(await autocomplete_clientes.sugerir(repo, LOJA, 'ana')) == ['c4']
+    assert fake.lotes == [(0, 3), (3, 3)]
+
+    await repo.criar({'nome': 'Anastácia'}, LOJA)
+    assert ids(await autocomplete_clientes.sugerir(repo, LOJA, 'anas')) == ['novo']
@@ -0,0 +1,180 @@
+"""
+Testes da busca de clientes (nome sem acentos, CPF/CNPJ e telefone por dígitos)
+
+O banco é um transporte HTTP em memória que imita o PostgREST: aplica o
+filtro `or=(coluna.ilike.%termo%,...)` sobre c_clientes e registra as
+requisições. Sem `colunas_busca`/`rpc`, responde como um banco onde
+sql/criar_busca_clientes.sql ainda não foi executado.
+"""
+import asyncio
+import re
+
+import pytest
+
+from conftest import PostgRESTFake
+from modules.clientes import repository
+from modules.clientes.busca import (
+    filtro_busca, normalizar_texto, relevancia, so_digitos, termos_busca, valor_filtro
+)
+from modules.clientes.repository import ClienteRepository
+
+CLIENTES = [
+    {'id': 'c1', 'nome': 'Maria José Silva', 'cpf_cnpj': '12345678900', 'telefone': '(11) 98888-7777'},
+    {'id': 'c2', 'nome': 'José', 'cpf_cnpj': '987.654.321-00', 'telefone': None},
+    {'id': 'c3', 'nome': 'Josefina Andrade', 'cpf_cnpj': None, 'telefone': '11 3333-4444'},
+    {'id': 'c4', 'nome': 'Ana Paula', 'cpf_cnpj': '123.456.000-11', 'telefone': None},
+]
+
+
+class BancoBusca(PostgRESTFake):
+    """c_clientes com as colunas geradas de busca e a RPC buscar_clientes"""
+
+    def __init__(self, colunas_busca=True, rpc=True):
+        super().__init__()
+        self.colunas_busca = colunas_busca
+        self.rpc = rpc
+        self.linhas = [
+            {
+                **cliente, 'ativo': True,
+                'created_at': '2025-07-01T10:00:00', 'updated_at': '2025-07-01T10:00:00',
+                'busca_texto': normalizar_texto(cliente['nome']),
+                'busca_digitos': f"{so_digitos(cliente['cpf_cnpj'])} {so_digitos(cliente['telefone'])}",
+            }
+            for cliente in CLIENTES
+        ]
+
+    @property
+    def filtros(self):
+        """Filtro `or` de cada consulta a c_clientes"""
+        return [c.params.get('or', '') for c in self.de('c_clientes')]
+
+    @property
+    def rpc_params(self):
+        return [c.corpo for c in self.de('rpc/buscar_clientes')]
+
+    def responder(self, request, requisicao):
+        if requisicao.caminho == 'rpc/buscar_clientes':
+            if not self.rpc:
+                return self.erro(404, 'PGRST202', 'function not found')
+            return self.resposta(self.linhas[:1])
+
+        filtro = requisicao.params.get('or', '')
+        if 'busca_' in filtro and not self.colunas_busca:
+            return self.erro(400, '42703', 'column c_clientes.busca_texto does not exist')
+
+        condicoes = [
+            (coluna, re.sub(r'\\(.)', r'\1', entre_aspas) if entre_aspas else simples)
+            for coluna, entre_aspas, simples in re.findall(
+                r'(\w+)\.ilike\.(?:"%((?:[^"\\]|\\.)*)%"|%([^,)]*)%)', filtro
+            )
+        ]
+        linhas = [
+            linha for linha in self.linhas
+            if not condicoes or any(termo.lower() in (linha[coluna] or '').lower() for coluna, termo in condicoes)
+        ]
+        return self.resposta(linhas)
+
+
+@pytest.fixture(autouse=True)
+def recursos_de_busca(monkeypatch):
+    monkeypatch.setattr(repository, '_colunas_busca_disponiveis', True)
+    monkeypatch.setattr(repository, '_rpc_busca_disponivel', True)
+
+
+def repositorio(fake):
+    return ClienteRepository(fake.banco())
+
+
+def test_normalizacao():
+    assert termos_busca("José D'Ávila") == ('jose d avila', '')
+    assert termos_busca('123.456') == ('123 456', '123456')
+    assert termos_busca('(11) 9888') == ('11 9888', '119888')
+    assert filtro_busca('123.456').endswith(',busca_digitos.ilike.%123456%')
+    assert filtro_busca('123456').endswith(',busca_digitos.ilike.%123456%')
+    assert filtro_busca(' .- ') is None
+
+
+@pytest.mark.asyncio
+async def test_listar_pelas_colunas_normalizadas():
+    fake = BancoBusca()
+
+    por_pontuacao = await repositorio(fake).listar(None, {'busca': '123.456'})
+    por_digitos = await repositorio(fake).listar(None, {'busca': '123456'})
+    sem_acento = await repositorio(fake).listar(None, {'busca': 'JOSE'})
+
+    assert [c['id'] for c in por_pontuacao['items']] == [c['id'] for c in por_digitos['items']] == ['c1', 'c4']
+    assert [c['id'] for c in sem_acento['items']] == ['c1', 'c2', 'c3']
+    assert 'nome.ilike' not in fake.filtros[0]
+
+
+@pytest.mark.asyncio
+async def test_sem_colunas_volta_ao_ilike_antigo():
+    fake = BancoBusca(colunas_busca=False)
+    repo = repositorio(fake)
+
+    await repo.listar(None, {'busca': 'Ana'})
+    total = await repo.contar(None, {'busca': 'Ana'})
+
+    assert total == 1
+    # Depois do 42703 a busca não tenta mais as colunas geradas
+    assert ['busca_texto' in filtro for filtro in fake.filtros] == [True, False, False]
+    assert fake.filtros[-1].startswith('(nome.ilike."%Ana%"')
+
+
+class BancoBuscaLento(BancoBusca):
+    """Demora a responder: as requisições simultâneas chegam antes do primeiro erro"""
+
+    async def __call__(self, request):
+        await asyncio.sleep(0.01)
+        return super().__call__(request)
+
+
+@pytest.mark.asyncio
+async def test_sem_colunas_em_requisicoes_simultaneas(monkeypatch):
+    fake = BancoBuscaLento(colunas_busca=False, rpc=False)
+    repo = repositorio(fake)
+
+    # Todas falham com 42703 antes de alguma desligar as colunas: todas usam o ILIKE antigo
+    listagens = await asyncio.gather(*(repo.listar(None, {'busca': 'Ana'}) for _ in range(3)))
+    monkeypatch.setattr(repository, '_colunas_busca_disponiveis', True)
+    sugestoes = await asyncio.gather(*(repo.buscar('Ana', None) for _ in range(2)))
+
+    assert [[c['id'] for c in listagem['items']] for listagem in listagens] == [['c4']] * 3
+    assert [[c['id'] for c in clientes] for clientes in sugestoes] == [['c4']] * 2
+
+
+@pytest.mark.asyncio
+async def test_buscar_pela_rpc_com_termos_normalizados():
+    fake = BancoBusca()
+
+    clientes = await repositorio(fake).buscar('José ', 'loja-1', limite=5)
+
+    assert [c['id'] for c in clientes] == ['c1']
+    assert fake.rpc_params == [{'p_texto': 'jose', 'p_digitos': '', 'p_loja_id': 'loja-1', 'p_limite': 5}]
+    assert await repositorio(fake).buscar('--', None) == []
+
+
+@pytest.mark.asyncio
+async def test_buscar_sem_rpc_ordena_por_relevancia():
+    fake = BancoBusca(rpc=False)
+    repo = repositorio(fake)
+
+    por_nome = await repo.buscar('jose', None)
+    por_telefone = await repo.buscar('3333-4444', None)
+
+    # Igual > começa pelo termo > palavra começa pelo termo
+    assert [c['id'] for c in por_nome] == ['c2', 'c3', 'c1']
+    assert [c['id'] for c in por_telefone] == ['c3']
+    assert relevancia(CLIENTES[0], '', '12345678900') > relevancia(CLIENTES[3], '', '123')
+
+
+@pytest.mark.asyncio
+async def test_buscar_sem_colunas_aceita_parenteses_e_aspas():
+    fake = BancoBusca(colunas_busca=False, rpc=False)
+
+    clientes = await repositorio(fake).buscar('(11) 9888', None)
+
+    # Entre aspas, parênteses e vírgulas não quebram o `or=(...)`
+    assert [c['id'] for c in clientes] == ['c1']
+    assert fake.filtros[-1].startswith('(nome.ilike."%(11) 9888%",')
+    assert valor_filtro('a"b\\c') == '"a\\"b\\\\c"'
@@ -0,0 +1,156 @@
+"""
+Testes da criação/atualização de clientes em uma ida ao banco (RPCs
+criar_cliente/atualizar_cliente) e do caminho em etapas sem as RPCs
+"""
+import httpx
+import pytest
+
+from conftest import PostgRESTFake
+from core.auth import User
+from core.exceptions import ConflictException, NotFoundException
+from modules.clientes import repository, services
+from modules.clientes.schemas import ClienteCreate, ClienteUpdate
+from modules.clientes.services import ClienteService
+from modules.status_orcamento.catalogo import catalogo_status
+
+LOJA = '00000000-0000-4000-8000-0000000000aa'
+STATUS = '00000000-0000-4000-8000-0000000000bb'
+USUARIO = User(id='u1', email='vendedor@loja.com', perfil='ADMIN', loja_id=LOJA)
+
+
+class BancoClientes(PostgRESTFake):
+    """c_clientes, c_status_orcamento e as RPCs de escrita"""
+
+    def __init__(self, rpc=True, coluna_transicao=True):
+        super().__init__()
+        self.rpc = rpc
+        self.coluna_transicao = coluna_transicao
+        self.cliente = None
+
+    def responder(self, request, requisicao):
+        caminho, corpo = requisicao.caminho, requisicao.corpo
+
+        if caminho.startswith('rpc/'):
+            if not self.rpc:
+                return self.erro(404, 'PGRST202', 'function not found')
+            if corpo.get('p_dados', {}).get('nome') == 'Duplicado':
+                return self.erro(409, '23505', 'duplicate key value')
+            if caminho == 'rpc/atualizar_cliente':
+                if self.cliente is None:
+                    return httpx.Response(200, content='null')
+                self.cliente.update(corpo['p_dados'])
+            else:
+                self._inserir({**corpo['p_dados'], 'loja_id': corpo['p_loja_id'], 'status_id': STATUS})
+            return httpx.Response(200, json={
+                **self.cliente,
+                'vendedor': {'id': 'v1', 'nome': 'Maria Vendedora'},
+                'procedencia': {'id': 'p1', 'nome': 'Indicação'},
+            })
+
+        if caminho == 'c_status_orcamento':
+            return self.resposta([{
+                'id': STATUS, 'nome': 'Cliente Cadastrado', 'ordem': 1, 'cor': '#000000', 'ativo': True,
+                'created_at': '2025-07-01T10:00:00', 'updated_at': '2025-07-01T10:00:00'
+            }])
+        if requisicao.metodo == 'POST':
+            return self.resposta([self._inserir(corpo)], 201)
+        if requisicao.metodo == 'PATCH':
+            if 'status_transicao_em' in corpo and not self.coluna_transicao:
+                return self.erro(
+                    400, 'PGRST204', "Could not find the 'status_transicao_em' column of 'c_clientes' in the schema cache"
+                )
+            self.cliente.update(corpo)
+            return self.resposta([self.cliente])
+        if 'id' in requisicao.params and self.cliente:
+            return self.resposta([self.cliente])
+        # Buscas de nome / CPF duplicado
+        return self.resposta([])
+
+    def _inserir(self, dados):
+        self.cliente = {
+            'id': '00000000-0000-4000-8000-000000000001', 'status_id': None,
+            'created_at': '2025-07-01T10:00:00', 'updated_at': '2025-07-01T10:00:00', **dados
+        }
+        return self.cliente
+
+
+@pytest.fixture
+def banco(monkeypatch, usar_banco):
+    monkeypatch.setattr(repository, '_rpc_escrita_disponivel', True)
+    catalogo_status.invalidar()
+    return lambda fake: usar_banco(fake, services)
+
+
+@pytest.mark.asyncio
+async def test_criar_em_uma_ida_ao_banco(banco):
+    fake = banco(BancoClientes())
+
+    cliente = await ClienteService().criar_cliente(ClienteCreate(nome='João', telefone='(11) 99999-0000'), USUARIO)
+
+    assert fake.rotas() == [('POST', 'rpc/criar_cliente')]
+    assert (cliente.status_id, cliente.vendedor_nome, cliente.procedencia) == (STATUS, 'Maria Vendedora', 'Indicação')
+    assert cliente.loja_id == LOJA and cliente.telefone == '11999990000'
+
+
+@pytest.mark.asyncio
+async def test_atualizar_em_uma_ida_ao_banco(banco):
+    fake = banco(BancoClientes())
+    service = ClienteService()
+    criado = await service.criar_cliente(ClienteCreate(nome='João'), USUARIO)
+    fake.chamadas.clear()
+
+    atualizado = await service.atualizar_cliente(criado.id, ClienteUpdate(cidade='Curitiba'), USUARIO)
+
+    assert fake.rotas() == [('POST', 'rpc/atualizar_cliente')]
+    assert (atualizado.nome, atualizado.cidade, atualizado.vendedor_nome) == ('João', 'Curitiba', 'Maria Vendedora')
+
+
+@pytest.mark.asyncio
+async def test_nome_duplicado_e_cliente_inexistente(banco):
+    banco(BancoClientes())
+    service = ClienteService()
+
+    with pytest.raises(ConflictException):
+        await service.criar_cliente(ClienteCreate(nome='Duplicado'), USUARIO)
+    with pytest.raises(NotFoundException):
+        await service.atualizar_cliente('nao-existe', ClienteUpdate(cidade='Curitiba'), USUARIO)
+
+
+@pytest.mark.asyncio
+async def test_sem_rpc_grava_em_etapas(banco):
+    fake = banco(BancoClientes(rpc=False))
+    service = ClienteService()
+
+    cliente = await service.criar_cliente(ClienteCreate(nome='João'), USUARIO)
+    await service.criar_cliente(ClienteCreate(nome='Ana'), USUARIO)
+
+    assert cliente.status_id == STATUS
+    # Depois do PGRST202 as RPCs não são mais tentadas
+    assert [c for c in fake.rotas() if c[1].startswith('rpc/')] == [('POST', 'rpc/criar_cliente')]
+    assert ('POST', 'c_clientes') in fake.rotas()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('coluna_transicao', [True, False])
+async def test_mudanca_manual_de_status_grava_o_instante(banco, monkeypatch, coluna_transicao):
+    monkeypatch.setattr(repository, '_coluna_transicao_disponivel', True)
+    fake = banco(BancoClientes(rpc=False, coluna_transicao=coluna_transicao))
+    repo = repository.ClienteRepository(fake.banco())
+    cliente_id = fake._inserir({'nome': 'João', 'loja_id': LOJA, 'status_id': STATUS})['id']
+    outro_status = '00000000-0000-4000-8000-0000000000b2'
+
+    await repo.atualizar(cliente_id, {'cidade': 'Curitiba'}, LOJA)
+    await repo.atualizar(cliente_id, {'status_id': outro_status}, LOJA)
+
+    # Só a mudança de status grava status_transicao_em: transições automáticas
+    # mais antigas que ela não a desfazem (RPC aplicar_transicoes_status)
+    enviados = [c.corpo for c in fake.de('c_clientes', 'PATCH')]
+    assert 'status_transicao_em' not in enviados[0]
+    assert 'status_transicao_em' in enviados[1]
+    assert fake.cliente['status_id'] == outro_status
+    if coluna_transicao:
+        assert len(enviados) == 2
+    else:
+        # Sem a coluna (sql/criar_rpc_transicoes_status.sql não executado): grava sem ela
+        assert enviados[2] == {'status_id': outro_status}
+        assert repository._coluna_transicao_disponivel is False
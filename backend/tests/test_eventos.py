@@ -0,0 +1,316 @@
+"""
+Testes do barramento de eventos de domínio (lotes, coalescência, novas
+tentativas, outbox) e das transições de status do cliente fora da requisição
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from conftest import PostgRESTFake
+from core.auth import User
+from core.database import get_admin_database, get_database
+from core.eventos import BarramentoEventos, Evento, OutboxBanco, OutboxMemoria, barramento_eventos
+from modules.clientes import repository as clientes_repository
+from modules.clientes import status_eventos
+from modules.clientes.status_eventos import EVENTO_TRANSICAO_STATUS, publicar_transicao_status
+from modules.status_orcamento.catalogo import catalogo_status
+
+LOJA = '00000000-0000-4000-8000-0000000000aa'
+USUARIO = User(id='u1', email='vendedor@loja.com', perfil='ADMIN', loja_id=LOJA)
+
+
+def barramento(outbox=None, **opcoes):
+    return BarramentoEventos(
+        outbox or OutboxMemoria(),
+        janela=opcoes.pop('janela', 0.02), lote_max=opcoes.pop('lote_max', 100),
+        tentativas=opcoes.pop('tentativas', 3), fila_max=100, **opcoes
+    )
+
+
+class BancoEventos(PostgRESTFake):
+    """c_eventos_outbox, c_status_orcamento, c_clientes e a RPC de transições"""
+
+    def __init__(self, outbox=True, pendentes=(), rpc=True):
+        super().__init__()
+        self.outbox = outbox
+        self.pendentes = list(pendentes)
+        self.rpc = rpc
+
+    def responder(self, request, requisicao):
+        if requisicao.caminho == 'c_eventos_outbox':
+            if not self.outbox:
+                return self.erro(404, 'PGRST205', 'table not found')
+            if requisicao.metodo == 'GET':
+                return self.resposta(self.pendentes)
+            return httpx.Response(201 if requisicao.metodo == 'POST' else 204)
+        if requisicao.caminho == 'rpc/aplicar_transicoes_status':
+            if not self.rpc:
+                return self.erro(404, 'PGRST202', 'function not found')
+            return httpx.Response(200, json=len(requisicao.corpo['p_transicoes']))
+        if requisicao.caminho == 'c_status_orcamento':
+            return self.resposta([
+                {'id': f'00000000-0000-4000-8000-00000000000{ordem}', 'nome': f'Status {ordem}', 'ordem': ordem,
+                 'cor': '#000000', 'ativo': True,
+                 'created_at': '2025-07-01T10:00:00', 'updated_at': '2025-07-01T10:00:00'}
+                for ordem in (1, 2, 3, 4)
+            ])
+        # PATCH c_clientes
+        ids = requisicao.params['id'].removeprefix('in.(').removesuffix(')').split(',')
+        return self.resposta([{'id': cliente_id, **requisicao.corpo} for cliente_id in ids])
+
+
+@pytest.mark.asyncio
+async def test_lote_coalesce_por_chave():
+    lotes = []
+
+    async def handler(eventos):
+        lotes.append([(e.chave, e.dados['ordem']) for e in eventos])
+
+    bus = barramento()
+    bus.assinar('teste', handler)
+    for chave, ordem in [('a', 2), ('b', 3), ('a', 3), ('a', 4)]:
+        await bus.publicar('teste', {'ordem': ordem}, chave=chave)
+    await bus.publicar('teste', {'ordem': 1})
+    await bus.publicar('teste', {'ordem': 1})
+    await bus.drenar()
+
+    # Um lote só; 'a' entregue uma vez com a última transição; sem chave não coalesce
+    assert lotes == [[('b', 3), ('a', 4), (None, 1), (None, 1)]]
+    assert bus.estatisticas()['coalescidos'] == 2
+    assert bus.estatisticas()['processados'] == 6
+    await bus.encerrar()
+
+
+@pytest.mark.asyncio
+async def test_falha_tenta_de_novo_e_desiste():
+    chamadas = []
+
+    async def instavel(eventos):
+        chamadas.append(len(eventos))
+        if len(chamadas) == 1:
+            raise RuntimeError('banco fora')
+
+    async def sempre_falha(eventos):
+        raise RuntimeError('sem conserto')
+
+    bus = barramento(janela=0.001, tentativas=2)
+    bus.assinar('instavel', instavel)
+    bus.assinar('quebrado', sempre_falha)
+    await bus.publicar('instavel', {}, chave='x')
+    evento = await bus.publicar('quebrado', {}, chave='y')
+    await bus.drenar()
+
+    assert chamadas == [1, 1]
+    assert evento.tentativas == 2
+    assert bus.estatisticas()['falhas'] == 3 and bus.estatisticas()['processados'] == 1
+    await bus.encerrar()
+
+    with pytest.raises(ValueError):
+        await bus.publicar('desconhecido', {})
+
+
+@pytest.mark.asyncio
+async def test_outbox_grava_conclui_e_recupera():
+    pendente = {
+        'id': '00000000-0000-4000-8000-0000000000e1', 'tipo': 'teste', 'chave': 'velho',
+        'dados': {'ordem': 9}, 'tentativas': 1, 'criado_em': '2025-07-01T10:00:00+00:00'
+    }
+    fake = BancoEventos(pendentes=[pendente])
+    db = fake.banco()
+    recebidos = []
+
+    async def handler(eventos):
+        recebidos.extend(e.chave for e in eventos)
+
+    bus = barramento(OutboxBanco(lambda: db))
+    bus.assinar('teste', handler)
+    await bus.publicar('teste', {'ordem': 1}, chave='novo')
+
+    # Gravado antes de publicar retornar, antes de qualquer entrega
+    gravados = fake.de('c_eventos_outbox', 'POST')
+    assert [linha['chave'] for linha in gravados[0].corpo] == ['novo'] and recebidos == []
+    await bus.drenar()
+
+    # O pendente recuperado não é gravado de novo; os dois são concluídos
+    assert recebidos == ['velho', 'novo']
+    assert len(fake.de('c_eventos_outbox', 'POST')) == 1
+    concluidos = [c.params['id'] for c in fake.de('c_eventos_outbox', 'PATCH')]
+    assert len(concluidos) == 2 and pendente['id'] in concluidos[0]
+    await bus.encerrar()
+
+
+@pytest.mark.asyncio
+async def test_sem_tabela_outbox_entrega_em_memoria():
+    fake = BancoEventos(outbox=False)
+    db = fake.banco()
+    recebidos = []
+
+    async def handler(eventos):
+        recebidos.extend(e.chave for e in eventos)
+
+    bus = barramento(OutboxBanco(lambda: db))
+    bus.assinar('teste', handler)
+    await bus.publicar('teste', {}, chave='a')
+    await bus.drenar()
+    await bus.publicar('teste', {}, chave='b')
+    await bus.drenar()
+
+    assert recebidos == ['a', 'b']
+    # Depois do PGRST205 o outbox não vai mais ao banco
+    assert len(fake.chamadas) == 1
+    await bus.encerrar()
+
+
+def test_outbox_usa_o_cliente_da_service_key():
+    # c_eventos_outbox tem RLS sem políticas: com a anon key nada seria gravado
+    outbox = barramento_eventos.outbox
+    assert isinstance(outbox, OutboxBanco)
+    assert outbox._obter_db() is get_admin_database()
+    assert outbox._obter_db() is not get_database()
+
+
+@pytest.mark.asyncio
+async def test_reenvio_nao_desfaz_evento_mais_novo():
+    aplicado = {}
+    falhou = asyncio.Event()
+
+    async def handler(eventos):
+        if not falhou.is_set():
+            falhou.set()
+            raise RuntimeError('banco fora')
+        for evento in eventos:
+            aplicado[evento.chave] = evento.dados['ordem']
+
+    bus = barramento(janela=0.01)
+    bus.assinar('teste', handler)
+    await bus.publicar('teste', {'ordem': 3}, chave='x')
+    await falhou.wait()
+    # Publicado enquanto o 3 espera o reenvio
+    await bus.publicar('teste', {'ordem': 4}, chave='x')
+    await bus.drenar()
+
+    assert aplicado == {'x': 4}
+    assert bus.estatisticas()['processados'] == 2 and bus.estatisticas()['coalescidos'] == 1
+    assert bus._mais_recente == {} and bus._em_andamento == {}
+    await bus.encerrar()
+
+
+@pytest.mark.asyncio
+async def test_pendente_recuperado_superado_nao_e_entregue():
+    antigo = Evento(tipo='teste', chave='x', dados={'ordem': 3},
+                    criado_em=datetime.now(timezone.utc) - timedelta(minutes=5))
+
+    class OutboxComPendente(OutboxMemoria):
+        async def pendentes(self, anteriores_a, limite):
+            return [antigo]
+
+    recebidos = []
+
+    async def handler(eventos):
+        recebidos.extend(e.dados['ordem'] for e in eventos)
+
+    bus = barramento(OutboxComPendente())
+    bus.assinar('teste', handler)
+    # Publicado antes do despachante recuperar o pendente do processo anterior
+    await bus.publicar('teste', {'ordem': 4}, chave='x')
+    await bus.drenar()
+
+    assert recebidos == [4]
+    await bus.encerrar()
+
+
+@pytest.mark.asyncio
+async def test_varredura_periodica_recupera_pendente_recente():
+    # Pendente gravado pelo processo anterior, que caiu logo antes desta subida
+    orfao = Evento(tipo='teste', chave='x', dados={'ordem': 3})
+
+    class OutboxComOrfao(OutboxMemoria):
+        def __init__(self):
+            self.linhas = {orfao.id: orfao}
+
+        async def concluir(self, evento_ids):
+            for evento_id in evento_ids:
+                self.linhas.pop(evento_id, None)
+
+        async def pendentes(self, anteriores_a, limite):
+            return [evento.model_copy() for evento in self.linhas.values() if evento.criado_em < anteriores_a]
+
+    recebidos = []
+    entregue = asyncio.Event()
+
+    async def handler(eventos):
+        recebidos.extend(e.dados['ordem'] for e in eventos)
+        entregue.set()
+
+    outbox = OutboxComOrfao()
+    bus = barramento(outbox, recuperar_apos=0.05)
+    bus.assinar('teste', handler)
+    bus.iniciar()
+
+    # Na subida ainda é recente demais; a varredura seguinte o entrega uma vez só
+    await asyncio.sleep(0)
+    assert recebidos == []
+    await asyncio.wait_for(entregue.wait(), 1)
+    await asyncio.sleep(0.12)
+    assert recebidos == [3] and outbox.linhas == {}
+    await bus.encerrar()
+
+
+@pytest.fixture
+def transicoes(monkeypatch, usar_banco):
+    def preparar(**opcoes):
+        fake = usar_banco(BancoEventos(**opcoes), status_eventos)
+        monkeypatch.setattr(clientes_repository, '_rpc_transicoes_disponivel', True)
+        monkeypatch.setattr(barramento_eventos, 'outbox', OutboxMemoria())
+        return fake
+
+    catalogo_status.invalidar()
+    yield preparar
+    catalogo_status.invalidar()
+
+
+@pytest.mark.asyncio
+async def test_transicoes_de_status_em_lote(transicoes):
+    fake = transicoes()
+
+    publicados = {}
+    for cliente_id, ordem in [('c1', 2), ('c2', 3), ('c1', 3), ('c3', 4), ('c3', 7)]:
+        publicados[cliente_id] = await publicar_transicao_status(cliente_id, ordem, USUARIO)
+    # Publicar só grava no outbox (em memória aqui): nada em c_clientes ainda
+    assert fake.chamadas == []
+    await barramento_eventos.drenar()
+
+    # Uma chamada para o lote; c3 termina numa ordem inexistente e é mantido.
+    # transicao_em é o criado_em do evento: a RPC ignora transições mais antigas
+    assert [c.corpo for c in fake.de('rpc/aplicar_transicoes_status', 'POST')] == [{'p_transicoes': [
+        {'cliente_id': 'c2', 'status_id': '00000000-0000-4000-8000-000000000003', 'loja_id': LOJA,
+         'transicao_em': publicados['c2'].criado_em.isoformat()},
+        {'cliente_id': 'c1', 'status_id': '00000000-0000-4000-8000-000000000003', 'loja_id': LOJA,
+         'transicao_em': publicados['c1'].criado_em.isoformat()},
+    ]}]
+    assert fake.de('c_clientes', 'PATCH') == []
+    assert len(fake.de('c_status_orcamento', 'GET')) == 1
+
+    sem_loja = User(id='u2', email='admin@fluyt.com', perfil='SUPER_ADMIN', loja_id=None)
+    assert await publicar_transicao_status('c4', 2, sem_loja) is None
+    assert EVENTO_TRANSICAO_STATUS in barramento_eventos._handlers
+
+    await barramento_eventos.encerrar()
+
+
+@pytest.mark.asyncio
+async def test_transicoes_sem_rpc_agrupam_por_status(transicoes):
+    fake = transicoes(rpc=False)
+
+    for cliente_id, ordem in [('c1', 2), ('c2', 3), ('c1', 3)]:
+        await publicar_transicao_status(cliente_id, ordem, USUARIO)
+    await barramento_eventos.drenar()
+
+    # c1 e c2 no mesmo UPDATE
+    atualizacoes = [(c.params['id'], c.params['loja_id'], c.corpo['status_id']) for c in fake.de('c_clientes', 'PATCH')]
+    assert atualizacoes == [('in.(c2,c1)', f'eq.{LOJA}', '00000000-0000-4000-8000-000000000003')]
+    assert clientes_repository._rpc_transicoes_disponivel is False
+
+    await barramento_eventos.encerrar()
@@ -0,0 +1,239 @@
+"""
+Testes do índice de passada única do extrator XML do Promob
+
+O índice (extractors/indice_promob.py) substitui as consultas XPath `//`;
+as respostas precisam ser as mesmas das consultas antigas, inclusive nos
+casos de borda (coleções aninhadas, campos fora da coleção, valores vazios).
+"""
+import sys
+from pathlib import Path
+
+from lxml import etree
+import pytest
+
+from modules.ambientes.extrator_xml.app.extractors import XMLExtractor
+from modules.ambientes.extrator_xml.app.extractors.indice_promob import IndicePromob
+from modules.ambientes.extrator_xml.app.utils import detectar_linha, extrair_multiplos_valores
+from modules.ambientes.extrator_xml.app.utils.helpers import (
+    detectar_espessura_brilhart,
+    extrair_espessura_paineis_sublime,
+)
+
+# Gerador do corpus dos benchmarks (scripts/benchmarks/gerador_xml_promob.py)
+sys.path.append(str(Path(__file__).parent.parent / "scripts" / "benchmarks"))
+from gerador_xml_promob import gerar_xml_promob  # noqa: E402
+
+# Sublime com coleção aninhada, campo fora da coleção, "Coleção Unique " só em
+# um elemento qualquer e totais inválidos/ausentes na raiz
+XML_SUBLIME = r"""<?xml version="1.0" encoding="UTF-8"?>
+<LISTING>
+  <!-- comentário -->
+  <TOTALPRICES><MARGINS><ORDER VALUE="abc"/><BUDGET/></MARGINS></TOTALPRICES>
+  <AMBIENTS>
+    <AMBIENT DESCRIPTION="  Projeto - Sala  ">
+      <TOTALPRICES><MARGINS><ORDER VALUE="1500.5"/><BUDGET VALUE="3000"/></MARGINS></TOTALPRICES>
+      <ITEM>
+        <MODELCATEGORYINFORMATION DESCRIPTION="Coleção Sublime">
+          <MODELINFORMATION DESCRIPTION="Cor Corpo">
+            <MODELTYPEINFORMATIONS>
+              <MODELTYPEINFORMATION DESCRIPTION=""/>
+              <MODELTYPEINFORMATION/>
+              <!-- x -->
+              <MODELTYPEINFORMATION DESCRIPTION="MDF\Preto"/>
+            </MODELTYPEINFORMATIONS>
+          </MODELINFORMATION>
+          <X><MODELINFORMATION DESCRIPTION="Painéis">
+            <MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="BP\Nogal"/></MODELTYPEINFORMATIONS>
+            <A><B><DESCRI REFERENCE="18mm"/><DESCRI REFERENCE="x18mm"/></B></A>
+            <MODELINFORMATION DESCRIPTION="Painéis"><DESCRI REFERENCE="25mm"/><DESCRI REFERENCE="18mm"/></MODELINFORMATION>
+          </MODELINFORMATION></X>
+          <MODELCATEGORYINFORMATION DESCRIPTION="Coleção Sublime">
+            <MODELINFORMATION DESCRIPTION="Tipo Corrediças"><MODELTYPEINFORMATIONS>
+              <MODELTYPEINFORMATION DESCRIPTION="Standard s/ amortecimento"/>
+              <MODELTYPEINFORMATION DESCRIPTION="c/ "/>
+            </MODELTYPEINFORMATIONS></MODELINFORMATION>
+          </MODELCATEGORYINFORMATION>
+          <MODELINFORMATION DESCRIPTION="Tipo Dobradiças"><MODELTYPEINFORMATIONS>
+            <MODELTYPEINFORMATION DESCRIPTION="Curva"/></MODELTYPEINFORMATIONS>
+            <MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Reta"/></MODELTYPEINFORMATIONS>
+          </MODELINFORMATION>
+        </MODELCATEGORYINFORMATION>
+        <MODELINFORMATION DESCRIPTION="Cor Frontal"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="fora"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+        <MODELCATEGORYINFORMATION DESCRIPTION="Coleção Unique">
+          <MODELINFORMATION DESCRIPTION="5 - Puxadores"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="sem espaço"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+        </MODELCATEGORYINFORMATION>
+        <Z DESCRIPTION="Coleção Unique "><MODELCATEGORYINFORMATION DESCRIPTION="Outra"><MODELINFORMATION DESCRIPTION="5 - Puxadores"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="x\X"/></MODELTYPEINFORMATIONS></MODELINFORMATION></MODELCATEGORYINFORMATION></Z>
+      </ITEM>
+    </AMBIENT>
+    <AMBIENT DESCRIPTION="Segundo"/>
+  </AMBIENTS>
+  <TOTALPRICES><MARGINS><ORDER VALUE="99"/><BUDGET VALUE="77"/></MARGINS></TOTALPRICES>
+</LISTING>
+"""
+
+# Unique em duas coleções, fallback de MARCA, Portábille e Brilhart Color
+XML_UNIQUE = r"""<?xml version="1.0" encoding="UTF-8"?>
+<ROOT>
+<AMBIENT DESCRIPTION="Projeto - Quarto"/>
+<CATEGORY DESCRIPTION="Corpo Sublime"><CATEGORY DESCRIPTION="Corpo"/></CATEGORY>
+<MODELCATEGORYINFORMATION DESCRIPTION="Coleção Unique ">
+  <MODELINFORMATION DESCRIPTION="7.1 - Corrediça"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Tandembox"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <MODELINFORMATION DESCRIPTION="7.1.1 - Gaveta"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="c/ Gaveta/Alto Drawer"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <MODELINFORMATION DESCRIPTION="7.2 - Tipo Corrediça"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Sem amortecimento"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <MODELINFORMATION DESCRIPTION="7 - Dobradiça"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Blum"/><MODELTYPEINFORMATION DESCRIPTION="Dobradiça\Curva"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <MODELINFORMATION DESCRIPTION="7.2.1 - Tipo Dobradiça"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Dobradiça\Curva"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <MODELINFORMATION DESCRIPTION="5 - Puxadores"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Sem puxador\Sem Puxador"/><MODELTYPEINFORMATION DESCRIPTION="Perfil\Gola"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <REF><MARCA REFERENCE="."/><MARCA REFERENCE=".Hettich"/></REF>
+</MODELCATEGORYINFORMATION>
+<MODELCATEGORYINFORMATION DESCRIPTION="Coleção Unique "><MARCA REFERENCE="Grass"/>
+  <MODELINFORMATION DESCRIPTION="4 - Cor Corpo"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="MDF\Branco"/><MODELTYPEINFORMATION DESCRIPTION="Semcor"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+</MODELCATEGORYINFORMATION>
+<X DESCRIPTION="Coleção Sublime"/>
+<MODELCATEGORYINFORMATION DESCRIPTION="Brilhart Color" CODE="BC 120mm">
+  <Q A="abc 25mm"><MODELINFORMATION DESCRIPTION="Acab Porta"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Fosco (2 Face)&gt;Alba"/><MODELTYPEINFORMATION DESCRIPTION="Liso &amp;amp; Alto"/></MODELTYPEINFORMATIONS></MODELINFORMATION></Q>
+</MODELCATEGORYINFORMATION>
+<MODELCATEGORYINFORMATION DESCRIPTION="Portábille">
+  <MODELINFORMATION DESCRIPTION="Acab Vidros"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Importados\Argentato"/><MODELTYPEINFORMATION DESCRIPTION="Fumê"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <MODELINFORMATION DESCRIPTION="Painéis"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Vidro 6mm"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+  <MODELINFORMATION DESCRIPTION="Dobradiças"><MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Sem Dobradiças"/></MODELTYPEINFORMATIONS></MODELINFORMATION>
+</MODELCATEGORYINFORMATION>
+<TOTALPRICES><MARGINS><ORDER VALUE="0"/><BUDGET VALUE="12.5"/></MARGINS></TOTALPRICES>
+</ROOT>
+"""
+
+COLECOES = ["Coleção Unique ", "Coleção Sublime", "Portábille", "Brilhart Color", "Outra"]
+CAMPOS = [
+    "Cor Corpo", "Painéis", "Tipo Corrediças", "Tipo Dobradiças", "Cor Frontal", "5 - Puxadores",
+    "7.1 - Corrediça", "7 - Dobradiça", "4 - Cor Corpo", "Acab Porta", "Acab Vidros", "Inexistente",
+]
+
+
+def xpath_colecao(colecao):
+    return f"//MODELCATEGORYINFORMATION[@DESCRIPTION='{colecao}']"
+
+
+@pytest.mark.parametrize("xml", [XML_SUBLIME, XML_UNIQUE])
+def test_indice_responde_como_as_consultas_xpath(xml):
+    tree = etree.fromstring(xml.encode("utf-8"))
+    indice = IndicePromob(tree)
+
+    for colecao in COLECOES:
+        base = xpath_colecao(colecao)
+        assert indice.tem_colecao(colecao) == bool(tree.xpath(base))
+        assert indice.marcas(colecao) == tree.xpath(f"{base}//MARCA/@REFERENCE")
+        for campo in CAMPOS:
+            assert indice.valores(colecao, campo) == extrair_multiplos_valores(tree, base, campo)
+            assert indice.referencias_descri(colecao, campo) == tree.xpath(
+                f"{base}//MODELINFORMATION[@DESCRIPTION='{campo}']//DESCRI/@REFERENCE"
+            )
+
+    for tag in ("ORDER", "BUDGET"):
+        esperado = [
+            valores[0] for valores in (
+                tree.xpath(f"//LISTING/TOTALPRICES/MARGINS/{tag}/@VALUE"),
+                tree.xpath(f"//LISTING/AMBIENTS/AMBIENT/TOTALPRICES/MARGINS/{tag}/@VALUE"),
+                tree.xpath(f"//TOTALPRICES/MARGINS/{tag}/@VALUE"),
+            ) if valores
+        ]
+        assert indice.valores_totais(tag) == esperado
+
+    assert indice.ambiente is tree.find(".//AMBIENT")
+
+
+@pytest.mark.parametrize("xml", [XML_SUBLIME, XML_UNIQUE])
+def test_registro_xpath_responde_como_as_consultas_montadas(xml):
+    tree = etree.fromstring(xml.encode("utf-8"))
+
+    for colecao in COLECOES:
+        base = xpath_colecao(colecao)
+        for campo in CAMPOS:
+            montada = tree.xpath(
+                f"{base}//MODELINFORMATION[@DESCRIPTION='{campo}']/MODELTYPEINFORMATIONS/MODELTYPEINFORMATION/@DESCRIPTION"
+            )
+            assert extrair_multiplos_valores(tree, base, campo) == list(dict.fromkeys(montada))
+
+    # Base fora do padrão de coleção: compilada uma vez, campo como variável
+    assert extrair_multiplos_valores(tree, "//ITEM", "Cor Corpo") == list(dict.fromkeys(tree.xpath(
+        "//ITEM//MODELINFORMATION[@DESCRIPTION='Cor Corpo']/MODELTYPEINFORMATIONS/MODELTYPEINFORMATION/@DESCRIPTION"
+    )))
+    assert extrair_espessura_paineis_sublime(tree, xpath_colecao("Coleção Sublime")) == (
+        ["18mm", "25mm"] if xml is XML_SUBLIME else []
+    )
+    assert detectar_espessura_brilhart(tree) == ("25mm" if xml is XML_UNIQUE else None)
+    assert detectar_linha(xml) == ("Sublime" if xml is XML_SUBLIME else "Unique")
+
+
+def test_registro_xpath_aceita_aspas_na_descricao():
+    tree = etree.fromstring(
+        """<R><MODELCATEGORYINFORMATION DESCRIPTION="Coleção Unique "><MODELINFORMATION DESCRIPTION="Porta 1/2'">"""
+        """<MODELTYPEINFORMATIONS><MODELTYPEINFORMATION DESCRIPTION="Vidro"/></MODELTYPEINFORMATIONS>"""
+        """</MODELINFORMATION></MODELCATEGORYINFORMATION></R>"""
+    )
+
+    assert extrair_multiplos_valores(tree, xpath_colecao("Coleção Unique "), "Porta 1/2'") == ["Vidro"]
+
+
+def test_extracao_sublime():
+    resultado = XMLExtractor().extract(XML_SUBLIME)
+
+    assert resultado.linha_detectada == "Unique / Sublime"
+    assert resultado.nome_ambiente == "Sala"
+    assert resultado.caixa is None
+    assert resultado.portas is None
+    assert resultado.paineis.model_dump() == {"material": "BP", "espessura": "18mm / 25mm", "cor": "Nogal"}
+    assert resultado.ferragens.model_dump() == {
+        "puxadores": None, "dobradicas": "Curva / Reta", "corredicas": "Standard amortecimento"
+    }
+    assert resultado.valor_total.custo_fabrica == "R$ 1.500,50"
+    assert resultado.valor_total.valor_venda == "R$ 77,00"
+    assert resultado.metadata.sections_extracted == ["paineis", "ferragens", "ferragens", "valor_total"]
+
+
+def test_extracao_unique():
+    resultado = XMLExtractor().extract(XML_UNIQUE)
+
+    assert resultado.nome_ambiente == "Quarto"
+    assert resultado.caixa.model_dump() == {
+        "linha": "Unique / Sublime", "espessura": "15mm", "espessura_prateleiras": None,
+        "material": "MDF", "cor": "Branco / Semcor"
+    }
+    assert resultado.ferragens.model_dump() == {
+        "puxadores": "Sem puxador / Perfil > Gola",
+        "dobradicas": "Blum Curva / Dobradiça\\Curva Curva",
+        "corredicas": "Tandembox Alto Drawer amortecedor"
+    }
+    assert resultado.porta_perfil.vidro == "Argentato / Fumê / 6mm"
+    assert resultado.brilhart_color.model_dump() == {
+        "espessura": "25mm", "cor": "Fosco (2 Face) > Alba / Liso & Alto", "perfil": None
+    }
+    assert resultado.valor_total.custo_fabrica is None
+    assert resultado.valor_total.valor_venda == "R$ 12,50"
+
+
+def test_extracao_aceita_bytes_e_arvore():
+    esperado = XMLExtractor().extract(XML_UNIQUE).model_dump()
+    conteudo = XML_UNIQUE.encode("utf-8")
+
+    assert XMLExtractor().extract(conteudo).model_dump() == esperado
+    assert XMLExtractor().extract(etree.fromstring(conteudo)).model_dump() == esperado
+
+
+def test_sem_linhas():
+    resultado = XMLExtractor().extract('<LISTING><CATEGORY DESCRIPTION="Corpo"/></LISTING>')
+
+    assert not resultado.success
+    assert "linha (Unique/Sublime)" in resultado.error
+
+
+@pytest.mark.parametrize("linha, detectada", [
+    ("unique", "Unique"), ("sublime", "Sublime"), ("misto", "Unique / Sublime"),
+])
+def test_corpus_sintetico_dos_benchmarks(linha, detectada):
+    resultado = XMLExtractor().extract(gerar_xml_promob(12, linha))
+
+    assert resultado.success, resultado.error
+    assert resultado.linha_detectada == detectada
+    assert resultado.nome_ambiente == "Cozinha Integrada"
+    assert set(resultado.metadata.sections_extracted) == {
+        "caixa", "paineis", "portas", "ferragens", "porta_perfil", "brilhart_color", "valor_total"
+    }
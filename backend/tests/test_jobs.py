@@ -0,0 +1,163 @@
+"""
+Testes da fila de jobs em segundo plano (core.jobs) e do job de importação de XML
+"""
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from core.exceptions import LimitExceededException, ValidationException
+from core.jobs import BackendJobsMemoria, GerenciadorJobs, StatusJob
+from modules.ambientes import xml_jobs
+
+
+def gerenciador(concorrencia=2, max_fila=10, ttl=60):
+    return GerenciadorJobs(BackendJobsMemoria(max_fila, ttl=ttl), concorrencia=concorrencia)
+
+
+async def aguardar(gerenciador_, job_id):
+    async for job in gerenciador_.acompanhar(job_id, intervalo=0.01):
+        pass
+    return job
+
+
+@pytest.mark.asyncio
+async def test_job_concluido_com_resultado_e_progresso():
+    jobs = gerenciador()
+
+    async def somar(job, reportar):
+        await reportar(50, 'somando')
+        return sum(job.parametros['valores'])
+
+    jobs.registrar('somar', somar)
+    job = await jobs.submeter('somar', {'valores': [1, 2, 3]}, usuario_id='u1')
+    assert job.status == StatusJob.PENDENTE
+
+    estados = [j async for j in jobs.acompanhar(job.id, intervalo=0.01)]
+    await jobs.encerrar()
+
+    final = estados[-1]
+    assert (final.status, final.progresso, final.resultado) == (StatusJob.CONCLUIDO, 100, 6)
+    assert final.usuario_id == 'u1'
+    # Parâmetros (ex: caminhos em disco) não saem nas respostas
+    assert 'parametros' not in final.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_erro_no_handler_marca_o_job():
+    jobs = gerenciador()
+
+    async def recusar(job, reportar):
+        raise ValidationException("XML sem ambientes")
+
+    async def quebrar(job, reportar):
+        raise RuntimeError("falha inesperada")
+
+    jobs.registrar('recusar', recusar)
+    jobs.registrar('quebrar', quebrar)
+    recusado = await aguardar(jobs, (await jobs.submeter('recusar', {})).id)
+    quebrado = await aguardar(jobs, (await jobs.submeter('quebrar', {})).id)
+    await jobs.encerrar()
+
+    assert (recusado.status, recusado.erro) == (StatusJob.ERRO, "XML sem ambientes")
+    assert quebrado.status == StatusJob.ERRO
+    assert "falha inesperada" in quebrado.erro
+
+
+@pytest.mark.asyncio
+async def test_tipo_desconhecido_e_fila_cheia():
+    jobs = gerenciador(concorrencia=1, max_fila=1)
+    liberar = asyncio.Event()
+
+    async def esperar(job, reportar):
+        await liberar.wait()
+
+    jobs.registrar('esperar', esperar)
+    with pytest.raises(ValidationException):
+        await jobs.submeter('inexistente', {})
+
+    await jobs.submeter('esperar', {})
+    await asyncio.sleep(0)  # o trabalhador retira o primeiro da fila
+    await jobs.submeter('esperar', {})
+    with pytest.raises(LimitExceededException) as erro:
+        await jobs.submeter('esperar', {})
+
+    assert erro.value.status_code == 429
+    liberar.set()
+    await jobs.encerrar()
+
+
+@pytest.mark.asyncio
+async def test_concorrencia_limitada():
+    jobs = gerenciador(concorrencia=2)
+    ativos = []
+    pico = 0
+
+    async def trabalhar(job, reportar):
+        nonlocal pico
+        ativos.append(job.id)
+        pico = max(pico, len(ativos))
+        await asyncio.sleep(0.02)
+        ativos.remove(job.id)
+
+    jobs.registrar('trabalhar', trabalhar)
+    submetidos = [await jobs.submeter('trabalhar', {}) for _ in range(6)]
+    finais = [await aguardar(jobs, job.id) for job in submetidos]
+    await jobs.encerrar()
+
+    assert pico == 2
+    assert all(job.status == StatusJob.CONCLUIDO for job in finais)
+    assert jobs.estatisticas()['trabalhadores'] == 0
+
+
+@pytest.mark.asyncio
+async def test_finalizados_expiram():
+    backend = BackendJobsMemoria(10, ttl=0.05)
+    jobs = GerenciadorJobs(backend, concorrencia=1)
+
+    async def nada(job, reportar):
+        return None
+
+    jobs.registrar('nada', nada)
+    primeiro = await aguardar(jobs, (await jobs.submeter('nada', {})).id)
+    time.sleep(0.06)
+    # Qualquer gravação limpa os finalizados com TTL vencido
+    segundo = await jobs.submeter('nada', {})
+    await jobs.encerrar()
+
+    assert primeiro.status == StatusJob.CONCLUIDO
+    assert await jobs.obter(primeiro.id) is None
+    assert await jobs.obter(segundo.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_job_de_importacao_remove_o_temporario(monkeypatch, tmp_path):
+    caminho = tmp_path / "upload.xml"
+    caminho.write_text("<LISTING/>")
+    recebidos = {}
+
+    class ServiceFake:
+        def __init__(self, db):
+            pass
+
+        async def importar_xml_ambiente(self, **kwargs):
+            recebidos.update(kwargs)
+            await kwargs['reportar'](70, 'salvando')
+            raise xml_jobs.XMLInvalidoError("documento vazio")
+
+    monkeypatch.setattr(xml_jobs, "AmbienteService", ServiceFake)
+    monkeypatch.setattr(xml_jobs, "get_database", lambda: None)
+    jobs = gerenciador()
+    jobs.registrar(xml_jobs.TIPO_IMPORTAR_XML, xml_jobs.processar_importacao_xml)
+
+    job = await jobs.submeter(xml_jobs.TIPO_IMPORTAR_XML, {
+        'cliente_id': 'c1', 'caminho': str(caminho), 'nome_arquivo': 'upload.xml', 'xml_hash': 'abc'
+    })
+    final = await aguardar(jobs, job.id)
+    await jobs.encerrar()
+
+    assert recebidos['conteudo_xml'] == Path(caminho)
+    assert recebidos['xml_hash'] == 'abc'
+    assert (final.status, final.erro) == (StatusJob.ERRO, "Arquivo XML inválido: documento vazio")
+    assert not caminho.exists()
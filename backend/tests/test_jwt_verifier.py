@@ -0,0 +1,175 @@
+"""
+Testes da verificação local de JWT (core.jwt_verifier)
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import JWTError, jwk, jwt
+
+from core import jwt_verifier
+from core.config import settings
+from core.jwt_verifier import JWTVerifier, get_jwt_verifier, validar_configuracao_jwt
+
+SECRET = "segredo-de-teste"
+
+
+def gerar_token(claims=None, segredo=SECRET, **kwargs):
+    payload = {"sub": "user-123", "aud": "authenticated", "exp": int(time.time()) + 3600}
+    payload.update(claims or {})
+    return jwt.encode(payload, segredo, **kwargs)
+
+
+def gerar_chave(kid, algoritmo="RS256"):
+    if algoritmo == "RS256":
+        privada = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        privada = ec.generate_private_key(ec.SECP256R1())
+    pem = privada.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    publica = jwk.construct(
+        privada.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        ),
+        algorithm=algoritmo
+    ).to_dict()
+    publica["kid"] = kid
+    return pem, publica
+
+
+class JWKSFake:
+    """Endpoint de JWKS: conta os downloads e demora um pouco para responder"""
+
+    def __init__(self, *chaves):
+        self.chaves = list(chaves)
+        self.downloads = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.downloads += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"keys": self.chaves})
+
+
+@pytest.fixture
+def jwks():
+    return JWKSFake()
+
+
+@pytest.fixture
+def verifier(jwks):
+    return JWTVerifier(
+        secret=SECRET, jwks_url="http://supabase.local/jwks", audience="authenticated",
+        transport=httpx.MockTransport(jwks)
+    )
+
+
+@pytest.mark.asyncio
+async def test_token_valido_retorna_claims(verifier):
+    claims = await verifier.verificar(gerar_token())
+    assert claims["sub"] == "user-123"
+
+
+@pytest.mark.parametrize("token", [
+    gerar_token(segredo="outro-segredo"),
+    gerar_token({"exp": int(time.time()) - 10}),
+    gerar_token({"aud": "outra-audience"}),
+])
+@pytest.mark.asyncio
+async def test_token_invalido_e_rejeitado(verifier, token):
+    with pytest.raises(JWTError):
+        await verifier.verificar(token)
+
+
+@pytest.mark.asyncio
+async def test_algoritmo_none_e_rejeitado(verifier):
+    # Header {"alg": "none"} com o payload de um token válido e sem assinatura
+    payload = gerar_token().split(".")[1]
+    token = f"eyJhbGciOiJub25lIiwidHlwIjoiSldUIn0.{payload}."
+    with pytest.raises(JWTError):
+        await verifier.verificar(token)
+
+
+@pytest.mark.asyncio
+async def test_claims_ficam_em_cache(verifier):
+    token = gerar_token()
+    await verifier.verificar(token)
+    await verifier.verificar(token)
+    assert verifier.estatisticas()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_jwks_baixado_uma_vez_e_atualizado_na_rotacao(verifier, jwks):
+    pem_antiga, publica_antiga = gerar_chave("chave-1")
+    pem_nova, publica_nova = gerar_chave("chave-2")
+    jwks.chaves = [publica_antiga]
+
+    await verifier.verificar(gerar_token(segredo=pem_antiga, algorithm="RS256", headers={"kid": "chave-1"}))
+    await verifier.verificar(gerar_token({"sub": "user-456"}, segredo=pem_antiga, algorithm="RS256", headers={"kid": "chave-1"}))
+    assert jwks.downloads == 1
+
+    # Rotação: kid desconhecido força novo download (respeitando o intervalo mínimo)
+    verifier._jwks_baixado_em -= 120
+    jwks.chaves = [publica_antiga, publica_nova]
+    claims = await verifier.verificar(gerar_token(segredo=pem_nova, algorithm="RS256", headers={"kid": "chave-2"}))
+    assert jwks.downloads == 2
+    assert claims["sub"] == "user-123"
+
+    # Dentro do intervalo mínimo, kid desconhecido não baixa de novo
+    with pytest.raises(JWTError):
+        await verifier.verificar(gerar_token(segredo=pem_nova, algorithm="RS256", headers={"kid": "chave-3"}))
+    assert jwks.downloads == 2
+
+
+@pytest.mark.asyncio
+async def test_es256_com_download_compartilhado(verifier, jwks):
+    pem, publica = gerar_chave("chave-ec", "ES256")
+    jwks.chaves = [publica]
+    tokens = [
+        gerar_token({"sub": f"user-{i}"}, segredo=pem, algorithm="ES256", headers={"kid": "chave-ec"})
+        for i in range(5)
+    ]
+
+    # JWKS frio: as requisições simultâneas esperam o mesmo download
+    claims = await asyncio.gather(*(verifier.verificar(token) for token in tokens))
+
+    assert [c["sub"] for c in claims] == [f"user-{i}" for i in range(5)]
+    assert jwks.downloads == 1
+
+    outra_pem, _ = gerar_chave("chave-ec", "ES256")
+    with pytest.raises(JWTError):
+        await verifier.verificar(gerar_token(segredo=outra_pem, algorithm="ES256", headers={"kid": "chave-ec"}))
+
+
+@pytest.mark.asyncio
+async def test_secret_do_projeto_nao_cai_no_jwt_secret_key(monkeypatch):
+    monkeypatch.setattr(jwt_verifier, "_verifier", None)
+    monkeypatch.setattr(settings, "supabase_jwt_secret", None)
+    monkeypatch.setattr(settings, "jwt_secret_key", SECRET)
+
+    # Token assinado com a chave da aplicação não vale como token do Supabase Auth
+    with pytest.raises(JWTError):
+        await get_jwt_verifier().verificar(gerar_token())
+
+
+@pytest.mark.parametrize("secret, hs256, falha", [
+    (None, True, True),
+    ("", True, True),
+    (SECRET, True, False),
+    (None, False, False),
+])
+def test_inicializacao_exige_secret_com_hs256(monkeypatch, secret, hs256, falha):
+    monkeypatch.setattr(settings, "supabase_jwt_secret", secret)
+    monkeypatch.setattr(settings, "supabase_jwt_hs256", hs256)
+
+    if falha:
+        with pytest.raises(RuntimeError, match="SUPABASE_JWT_SECRET"):
+            validar_configuracao_jwt()
+    else:
+        validar_configuracao_jwt()
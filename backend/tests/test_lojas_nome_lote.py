@@ -0,0 +1,80 @@
+"""
+Testes do enriquecimento de nome de loja em lote (comissões e config_loja)
+
+As queries passam por um transporte HTTP em memória que imita o PostgREST
+e conta as requisições: o número de idas ao banco por página não pode
+depender do tamanho da página.
+"""
+import pytest
+
+from conftest import PostgRESTFake
+from core.lojas_cache import invalidar_nome_loja
+from modules.comissoes.repository import ComissoesRepository
+from modules.config_loja.repository import ConfigLojaRepository
+
+
+def loja_id(i):
+    return f"00000000-0000-4000-8000-{i:012d}"
+
+
+class BancoLojas(PostgRESTFake):
+    """Responde linhas de qualquer tabela e nomes para c_lojas, contando chamadas"""
+
+    def __init__(self, linhas):
+        super().__init__()
+        self.linhas = linhas
+
+    def responder(self, request, requisicao):
+        if requisicao.caminho == "c_lojas":
+            ids = requisicao.params["id"][len("in.("):-1].split(",")
+            return self.resposta([{"id": i.strip('"'), "nome": f"Loja {i[-3:]}"} for i in ids])
+        return self.resposta(self.linhas)
+
+
+def banco(linhas):
+    fake = BancoLojas(linhas)
+    return fake.banco(), fake
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    invalidar_nome_loja()
+    yield
+    invalidar_nome_loja()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tamanho", [1, 20, 100])
+async def test_comissoes_listar_chamadas_constantes(tamanho):
+    linhas = [{"id": str(i), "loja_id": loja_id(i % 7), "tipo_comissao": "VENDA"} for i in range(tamanho)]
+    db, fake = banco(linhas)
+
+    regras, total = await ComissoesRepository(db).listar(page=1, limit=tamanho)
+
+    assert len(fake.chamadas) == 2
+    assert total == tamanho
+    assert regras[0]["loja_nome"] == "Loja 000"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tamanho", [1, 20, 100])
+async def test_config_loja_listar_chamadas_constantes(tamanho):
+    linhas = [{"id": str(i), "loja_id": loja_id(i)} for i in range(tamanho)]
+    db, fake = banco(linhas)
+
+    configs, _ = await ConfigLojaRepository(db).listar(page=1, limit=tamanho)
+
+    assert len(fake.chamadas) == 2
+    assert all(config["store_name"] for config in configs)
+
+
+@pytest.mark.asyncio
+async def test_nomes_em_cache_nao_voltam_ao_banco():
+    linhas = [{"id": str(i), "loja_id": loja_id(i % 3), "tipo_comissao": "VENDA"} for i in range(10)]
+    db, fake = banco(linhas)
+    repository = ComissoesRepository(db)
+
+    await repository.listar()
+    await repository.buscar_por_id("1")
+
+    assert len(fake.de("c_lojas")) == 1
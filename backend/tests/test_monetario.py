@@ -0,0 +1,109 @@
+"""
+Testes dos valores monetários em centavos (core.monetario) e de quem os usa
+"""
+from decimal import Decimal
+
+import pytest
+
+from core.monetario import (
+    formatar_brl, formatar_centavos, para_centavos, para_centavos_lote, percentual_centavos
+)
+from modules.ambientes import monetary
+from modules.ambientes.extrator_xml.app.utils.helpers import formatar_valor_monetario
+from modules.ambientes.utils import converter_valor_monetario
+from modules.comissoes.services import ComissoesService
+
+
+@pytest.mark.parametrize("texto, centavos", [
+    ("R$ 1.234,56", 123456),
+    ("1.234,56", 123456),
+    ("1234,56", 123456),
+    ("1234.56", 123456),
+    ("$1,234.56", 123456),
+    ("USD 1,234.56", 123456),
+    ("R$ 1.234.567,8", 123456780),
+    ("1.234.567", 123456700),
+    ("1,234,567", 123456700),
+    ("48211.37", 4821137),
+    ("0,005", 1),
+    ("1.234", 123),
+    ("R$ -50,00", -5000),
+    ("", None),
+    ("N/A", None),
+    ("100,00 R$", 10000),
+    ("1234 BRL", 123400),
+    ("1e3", 100000),
+    ("1,5E-2", 2),
+    ("12 abc 34", None),
+    ("10 e5", None),
+])
+def test_textos(texto, centavos):
+    assert para_centavos(texto) == centavos
+
+
+def test_numeros_e_lote():
+    assert para_centavos(Decimal("10.005")) == 1001
+    assert para_centavos(0.1 + 0.2) == 30
+    assert para_centavos(7) == 700
+    assert para_centavos(None) is None
+    assert para_centavos_lote(["1,50", "1,50", None, 2.5]) == [150, 150, None, 250]
+
+
+def test_formatacao():
+    assert formatar_centavos(123456789) == "R$ 1.234.567,89"
+    assert formatar_centavos(5) == "R$ 0,05"
+    assert formatar_centavos(-123456) == "R$ -1.234,56"
+    assert formatar_brl(96422.74) == formatar_valor_monetario(96422.74) == "R$ 96.422,74"
+    assert monetary.formatar_valor_monetario(Decimal("1644.38")) == "R$ 1.644,38"
+
+
+def test_percentual_arredonda_meio_para_cima():
+    assert percentual_centavos(1005, 50) == 503
+    assert percentual_centavos(999_99, Decimal("2.5")) == 2500
+
+
+def test_conversores_existentes_mantem_o_comportamento():
+    assert converter_valor_monetario("R$ 1.234,56") == 1234.56
+    assert converter_valor_monetario("R$ -50,00") == 0.0
+    assert converter_valor_monetario("15000000") == 0.0
+    assert converter_valor_monetario("N/A") == 0.0
+    assert monetary.converter_valor_monetario("1.234,56") == Decimal("1234.56")
+    assert monetary.converter_valor_monetario("abc") == Decimal("0")
+
+
+@pytest.mark.parametrize("texto, antigo", [
+    # Saídas do converter_valor_monetario anterior ao core.monetario
+    ("100,00 R$", 100.0),
+    ("1234 BRL", 1234.0),
+    ("10 €", 10.0),
+    ("USD 99.90", 99.9),
+    ("1e3", 1000.0),
+    ("2.5E2", 250.0),
+])
+def test_moeda_depois_do_numero_e_notacao_cientifica(texto, antigo):
+    assert converter_valor_monetario(texto) == antigo
+    assert monetary.converter_valor_monetario(texto) == Decimal(str(antigo))
+
+
+class RepositorioRegrasFake:
+    def __init__(self, regras):
+        self.regras = regras
+
+    async def buscar_regras_ativas_por_tipo(self, tipo, loja_id):
+        return self.regras
+
+
+@pytest.mark.asyncio
+async def test_comissao_em_centavos():
+    service = ComissoesService.__new__(ComissoesService)
+    service.repository = RepositorioRegrasFake([
+        {'id': 'r1', 'valor_minimo': 0, 'valor_maximo': 1000.10, 'percentual': 3},
+        {'id': 'r2', 'valor_minimo': 1000.11, 'valor_maximo': None, 'percentual': 5, 'descricao': 'Acima de mil'},
+    ])
+
+    limite = await service.calcular_comissao(1000.10, 'VENDEDOR', '00000000-0000-4000-8000-000000000001')
+    acima = await service.calcular_comissao(1234.57, 'VENDEDOR', '00000000-0000-4000-8000-000000000001')
+
+    assert (limite.regra_id, limite.valor_comissao) == ('r1', 30.0)
+    # 5% de 1234,57 = 61,7285 -> 61,73
+    assert (acima.regra_id, acima.valor_comissao) == ('r2', 61.73)
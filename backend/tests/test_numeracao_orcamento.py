@@ -0,0 +1,95 @@
+"""
+Testes da numeração de orçamentos por loja (modules.orcamentos.numeracao)
+
+A RPC `reservar_numeros_orcamento` é imitada por um transporte HTTP em
+memória com um contador por loja, como a tabela c_orcamento_numeracao.
+"""
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from core.database import AsyncDatabase
+from modules.orcamentos.numeracao import NumeracaoOrcamento, formatar_numero
+
+LOJA_A = "00000000-0000-4000-8000-00000000000a"
+LOJA_B = "00000000-0000-4000-8000-00000000000b"
+
+
+class ContadorFake:
+    """Contador atômico por loja, com initial_number 1001 e formato padrão"""
+
+    def __init__(self, disponivel=True):
+        self.disponivel = disponivel
+        self.proximos = {}
+        self.chamadas = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.chamadas += 1
+        if not self.disponivel:
+            return httpx.Response(404, json={"code": "PGRST202", "message": "função não encontrada"})
+
+        params = json.loads(request.content)
+        loja_id, quantidade = params["p_loja_id"], params["p_quantidade"]
+        inicio = self.proximos.get(loja_id, 1001)
+        self.proximos[loja_id] = inicio + quantidade
+
+        return httpx.Response(200, json={
+            "inicio": inicio,
+            "quantidade": quantidade,
+            "number_format": "YYYY-NNNNNN",
+            "number_prefix": "ORC"
+        })
+
+
+def banco(**kwargs):
+    fake = ContadorFake(**kwargs)
+    return AsyncDatabase(httpx.MockTransport(fake), "a.b.c"), fake
+
+
+@pytest.mark.parametrize("formato, prefixo, esperado", [
+    ("YYYY-NNNNNN", "ORC", "ORC-2025-001001"),
+    ("NNNN", None, "1001"),
+    ("YY.MM/NNN", "P", "P-25.03/1001"),
+    ("YYYY", "ORC", "ORC-2025-1001"),
+])
+def test_formatar_numero(formato, prefixo, esperado):
+    assert formatar_numero(1001, formato, prefixo, datetime(2025, 3, 10)) == esperado
+
+
+@pytest.mark.asyncio
+async def test_bloco_reduz_idas_ao_banco():
+    db, fake = banco()
+    numeracao = NumeracaoOrcamento(tamanho_bloco=5)
+
+    numeros = [await numeracao.proximo_numero(db, LOJA_A) for _ in range(12)]
+
+    assert fake.chamadas == 3
+    assert [int(n.rsplit("-", 1)[-1]) for n in numeros] == list(range(1001, 1013))
+
+
+@pytest.mark.asyncio
+async def test_criacoes_simultaneas_nao_repetem_numero():
+    db, _ = banco()
+    numeracao = NumeracaoOrcamento(tamanho_bloco=3)
+
+    numeros = await asyncio.gather(*[
+        numeracao.proximo_numero(db, loja)
+        for loja in [LOJA_A, LOJA_B] * 20
+    ])
+
+    # Cada loja tem sua própria sequência, sem repetição
+    for numeros_loja in (numeros[0::2], numeros[1::2]):
+        assert sorted(int(n.rsplit("-", 1)[-1]) for n in numeros_loja) == list(range(1001, 1021))
+
+
+@pytest.mark.asyncio
+async def test_sem_rpc_retorna_none_e_nao_tenta_de_novo():
+    db, fake = banco(disponivel=False)
+    numeracao = NumeracaoOrcamento()
+
+    assert await numeracao.proximo_numero(db, LOJA_A) is None
+    assert await numeracao.proximo_numero(db, LOJA_A) is None
+    assert fake.chamadas == 1
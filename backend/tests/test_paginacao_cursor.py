@@ -0,0 +1,84 @@
+"""
+Testes da paginação por cursor (keyset) em core.database.DatabaseUtils
+"""
+import pytest
+
+from core.database import DatabaseUtils, get_database
+from core.exceptions import ValidationException
+
+
+def linha(i):
+    return {"id": f"00000000-0000-4000-8000-{i:012d}", "created_at": f"2024-01-{i + 1:02d}T10:30:00.123456+00:00"}
+
+
+def test_cursor_ida_e_volta():
+    cursor = DatabaseUtils.encode_cursor(linha(3))
+    assert DatabaseUtils.decode_cursor(cursor) == (linha(3)["created_at"], linha(3)["id"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "nao-e-base64!",
+    DatabaseUtils.encode_cursor({"created_at": "ontem", "id": "00000000-0000-4000-8000-000000000001"}),
+    DatabaseUtils.encode_cursor({"created_at": "2024-01-01T00:00:00", "id": "1),id.gt.(0"}),
+])
+def test_cursor_invalido_e_rejeitado(cursor):
+    with pytest.raises(ValidationException):
+        DatabaseUtils.decode_cursor(cursor)
+
+
+def test_split_page_gera_next_cursor_somente_se_houver_mais():
+    linhas = [linha(i) for i in range(6)]
+
+    pagina, next_cursor = DatabaseUtils.split_page(linhas, 5)
+    assert pagina == linhas[:5]
+    assert DatabaseUtils.decode_cursor(next_cursor)[1] == linhas[4]["id"]
+
+    pagina, next_cursor = DatabaseUtils.split_page(linhas[:5], 5)
+    assert len(pagina) == 5
+    assert next_cursor is None
+
+
+def test_query_com_cursor_usa_keyset_sem_offset():
+    cursor = DatabaseUtils.encode_cursor(linha(3))
+    query = DatabaseUtils.apply_cursor_pagination(get_database().table("c_clientes").select("*"), cursor, limit=20)
+
+    # Um único parâmetro `order` com as duas chaves (desempate por id)
+    assert query.params.get_list("order") == ["created_at.desc,id.desc"]
+    assert query.params["limit"] == "21"
+    assert "offset" not in query.params
+    assert f"id.lt.{linha(3)['id']}" in query.params["or"]
+
+
+def test_query_sem_cursor_mantem_page_limit():
+    query = DatabaseUtils.apply_cursor_pagination(get_database().table("c_clientes").select("*"), None, page=3, limit=20)
+
+    assert query.params["offset"] == "40"
+    assert query.params["limit"] == "21"
+
+
+@pytest.mark.parametrize("count, cursor, esperado", [
+    ("exact", None, "exact"),
+    ("planned", None, "planned"),
+    ("none", None, None),
+    ("exact", DatabaseUtils.encode_cursor(linha(1)), None),
+])
+def test_count_method(count, cursor, esperado):
+    assert DatabaseUtils.count_method(count, cursor) == esperado
+
+
+def test_count_method_invalido_e_rejeitado():
+    with pytest.raises(ValidationException):
+        DatabaseUtils.count_method("aproximado")
+
+
+def test_contagem_vai_no_mesmo_request_da_pagina():
+    query = get_database().table("c_clientes").select("*", count=DatabaseUtils.count_method("estimated"))
+    query = DatabaseUtils.apply_cursor_pagination(query, None, limit=20)
+
+    assert "count=estimated" in query.headers["prefer"]
+    assert query.params["limit"] == "21"
+
+
+def test_count_pages_sem_total():
+    assert DatabaseUtils.count_pages(41, 20) == 3
+    assert DatabaseUtils.count_pages(None, 20) is None
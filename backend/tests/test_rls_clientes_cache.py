@@ -0,0 +1,66 @@
+"""
+Testes do cache de clientes RLS por token (SupabaseClient.get_database_with_auth)
+"""
+import time
+
+import pytest
+from jose import jwt
+
+from core import cache
+from core.database import SupabaseClient
+
+
+def token(sub, exp_em):
+    return jwt.encode({'sub': sub, 'exp': int(time.time() + exp_em)}, 'segredo', algorithm='HS256')
+
+
+@pytest.fixture
+def supabase():
+    return SupabaseClient()
+
+
+def test_mesmo_token_reutiliza_cliente(supabase):
+    acesso = token('u1', 3600)
+
+    primeiro = supabase.get_database_with_auth(acesso)
+    segundo = supabase.get_database_with_auth(acesso)
+
+    assert primeiro is segundo
+    assert primeiro.session.headers['Authorization'] == f'Bearer {acesso}'
+    # Sem pool próprio: todos sobre o transporte compartilhado
+    assert primeiro._transport is supabase.transport
+
+
+def test_um_cliente_por_token(supabase):
+    de_u1 = supabase.get_database_with_auth(token('u1', 3600))
+    de_u2 = supabase.get_database_with_auth(token('u2', 3600))
+
+    assert de_u1 is not de_u2
+    assert de_u1.session.headers['Authorization'] != de_u2.session.headers['Authorization']
+
+
+def test_expira_no_exp_do_jwt(supabase, monkeypatch):
+    acesso = token('u1', 60)
+    primeiro = supabase.get_database_with_auth(acesso)
+    assert supabase.get_database_with_auth(acesso) is primeiro
+
+    # 61s depois o `exp` passou: o cliente em cache é descartado
+    agora = time.monotonic()
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: agora + 61)
+    assert supabase.get_database_with_auth(acesso) is not primeiro
+
+
+def test_token_expirado_nao_entra_no_cache(supabase):
+    vencido = token('u1', -10)
+
+    assert supabase.get_database_with_auth(vencido) is not supabase.get_database_with_auth(vencido)
+    assert len(supabase._rls_databases) == 0
+
+
+def test_invalidar_token(supabase):
+    acesso = token('u1', 3600)
+    primeiro = supabase.get_database_with_auth(acesso)
+
+    supabase.invalidar_token(acesso)
+
+    assert supabase.get_database_with_auth(acesso) is not primeiro
@@ -0,0 +1,102 @@
+"""
+Testes da contagem agrupada de funcionários por setor (core.setores_cache)
+
+As queries passam por um transporte HTTP em memória que imita o PostgREST
+e registra as requisições.
+"""
+import pytest
+
+from conftest import PostgRESTFake
+from core import setores_cache
+from core.lojas_cache import invalidar_nome_loja
+from modules.equipe.repository import FuncionarioRepository
+from modules.setores.repository import SetorRepository
+
+
+def setor_id(i):
+    return f"00000000-0000-4000-8000-{i:012d}"
+
+
+FUNCIONARIO = {"id": "func-1", "nome": "Ana", "email": None, "loja_id": None, "setor_id": setor_id(1), "ativo": True}
+
+
+class BancoSetores(PostgRESTFake):
+    """Imita cad_setores, cad_equipe e a RPC de contagem, registrando as chamadas"""
+
+    def __init__(self, setores, rpc_disponivel=True):
+        super().__init__()
+        self.setores = setores
+        self.rpc_disponivel = rpc_disponivel
+
+    def responder(self, request, requisicao):
+        if requisicao.caminho == "rpc/contar_funcionarios_por_setor":
+            if not self.rpc_disponivel:
+                return self.erro(404, "PGRST202", "função não encontrada")
+            ids = requisicao.corpo["setor_ids"]
+            return self.resposta([{"setor_id": i, "total_funcionarios": 3} for i in ids])
+        if requisicao.caminho == "cad_setores":
+            return self.resposta(self.setores)
+        if requisicao.caminho == "cad_equipe" and requisicao.metodo == "GET" and "setor_id" in requisicao.params:
+            # count=exact com limit 1: uma linha, total de 1500 no content-range
+            # (acima do max-rows de 1000 do PostgREST)
+            return self.resposta([{"id": "func-1"}], total=1500)
+        return self.resposta([FUNCIONARIO])
+
+
+def banco(setores=(), **kwargs):
+    fake = BancoSetores(list(setores), **kwargs)
+    return fake.banco(), fake
+
+
+def setores(quantidade):
+    return [{"id": setor_id(i), "nome": f"Setor {i}", "ativo": True} for i in range(quantidade)]
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo(monkeypatch):
+    monkeypatch.setattr(setores_cache, "_rpc_disponivel", True)
+    setores_cache.limpar_contagem_setores()
+    invalidar_nome_loja()
+    yield
+    setores_cache.limpar_contagem_setores()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("quantidade", [1, 20, 100])
+async def test_listar_conta_todos_os_setores_em_uma_query(quantidade):
+    db, fake = banco(setores(quantidade))
+
+    resultado = await SetorRepository(db).listar(limit=quantidade)
+
+    assert fake.caminhos() == ["cad_setores", "rpc/contar_funcionarios_por_setor"]
+    assert all(setor["total_funcionarios"] == 3 for setor in resultado["items"])
+
+
+@pytest.mark.asyncio
+async def test_sem_rpc_conta_cada_setor_e_nao_tenta_de_novo():
+    db, fake = banco(setores(5), rpc_disponivel=False)
+
+    resultado = await SetorRepository(db).listar()
+    assert all(setor["total_funcionarios"] == 1500 for setor in resultado["items"])
+
+    setores_cache.limpar_contagem_setores()
+    await SetorRepository(db).listar()
+
+    assert fake.caminhos().count("rpc/contar_funcionarios_por_setor") == 1
+    assert fake.caminhos().count("cad_equipe") == 10
+
+
+@pytest.mark.asyncio
+async def test_contagem_em_cache_e_invalidada_ao_excluir_funcionario():
+    db, fake = banco(setores(3))
+    repository = SetorRepository(db)
+
+    await repository.listar()
+    await repository.listar()
+    assert fake.caminhos().count("rpc/contar_funcionarios_por_setor") == 1
+
+    await FuncionarioRepository(db).excluir("func-1")
+    fake.chamadas.clear()
+    await repository.listar()
+
+    assert fake.caminhos() == ["cad_setores", "rpc/contar_funcionarios_por_setor"]
@@ -0,0 +1,132 @@
+"""
+Testes do catálogo de status de orçamento em memória
+"""
+import asyncio
+
+import pytest
+
+from conftest import PostgRESTFake
+from core.exceptions import NotFoundException
+from modules.status_orcamento.catalogo import CatalogoStatus, catalogo_status
+from modules.status_orcamento.repository import StatusOrcamentoRepository
+
+
+def status(numero, ordem, nome, ativo=True):
+    return {
+        'id': f'00000000-0000-4000-8000-00000000000{numero}', 'nome': nome, 'ordem': ordem,
+        'cor': '#000000', 'ativo': ativo,
+        'created_at': '2025-07-01T10:00:00', 'updated_at': '2025-07-01T10:00:00',
+    }
+
+
+class BancoStatus(PostgRESTFake):
+    """c_status_orcamento, contando as leituras da tabela"""
+
+    def __init__(self):
+        super().__init__()
+        self.status = [
+            status(1, 1, 'Cliente Cadastrado'),
+            status(2, 3, 'Orçamento Criado'),
+            status(3, 3, 'Antigo', ativo=False),
+        ]
+        self.leituras = 0
+
+    def responder(self, request, requisicao):
+        if requisicao.metodo == 'POST':
+            self.status.append({**status(9, 9, ''), **requisicao.corpo})
+            return self.resposta([self.status[-1]])
+        self.leituras += 1
+        return self.resposta(sorted(self.status, key=lambda s: s['ordem']))
+
+
+@pytest.fixture
+def repositorio():
+    catalogo_status.invalidar()
+    fake = BancoStatus()
+    yield StatusOrcamentoRepository(fake.banco()), fake
+    catalogo_status.invalidar()
+
+
+@pytest.mark.asyncio
+async def test_consultas_sem_ida_ao_banco(repositorio):
+    repo, fake = repositorio
+
+    por_ordem = await repo.buscar_por_ordem(3)
+    por_id = await repo.buscar_por_id('00000000-0000-4000-8000-000000000003')
+    por_nome = await repo.buscar_por_nome('Cliente Cadastrado')
+    ativos = await repo.listar()
+    todos = await repo.listar(apenas_ativos=False)
+    with pytest.raises(NotFoundException):
+        await repo.buscar_por_id('00000000-0000-4000-8000-00000000000f')
+
+    assert fake.leituras == 1
+    # Ordem: só status ativos; por id os inativos também aparecem
+    assert (por_ordem['nome'], por_id['nome'], por_nome['ordem']) == ('Orçamento Criado', 'Antigo', 1)
+    assert [s['nome'] for s in ativos] == ['Cliente Cadastrado', 'Orçamento Criado']
+    assert len(todos) == 3
+    assert await repo.buscar_por_ordem(7) is None
+
+    # Cópias: alterar o retorno não altera o catálogo
+    por_ordem['nome'] = 'Alterado'
+    assert (await repo.buscar_por_ordem(3))['nome'] == 'Orçamento Criado'
+
+
+@pytest.mark.asyncio
+async def test_criar_invalida(repositorio):
+    repo, fake = repositorio
+    assert await repo.buscar_por_ordem(5) is None
+
+    await repo.criar({'nome': 'Enviado', 'ordem': 5, 'ativo': True})
+
+    assert (await repo.buscar_por_ordem(5))['nome'] == 'Enviado'
+    # Carga inicial, verificação de nome no criar e recarga após o insert
+    assert fake.leituras == 3
+
+
+@pytest.mark.asyncio
+async def test_carga_compartilhada_e_ttl_zero():
+    cargas = []
+
+    async def carregar():
+        cargas.append(1)
+        await asyncio.sleep(0.01)
+        return [status(1, 1, 'Cliente Cadastrado')]
+
+    catalogo = CatalogoStatus(ttl=60)
+    resultados = await asyncio.gather(*(catalogo.por_ordem(carregar, 1) for _ in range(5)))
+    assert len(cargas) == 1 and all(r['nome'] == 'Cliente Cadastrado' for r in resultados)
+
+    sem_cache = CatalogoStatus(ttl=0)
+    await sem_cache.por_ordem(carregar, 1)
+    await sem_cache.por_ordem(carregar, 1)
+    assert len(cargas) == 3
+
+
+@pytest.mark.asyncio
+async def test_invalidar_durante_a_carga_nao_reaproveita_a_carga_antiga():
+    tabela = [status(1, 1, 'Cliente Cadastrado')]
+    liberar_antiga = asyncio.Event()
+    cargas = []
+
+    async def carregar():
+        cargas.append(1)
+        lido = list(tabela)
+        if len(cargas) == 1:
+            await liberar_antiga.wait()
+        return lido
+
+    catalogo = CatalogoStatus(ttl=60)
+    antiga = asyncio.ensure_future(catalogo.por_nome(carregar, 'Enviado'))
+    await asyncio.sleep(0)
+
+    # Escrita durante a carga: a consulta seguinte lê a tabela de novo
+    tabela.append(status(5, 5, 'Enviado'))
+    catalogo.invalidar()
+    depois_da_escrita = await asyncio.wait_for(catalogo.por_nome(carregar, 'Enviado'), 1)
+    assert depois_da_escrita['ordem'] == 5
+
+    # A carga antiga termina depois e não sobrescreve a nova
+    liberar_antiga.set()
+    assert (await antiga)['ordem'] == 5
+    assert (await catalogo.por_nome(carregar, 'Enviado'))['ordem'] == 5
+    assert len(cargas) == 2
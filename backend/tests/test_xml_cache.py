@@ -0,0 +1,177 @@
+"""
+Testes do cache da extração de XML por hash (modules.ambientes.xml_cache)
+"""
+import hashlib
+import io
+from types import SimpleNamespace
+
+import pytest
+from fastapi import UploadFile
+
+from modules.ambientes import xml_importer
+from modules.ambientes.xml_cache import CacheMateriaisXML
+from modules.ambientes.xml_executor import ExecutorExtracaoXML
+from modules.ambientes.xml_importer import XMLImporter
+from modules.ambientes.xml_upload import receber_xml_upload
+
+XML = r"""<?xml version="1.0" encoding="UTF-8"?>
+<LISTING>
+  <TOTALPRICES><MARGINS><ORDER VALUE="1500.5"/><BUDGET VALUE="3000"/></MARGINS></TOTALPRICES>
+  <AMBIENTS><AMBIENT DESCRIPTION="Projeto - Cozinha">
+    <MODELCATEGORYINFORMATION DESCRIPTION="Coleção Unique ">
+      <MODELINFORMATION DESCRIPTION="4 - Cor Corpo"><MODELTYPEINFORMATIONS>
+        <MODELTYPEINFORMATION DESCRIPTION="MDF\Branco"/>
+      </MODELTYPEINFORMATIONS></MODELINFORMATION>
+    </MODELCATEGORYINFORMATION>
+  </AMBIENT></AMBIENTS>
+</LISTING>
+"""
+
+XML_SEM_LINHA = """<LISTING><AMBIENTS><AMBIENT DESCRIPTION="Projeto - Lavanderia"/></AMBIENTS></LISTING>"""
+
+MATERIAIS = {'linha_detectada': 'Unique', 'nome_ambiente': 'Cozinha', 'valor_total': None}
+
+
+class ServiceFake:
+    """Stand-in do AmbienteService com c_ambientes/c_ambientes_material em memória"""
+
+    def __init__(self):
+        self.ambientes = {}
+        self.materiais = []
+
+    async def buscar_materiais_por_hashes(self, xml_hashes):
+        return [
+            {'ambiente_id': m.ambiente_id, 'materiais_json': m.materiais_json,
+             'xml_hash': m.xml_hash, 'cliente_id': self.ambientes[m.ambiente_id].cliente_id}
+            for m in self.materiais if m.xml_hash in xml_hashes
+        ]
+
+    async def criar_ambiente(self, dados):
+        ambiente = SimpleNamespace(id=f"amb-{len(self.ambientes) + 1}", **dados.model_dump())
+        self.ambientes[ambiente.id] = ambiente
+        return ambiente
+
+    async def criar_material_ambiente(self, ambiente_id, dados):
+        self.materiais.append(dados)
+
+    async def buscar_ambiente_por_id(self, ambiente_id, incluir_materiais=False, completar_materiais=True):
+        return SimpleNamespace(**vars(self.ambientes[ambiente_id]))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CacheMateriaisXML(max_itens=10, ttl=60)
+    monkeypatch.setattr(xml_importer, "cache_materiais_xml", cache)
+    return cache
+
+
+@pytest.fixture
+def extracoes(monkeypatch):
+    """Conta as extrações executadas (executor em thread)"""
+    executor = ExecutorExtracaoXML(workers=0, timeout=30)
+    chamadas = []
+    extrair = executor.extrair
+
+    async def contar(origem, secoes=None):
+        chamadas.append(origem)
+        return await extrair(origem, secoes=secoes)
+
+    monkeypatch.setattr(executor, "extrair", contar)
+    monkeypatch.setattr(xml_importer, "executor_extracao_xml", executor)
+    return chamadas
+
+
+def test_memoria_lru():
+    cache = CacheMateriaisXML(max_itens=2, ttl=60)
+    cache.definir("a", {"n": 1})
+    cache.definir("b", {"n": 2})
+    cache.obter("a")
+    cache.definir("c", {"n": 3})
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") == {"n": 1}
+    assert cache.obter("c") == {"n": 3}
+
+
+def test_disco_sobrevive_a_nova_instancia(tmp_path):
+    CacheMateriaisXML(max_itens=10, ttl=60, diretorio=str(tmp_path)).definir("abc123", MATERIAIS)
+
+    novo = CacheMateriaisXML(max_itens=10, ttl=60, diretorio=str(tmp_path))
+
+    assert novo.obter("abc123") == MATERIAIS
+    assert novo.obter("../fora") is None
+    assert [arquivo.name for arquivo in tmp_path.iterdir()] == ["abc123.json"]
+
+
+def test_memoria_desativada_e_sem_disco_nao_guarda():
+    cache = CacheMateriaisXML(max_itens=0, ttl=60)
+    cache.definir("a", MATERIAIS)
+
+    assert cache.obter("a") is None
+
+
+@pytest.mark.asyncio
+async def test_reimportacao_nao_extrai_de_novo(cache, extracoes):
+    service = ServiceFake()
+    importer = XMLImporter(service)
+
+    primeiro = await importer.importar_xml("cliente-1", XML, "cozinha.xml")
+    segundo = await importer.importar_xml("cliente-2", XML, "cozinha.xml")
+
+    assert len(extracoes) == 1
+    assert primeiro.xml_duplicado_de is None
+    assert segundo.xml_duplicado_de is None
+    assert segundo.nome == primeiro.nome == "Cozinha"
+    assert segundo.valor_venda == primeiro.valor_venda
+    assert service.materiais[1].materiais_json == service.materiais[0].materiais_json
+    assert service.materiais[1].xml_hash == hashlib.sha256(XML.encode("utf-8")).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_materiais_do_banco_e_duplicado_do_cliente(cache, extracoes):
+    service = ServiceFake()
+    importer = XMLImporter(service)
+    primeiro = await importer.importar_xml("cliente-1", XML, "cozinha.xml")
+    # Outro worker/restart: memória vazia, materiais só no banco
+    cache.limpar()
+
+    segundo = await importer.importar_xml("cliente-1", XML, "cozinha.xml")
+
+    assert len(extracoes) == 1
+    assert segundo.xml_duplicado_de == primeiro.id
+    assert cache.obter(service.materiais[0].xml_hash) == service.materiais[0].materiais_json
+
+
+@pytest.mark.asyncio
+async def test_importacao_basica_nao_entra_no_cache(cache, extracoes):
+    service = ServiceFake()
+    importer = XMLImporter(service)
+
+    await importer.importar_xml("cliente-1", XML_SEM_LINHA, "lavanderia.xml")
+    await importer.importar_xml("cliente-1", XML_SEM_LINHA, "lavanderia.xml")
+
+    assert len(extracoes) == 2
+    assert len(cache._memoria) == 0
+
+
+@pytest.mark.asyncio
+async def test_reenvio_de_arquivo_latin1_encontra_a_importacao(cache, extracoes, tmp_path, monkeypatch):
+    monkeypatch.setattr(xml_importer.settings, "temp_path", str(tmp_path))
+    service = ServiceFake()
+    importer = XMLImporter(service)
+    # Declara UTF-8 mas foi salvo em latin-1: o worker relê como latin-1
+    conteudo = XML.encode("latin-1")
+
+    async def importar():
+        async with receber_xml_upload(UploadFile(io.BytesIO(conteudo), filename="cozinha.xml")) as recebido:
+            return await importer.importar_xml("cliente-1", recebido.caminho, "cozinha.xml", recebido.xml_hash)
+
+    primeiro = await importar()
+    # Outro worker/restart: memória vazia, materiais só no banco
+    cache.limpar()
+    segundo = await importar()
+
+    assert len(extracoes) == 1
+    assert segundo.xml_duplicado_de == primeiro.id
+    # Mesmo hash da importação do texto (conteúdo em UTF-8)
+    assert service.materiais[0].xml_hash == hashlib.sha256(XML.encode("utf-8")).hexdigest()
@@ -0,0 +1,110 @@
+"""
+Testes do executor da extração de XML (modules.ambientes.xml_executor)
+"""
+import hashlib
+import time
+
+import pytest
+
+from core.exceptions import ValidationException
+from modules.ambientes import xml_executor
+from modules.ambientes.extrator_xml.app.extractors import XMLExtractor
+from modules.ambientes.xml_executor import ExecutorExtracaoXML, XMLInvalidoError, extrair_xml
+
+XML = r"""<?xml version="1.0" encoding="UTF-8"?>
+<LISTING>
+  <TOTALPRICES><MARGINS><ORDER VALUE="1500.5"/><BUDGET VALUE="3000"/></MARGINS></TOTALPRICES>
+  <AMBIENTS><AMBIENT DESCRIPTION="Projeto - Cozinha Não Planejada">
+    <MODELCATEGORYINFORMATION DESCRIPTION="Coleção Sublime">
+      <MODELINFORMATION DESCRIPTION="Cor Corpo"><MODELTYPEINFORMATIONS>
+        <MODELTYPEINFORMATION DESCRIPTION="MDF\Pêssego"/>
+      </MODELTYPEINFORMATIONS></MODELINFORMATION>
+    </MODELCATEGORYINFORMATION>
+  </AMBIENT></AMBIENTS>
+</LISTING>
+"""
+
+XML_SEM_LINHA = """<LISTING><AMBIENTS>
+  <AMBIENT DESCRIPTION="Projeto - Área Gourmet"><ITEM DESCRIPTION="Bancada"/></AMBIENT>
+</AMBIENTS></LISTING>
+"""
+
+
+@pytest.fixture
+def arquivo_xml(tmp_path):
+    def criar(conteudo: bytes):
+        caminho = tmp_path / "upload.xml"
+        caminho.write_bytes(conteudo)
+        return caminho
+    return criar
+
+
+def test_arquivo_extrai_igual_a_string(arquivo_xml):
+    extracao = extrair_xml(arquivo_xml(XML.encode("utf-8")))
+
+    assert extracao.resultado.model_dump() == XMLExtractor().extract(XML).model_dump()
+    # Arquivo UTF-8: vale o hash calculado na leitura do upload
+    assert extracao.xml_hash is None
+
+
+def test_latin1_sem_declaracao_usa_fallback(arquivo_xml):
+    xml = XML_SEM_LINHA
+    extracao = extrair_xml(arquivo_xml(xml.encode("latin-1")))
+
+    # Mesmo hash da leitura antiga: conteúdo decodificado e recodificado em UTF-8
+    assert extracao.xml_hash == hashlib.sha256(xml.encode("utf-8")).hexdigest()
+    assert extracao.nome_ambiente == "Área Gourmet"
+
+
+def test_sem_linha_devolve_nome_do_ambiente():
+    extracao = extrair_xml(XML_SEM_LINHA)
+
+    assert not extracao.resultado.success
+    assert "linha (Unique/Sublime)" in extracao.resultado.error
+    assert extracao.nome_ambiente == "Área Gourmet"
+
+
+def test_arquivo_invalido(arquivo_xml):
+    with pytest.raises(XMLInvalidoError):
+        extrair_xml(arquivo_xml(b"<LISTING><AMBIENT></LISTING>"))
+
+
+@pytest.mark.asyncio
+async def test_executor_sem_workers_roda_em_thread(arquivo_xml):
+    executor = ExecutorExtracaoXML(workers=0, timeout=30)
+
+    extracao = await executor.extrair(arquivo_xml(XML.encode("utf-8")))
+
+    assert extracao.resultado.model_dump() == XMLExtractor().extract(XML).model_dump()
+    assert executor.estatisticas() == {"workers": "thread", "ativo": True, "em_andamento": 0}
+
+
+@pytest.mark.asyncio
+async def test_tempo_limite(monkeypatch):
+    def extracao_lenta(origem, secoes=None):
+        time.sleep(0.5)
+
+    monkeypatch.setattr(xml_executor, "extrair_xml", extracao_lenta)
+    executor = ExecutorExtracaoXML(workers=0, timeout=0.05)
+
+    with pytest.raises(ValidationException) as erro:
+        await executor.extrair(XML)
+
+    assert "tempo limite" in erro.value.detail
+    assert executor.estatisticas()["em_andamento"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_de_processos(arquivo_xml):
+    executor = ExecutorExtracaoXML(workers=1, timeout=60)
+    executor.iniciar()
+    try:
+        extracao = await executor.extrair(arquivo_xml(XML.encode("utf-8")))
+        assert extracao.resultado.model_dump() == XMLExtractor().extract(XML).model_dump()
+
+        with pytest.raises(XMLInvalidoError):
+            await executor.extrair(arquivo_xml(b"<LISTING>"))
+    finally:
+        executor.encerrar()
+
+    assert executor.estatisticas()["ativo"] is False
@@ -0,0 +1,231 @@
+"""
+Testes da importação de XML em lote (POST /ambientes/importar-xml/lote)
+
+O banco é um transporte HTTP em memória que imita o PostgREST e conta as
+requisições: o número de idas ao banco não pode depender da quantidade de
+arquivos do lote.
+"""
+import io
+import zipfile
+from datetime import datetime
+from urllib.parse import unquote
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from conftest import PostgRESTFake
+from core.config import settings
+from modules.ambientes import xml_importer
+from modules.ambientes.service import AmbienteService
+from modules.ambientes.xml_cache import CacheMateriaisXML
+from modules.ambientes.xml_executor import ExecutorExtracaoXML
+from modules.ambientes.xml_upload import receber_lote_xml
+
+CLIENTE_ID = "00000000-0000-4000-8000-000000000001"
+
+
+def xml_promob(ambiente: str, colecao: str = "Coleção Unique ") -> str:
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<LISTING>
+  <TOTALPRICES><MARGINS><ORDER VALUE="1000"/><BUDGET VALUE="2500"/></MARGINS></TOTALPRICES>
+  <AMBIENTS><AMBIENT DESCRIPTION="Projeto - {ambiente}">
+    <MODELCATEGORYINFORMATION DESCRIPTION="{colecao}">
+      <MODELINFORMATION DESCRIPTION="4 - Cor Corpo"><MODELTYPEINFORMATIONS>
+        <MODELTYPEINFORMATION DESCRIPTION="MDF Branco"/>
+      </MODELTYPEINFORMATIONS></MODELINFORMATION>
+    </MODELCATEGORYINFORMATION>
+  </AMBIENT></AMBIENTS>
+</LISTING>
+"""
+
+
+class BancoXML(PostgRESTFake):
+    """c_ambientes e c_ambientes_material em memória, contando as requisições"""
+
+    def __init__(self, falhar_materiais=False):
+        super().__init__()
+        self.falhar_materiais = falhar_materiais
+        self.ambientes = {}
+        self.materiais = []
+
+    def responder(self, request, requisicao):
+        metodo, tabela = requisicao.metodo, requisicao.caminho
+
+        if metodo == "POST" and tabela == "c_ambientes":
+            agora = datetime.now().isoformat()
+            dados = []
+            for linha in requisicao.corpo:
+                linha = {**linha, "id": f"amb-{len(self.ambientes) + 1}", "created_at": agora, "updated_at": agora}
+                self.ambientes[linha["id"]] = linha
+                dados.append(linha)
+            return self.resposta(dados, 201)
+
+        if metodo == "POST" and tabela == "c_ambientes_material":
+            if self.falhar_materiais:
+                return self.erro(400, "23505", "falha simulada")
+            self.materiais.extend(requisicao.corpo)
+            return self.resposta(requisicao.corpo, 201)
+
+        if metodo == "DELETE":
+            for ambiente_id in self._ids(requisicao):
+                self.ambientes.pop(ambiente_id, None)
+            return self.resposta([])
+
+        if tabela == "c_ambientes":
+            materiais = {m["ambiente_id"]: m for m in self.materiais}
+            dados = [
+                {**self.ambientes[i], "cliente": {"nome": "Cliente"},
+                 "materiais": {"materiais_json": materiais[i]["materiais_json"]}}
+                for i in self._ids(requisicao) if i in self.ambientes
+            ]
+            return self.resposta(dados)
+
+        # c_ambientes_material por xml_hash: nada importado antes
+        return self.resposta([])
+
+    @staticmethod
+    def _ids(requisicao):
+        return [i.strip('"') for i in unquote(requisicao.params["id"])[len("in.("):-1].split(",")]
+
+
+def servico(falhar_materiais=False):
+    fake = BancoXML(falhar_materiais)
+    return AmbienteService(fake.banco()), fake
+
+
+@pytest.fixture(autouse=True)
+def isolado(monkeypatch, tmp_path):
+    monkeypatch.setattr(xml_importer, "cache_materiais_xml", CacheMateriaisXML(max_itens=10, ttl=60))
+    monkeypatch.setattr(xml_importer, "executor_extracao_xml", ExecutorExtracaoXML(workers=0, timeout=30))
+    monkeypatch.setattr(settings, "temp_path", str(tmp_path))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("quantidade", [1, 5, 20])
+async def test_idas_ao_banco_nao_dependem_do_lote(quantidade):
+    service, fake = servico()
+    arquivos = [(f"amb{i}.xml", xml_promob(f"Ambiente {i}"), None) for i in range(quantidade)]
+
+    resultado = await service.importar_xml_lote(CLIENTE_ID, arquivos)
+
+    assert resultado.importados == resultado.total == quantidade
+    assert [item.ambiente.nome for item in resultado.itens] == [f"Ambiente {i}" for i in range(quantidade)]
+    assert resultado.itens[0].ambiente.materiais["linha_detectada"]
+    # Busca por hash + insert de ambientes + insert de materiais + busca dos criados
+    assert fake.rotas() == [
+        ("GET", "c_ambientes_material"),
+        ("POST", "c_ambientes"),
+        ("POST", "c_ambientes_material"),
+        ("GET", "c_ambientes"),
+    ]
+    assert [m["ambiente_id"] for m in fake.materiais] == [item.ambiente.id for item in resultado.itens]
+
+
+@pytest.mark.asyncio
+async def test_falha_de_um_arquivo_nao_impede_os_demais():
+    service, _ = servico()
+    arquivos = [
+        ("cozinha.xml", xml_promob("Cozinha"), None),
+        ("quebrado.xml", "<LISTING><AMBIENT>", None),
+        ("quarto.xml", xml_promob("Quarto"), None),
+    ]
+
+    resultado = await service.importar_xml_lote(CLIENTE_ID, arquivos)
+
+    assert (resultado.total, resultado.importados, resultado.falhas) == (3, 2, 1)
+    assert [item.sucesso for item in resultado.itens] == [True, False, True]
+    assert resultado.itens[1].arquivo == "quebrado.xml"
+    assert "Erro ao processar XML" in resultado.itens[1].erro
+
+
+@pytest.mark.asyncio
+async def test_conteudo_repetido_extraido_uma_vez(monkeypatch):
+    service, _ = servico()
+    executor = xml_importer.executor_extracao_xml
+    extracoes = []
+    extrair = executor.extrair
+
+    async def contar(origem, secoes=None):
+        extracoes.append(origem)
+        return await extrair(origem, secoes=secoes)
+
+    monkeypatch.setattr(executor, "extrair", contar)
+    xml = xml_promob("Banheiro")
+
+    resultado = await service.importar_xml_lote(CLIENTE_ID, [("a.xml", xml, None), ("b.xml", xml, None)])
+
+    assert resultado.importados == 2
+    assert len(extracoes) == 1
+
+
+@pytest.mark.asyncio
+async def test_falha_nos_materiais_desfaz_os_ambientes():
+    service, fake = servico(falhar_materiais=True)
+
+    resultado = await service.importar_xml_lote(CLIENTE_ID, [("cozinha.xml", xml_promob("Cozinha"), None)])
+
+    assert resultado.falhas == 1
+    assert "Erro" in resultado.itens[0].erro
+    assert ("DELETE", "c_ambientes") in fake.rotas()
+    assert fake.ambientes == {}
+
+
+def upload(nome: str, conteudo: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(conteudo), filename=nome)
+
+
+def compactar(arquivos: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_:
+        for nome, conteudo in arquivos.items():
+            zip_.writestr(nome, conteudo)
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_lote_com_zip_e_arquivos_recusados(tmp_path):
+    zip_ = compactar({
+        "projeto/cozinha.xml": xml_promob("Cozinha"),
+        "projeto/quarto.xml": xml_promob("Quarto"),
+        "__MACOSX/projeto/._cozinha.xml": "lixo",
+        "leia-me.txt": "texto",
+    })
+    arquivos = [
+        upload("sala.xml", xml_promob("Sala").encode()),
+        upload("projeto.zip", zip_),
+        upload("planta.pdf", b"%PDF"),
+        upload("quebrado.zip", b"nao e zip"),
+    ]
+
+    async with receber_lote_xml(arquivos) as lote:
+        assert [(item.nome, item.erro) for item in lote] == [
+            ("sala.xml", None),
+            ("cozinha.xml", None),
+            ("quarto.xml", None),
+            ("planta.pdf", "Apenas arquivos .xml ou .zip são permitidos"),
+            ("quebrado.zip", "Arquivo ZIP inválido"),
+        ]
+        assert lote[1].recebido.caminho.read_text() == xml_promob("Cozinha")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_item_do_zip_acima_do_limite(tmp_path):
+    zip_ = compactar({"grande.xml": "<A>" + " " * 5000 + "</A>", "ok.xml": "<A/>"})
+
+    async with receber_lote_xml([upload("p.zip", zip_)], tamanho_maximo=1000) as lote:
+        assert "muito grande" in lote[0].erro
+        assert lote[1].erro is None
+
+
+@pytest.mark.asyncio
+async def test_limite_de_arquivos_por_lote():
+    zip_ = compactar({f"{i}.xml": "<A/>" for i in range(5)})
+
+    with pytest.raises(HTTPException) as erro:
+        async with receber_lote_xml([upload("p.zip", zip_)], max_arquivos=3):
+            pass
+
+    assert erro.value.status_code == 400
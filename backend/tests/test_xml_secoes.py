@@ -0,0 +1,175 @@
+"""
+Testes das seções do XML extraídas sob demanda (xml_secoes)
+
+Importação com `xml_secoes_sob_demanda`: só caixa, painéis e valor total
+são extraídos; portas/ferragens, porta perfil e Brilhart Color saem do
+índice compacto na primeira leitura dos materiais e são gravados de volta.
+"""
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import unquote
+
+import pytest
+
+from conftest import PostgRESTFake
+from core.config import settings
+from modules.ambientes import service as ambientes_service, xml_importer
+from modules.ambientes.service import AmbienteService
+from modules.ambientes.xml_cache import CacheMateriaisXML
+from modules.ambientes.xml_executor import ExecutorExtracaoXML, extrair_xml
+from modules.ambientes.xml_secoes import (
+    CHAVE_INDICE, CHAVE_PENDENTES, SECOES_IMPORTACAO, SECOES_SOB_DEMANDA, completar_secoes
+)
+
+# Gerador do corpus dos benchmarks (scripts/benchmarks/gerador_xml_promob.py)
+sys.path.append(str(Path(__file__).parent.parent / "scripts" / "benchmarks"))
+from gerador_xml_promob import gerar_xml_promob  # noqa: E402
+
+CLIENTE_ID = "00000000-0000-4000-8000-000000000001"
+
+
+class BancoXML(PostgRESTFake):
+    """c_ambientes e c_ambientes_material em memória, registrando as requisições"""
+
+    def __init__(self):
+        super().__init__()
+        self.ambientes = {}
+        self.materiais = {}
+
+    def responder(self, request, requisicao):
+        metodo, tabela = requisicao.metodo, requisicao.caminho
+        filtros = {chave: unquote(valor) for chave, valor in requisicao.params.items()}
+
+        if metodo == "POST" and tabela == "c_ambientes":
+            agora = datetime.now().isoformat()
+            linhas = requisicao.corpo if isinstance(requisicao.corpo, list) else [requisicao.corpo]
+            dados = []
+            for linha in linhas:
+                linha = {**linha, "id": f"amb-{len(self.ambientes) + 1}", "created_at": agora, "updated_at": agora}
+                self.ambientes[linha["id"]] = linha
+                dados.append(linha)
+            return self.resposta(dados, 201)
+
+        if metodo == "POST" and tabela == "c_ambientes_material":
+            linhas = requisicao.corpo if isinstance(requisicao.corpo, list) else [requisicao.corpo]
+            for linha in linhas:
+                self.materiais[linha["ambiente_id"]] = dict(linha)
+            return self.resposta(linhas, 201)
+
+        if metodo == "PATCH" and tabela == "c_ambientes_material":
+            ambiente_id = filtros["ambiente_id"][len("eq."):]
+            self.materiais[ambiente_id].update(requisicao.corpo)
+            return self.resposta([self.materiais[ambiente_id]])
+
+        if tabela == "c_ambientes":
+            ids = list(self.ambientes) if "id" not in filtros else self._valores(filtros["id"])
+            dados = [
+                {**self.ambientes[i], "cliente": {"nome": "Cliente"},
+                 "materiais": {"materiais_json": self.materiais[i]["materiais_json"]} if i in self.materiais else None}
+                for i in ids if i in self.ambientes
+            ]
+            return self.resposta(dados)
+
+        if "ambiente_id" in filtros:
+            ambiente_id = filtros["ambiente_id"][len("eq."):]
+            return self.resposta([self.materiais[ambiente_id]] if ambiente_id in self.materiais else [])
+
+        # c_ambientes_material por xml_hash: nada importado antes
+        return self.resposta([])
+
+    @staticmethod
+    def _valores(filtro):
+        if filtro.startswith("eq."):
+            return [filtro[len("eq."):]]
+        return [i.strip('"') for i in filtro[len("in.("):-1].split(",")]
+
+
+@pytest.fixture(autouse=True)
+def isolado(monkeypatch, tmp_path):
+    monkeypatch.setattr(xml_importer, "cache_materiais_xml", CacheMateriaisXML(max_itens=10, ttl=60))
+    executor = ExecutorExtracaoXML(workers=0, timeout=30)
+    monkeypatch.setattr(xml_importer, "executor_extracao_xml", executor)
+    monkeypatch.setattr(ambientes_service, "executor_extracao_xml", executor)
+    monkeypatch.setattr(settings, "temp_path", str(tmp_path))
+    monkeypatch.setattr(settings, "xml_secoes_sob_demanda", True)
+
+
+def servico():
+    fake = BancoXML()
+    return AmbienteService(fake.banco()), fake
+
+
+@pytest.mark.parametrize("linha", ["unique", "sublime", "misto"])
+def test_secoes_do_indice_compacto_iguais_as_do_xml(linha):
+    xml = gerar_xml_promob(24, linha).decode("utf-8")
+    completo = extrair_xml(xml).resultado
+    parcial = extrair_xml(xml, SECOES_IMPORTACAO)
+
+    # O índice compacto passa pelo banco como JSON
+    indice = json.loads(json.dumps(parcial.indice))
+    materiais = completar_secoes({CHAVE_PENDENTES: SECOES_SOB_DEMANDA, CHAVE_INDICE: indice, "metadata": {}})
+
+    assert parcial.resultado.portas is None and parcial.resultado.brilhart_color is None
+    for secao in SECOES_SOB_DEMANDA:
+        esperado = getattr(completo, secao)
+        assert materiais[secao] == (esperado.model_dump() if esperado else None)
+    assert CHAVE_INDICE not in materiais and CHAVE_PENDENTES not in materiais
+
+
+@pytest.mark.asyncio
+async def test_primeira_leitura_completa_e_grava_as_secoes():
+    service, fake = servico()
+    xml = gerar_xml_promob(12, "misto").decode("utf-8")
+
+    importado = await service.importar_xml_ambiente(cliente_id=CLIENTE_ID, conteudo_xml=xml, nome_arquivo="cozinha.xml")
+
+    gravado = fake.materiais[importado.id]["materiais_json"]
+    assert gravado[CHAVE_PENDENTES] == SECOES_SOB_DEMANDA and gravado[CHAVE_INDICE]
+    assert gravado["portas"] is None and gravado["caixa"] and gravado["valor_total"]
+    # O índice não sai na resposta da importação
+    assert CHAVE_INDICE not in importado.materiais
+
+    fake.chamadas.clear()
+    ambiente = await service.buscar_ambiente_por_id(importado.id, incluir_materiais=True)
+    assert ("PATCH", "c_ambientes_material") in fake.rotas()
+    assert ambiente.materiais["portas"] and ambiente.materiais["brilhart_color"]
+    assert CHAVE_INDICE not in ambiente.materiais and CHAVE_PENDENTES not in ambiente.materiais
+    assert CHAVE_PENDENTES not in fake.materiais[importado.id]["materiais_json"]
+
+    fake.chamadas.clear()
+    listagem = await service.listar_ambientes(incluir_materiais=True)
+    assert ("PATCH", "c_ambientes_material") not in fake.rotas()
+    assert listagem.items[0].materiais == ambiente.materiais
+
+
+@pytest.mark.asyncio
+async def test_listagem_completa_no_maximo_o_limite_por_requisicao(monkeypatch):
+    monkeypatch.setattr(settings, "xml_secoes_max_por_requisicao", 2)
+    service, fake = servico()
+    xml = gerar_xml_promob(6, "unique").decode("utf-8")
+    for i in range(3):
+        await service.importar_xml_ambiente(cliente_id=CLIENTE_ID, conteudo_xml=xml, nome_arquivo=f"a{i}.xml")
+
+    # A extração sai do event loop: vai para o executor
+    completados = []
+    completar = ambientes_service.executor_extracao_xml.completar_secoes
+
+    async def contar(materiais_json):
+        completados.append(1)
+        return await completar(materiais_json)
+
+    monkeypatch.setattr(ambientes_service.executor_extracao_xml, "completar_secoes", contar)
+
+    fake.chamadas.clear()
+    primeira = await service.listar_ambientes(incluir_materiais=True)
+    assert len(completados) == 2
+    assert len(fake.de("c_ambientes_material", "PATCH")) == 2
+    pendentes = [a for a in primeira.items if CHAVE_PENDENTES in a.materiais]
+    assert len(pendentes) == 1 and CHAVE_INDICE not in pendentes[0].materiais
+
+    # O que ficou pendente é completado na leitura seguinte
+    segunda = await service.listar_ambientes(incluir_materiais=True)
+    assert len(completados) == 3
+    assert all(CHAVE_PENDENTES not in a.materiais and a.materiais["portas"] for a in segunda.items)
@@ -0,0 +1,95 @@
+"""
+Testes da leitura em partes do upload de XML (modules.ambientes.xml_upload)
+"""
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from core.config import settings
+from modules.ambientes.xml_upload import receber_xml_upload
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<LISTING>
+  <TOTALPRICES><MARGINS><ORDER VALUE="1500.5"/><BUDGET VALUE="3000"/></MARGINS></TOTALPRICES>
+  <AMBIENTS><AMBIENT DESCRIPTION="Projeto - Cozinha Não Planejada">
+    <MODELCATEGORYINFORMATION DESCRIPTION="Coleção Sublime">
+      <MODELINFORMATION DESCRIPTION="Cor Corpo"><MODELTYPEINFORMATIONS>
+        <MODELTYPEINFORMATION DESCRIPTION="MDF\\Pêssego"/>
+      </MODELTYPEINFORMATIONS></MODELINFORMATION>
+    </MODELCATEGORYINFORMATION>
+  </AMBIENT></AMBIENTS>
+</LISTING>
+"""
+
+
+class ArquivoContado(io.BytesIO):
+    """BytesIO que registra quantos bytes foram lidos"""
+
+    lidos = 0
+
+    def read(self, tamanho=-1):
+        dados = super().read(tamanho)
+        self.lidos += len(dados)
+        return dados
+
+
+def upload(conteudo: bytes) -> UploadFile:
+    return UploadFile(file=ArquivoContado(conteudo), filename="projeto.xml")
+
+
+@pytest.fixture(autouse=True)
+def partes_pequenas(monkeypatch, tmp_path):
+    # Partes de 7 bytes: caracteres acentuados ficam divididos entre partes
+    monkeypatch.setattr(settings, "xml_upload_chunk_size", 7)
+    monkeypatch.setattr(settings, "temp_path", str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_arquivo_temporario_e_hash_na_mesma_passada(tmp_path):
+    conteudo = XML.encode("utf-8")
+
+    async with receber_xml_upload(upload(conteudo)) as recebido:
+        assert recebido.caminho.parent == tmp_path
+        assert recebido.caminho.read_bytes() == conteudo
+        assert recebido.xml_hash == hashlib.sha256(conteudo).hexdigest()
+        assert recebido.tamanho == len(conteudo)
+
+    # Removido ao sair do bloco
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_limite_de_tamanho_interrompe_a_leitura(tmp_path):
+    arquivo = upload(XML.encode("utf-8") * 100)
+
+    with pytest.raises(HTTPException) as erro:
+        async with receber_xml_upload(arquivo, tamanho_maximo=100):
+            pass
+
+    assert erro.value.status_code == 400
+    assert "muito grande" in erro.value.detail
+    assert arquivo.file.lidos <= 100 + settings.xml_upload_chunk_size
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_arquivo_vazio(tmp_path):
+    with pytest.raises(HTTPException) as erro:
+        async with receber_xml_upload(upload(b"")):
+            pass
+
+    assert erro.value.status_code == 400
+    assert "vazio" in erro.value.detail
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_remove_arquivo_quando_a_importacao_falha(tmp_path):
+    with pytest.raises(RuntimeError):
+        async with receber_xml_upload(upload(XML.encode("utf-8"))):
+            raise RuntimeError("falha na importação")
+
+    assert list(tmp_path.iterdir()) == []
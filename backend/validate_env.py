@@ -24,7 +24,9 @@ def validate_env_file():
         'SUPABASE_URL': r'SUPABASE_URL=https://\w+\.supabase\.co',
         'SUPABASE_ANON_KEY': r'SUPABASE_ANON_KEY=eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+',
         'SUPABASE_SERVICE_KEY': r'SUPABASE_SERVICE_KEY=eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+',
-        'JWT_SECRET_KEY': r'JWT_SECRET_KEY=.+'
+        'JWT_SECRET_KEY': r'JWT_SECRET_KEY=.+',
+        # Sem ele os tokens HS256 do Supabase Auth não são verificados (o backend não sobe)
+        'SUPABASE_JWT_SECRET': r'SUPABASE_JWT_SECRET=.+|SUPABASE_JWT_HS256=false'
     }
     
     all_valid = True